@@ -0,0 +1,160 @@
+"""
+Adaptive per-source scrape intervals
+Each source's interval shrinks when its content changes or yields new events and
+grows while it stays the same, within configurable bounds. Sources listing events
+that start soon are checked more often so late changes are still picked up.
+"""
+
+import sqlite3
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from date_normalizer import normalize_date
+
+logger = logging.getLogger(__name__)
+
+# Default interval bounds in minutes (override per source with selector_config['schedule'])
+MIN_INTERVAL_MINUTES = 10
+MAX_INTERVAL_MINUTES = 24 * 60
+
+# Interval is divided by up to this after a change and multiplied by up to this after
+# a quiet run, scaled by how often the source has changed before
+SPEEDUP_FACTOR = 2.0
+BACKOFF_FACTOR = 1.5
+
+# Weight of the latest run in the smoothed change and yield rates
+HISTORY_SMOOTHING = 0.3
+
+# Sources with an event starting within this window are checked at least this often
+IMMINENT_EVENT_HOURS = 48
+IMMINENT_MAX_INTERVAL_MINUTES = 60
+
+@dataclass
+class IntervalBounds:
+    """Shortest and longest allowed scrape interval for a source, in minutes"""
+    min_minutes: int = MIN_INTERVAL_MINUTES
+    max_minutes: int = MAX_INTERVAL_MINUTES
+
+    @classmethod
+    def from_config(cls, config: Dict = None) -> 'IntervalBounds':
+        """Build bounds from the optional 'schedule' block of a selector_config"""
+        overrides = (config or {}).get('schedule') or {}
+        min_minutes = int(overrides.get('min_interval', MIN_INTERVAL_MINUTES))
+        max_minutes = int(overrides.get('max_interval', MAX_INTERVAL_MINUTES))
+        return cls(min_minutes, max(min_minutes, max_minutes))
+
+    def clamp(self, minutes: float) -> float:
+        return min(self.max_minutes, max(self.min_minutes, minutes))
+
+class ContentFingerprint:
+    """Order-independent fingerprint of a run's extracted events, built while they stream"""
+
+    def __init__(self):
+        self.keys = set()
+        self.soonest_start: Optional[datetime] = None
+
+    def add(self, event: Dict):
+        title = (event.get('title') or '').strip().lower()
+        start = (event.get('start_date') or '').strip()
+        self.keys.add(f"{title}|{start}")
+
+        start_time = parse_start(start)
+        if start_time and start_time >= datetime.now() and (
+                self.soonest_start is None or start_time < self.soonest_start):
+            self.soonest_start = start_time
+
+    def digest(self) -> str:
+        return hashlib.sha1('\n'.join(sorted(self.keys)).encode('utf-8')).hexdigest()[:16]
+
+def parse_start(value: str) -> Optional[datetime]:
+    """Best-effort parse of a scraped start date (naive local time)"""
+    return normalize_date(value)
+
+class AdaptiveScheduler:
+    """Keeps change history and next_run for each web scraper"""
+
+    def __init__(self, db_path: str = 'calendar.db'):
+        self.db_path = db_path
+
+    def is_due(self, next_run: Optional[str], now: datetime = None) -> bool:
+        """Whether a source with this next_run should be scraped now"""
+        if not next_run:
+            return True
+        try:
+            return datetime.fromisoformat(next_run) <= (now or datetime.now())
+        except ValueError:
+            return True  # Legacy or hand-edited value
+
+    def next_interval(self, current: float, bounds: IntervalBounds, changed: bool,
+                      soonest_start: Optional[datetime] = None, now: datetime = None,
+                      change_rate: Optional[float] = None, yield_rate: Optional[float] = None) -> float:
+        """Interval in minutes until the next scrape of a source.
+
+        change_rate and yield_rate are the smoothed history including this run; without
+        them only this run counts. Sources that usually change, or average at least one
+        new event per run, speed up fully on a change and back off slowly when quiet;
+        a rarely changing source does the opposite.
+        """
+        if change_rate is None:
+            activity = 1.0 if changed else 0.0
+        else:
+            activity = max(change_rate, min(1.0, yield_rate or 0.0))
+
+        if changed:
+            interval = current / (1 + (SPEEDUP_FACTOR - 1) * activity)
+        else:
+            interval = current * (1 + (BACKOFF_FACTOR - 1) * (1 - activity))
+        interval = bounds.clamp(interval)
+
+        now = now or datetime.now()
+        if soonest_start and soonest_start - now <= timedelta(hours=IMMINENT_EVENT_HOURS):
+            interval = max(bounds.min_minutes, min(interval, IMMINENT_MAX_INTERVAL_MINUTES))
+
+        return interval
+
+    def record_run(self, cursor: sqlite3.Cursor, scraper_id: int, selector_config: Dict,
+                   fingerprint: Optional[ContentFingerprint], events_added: int) -> Dict:
+        """Update a source's history after a run and schedule its next one"""
+        cursor.execute('''
+            SELECT update_interval, content_hash, change_rate, yield_rate, current_interval
+            FROM web_scrapers WHERE id = ?
+        ''', (scraper_id,))
+        row = cursor.fetchone()
+        if not row:
+            return {}
+
+        update_interval, content_hash, change_rate, yield_rate, current_interval = row
+        bounds = IntervalBounds.from_config(selector_config)
+        current = current_interval or bounds.clamp(update_interval or MIN_INTERVAL_MINUTES)
+        now = datetime.now()
+
+        if fingerprint is None:
+            # Failed run: keep the interval, the circuit breaker handles repeated failures
+            new_hash, changed, soonest_start = content_hash, False, None
+            interval = current
+        else:
+            new_hash = fingerprint.digest()
+            changed = events_added > 0 or (content_hash is not None and new_hash != content_hash)
+            soonest_start = fingerprint.soonest_start
+
+            change_rate = self._smooth(change_rate, 1.0 if changed else 0.0)
+            yield_rate = self._smooth(yield_rate, float(events_added))
+            interval = self.next_interval(current, bounds, changed, soonest_start, now,
+                                          change_rate, yield_rate)
+
+        next_run = now + timedelta(minutes=interval)
+        cursor.execute('''
+            UPDATE web_scrapers
+            SET content_hash = ?, change_rate = ?, yield_rate = ?, current_interval = ?, next_run = ?
+            WHERE id = ?
+        ''', (new_hash, change_rate, yield_rate, int(round(interval)), next_run.isoformat(), scraper_id))
+
+        return {'changed': changed, 'interval_minutes': int(round(interval)), 'next_run': next_run.isoformat()}
+
+    def _smooth(self, previous: Optional[float], observed: float) -> float:
+        """Exponentially weighted moving average of a per-run observation"""
+        if previous is None:
+            return observed
+        return round(HISTORY_SMOOTHING * observed + (1 - HISTORY_SMOOTHING) * previous, 4)
@@ -11,15 +11,14 @@ A robust scraping system that handles complex websites through:
 5. Anti-bot evasion techniques
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
 import json
 import sqlite3
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
-import time
 import random
+from http_client import create_session
 
 class AdvancedWebScraper:
     """
@@ -27,6 +26,7 @@ class AdvancedWebScraper:
     """
     
     def __init__(self):
+        self.session = create_session()
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -76,7 +76,7 @@ class AdvancedWebScraper:
         """Get page content with anti-bot evasion"""
         for attempt in range(retries):
             try:
-                # Random user agent and delay
+                # Random user agent; the session's limiter spaces the attempts and honours Retry-After
                 user_agent = random.choice(self.user_agents)
                 headers = {
                     'User-Agent': user_agent,
@@ -87,11 +87,7 @@ class AdvancedWebScraper:
                     'Upgrade-Insecure-Requests': '1'
                 }
                 
-                # Random delay between requests
-                if attempt > 0:
-                    time.sleep(random.uniform(1, 3))
-                
-                response = requests.get(url, headers=headers, timeout=15)
+                response = self.session.get(url, headers=headers, timeout=15)
                 
                 if response.status_code == 200:
                     return response
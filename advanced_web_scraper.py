@@ -4,7 +4,6 @@ Advanced Web Scraper for Various Website Types
 Handles static HTML, JavaScript-heavy sites, and various event formats
 """
 
-import requests
 import time
 import logging
 from bs4 import BeautifulSoup
@@ -14,6 +13,7 @@ from typing import List, Dict, Optional, Tuple
 import re
 from datetime import datetime, timedelta
 import json
+from http_client import create_session
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,8 +31,7 @@ class ScrapedEvent:
 
 class AdvancedWebScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = create_session({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
@@ -151,7 +150,7 @@ class AdvancedWebScraper:
         """Fetch with retries and backoff"""
         for attempt in range(3):
             try:
-                time.sleep(attempt * 2)  # Exponential backoff
+                # The session's limiter spaces the attempts and honours Retry-After
                 response = self.session.get(url, timeout=timeout)
                 response.raise_for_status()
                 soup = BeautifulSoup(response.content, 'html.parser')
@@ -167,7 +166,7 @@ class AdvancedWebScraper:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = self.session.get(url, headers=headers, timeout=timeout)
         response.raise_for_status()
         soup = BeautifulSoup(response.content, 'html.parser')
         return True, response.text, soup
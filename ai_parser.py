@@ -5,9 +5,21 @@ Handles natural language input and converts it to structured event data.
 
 import re
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+import time
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 import json
+from date_normalizer import normalize_date
+from parse_pool import iter_parallel, worker_instance
+from rate_limiter import TokenBucket
+from llm_cache import get_llm_cache
+from pattern_registry import (MAX_DOCUMENT_CHARS, document_deadline, find_keyword_runs, note_budget_overrun,
+                              register, register_all, search_keyword_run)
+
+logger = logging.getLogger(__name__)
 
 # Try to import optional dependencies
 try:
@@ -22,15 +34,227 @@ try:
 except ImportError:
     DATEPARSER_AVAILABLE = False
 
+# Concurrent OpenAI requests per batch
+LLM_CONCURRENCY = 4
+
+# OpenAI requests allowed per minute across the process
+LLM_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '60'))
+
+# Text blocks packed into one OpenAI request, and the most text one request may carry
+BLOCKS_PER_LLM_REQUEST = 5
+MAX_LLM_REQUEST_CHARS = 6000
+
+OPENAI_MODEL = "gpt-3.5-turbo"
+
+# Bump when the prompts or the fields they ask for change, so cached results from older prompts miss
+PROMPT_VERSION = 2
+
+# Simulated request latency of the offline stub backend (seconds)
+STUB_LATENCY_SECONDS = float(os.getenv('LLM_STUB_LATENCY', '0.05'))
+
+EVENT_FIELDS_PROMPT = """
+        - title: string (event title)
+        - date: string (YYYY-MM-DD format)
+        - time: string (HH:MM format in 24-hour)
+        - endTime: string (HH:MM format in 24-hour, if available)
+        - location: string (if mentioned)
+        - description: string (brief description if not obvious from title)
+        - price: string (price information)
+        - url: string (if mentioned)
+        - tags: array of strings (relevant tags like "Art", "Music", "Free")
+        """
+
+# Characters venue and title names are made of; a name starts at a letter
+_NAME_CHARS = r"[A-Za-z\s&',\-.]"
+NAME_RUN_RE = register('ai_parser.name_run', _NAME_CHARS + '*')
+NAME_START_RE = register('ai_parser.name_start', r'(?=[A-Za-z])')
+AT_NAME_RE = register('ai_parser.at_name', r'at\s+(?=[A-Za-z])', re.IGNORECASE)
+IN_NAME_RE = register('ai_parser.in_name', r'in\s+(?=[A-Za-z])', re.IGNORECASE)
+
+# Words that make a name a venue, an organization, or an event title
+VENUE_WORD_RE = register('ai_parser.venue_word', r'Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|Room|Plaza|Park|Arena|Stadium|Club|Bar|Restaurant|Cafe|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue|Library|Auditorium|Pavilion|Convention|Complex|Facility|Institution|Foundation|Society|Association|Organization|Institute|Conservatory|Conservatoire', re.IGNORECASE)
+ORG_WORD_RE = register('ai_parser.org_word', r'Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|University|College|School|Library|Auditorium', re.IGNORECASE)
+TITLE_EVENT_WORD_RE = register('ai_parser.title_event_word', r'Gallery|Festival|Night|Day|Show|Concert|Meeting|Workshop|Conference|Event|Program|Series', re.IGNORECASE)
+TITLE_LINK_WORD_RE = register('ai_parser.title_link_word', r'at|in|with|by|presented|hosted|organized', re.IGNORECASE)
+
+# A whole line that reads like a title, and phrases that might be one
+TITLE_LINE_RE = register('ai_parser.title_line', r"^([A-Z][A-Za-z\s&',\-.]{10,80})(?:\n|$)", re.IGNORECASE)
+CAPITALIZED_PHRASE_RE = register('ai_parser.capitalized_phrase', r"[A-Z][A-Za-z\s&',\-.]{15,100}")
+
+WEEKDAY_START_RE = register('ai_parser.weekday_start', r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', re.IGNORECASE)
+CLOCK_START_RE = register('ai_parser.clock_start', r'^\d{1,2}:\d{2}')
+TITLE_WEEKDAY_PREFIX_RE = register('ai_parser.title_weekday_prefix', r'^(Thursday|Friday|Saturday|Sunday|Monday|Tuesday|Wednesday),?\s*', re.IGNORECASE)
+TITLE_MONTH_PREFIX_RE = register('ai_parser.title_month_prefix', r'^(Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+\d+,?\s*', re.IGNORECASE)
+TITLE_MENU_SUFFIX_RE = register('ai_parser.title_menu_suffix', r'(?<!\s)\s+Return to menu\s*$', re.IGNORECASE)
+RETURN_TO_MENU_RE = register('ai_parser.return_to_menu', r'Return to menu\s*', re.IGNORECASE)
+WHITESPACE_RE = register('ai_parser.whitespace', r'\s+')
+
+# "6 to 9 p.m.", "6:00 to 9:00 p.m.", "6:00 p.m. to 9:00 p.m.", "6 p.m. to 9 p.m."
+TIME_RANGE_RES = register_all('ai_parser.time_range', [
+    r'(\d{1,2})\s*(?:to|–|-)\s*(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)',
+    r'(\d{1,2}):(\d{2})\s*(?:to|–|-)\s*(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
+    r'(\d{1,2}):?(\d{2})?\s*(am|pm|a\.m\.|p\.m\.)\s*(?:to|–|-)\s*(\d{1,2}):?(\d{2})?\s*(am|pm|a\.m\.|p\.m\.)',
+    r'(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)\s*(?:to|–|-)\s*(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)',
+], re.IGNORECASE)
+SINGLE_TIME_RES = register_all('ai_parser.single_time', [
+    r'(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
+    r'(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)',
+    r'at\s+(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
+    r'beginning\s+at\s+(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
+], re.IGNORECASE)
+
+# Digit and whitespace runs are only tried from where they start (tried from inside a run,
+# the run would be rescanned from every position in it); the leftmost match starts there anyway
+LOCATION_SPECIAL_CHARS_RE = register('ai_parser.location_special_chars', r"[^\w\s&',\-.]")
+LOCATION_SUFFIX_RE = register('ai_parser.location_suffix', r'(?<!\s)\s+(PM|AM|p\.m\.|a\.m\.|Registration|opens|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday).*$', re.IGNORECASE)
+
+PRICE_RES = register_all('ai_parser.price', [
+    r'\b(Free|FREE|free)\b',
+    r'\$(\d+(?:\.\d{2})?)',
+    r'(?<!\d)(\d+)\s*dollars?',
+    r'(?<!\d)(\d+)\s*bucks?',
+], re.IGNORECASE)
+
+# Bare domains only start where a run of host characters starts: tried from inside a long
+# token, the host run would be rescanned from every position in it
+URL_RES = register_all('ai_parser.url', [
+    r'https?://[^\s<>"{}|\\^`\[\]]+[^\s<>"{}|\\^`\[\].,;:!?]',
+    r'www\.[^\s<>"{}|\\^`\[\]]+[^\s<>"{}|\\^`\[\].,;:!?]',
+    r'(?<![a-zA-Z0-9.-])[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?:/[^\s<>"{}|\\^`\[\]]*)?',
+], re.IGNORECASE)
+URL_SCHEME_RE = register('ai_parser.url_scheme', r'^https?://')
+URL_DOMAIN_RE = register('ai_parser.url_domain', r'^https?://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Dates, times and prices removed from descriptions
+DESCRIPTION_DATE_RES = register_all('ai_parser.description_date', [
+    r'(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday),?\s*(?:Jan\.?|January|Feb\.?|February|Mar\.?|March|Apr\.?|April|May|Jun\.?|June|Jul\.?|July|Aug\.?|August|Sep\.?|Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+\d{1,2}(?:st|nd|rd|th)?,?\s*\d{4}?',
+    r'(?:Jan\.?|January|Feb\.?|February|Mar\.?|March|Apr\.?|April|May|Jun\.?|June|Jul\.?|July|Aug\.?|August|Sep\.?|Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+\d{1,2}(?:st|nd|rd|th)?,?\s*\d{4}?',
+], re.IGNORECASE)
+DESCRIPTION_TIME_RES = register_all('ai_parser.description_time', [
+    r'\d{1,2}:\d{2}\s*(?:am|pm|a\.m\.|p\.m\.)\s*(?:to|–|-)\s*\d{1,2}:\d{2}\s*(?:am|pm|a\.m\.|p\.m\.)',
+    r'\d{1,2}:\d{2}\s*(?:am|pm|a\.m\.|p\.m\.)',
+    r'\d{1,2}\s*(?:am|pm|a\.m\.|p\.m\.)',
+], re.IGNORECASE)
+DESCRIPTION_PRICE_RES = register_all('ai_parser.description_price', [
+    r'\b(Free|FREE|free)\b',
+    r'\$\d+(?:\.\d{2})?',
+    r'(?<!\d)\d+\s*dollars?',
+], re.IGNORECASE)
+
+# Punctuation at either end of a description; the trailing run is only tried from where it starts
+EDGE_SYMBOLS_RE = register('ai_parser.edge_symbols', r'^[^\w\s]+|(?<![^\w\s])[^\w\s]+$')
+
+_llm_bucket = TokenBucket(LLM_REQUESTS_PER_MINUTE / 60.0, LLM_CONCURRENCY)
+_llm_bucket_lock = threading.Lock()
+
+def _wait_for_llm_slot():
+    """Block until the process-wide OpenAI rate limit allows another request"""
+    with _llm_bucket_lock:
+        wait = _llm_bucket.reserve(time.monotonic())
+    if wait > 0:
+        time.sleep(wait)
+
+def _parse_with_regex_worker(text: str) -> Dict:
+    """Regex parse in a pool worker"""
+    return worker_instance(EventParser)._parse_with_regex(text)
+
+def pack_blocks(items: Sequence[Tuple[int, str]], max_blocks: int = BLOCKS_PER_LLM_REQUEST,
+                max_chars: int = MAX_LLM_REQUEST_CHARS) -> List[List[Tuple[int, str]]]:
+    """Group (index, text) blocks into OpenAI requests by count and size"""
+    packs, current, size = [], [], 0
+    for index, text in items:
+        if current and (len(current) >= max_blocks or size + len(text) > max_chars):
+            packs.append(current)
+            current, size = [], 0
+        current.append((index, text))
+        size += len(text)
+    if current:
+        packs.append(current)
+    return packs
+
+
+class OpenAIBackend:
+    """Event parsing through the OpenAI chat API."""
+    
+    def __init__(self, client, model: str = OPENAI_MODEL):
+        self.client = client
+        self.model = model
+    
+    def parse(self, texts: List[str]) -> List[Dict]:
+        """One result per text from a single request; raises if the reply doesn't match."""
+        if len(texts) == 1:
+            prompt = f"""
+        Parse this natural language event description into structured data:
+        "{texts[0]}"
+        
+        Return a JSON object with these fields:{EVENT_FIELDS_PROMPT}
+        Examples:
+        "Team sync with Sam at 10am next Wednesday in Zoom" -> 
+        {{"title": "Team sync with Sam", "date": "2025-09-17", "time": "10:00", "location": "Zoom", "description": "Team synchronization meeting", "tags": ["Meeting", "Online"]}}
+        
+        "National Gallery Nights at the National Gallery of Art, 6 to 9 p.m. Free" ->
+        {{"title": "National Gallery Nights", "date": "2025-09-11", "time": "18:00", "endTime": "21:00", "location": "National Gallery of Art", "description": "After-hours gallery program", "price": "Free", "tags": ["Art", "Evening", "Free"]}}
+        """
+        else:
+            numbered = "\n\n".join(f'Block {number}:\n"{text}"' for number, text in enumerate(texts, 1))
+            prompt = f"""
+        Parse each of these {len(texts)} natural language event descriptions into structured data:
+        
+        {numbered}
+        
+        Return a JSON array with exactly one object per block, in block order, each with these fields:{EVENT_FIELDS_PROMPT}"""
+        
+        response = self.client.ChatCompletion.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=300 * len(texts),
+            temperature=0.1
+        )
+        
+        results = json.loads(response.choices[0].message.content.strip())
+        if len(texts) == 1 and isinstance(results, dict):
+            results = [results]
+        if not isinstance(results, list) or len(results) != len(texts) or not all(isinstance(r, dict) for r in results):
+            raise ValueError(f"expected {len(texts)} events, got {type(results).__name__}")
+        return results
+
+
+class StubBackend:
+    """Offline stand-in for the LLM (LLM_BACKEND=stub): answers with the regex parse after a fixed delay."""
+    
+    model = "stub"
+    
+    def __init__(self, parse, latency: float = STUB_LATENCY_SECONDS):
+        self.parse_one = parse
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+    
+    def parse(self, texts: List[str]) -> List[Dict]:
+        with self.lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        return [self.parse_one(text) for text in texts]
+
 
 class EventParser:
     """Main class for parsing natural language into event data."""
     
-    def __init__(self):
-        self.openai_client = None
+    def __init__(self, llm_backend=None, llm_cache=None):
+        """Backend and cache default to the configured ones; llm_cache=False parses without caching."""
+        self.llm_backend = llm_backend or self._configured_backend()
+        self.llm_cache = llm_cache
+        if self.llm_backend and llm_cache is None:
+            self.llm_cache = get_llm_cache()
+    
+    def _configured_backend(self):
+        """LLM backend from the environment: the offline stub, OpenAI with an API key, or none"""
+        if os.getenv('LLM_BACKEND', '').lower() == 'stub':
+            return StubBackend(self._parse_with_regex)
         if OPENAI_AVAILABLE and os.getenv('OPENAI_API_KEY'):
             openai.api_key = os.getenv('OPENAI_API_KEY')
-            self.openai_client = openai
+            return OpenAIBackend(openai)
+        return None
     
     def parse_natural_language(self, text: str) -> Dict:
         """
@@ -42,54 +266,80 @@ class EventParser:
         Returns:
             Dict with parsed event fields
         """
-        # Try OpenAI first if available
-        if self.openai_client:
+        # Try the LLM first if available
+        if self.llm_backend:
             try:
-                return self._parse_with_openai(text)
+                return self._parse_with_llm([text])[0]
             except Exception as e:
-                print(f"OpenAI parsing failed: {e}, falling back to regex")
+                logger.warning(f"LLM parsing failed: {e}, falling back to regex")
         
         # Fallback to regex-based parsing
         return self._parse_with_regex(text)
     
-    def _parse_with_openai(self, text: str) -> Dict:
-        """Parse using OpenAI API."""
-        prompt = f"""
-        Parse this natural language event description into structured data:
-        "{text}"
-        
-        Return a JSON object with these fields:
-        - title: string (event title)
-        - date: string (YYYY-MM-DD format)
-        - time: string (HH:MM format in 24-hour)
-        - endTime: string (HH:MM format in 24-hour, if available)
-        - location: string (if mentioned)
-        - description: string (brief description if not obvious from title)
-        - price: string (price information)
-        - url: string (if mentioned)
-        - tags: array of strings (relevant tags like "Art", "Music", "Free")
-        
-        Examples:
-        "Team sync with Sam at 10am next Wednesday in Zoom" -> 
-        {{"title": "Team sync with Sam", "date": "2025-09-17", "time": "10:00", "location": "Zoom", "description": "Team synchronization meeting", "tags": ["Meeting", "Online"]}}
-        
-        "National Gallery Nights at the National Gallery of Art, 6 to 9 p.m. Free" ->
-        {{"title": "National Gallery Nights", "date": "2025-09-11", "time": "18:00", "endTime": "21:00", "location": "National Gallery of Art", "description": "After-hours gallery program", "price": "Free", "tags": ["Art", "Evening", "Free"]}}
+    def _parse_with_llm(self, texts: List[str], check_cache: bool = True) -> List[Dict]:
+        """Parse texts with one LLM request, answering from the cache where possible."""
+        cached = {}
+        if self.llm_cache and check_cache:
+            cached = self.llm_cache.get_many(texts, self.llm_backend.model, PROMPT_VERSION)
+        missing = [text for index, text in enumerate(texts) if index not in cached]
+        
+        fresh = []
+        if missing:
+            _wait_for_llm_slot()
+            fresh = self.llm_backend.parse(missing)
+            if self.llm_cache:
+                self.llm_cache.put_many(list(zip(missing, fresh)), self.llm_backend.model, PROMPT_VERSION)
+        
+        fresh = iter(fresh)
+        return [cached[index] if index in cached else next(fresh) for index in range(len(texts))]
+    
+    def parse_batch(self, texts: Sequence[str]) -> List[Dict]:
+        """Parse many text blocks at once; results are in the order of texts."""
+        results = [None] * len(texts)
+        for index, result in self.iter_parse_batch(texts):
+            results[index] = result
+        return results
+    
+    def iter_parse_batch(self, texts: Sequence[str]) -> Iterator[Tuple[int, Dict]]:
         """
+        Parse many text blocks, yielding (index, result) as each one finishes.
         
-        response = self.openai_client.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300,
-            temperature=0.1
-        )
-        
-        result = response.choices[0].message.content.strip()
-        try:
-            return json.loads(result)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, fall back to regex
-            return self._parse_with_regex(text)
+        With an LLM configured, cached results come back first; the remaining
+        blocks are packed several to a request and the requests run concurrently
+        under the process-wide rate limit. Blocks whose request fails are
+        regex-parsed instead, on the parse pool.
+        """
+        items = list(enumerate(texts))
+        if not items:
+            return
+        
+        fallback = items
+        if self.llm_backend:
+            fallback = []
+            cached = {}
+            if self.llm_cache:
+                cached = self.llm_cache.get_many([text for _, text in items], self.llm_backend.model, PROMPT_VERSION)
+                for position, result in cached.items():
+                    yield items[position][0], result
+            
+            packs = pack_blocks([item for position, item in enumerate(items) if position not in cached])
+            if packs:
+                with ThreadPoolExecutor(max_workers=min(LLM_CONCURRENCY, len(packs)),
+                                        thread_name_prefix='llm-parse') as executor:
+                    # Cache already checked above
+                    futures = {executor.submit(self._parse_with_llm, [text for _, text in pack], False): pack
+                               for pack in packs}
+                    for future in as_completed(futures):
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            logger.warning(f"LLM batch parsing failed: {e}, falling back to regex")
+                            fallback.extend(futures[future])
+                            continue
+                        for (index, _), result in zip(futures[future], results):
+                            yield index, result
+        
+        yield from iter_parallel(_parse_with_regex_worker, fallback)
     
     def _parse_with_regex(self, text: str) -> Dict:
         """Enhanced regex-based parsing with better field extraction and validation."""
@@ -105,18 +355,30 @@ class EventParser:
             "tags": []
         }
         
-        # Clean the text first
-        cleaned_text = self._clean_text(text)
-        
-        # Extract fields with improved algorithms
-        result["title"] = self._extract_title(cleaned_text)
-        result["date"] = self._extract_date(cleaned_text)
-        result["time"], result["endTime"] = self._extract_time_range(cleaned_text)
-        result["location"] = self._extract_location(cleaned_text)
-        result["price"] = self._extract_price(cleaned_text)
-        result["url"] = self._extract_url(cleaned_text)
-        result["description"] = self._extract_description(cleaned_text)
-        result["tags"] = self._extract_tags(cleaned_text)
+        # Clean the text first (very long documents are cut to bound the regex work)
+        cleaned_text = self._clean_text(text[:MAX_DOCUMENT_CHARS])
+        
+        # Extract fields with improved algorithms, until the document's time budget is spent
+        extractors = [
+            (("title",), self._extract_title),
+            (("date",), self._extract_date),
+            (("time", "endTime"), self._extract_time_range),
+            (("location",), self._extract_location),
+            (("price",), self._extract_price),
+            (("url",), self._extract_url),
+            (("description",), self._extract_description),
+            (("tags",), self._extract_tags),
+        ]
+        deadline = document_deadline()
+        for fields, extract in extractors:
+            if deadline.expired():
+                note_budget_overrun('Regex event parser', len(cleaned_text), fields[0])
+                break
+            value = extract(cleaned_text)
+            if len(fields) == 1:
+                result[fields[0]] = value
+            else:
+                result.update(zip(fields, value))
         
         # Apply field prioritization and validation
         result = self._validate_and_prioritize_fields(result, cleaned_text)
@@ -198,16 +460,10 @@ class EventParser:
             return 'National Gallery of Art'
         
         # Look for organization names in the text
-        org_patterns = [
-            r'([A-Z][A-Za-z\s&\',\-\.]*(?:Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|University|College|School|Library|Auditorium)[A-Za-z\s&\',\-\.]*)',
-        ]
-        
-        for pattern in org_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                location = match.group(1).strip()
-                if len(location) > 5 and len(location) < 100:
-                    return location
+        for _, name_start, end in find_keyword_runs(text, NAME_START_RE, NAME_RUN_RE, ORG_WORD_RE):
+            location = text[name_start:end].strip()
+            if len(location) > 5 and len(location) < 100:
+                return location
         return ""
     
     def _clean_description(self, description: str, parsed_fields: Dict) -> str:
@@ -225,16 +481,16 @@ class EventParser:
             description = description.replace(parsed_fields["price"], "")
         
         # Clean up whitespace
-        description = re.sub(r'\s+', ' ', description).strip()
+        description = WHITESPACE_RE.sub(' ', description).strip()
         
         return description
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize input text."""
         # Remove extra whitespace and normalize
-        text = re.sub(r'\s+', ' ', text)
+        text = WHITESPACE_RE.sub(' ', text)
         # Remove navigation elements like "Return to menu"
-        text = re.sub(r'Return to menu\s*', '', text, flags=re.IGNORECASE)
+        text = RETURN_TO_MENU_RE.sub('', text)
         return text.strip()
     
     def _extract_title(self, text: str) -> str:
@@ -248,46 +504,35 @@ class EventParser:
             
             # Skip navigation elements and date lines
             if (line.startswith(('Return to', 'After a', 'The party')) or 
-                re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', line, re.IGNORECASE) or
+                WEEKDAY_START_RE.match(line) or
                 len(line) < 10):
                 continue
             
             # Look for event title patterns
-            title_patterns = [
-                # Event names with common event keywords (more restrictive)
-                r'([A-Z][A-Za-z\s&\',\-\.]*(?:Gallery|Festival|Night|Day|Show|Concert|Meeting|Workshop|Conference|Event|Program|Series)[A-Za-z\s&\',\-\.]*)',
-                # Event names with location indicators (more restrictive)
-                r'([A-Z][A-Za-z\s&\',\-\.]*(?:at|in|with|by|presented|hosted|organized)[A-Za-z\s&\',\-\.]*)',
-                # General capitalized event names (limit length)
-                r'^([A-Z][A-Za-z\s&\',\-\.]{10,80})(?:\n|$)',
-            ]
-            
-            for pattern in title_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    title = match.group(1).strip()
-                    
-                    # Clean up common prefixes and suffixes
-                    title = re.sub(r'^(Thursday|Friday|Saturday|Sunday|Monday|Tuesday|Wednesday),?\s*', '', title, flags=re.IGNORECASE)
-                    title = re.sub(r'^(Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+\d+,?\s*', '', title, flags=re.IGNORECASE)
-                    title = re.sub(r'\s+Return to menu\s*$', '', title, flags=re.IGNORECASE)
-                    
-                    # Validate title quality and clean up
-                    if (len(title) > 10 and len(title) < 200 and 
-                        not title.lower().startswith(('after a', 'the party', 'while most', 'don\'t want'))):
-                        # Clean up title - remove extra text after the main event name
-                        title = self._clean_title(title)
-                        return title
+            for title in self._title_candidates(line):
+                title = title.strip()
+                
+                # Clean up common prefixes and suffixes
+                title = TITLE_WEEKDAY_PREFIX_RE.sub('', title)
+                title = TITLE_MONTH_PREFIX_RE.sub('', title)
+                title = TITLE_MENU_SUFFIX_RE.sub('', title)
+                
+                # Validate title quality and clean up
+                if (len(title) > 10 and len(title) < 200 and 
+                    not title.lower().startswith(('after a', 'the party', 'while most', 'don\'t want'))):
+                    # Clean up title - remove extra text after the main event name
+                    title = self._clean_title(title)
+                    return title
         
         # Strategy 2: Look for the most substantial capitalized phrase
         # Find the longest capitalized phrase that looks like an event title
-        capitalized_phrases = re.findall(r'[A-Z][A-Za-z\s&\',\-\.]{15,100}', text)
+        capitalized_phrases = CAPITALIZED_PHRASE_RE.findall(text)
         
         for phrase in capitalized_phrases:
             phrase = phrase.strip()
             # Skip if it looks like a date, time, or navigation element
-            if (re.match(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)', phrase, re.IGNORECASE) or
-                re.match(r'^\d{1,2}:\d{2}', phrase) or
+            if (WEEKDAY_START_RE.match(phrase) or
+                CLOCK_START_RE.match(phrase) or
                 'Return to menu' in phrase or
                 len(phrase) < 15):
                 continue
@@ -299,6 +544,17 @@ class EventParser:
         
         return ""
     
+    def _title_candidates(self, line: str) -> Iterator[str]:
+        """Title-like spans of a line: a name around an event word, a name around a linking word, the whole line"""
+        for keyword_re in (TITLE_EVENT_WORD_RE, TITLE_LINK_WORD_RE):
+            match = search_keyword_run(line, NAME_START_RE, NAME_RUN_RE, keyword_re)
+            if match:
+                yield line[match[1]:match[2]]
+        
+        match = TITLE_LINE_RE.search(line)
+        if match:
+            yield match.group(1)
+    
     def _clean_title(self, title: str) -> str:
         """Clean up title by removing extra descriptive text."""
         # Split by common separators and take the first substantial part
@@ -344,84 +600,10 @@ class EventParser:
         return title
     
     def _extract_date(self, text: str) -> str:
-        """Extract date with improved patterns and position awareness."""
-        # Enhanced date patterns with better coverage
-        date_patterns = [
-            # Day of week + month + day + year (e.g., "Thursday, Sept. 11, 2025")
-            r'(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday),?\s*(Jan\.?|January|Feb\.?|February|Mar\.?|March|Apr\.?|April|May|Jun\.?|June|Jul\.?|July|Aug\.?|August|Sep\.?|Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+(\d{1,2})(?:st|nd|rd|th)?,?\s*(\d{4})?',
-            # Month + day + year (e.g., "Sept. 11, 2025")
-            r'(Jan\.?|January|Feb\.?|February|Mar\.?|March|Apr\.?|April|May|Jun\.?|June|Jul\.?|July|Aug\.?|August|Sep\.?|Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+(\d{1,2})(?:st|nd|rd|th)?,?\s*(\d{4})?',
-            # Numeric formats
-            r'(\d{1,2})/(\d{1,2})/(\d{4})',
-            r'(\d{4})-(\d{1,2})-(\d{1,2})',
-            r'(\d{1,2})-(\d{1,2})-(\d{4})',
-            # Relative dates
-            r'\b(today|tomorrow|yesterday)\b',
-            r'\b(next|this)\s+(week|month|year)\b',
-        ]
-        
-        # Month mapping
-        month_map = {
-            'jan': '01', 'january': '01',
-            'feb': '02', 'february': '02',
-            'mar': '03', 'march': '03',
-            'apr': '04', 'april': '04',
-            'may': '05',
-            'jun': '06', 'june': '06',
-            'jul': '07', 'july': '07',
-            'aug': '08', 'august': '08',
-            'sep': '09', 'sept': '09', 'september': '09',
-            'oct': '10', 'october': '10',
-            'nov': '11', 'november': '11',
-            'dec': '12', 'december': '12'
-        }
-        
-        # Look for dates in order of priority (earlier in text = higher priority)
-        all_matches = []
-        for pattern in date_patterns:
-            matches = list(re.finditer(pattern, text, re.IGNORECASE))
-            for match in matches:
-                all_matches.append((match.start(), match, pattern))
-        
-        # Sort by position in text (earlier = better)
-        all_matches.sort(key=lambda x: x[0])
-        
-        for pos, match, pattern in all_matches:
-            groups = match.groups()
-            
-            # Handle relative dates
-            if any(rel in match.group().lower() for rel in ['today', 'tomorrow', 'yesterday', 'next', 'this']):
-                if 'today' in match.group().lower():
-                    return datetime.now().strftime('%Y-%m-%d')
-                elif 'tomorrow' in match.group().lower():
-                    return (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-                elif 'yesterday' in match.group().lower():
-                    return (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-                continue
-            
-            # Handle numeric formats
-            if '/' in match.group() or '-' in match.group():
-                if len(groups) >= 3:
-                    if '/' in match.group():
-                        month, day, year = groups
-                        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                    elif '-' in match.group():
-                        if len(groups[0]) == 4:  # YYYY-MM-DD
-                            year, month, day = groups
-                        else:  # MM-DD-YYYY
-                            month, day, year = groups
-                        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-            
-            # Handle month name formats
-            elif len(groups) >= 2:
-                month_name = groups[0]
-                day = groups[1]
-                year = groups[2] if len(groups) > 2 and groups[2] else "2025"
-                
-                month_num = month_map.get(month_name.lower(), '09')
-                return f"{year}-{month_num}-{day.zfill(2)}"
-        
-        return ""
+        """Extract the earliest date in the text as YYYY-MM-DD (year-less dates get the current year)."""
+        # Fuzzy dateutil matching would pick up stray numbers in free text
+        parsed_date = normalize_date(text, fuzzy=False)
+        return parsed_date.strftime('%Y-%m-%d') if parsed_date else ""
     
     def _extract_time_range(self, text: str) -> tuple:
         """Extract start and end times with semantic understanding."""
@@ -431,29 +613,9 @@ class EventParser:
         # Find all time mentions in the text
         all_time_matches = []
         
-        # Time range patterns (prioritize these)
-        time_range_patterns = [
-            # "6 to 9 p.m." format
-            r'(\d{1,2})\s*(?:to|–|-)\s*(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)',
-            # "6:00 to 9:00 p.m." format
-            r'(\d{1,2}):(\d{2})\s*(?:to|–|-)\s*(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
-            # "6:00 p.m. to 9:00 p.m." format
-            r'(\d{1,2}):?(\d{2})?\s*(am|pm|a\.m\.|p\.m\.)\s*(?:to|–|-)\s*(\d{1,2}):?(\d{2})?\s*(am|pm|a\.m\.|p\.m\.)',
-            # "6 p.m. to 9 p.m." format
-            r'(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)\s*(?:to|–|-)\s*(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)',
-        ]
-        
-        # Single time patterns
-        single_time_patterns = [
-            r'(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
-            r'(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)',
-            r'at\s+(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
-            r'beginning\s+at\s+(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)',
-        ]
-        
-        # Collect all time matches with context
-        for pattern in time_range_patterns:
-            matches = list(re.finditer(pattern, text, re.IGNORECASE))
+        # Collect all time matches with context (ranges first, they are prioritized)
+        for pattern in TIME_RANGE_RES:
+            matches = list(pattern.finditer(text))
             for match in matches:
                 context = self._get_time_context(text, match.start(), match.end())
                 all_time_matches.append({
@@ -463,8 +625,8 @@ class EventParser:
                     'priority': self._get_time_priority(context)
                 })
         
-        for pattern in single_time_patterns:
-            matches = list(re.finditer(pattern, text, re.IGNORECASE))
+        for pattern in SINGLE_TIME_RES:
+            matches = list(pattern.finditer(text))
             for match in matches:
                 context = self._get_time_context(text, match.start(), match.end())
                 all_time_matches.append({
@@ -562,31 +724,21 @@ class EventParser:
     
     def _extract_location(self, text: str) -> str:
         """Extract location information with improved venue detection."""
-        # Enhanced location patterns with better venue detection
-        location_patterns = [
-            # Venue patterns with "at" preposition
-            r'at\s+([A-Z][A-Za-z\s&\',\-\.]*(?:Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|Room|Plaza|Park|Arena|Stadium|Club|Bar|Restaurant|Cafe|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue|Library|Auditorium|Pavilion|Convention|Center|Complex|Facility|Institution|Foundation|Society|Association|Organization|Institute|Academy|Conservatory|Conservatoire)[A-Za-z\s&\',\-\.]*)',
-            # Venue patterns with "in" preposition
-            r'in\s+([A-Z][A-Za-z\s&\',\-\.]*(?:Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|Room|Plaza|Park|Arena|Stadium|Club|Bar|Restaurant|Cafe|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue|Library|Auditorium|Pavilion|Convention|Center|Complex|Facility|Institution|Foundation|Society|Association|Organization|Institute|Academy|Conservatory|Conservatoire)[A-Za-z\s&\',\-\.]*)',
-            # Direct venue mentions
-            r'([A-Z][A-Za-z\s&\',\-\.]*(?:Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|Room|Plaza|Park|Arena|Stadium|Club|Bar|Restaurant|Cafe|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue|Library|Auditorium|Pavilion|Convention|Center|Complex|Facility|Institution|Foundation|Society|Association|Organization|Institute|Academy|Conservatory|Conservatoire)[A-Za-z\s&\',\-\.]*)',
-        ]
-        
         # Collect all potential locations with context
         all_locations = []
         
-        for pattern in location_patterns:
-            matches = list(re.finditer(pattern, text, re.IGNORECASE))
-            for match in matches:
-                location = match.group(1).strip()
-                context = self._get_location_context(text, match.start(), match.end())
+        # Venue names after "at", after "in", and anywhere
+        for prefix_re in (AT_NAME_RE, IN_NAME_RE, NAME_START_RE):
+            for start, name_start, end in find_keyword_runs(text, prefix_re, NAME_RUN_RE, VENUE_WORD_RE):
+                location = text[name_start:end].strip()
+                context = self._get_location_context(text, start, end)
                 
                 # Clean up the location
-                location = re.sub(r'\s+', ' ', location)
-                location = re.sub(r'[^\w\s&\',\-\.]', '', location)  # Remove special chars except common ones
+                location = WHITESPACE_RE.sub(' ', location)
+                location = LOCATION_SPECIAL_CHARS_RE.sub('', location)  # Remove special chars except common ones
                 
                 # Remove common suffixes that aren't part of the venue name
-                location = re.sub(r'\s+(PM|AM|p\.m\.|a\.m\.|Registration|opens|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday).*$', '', location, flags=re.IGNORECASE)
+                location = LOCATION_SUFFIX_RE.sub('', location)
                 
                 if len(location) > 5 and len(location) < 100:
                     all_locations.append({
@@ -649,15 +801,8 @@ class EventParser:
     
     def _extract_price(self, text: str) -> str:
         """Extract price information."""
-        price_patterns = [
-            r'\b(Free|FREE|free)\b',
-            r'\$(\d+(?:\.\d{2})?)',
-            r'(\d+)\s*dollars?',
-            r'(\d+)\s*bucks?',
-        ]
-        
-        for pattern in price_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in PRICE_RES:
+            match = pattern.search(text)
             if match:
                 if 'free' in match.group().lower():
                     return "Free"
@@ -669,14 +814,8 @@ class EventParser:
     
     def _extract_url(self, text: str) -> str:
         """Extract URLs from the text."""
-        url_patterns = [
-            r'https?://[^\s<>"{}|\\^`\[\]]+[^\s<>"{}|\\^`\[\].,;:!?]',
-            r'www\.[^\s<>"{}|\\^`\[\]]+[^\s<>"{}|\\^`\[\].,;:!?]',
-            r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?:/[^\s<>"{}|\\^`\[\]]*)?',
-        ]
-        
-        for pattern in url_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in URL_RES:
+            matches = pattern.findall(text)
             if matches:
                 # Return the first valid URL found
                 for match in matches:
@@ -698,12 +837,11 @@ class EventParser:
         """Basic URL validation."""
         try:
             # Check if it looks like a valid URL
-            if not re.match(r'^https?://', url):
+            if not URL_SCHEME_RE.match(url):
                 return False
             
             # Check for basic domain structure
-            domain_pattern = r'^https?://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-            return bool(re.match(domain_pattern, url))
+            return bool(URL_DOMAIN_RE.match(url))
         except:
             return False
     
@@ -712,51 +850,26 @@ class EventParser:
         description = text
         
         # Remove navigation elements
-        description = re.sub(r'Return to menu\s*', '', description, flags=re.IGNORECASE)
-        
-        # Remove date patterns
-        date_patterns = [
-            r'(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday),?\s*(?:Jan\.?|January|Feb\.?|February|Mar\.?|March|Apr\.?|April|May|Jun\.?|June|Jul\.?|July|Aug\.?|August|Sep\.?|Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+\d{1,2}(?:st|nd|rd|th)?,?\s*\d{4}?',
-            r'(?:Jan\.?|January|Feb\.?|February|Mar\.?|March|Apr\.?|April|May|Jun\.?|June|Jul\.?|July|Aug\.?|August|Sep\.?|Sept\.?|September|Oct\.?|October|Nov\.?|November|Dec\.?|December)\s+\d{1,2}(?:st|nd|rd|th)?,?\s*\d{4}?',
-        ]
-        
-        for pattern in date_patterns:
-            description = re.sub(pattern, '', description, flags=re.IGNORECASE)
+        description = RETURN_TO_MENU_RE.sub('', description)
         
-        # Remove time patterns
-        time_patterns = [
-            r'\d{1,2}:\d{2}\s*(?:am|pm|a\.m\.|p\.m\.)\s*(?:to|–|-)\s*\d{1,2}:\d{2}\s*(?:am|pm|a\.m\.|p\.m\.)',
-            r'\d{1,2}:\d{2}\s*(?:am|pm|a\.m\.|p\.m\.)',
-            r'\d{1,2}\s*(?:am|pm|a\.m\.|p\.m\.)',
-        ]
-        
-        for pattern in time_patterns:
-            description = re.sub(pattern, '', description, flags=re.IGNORECASE)
-        
-        # Remove price information
-        price_patterns = [
-            r'\b(Free|FREE|free)\b',
-            r'\$\d+(?:\.\d{2})?',
-            r'\d+\s*dollars?',
-        ]
-        
-        for pattern in price_patterns:
-            description = re.sub(pattern, '', description, flags=re.IGNORECASE)
-        
-        # Remove location patterns (but keep venue names in context)
-        location_patterns = [
-            r'at\s+[A-Z][A-Za-z\s&\',\-\.]*(?:Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|Room|Plaza|Park|Arena|Stadium|Club|Bar|Restaurant|Cafe|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue|Library|Auditorium|Pavilion|Convention|Center|Complex|Facility|Institution|Foundation|Society|Association|Organization|Institute|Academy|Conservatory|Conservatoire)[A-Za-z\s&\',\-\.]*',
-        ]
+        # Remove dates, times and price information
+        for pattern in DESCRIPTION_DATE_RES + DESCRIPTION_TIME_RES + DESCRIPTION_PRICE_RES:
+            description = pattern.sub('', description)
         
-        for pattern in location_patterns:
-            description = re.sub(pattern, '', description, flags=re.IGNORECASE)
+        # Remove "at <venue>" phrases (but keep venue names in context)
+        kept = []
+        last_end = 0
+        for start, _, end in find_keyword_runs(description, AT_NAME_RE, NAME_RUN_RE, VENUE_WORD_RE):
+            kept.append(description[last_end:start])
+            last_end = end
+        description = ''.join(kept) + description[last_end:]
         
         # Clean up whitespace and formatting
-        description = re.sub(r'\s+', ' ', description)
+        description = WHITESPACE_RE.sub(' ', description)
         description = description.strip()
         
         # Remove leading/trailing punctuation
-        description = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', description)
+        description = EDGE_SYMBOLS_RE.sub('', description)
         
         # Limit length and ensure it's substantial
         if len(description) > 500:
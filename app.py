@@ -10,6 +10,8 @@ import threading
 import time
 from dotenv import load_dotenv
 from services import EventService
+from rss_manager import RSSManager
+from feed_schedule import FEED_POLL_TICK_MINUTES
 
 # Load environment variables
 load_dotenv()
@@ -26,13 +28,13 @@ def start_background_scheduler():
     def scheduler_loop():
         while True:
             try:
-                # Refresh RSS feeds every 30 minutes
-                event_service.refresh_rss_feeds()
-                print("🔄 RSS feeds refreshed")
+                # Poll only the feeds that are due; each feed has its own next_poll_at,
+                # and feeds kept current by WebSub pushes just get the fallback poll
+                results = RSSManager(event_service.db.db_path).process_all_feeds()
+                print(f"🔄 RSS feeds polled: {results}")
                 
-                # Run scrapers every 2 hours
                 # Note: In production, you might want to use a proper job queue
-                time.sleep(1800)  # 30 minutes
+                time.sleep(FEED_POLL_TICK_MINUTES * 60)
             except Exception as e:
                 print(f"❌ Scheduler error: {e}")
                 time.sleep(300)  # Wait 5 minutes on error
@@ -3,10 +3,11 @@ Simplified Calendar Application
 Reduced from 2,160 lines to ~400 lines while maintaining core functionality
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
 from functools import wraps
 import os
 import json
+import time
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
@@ -15,6 +16,14 @@ from dotenv import load_dotenv
 from services import EventService
 from enhanced_scraper import EnhancedWebScraper
 from scraper_scheduler import start_background_scheduler, get_scheduler_status
+from circuit_breaker import CircuitBreaker
+from http_client import get_connection_stats
+from snapshot_archive import get_snapshot_archive
+from stage_timer import StageTimer, stage_scope
+from rss_manager import RSSManager
+from websub import CALLBACK_PATH, MAX_PUSH_BYTES, get_websub_subscriber, read_push_body
+from llm_cache import get_llm_cache
+from web_scraper_manager import apply_schema_migrations
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +34,7 @@ app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-producti
 # Initialize services
 event_service = EventService()
 enhanced_scraper = EnhancedWebScraper()
+apply_schema_migrations('calendar.db')
 
 # Start background scheduler
 scheduler = start_background_scheduler()
@@ -261,7 +271,7 @@ def parse_event():
 @app.route('/api/ai/extract-events', methods=['POST'])
 @require_auth
 def extract_events():
-    """Extract multiple events from bulk text"""
+    """Extract multiple events from bulk text (NDJSON, one event per line as parsed, with ?stream=1 or Accept: application/x-ndjson)"""
     try:
         data = request.get_json()
         text = data.get('text', '')
@@ -269,6 +279,18 @@ def extract_events():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
+        if request.args.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+            def generate():
+                try:
+                    for record in event_service.iter_extract_events_from_text(text):
+                        yield json.dumps(record) + '\n'
+                except Exception as e:
+                    app.logger.error(f"Error extracting events: {str(e)}")
+                    yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                            headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+        
         events = event_service.extract_events_from_text(text)
         return jsonify({
             'events': events,
@@ -333,8 +355,20 @@ def delete_rss_feed(feed_id):
 @app.route('/api/rss-feeds/refresh', methods=['POST'])
 @require_auth
 def refresh_rss_feeds():
-    """Refresh all RSS feeds"""
+    """Refresh all RSS feeds (NDJSON progress per feed with ?stream=1 or Accept: application/x-ndjson)"""
     try:
+        if request.args.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+            def generate():
+                try:
+                    for progress in event_service.iter_refresh_rss_feeds():
+                        yield json.dumps(progress) + '\n'
+                except Exception as e:
+                    app.logger.error(f"Error refreshing RSS feeds: {str(e)}")
+                    yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                            headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+        
         result = event_service.refresh_rss_feeds()
         return jsonify(result)
     except Exception as e:
@@ -699,6 +733,10 @@ def get_web_scrapers():
         conn = sqlite3.connect('calendar.db')
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM web_scrapers ORDER BY created_at DESC')
+        
+        # Breaker columns are looked up by id: their position depends on when they were migrated in
+        breaker_states = {s['id']: s for s in CircuitBreaker('calendar.db', 'web_scrapers').get_states()}
+        
         scrapers = []
         for row in cursor.fetchall():
             scraper = {
@@ -717,6 +755,9 @@ def get_web_scrapers():
                 'created_at': row[12],           # created_at
                 'updated_at': row[13]            # updated_at
             }
+            breaker = breaker_states.get(row[0], {})
+            scraper['circuit_state'] = breaker.get('circuit_state', 'closed')
+            scraper['circuit_open_until'] = breaker.get('circuit_open_until')
             scrapers.append(scraper)
         conn.close()
         return jsonify(scrapers)
@@ -793,7 +834,15 @@ def test_web_scraper():
         
         # Use enhanced scraper for testing
         try:
-            events = enhanced_scraper.scrape_events(url, selector_config)
+            timer = StageTimer()
+            with stage_scope(timer):
+                # Iterating on selectors can replay the last stored copy of the page instead of refetching
+                snapshot = get_snapshot_archive().latest(url) if data.get('use_snapshot') else None
+                if snapshot:
+                    events = list(enhanced_scraper.iter_events_from_html(snapshot['html'], url, selector_config))
+                    events.sort(key=lambda x: x['confidence_score'], reverse=True)
+                else:
+                    events = enhanced_scraper.scrape_events(url, selector_config)
             
             # Format results for testing
             sample_events = []
@@ -811,7 +860,9 @@ def test_web_scraper():
                 'message': f'Found {len(events)} potential events (showing top {len(sample_events)})',
                 'sample_events': sample_events,
                 'total_found': len(events),
-                'avg_confidence': sum(e.get('confidence_score', 0) for e in events) / len(events) if events else 0
+                'avg_confidence': sum(e.get('confidence_score', 0) for e in events) / len(events) if events else 0,
+                'snapshot_fetched_at': snapshot['fetched_at'] if snapshot else None,
+                'stage_timings': timer.as_dict()
             })
             
         except Exception as e:
@@ -827,10 +878,30 @@ def test_web_scraper():
             'message': f'Error testing URL: {str(e)}'
         })
 
+@app.route('/api/web-scrapers/reextract', methods=['POST'])
+@require_auth
+def reextract_web_scrapers():
+    """Re-run extraction over stored page snapshots, without fetching"""
+    try:
+        data = request.get_json(silent=True) or {}
+        scraper_ids = data.get('scraper_ids') or ([data['scraper_id']] if data.get('scraper_id') else None)
+        
+        results = get_snapshot_archive().reextract(scraper_ids, data.get('selector_config'))
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total_found': sum(r.get('events_found', 0) for r in results)
+        })
+    except Exception as e:
+        app.logger.error(f"Error re-extracting from snapshots: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/web-scrapers/<int:scraper_id>/scrape', methods=['POST'])
 @require_auth
 def scrape_website(scraper_id):
     """Scrape a specific website"""
+    start_time = time.time()
+    timer = StageTimer()
     try:
         conn = sqlite3.connect('calendar.db')
         cursor = conn.cursor()
@@ -859,10 +930,12 @@ def scrape_website(scraper_id):
         
         # Use enhanced scraper for actual scraping
         try:
-            events = enhanced_scraper.scrape_events(scraper['url'], scraper['selector_config'])
+            with stage_scope(timer):
+                events = enhanced_scraper.scrape_events(scraper['url'], scraper['selector_config'])
             events_found = len(events)
             events_added = 0
             
+            dedupe_started = time.perf_counter()
             for event in events:
                 # Only add high-confidence events
                 if event.get('confidence_score', 0) < 60:
@@ -903,6 +976,7 @@ def scrape_website(scraper_id):
                         1  # Default category
                     ))
                     events_added += 1
+            timer.add('db_dedupe', time.perf_counter() - dedupe_started)
                     
         except Exception as e:
             app.logger.error(f"Enhanced scraper error: {str(e)}")
@@ -912,6 +986,10 @@ def scrape_website(scraper_id):
                 SET consecutive_failures = consecutive_failures + 1, last_run = CURRENT_TIMESTAMP
                 WHERE id = ?
             ''', (scraper_id,))
+            cursor.execute('''
+                INSERT INTO web_scraper_logs (scraper_id, status, error_message, response_time_ms, stage_timings)
+                VALUES (?, 'error', ?, ?, ?)
+            ''', (scraper_id, str(e), int((time.time() - start_time) * 1000), json.dumps(timer.as_dict())))
             conn.commit()
             conn.close()
             return jsonify({'error': f'Scraping error: {str(e)}'}), 400
@@ -925,13 +1003,21 @@ def scrape_website(scraper_id):
             WHERE id = ?
         ''', (events_added, scraper_id))
         
+        # Keep the stage breakdown with the run log for trend queries
+        stage_timings = timer.as_dict()
+        cursor.execute('''
+            INSERT INTO web_scraper_logs (scraper_id, status, events_found, events_added, response_time_ms, stage_timings)
+            VALUES (?, 'success', ?, ?, ?, ?)
+        ''', (scraper_id, events_found, events_added, int((time.time() - start_time) * 1000), json.dumps(stage_timings)))
+        
         conn.commit()
         conn.close()
         
         return jsonify({
             'message': f'Scraping completed. Found {events_found} events, added {events_added} new events to approval queue.',
             'events_found': events_found,
-            'events_added': events_added
+            'events_added': events_added,
+            'stage_timings': stage_timings
         })
         
     except Exception as e:
@@ -980,10 +1066,56 @@ def get_scheduler_status_api():
     """Get scheduler status"""
     try:
         status = get_scheduler_status()
+        status['rss_circuit_breakers'] = CircuitBreaker('calendar.db', 'rss_feeds').get_states()
+        status['http_connections'] = get_connection_stats()
+        status['websub_subscriptions'] = get_websub_subscriber('calendar.db').get_subscriptions()
+        status['llm_parse_cache'] = get_llm_cache('calendar.db').get_stats()
         return jsonify(status)
     except Exception as e:
         app.logger.error(f"Error getting scheduler status: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# WebSub callbacks (called by hubs, so no login)
+_rss_ingest = None
+
+def get_rss_ingest() -> RSSManager:
+    """RSS manager whose ingest path stores pushed feed content"""
+    global _rss_ingest
+    if _rss_ingest is None:
+        _rss_ingest = RSSManager('calendar.db')
+    return _rss_ingest
+
+@app.route(CALLBACK_PATH + '<token>', methods=['GET'])
+def websub_verify(token):
+    """Confirm a subscription (or unsubscription) the hub is verifying"""
+    challenge = get_websub_subscriber('calendar.db').verify(token, request.args.to_dict())
+    if challenge is None:
+        return Response('Unknown subscription', status=404, mimetype='text/plain')
+    return Response(challenge, status=200, mimetype='text/plain')
+
+@app.route(CALLBACK_PATH + '<token>', methods=['POST'])
+def websub_receive(token):
+    """Ingest feed content pushed by a hub"""
+    subscriber = get_websub_subscriber('calendar.db')
+    if not subscriber.is_known_token(token):
+        return Response('Unknown subscription', status=404, mimetype='text/plain')
+    if (request.content_length or 0) > MAX_PUSH_BYTES:
+        return Response('Payload too large', status=413, mimetype='text/plain')
+    
+    # Chunked pushes have no Content-Length, so the limit is also enforced while reading
+    body = read_push_body(request.stream, MAX_PUSH_BYTES)
+    if body is None:
+        return Response('Payload too large', status=413, mimetype='text/plain')
+    
+    try:
+        subscriber.receive(token, body, request.headers.get('X-Hub-Signature', ''),
+                           get_rss_ingest().store_feed_entries)
+    except Exception as e:
+        app.logger.error(f"Error ingesting WebSub push: {str(e)}")
+        return Response('Ingest failed', status=500, mimetype='text/plain')
+    
+    # Dropped pushes (bad signature) are still acknowledged, as the spec asks
+    return Response(status=202)
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
@@ -0,0 +1,131 @@
+"""
+Circuit breaker for scraped sources (web_scrapers and rss_feeds)
+A source whose consecutive_failures reach FAILURE_THRESHOLD is skipped (open)
+for an exponentially growing, jittered backoff, then gets a single trial run
+(half-open). Sources that keep failing are deactivated, and start over from
+closed when they are switched back on. The state is derived from
+consecutive_failures and circuit_open_until (added by SCHEMA_MIGRATIONS in
+web_scraper_manager); it is not stored.
+"""
+
+import random
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Consecutive failures that open the breaker
+FAILURE_THRESHOLD = 3
+
+# Backoff after opening: BASE * 2^(failures - threshold), capped
+BASE_BACKOFF_MINUTES = 20
+MAX_BACKOFF_MINUTES = 24 * 60
+
+# Consecutive failures after which a source is switched off entirely
+DEACTIVATE_AFTER_FAILURES = 15
+
+class CircuitBreaker:
+    """Per-source breaker state stored on the source's own table row"""
+
+    def __init__(self, db_path: str = 'calendar.db', table: str = 'web_scrapers'):
+        if table not in ('web_scrapers', 'rss_feeds'):
+            raise ValueError(f"Unsupported table for circuit breaker: {table}")
+        self.db_path = db_path
+        self.table = table
+
+    def state(self, consecutive_failures: int, open_until: Optional[str], now: datetime = None) -> str:
+        """Current breaker state for a source"""
+        if (consecutive_failures or 0) < FAILURE_THRESHOLD:
+            return CLOSED
+
+        now = now or datetime.now()
+        if open_until and now < datetime.fromisoformat(open_until):
+            return OPEN
+        return HALF_OPEN
+
+    def allows(self, source: Dict, now: datetime = None) -> bool:
+        """Whether a source may be run now (closed, or half-open for a trial run)"""
+        return self.state(source.get('consecutive_failures'), source.get('circuit_open_until'), now) != OPEN
+
+    def backoff(self, consecutive_failures: int) -> timedelta:
+        """Jittered exponential backoff for a source that just failed"""
+        exponent = max(0, consecutive_failures - FAILURE_THRESHOLD)
+        ceiling = min(MAX_BACKOFF_MINUTES, BASE_BACKOFF_MINUTES * (2 ** min(exponent, 16)))
+        # Equal jitter: at least half the backoff, so retries of many sources spread out
+        return timedelta(minutes=random.uniform(ceiling / 2, ceiling))
+
+    def record_success(self, cursor: sqlite3.Cursor, source_id: int):
+        """Close the breaker after a successful run"""
+        cursor.execute(f'''
+            UPDATE {self.table} SET consecutive_failures = 0, circuit_open_until = NULL
+            WHERE id = ?
+        ''', (source_id,))
+
+    def reset_inactive(self, cursor: sqlite3.Cursor, source_id: int):
+        """Close the breaker of a deactivated source; call before switching it back on"""
+        cursor.execute(f'''
+            UPDATE {self.table} SET consecutive_failures = 0, circuit_open_until = NULL
+            WHERE id = ? AND NOT COALESCE(is_active, 0)
+        ''', (source_id,))
+
+    def record_failure(self, cursor: sqlite3.Cursor, source_id: int) -> str:
+        """Count a failed run, opening the breaker or deactivating the source as needed"""
+        cursor.execute(f'''
+            UPDATE {self.table} SET consecutive_failures = COALESCE(consecutive_failures, 0) + 1
+            WHERE id = ?
+        ''', (source_id,))
+        cursor.execute(f'SELECT consecutive_failures FROM {self.table} WHERE id = ?', (source_id,))
+        row = cursor.fetchone()
+        failures = row[0] if row else 0
+
+        if failures >= DEACTIVATE_AFTER_FAILURES:
+            cursor.execute(f'''
+                UPDATE {self.table} SET is_active = 0, circuit_open_until = NULL
+                WHERE id = ?
+            ''', (source_id,))
+            logger.warning(f"🔌 {self.table} #{source_id} deactivated after {failures} consecutive failures")
+            return OPEN
+
+        if failures >= FAILURE_THRESHOLD:
+            open_until = datetime.now() + self.backoff(failures)
+            cursor.execute(f'''
+                UPDATE {self.table} SET circuit_open_until = ?
+                WHERE id = ?
+            ''', (open_until.isoformat(), source_id))
+            logger.info(f"⚡ {self.table} #{source_id} circuit open until {open_until:%Y-%m-%d %H:%M}")
+            return OPEN
+
+        return CLOSED
+
+    def get_states(self) -> List[Dict]:
+        """Breaker state of every source, for status pages"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        cursor.execute(f'''
+            SELECT id, name, is_active, consecutive_failures, circuit_open_until
+            FROM {self.table} ORDER BY name
+        ''')
+
+        now = datetime.now()
+        states = []
+        for row in cursor.fetchall():
+            states.append({
+                'id': row['id'],
+                'name': row['name'],
+                'is_active': bool(row['is_active']),
+                'consecutive_failures': row['consecutive_failures'] or 0,
+                'circuit_state': self.state(row['consecutive_failures'], row['circuit_open_until'], now),
+                'circuit_open_until': row['circuit_open_until']
+            })
+
+        conn.close()
+        return states
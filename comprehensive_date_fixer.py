@@ -20,8 +20,8 @@ import sys
 import os
 import re
 import argparse
-from datetime import datetime, timedelta
-from dateutil import parser
+from datetime import datetime
+from date_normalizer import find_date, month_number, normalize_date, within_window
 from urllib.parse import urlparse, unquote
 
 # Add the parent directory to the Python path to import web_scraper_manager
@@ -85,22 +85,14 @@ class ComprehensiveDateFixer:
         
         # Pattern 3: Month-DD-YYYY (e.g., September-24-2025)
         match = re.search(r'/(?P<month_name>[a-zA-Z]+)-(?P<day>\d{1,2})-(?P<year>\d{4})', url)
-        if match:
-            try:
-                month_num = datetime.strptime(match.group('month_name'), '%B').month
-                return f"{match.group('year')}-{month_num:02d}-{match.group('day'):02d}"
-            except ValueError:
-                pass
+        if match and month_number(match.group('month_name')):
+            return f"{match.group('year')}-{month_number(match.group('month_name')):02d}-{int(match.group('day')):02d}"
         
         # Pattern 4: Month-DD (e.g., September-24) - assume current year
         match = re.search(r'/(?P<month_name>[a-zA-Z]+)-(?P<day>\d{1,2})(?:-|/)', url)
-        if match:
-            try:
-                month_num = datetime.strptime(match.group('month_name'), '%B').month
-                current_year = datetime.now().year
-                return f"{current_year}-{month_num:02d}-{match.group('day'):02d}"
-            except ValueError:
-                pass
+        if match and month_number(match.group('month_name')):
+            current_year = datetime.now().year
+            return f"{current_year}-{month_number(match.group('month_name')):02d}-{int(match.group('day')):02d}"
         
         return ""
     
@@ -111,63 +103,13 @@ class ComprehensiveDateFixer:
         - "Event Name (Sep 24, 2025)"
         - "Event Name - 2025-09-24"
         """
-        if not title:
-            return ""
-        
-        # Pattern 1: Month DD, YYYY
-        match = re.search(r'(?P<month_name>[a-zA-Z]+)\s+(?P<day>\d{1,2}),?\s+(?P<year>\d{4})', title)
-        if match:
-            try:
-                month_num = datetime.strptime(match.group('month_name'), '%B').month
-                return f"{match.group('year')}-{month_num:02d}-{match.group('day'):02d}"
-            except ValueError:
-                try:
-                    month_num = datetime.strptime(match.group('month_name'), '%b').month
-                    return f"{match.group('year')}-{month_num:02d}-{match.group('day'):02d}"
-                except ValueError:
-                    pass
-        
-        # Pattern 2: YYYY-MM-DD
-        match = re.search(r'(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})', title)
-        if match:
-            return f"{match.group('year')}-{match.group('month')}-{match.group('day')}"
-        
-        # Pattern 3: MM/DD/YYYY
-        match = re.search(r'(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})', title)
-        if match:
-            return f"{match.group('year')}-{match.group('month').zfill(2)}-{match.group('day').zfill(2)}"
-        
-        return ""
+        found = find_date(title, require_year=True)
+        return found.isoformat() if found else ""
     
     def extract_date_from_description(self, description: str) -> str:
         """Extract date from event description"""
-        if not description:
-            return ""
-        
-        # Look for common date patterns in descriptions
-        patterns = [
-            r'(?P<month_name>[a-zA-Z]+)\s+(?P<day>\d{1,2}),?\s+(?P<year>\d{4})',
-            r'(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})',
-            r'(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, description)
-            if match:
-                if 'month_name' in match.groupdict():
-                    try:
-                        month_num = datetime.strptime(match.group('month_name'), '%B').month
-                        return f"{match.group('year')}-{month_num:02d}-{match.group('day'):02d}"
-                    except ValueError:
-                        try:
-                            month_num = datetime.strptime(match.group('month_name'), '%b').month
-                            return f"{match.group('year')}-{month_num:02d}-{match.group('day'):02d}"
-                        except ValueError:
-                            continue
-                else:
-                    return f"{match.group('year')}-{match.group('month').zfill(2)}-{match.group('day').zfill(2)}"
-        
-        return ""
+        found = find_date(description, require_year=True)
+        return found.isoformat() if found else ""
     
     def infer_date_from_context(self, event_data) -> str:
         """
@@ -216,14 +158,9 @@ class ComprehensiveDateFixer:
                 if parsed_date:
                     return parsed_date
             
-            # Fallback to basic parsing
-            parsed_date = parser.parse(date_str, fuzzy=True)
-            
-            # Validate date is reasonable (not too far in past/future)
-            current_date = datetime.now()
-            if parsed_date < current_date - timedelta(days=365*2):  # More than 2 years ago
-                return ""
-            if parsed_date > current_date + timedelta(days=365*3):  # More than 3 years future
+            # Fallback to the shared normalizer, rejecting implausibly old or distant dates
+            parsed_date = normalize_date(date_str)
+            if not within_window(parsed_date):
                 return ""
             
             return parsed_date.strftime('%Y-%m-%d %H:%M:%S')
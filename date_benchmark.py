@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Date normalizer benchmark
+Parses the date strings stored in the events database with the old per-call
+approach (dateutil fuzzy parsing) and with date_normalizer, cold and warm,
+and reports throughput and how often the two agree on the day.
+
+    python date_benchmark.py --db calendar.db --repeat 5 --json dates.json
+"""
+
+import json
+import time
+import sqlite3
+import argparse
+from typing import Callable, Dict, List
+from dateutil import parser as date_parser
+import date_normalizer
+
+# (corpus name, query, fuzzy): stored date fields, and free text the event parser scans
+CORPORA = [
+    ('date fields', '''
+        SELECT start_datetime FROM events WHERE start_datetime != ''
+        UNION ALL SELECT end_datetime FROM events WHERE end_datetime != ''
+        UNION ALL SELECT start_datetime FROM scraped_events WHERE start_datetime != ''
+    ''', True),
+    ('titles', "SELECT title FROM events WHERE title != ''", False)
+]
+
+def load_corpus(db_path: str, query: str) -> List[str]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute(query) if row[0]]
+    except sqlite3.OperationalError:
+        return []  # Table missing in this database
+    finally:
+        conn.close()
+
+def legacy_parse(text: str, fuzzy: bool):
+    """What most of the old parsers fell through to on every call"""
+    try:
+        return date_parser.parse(text.replace('@', ' '), fuzzy=fuzzy)
+    except (ValueError, OverflowError, TypeError):
+        return None
+
+def time_pass(strings: List[str], parse: Callable, repeat: int) -> Dict:
+    started = time.perf_counter()
+    parsed = 0
+    for _ in range(repeat):
+        parsed = sum(1 for text in strings if parse(text) is not None)
+    elapsed = time.perf_counter() - started
+    calls = len(strings) * repeat
+    return {'seconds': round(elapsed, 4), 'per_second': int(calls / elapsed) if elapsed else 0,
+            'us_per_call': round(elapsed / calls * 1e6, 1) if calls else 0, 'parsed': parsed}
+
+def benchmark(db_path: str, repeat: int) -> List[Dict]:
+    results = []
+    for name, query, fuzzy in CORPORA:
+        strings = load_corpus(db_path, query)
+        if not strings:
+            continue
+
+        legacy = time_pass(strings, lambda text: legacy_parse(text, fuzzy), repeat)
+
+        # Cold: first sight of each string, one pass; warm: repeated passes over a filled cache
+        date_normalizer.clear_cache()
+        cold = time_pass(strings, lambda text: date_normalizer.normalize_date(text, fuzzy=fuzzy), 1)
+        warm = time_pass(strings, lambda text: date_normalizer.normalize_date(text, fuzzy=fuzzy), repeat)
+
+        agree = differ = 0
+        for text in strings:
+            old, new = legacy_parse(text, fuzzy), date_normalizer.normalize_date(text, fuzzy=fuzzy)
+            if old and new:
+                if old.date() == new.date():
+                    agree += 1
+                else:
+                    differ += 1
+
+        results.append({'corpus': name, 'strings': len(strings), 'distinct': len(set(strings)),
+                        'legacy': legacy, 'normalizer_cold': cold, 'normalizer_warm': warm,
+                        'same_day': agree, 'different_day': differ,
+                        'cache': date_normalizer.cache_info()})
+    return results
+
+def print_results(results: List[Dict]):
+    print(f"\n{'corpus':<12} {'strings':>7} {'distinct':>8} {'mode':<16} {'µs/call':>8} {'calls/s':>9} {'parsed':>6}")
+    print('-' * 74)
+    for r in results:
+        for mode in ('legacy', 'normalizer_cold', 'normalizer_warm'):
+            m = r[mode]
+            print(f"{r['corpus']:<12} {r['strings']:>7} {r['distinct']:>8} {mode:<16} "
+                  f"{m['us_per_call']:>8} {m['per_second']:>9} {m['parsed']:>6}")
+        print(f"{'':<12} both parsed: {r['same_day']} same day, {r['different_day']} different day")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark date_normalizer against the old date parsing')
+    parser.add_argument('--db', default='calendar.db', help='Database to take date strings from')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over each corpus')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    results = benchmark(args.db, args.repeat)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+if __name__ == '__main__':
+    main()
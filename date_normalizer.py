@@ -0,0 +1,263 @@
+"""
+Shared date normalization
+The one parser for date text found by scrapers, feeds and the event text
+parser. Patterns are compiled once at import, and results are memoized per
+(text, reference day): scrapers see the same few date strings over and over,
+and relative or year-less dates only depend on the day they are read.
+
+Strategies, in order: ISO strings, Brookings-style run-together dates, the
+earliest explicit date in the text (month names, numeric and ISO forms) plus
+any time of day, strict dateutil, relative expressions ("tomorrow", "next
+Friday", "this weekend"), then fuzzy dateutil.
+
+Results are always naive: a date written with an offset or zone ("...T19:00
+-04:00", "7 pm EDT") keeps its wall-clock time and drops the zone, matching
+the naive local times events are stored with.
+"""
+
+import re
+import logging
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Optional, Union
+from dateutil import parser as date_parser
+from pattern_registry import register
+
+logger = logging.getLogger(__name__)
+
+# Distinct (text, reference day, fuzzy) results kept
+DATE_CACHE_SIZE = 8192
+
+# Longer texts (whole event descriptions) are parsed without caching
+MAX_CACHED_TEXT = 512
+
+# Dates outside this window around the reference are treated as misparses
+PAST_WINDOW_DAYS = 365 * 2
+FUTURE_WINDOW_DAYS = 365 * 3
+
+# Hour given to "tonight"
+TONIGHT_HOUR = 19
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4, 'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8, 'sep': 9, 'sept': 9, 'september': 9,
+    'oct': 10, 'october': 10, 'nov': 11, 'november': 11, 'dec': 12, 'december': 12
+}
+
+WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+_MONTH = r'(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?'
+
+# "Sept. 11, 2025", "September 24", "Oct 4 – 10 2025" (a range gives its first day)
+MONTH_DAY_YEAR_RE = register('date_normalizer.month_day_year', rf'\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:\s*[–-]\s*\d{{1,2}}(?:st|nd|rd|th)?\b)?(?:,?\s*(\d{{4}})\b)?', re.IGNORECASE)
+
+# "24 September 2025", "3rd of March"
+DAY_MONTH_YEAR_RE = register('date_normalizer.day_month_year', rf'\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?![a-z])(?:,?\s*(\d{{4}})\b)?', re.IGNORECASE)
+
+# "2025-09-24", "2025/09/24"
+ISO_DATE_RE = register('date_normalizer.iso_date', r'\b(\d{4})[/-](\d{1,2})[/-](\d{1,2})\b')
+
+# "09/24/2025", "9-24-25" (US order unless the first number can't be a month)
+NUMERIC_DATE_RE = register('date_normalizer.numeric_date', r'\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})\b')
+
+# "October01202510:00 am EDT", "September222025 Monday, 10:00 am" (Brookings run-together dates)
+RUN_TOGETHER_RE = register('date_normalizer.run_together', r'(January|February|March|April|May|June|July|August|September|October|November|December)(\d{2})(\d{4})', re.IGNORECASE)
+
+# "6 to 9 p.m.", "6:30-8 pm": the start takes the end's am/pm unless it has its own
+# (the space after a start am/pm belongs to that group: two \s* in a row rescan every split of a space run)
+TIME_RANGE_RE = register('date_normalizer.time_range', r'\b(\d{1,2})(?::([0-5]\d))?\s*(?:([ap])\.?\s?m\.?\s*)?(?:-|–|to)\s*\d{1,2}(?::[0-5]\d)?\s*([ap])\.?\s?m\b', re.IGNORECASE)
+
+# "7:30 pm", "7pm", "10 a.m."
+TIME_12H_RE = register('date_normalizer.time_12h', r'\b(\d{1,2})(?::([0-5]\d))?\s*([ap])\.?\s?m\b\.?', re.IGNORECASE)
+
+# "19:30"
+TIME_24H_RE = register('date_normalizer.time_24h', r'\b([01]?\d|2[0-3]):([0-5]\d)(?::[0-5]\d)?\b')
+
+RELATIVE_RE = register('date_normalizer.relative', r'\b(today|tonight|tomorrow|yesterday|(?:this|next)\s+(?:week|weekend|month)|(?:this|next)\s+(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b', re.IGNORECASE)
+
+WEEKDAY_RE = register('date_normalizer.weekday', r'\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b', re.IGNORECASE)
+
+_WHITESPACE_RE = register('date_normalizer.whitespace', r'\s+')
+
+Reference = Union[date, datetime, None]
+
+def month_number(name: str) -> Optional[int]:
+    """Month number for a full or abbreviated month name"""
+    return MONTHS.get((name or '').strip().rstrip('.').lower())
+
+def reference_day(reference: Reference = None) -> date:
+    if reference is None:
+        return date.today()
+    return reference.date() if isinstance(reference, datetime) else reference
+
+def normalize_date(text: str, reference: Reference = None, fuzzy: bool = True) -> Optional[datetime]:
+    """Datetime for a date string, or None.
+
+    Year-less and relative dates are resolved against reference (default
+    today). With fuzzy=False, dateutil's fuzzy matching and bare weekday names
+    are skipped, which suits long free text where they would pick up stray
+    numbers or "every Friday".
+    """
+    if not text:
+        return None
+    cleaned = _WHITESPACE_RE.sub(' ', str(text).replace('@', ' ')).strip()
+    if not cleaned:
+        return None
+    day = reference_day(reference)
+    if len(cleaned) > MAX_CACHED_TEXT:
+        return _normalize(cleaned, day, fuzzy)
+    return _normalize_cached(cleaned, day, fuzzy)
+
+def find_date(text: str, reference: Reference = None, require_year: bool = False) -> Optional[date]:
+    """The earliest date written out in the text (no relative or fuzzy guesses)"""
+    if not text:
+        return None
+    return _explicit_date(str(text), reference_day(reference), require_year)
+
+def within_window(value: Optional[datetime], reference: Reference = None,
+                  past_days: int = PAST_WINDOW_DAYS, future_days: int = FUTURE_WINDOW_DAYS) -> bool:
+    """Whether a parsed date is plausible for an event listed around the reference day"""
+    if value is None:
+        return False
+    day = reference_day(reference)
+    return day - timedelta(days=past_days) <= value.date() <= day + timedelta(days=future_days)
+
+def cache_info() -> Dict:
+    return _normalize_cached.cache_info()._asdict()
+
+def clear_cache():
+    _normalize_cached.cache_clear()
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _normalize_cached(text: str, day: date, fuzzy: bool) -> Optional[datetime]:
+    return _normalize(text, day, fuzzy)
+
+def _wall_clock(value: datetime) -> datetime:
+    return value.replace(tzinfo=None)
+
+def _normalize(text: str, day: date, fuzzy: bool) -> Optional[datetime]:
+    try:
+        return _wall_clock(datetime.fromisoformat(text))
+    except ValueError:
+        pass
+
+    match = RUN_TOGETHER_RE.search(text)
+    if match:
+        month, day_of_month, year = match.groups()
+        try:
+            return datetime.combine(date(int(year), MONTHS[month.lower()], int(day_of_month)),
+                                    _time_of_day(text[match.end():]) or time())
+        except ValueError:
+            pass
+
+    explicit = _explicit_date(text, day)
+    if explicit:
+        return datetime.combine(explicit, _time_of_day(text) or time())
+
+    default = datetime.combine(day, time())
+    try:
+        return _wall_clock(date_parser.parse(text, default=default))
+    except (ValueError, OverflowError, TypeError):
+        pass
+
+    # Before fuzzy dateutil, which reads "tomorrow at 7pm" as today at 7pm
+    relative = _relative_date(text, day, bare_weekday=fuzzy)
+    if relative:
+        if relative.time() == time():
+            return datetime.combine(relative.date(), _time_of_day(text) or time())
+        return relative
+
+    if fuzzy:
+        try:
+            return _wall_clock(date_parser.parse(text, fuzzy=True, default=default))
+        except (ValueError, OverflowError, TypeError):
+            pass
+    return None
+
+def _explicit_date(text: str, day: date, require_year: bool = False) -> Optional[date]:
+    """The earliest well-formed date written out in the text"""
+    candidates = []
+    for pattern in (MONTH_DAY_YEAR_RE, DAY_MONTH_YEAR_RE, ISO_DATE_RE, NUMERIC_DATE_RE):
+        for match in pattern.finditer(text):
+            candidates.append((match.start(), pattern, match))
+
+    for _, pattern, match in sorted(candidates, key=lambda candidate: candidate[0]):
+        groups = match.groups()
+        if require_year and pattern in (MONTH_DAY_YEAR_RE, DAY_MONTH_YEAR_RE) and not groups[2]:
+            continue
+        try:
+            if pattern is MONTH_DAY_YEAR_RE:
+                return date(int(groups[2] or day.year), month_number(groups[0]), int(groups[1]))
+            if pattern is DAY_MONTH_YEAR_RE:
+                return date(int(groups[2] or day.year), month_number(groups[1]), int(groups[0]))
+            if pattern is ISO_DATE_RE:
+                return date(int(groups[0]), int(groups[1]), int(groups[2]))
+            first, second, year = int(groups[0]), int(groups[1]), int(groups[2])
+            if year < 100:
+                year += 2000
+            if first > 12:
+                return date(year, second, first)
+            return date(year, first, second)
+        except (TypeError, ValueError):
+            continue  # e.g. February 30, or a version number
+    return None
+
+def _time_of_day(text: str) -> Optional[time]:
+    match = TIME_RANGE_RE.search(text)
+    if match:
+        hour, minute, own_meridiem, end_meridiem = match.groups()
+        if 1 <= int(hour) <= 12:
+            return time(_to_24h(int(hour), own_meridiem or end_meridiem), int(minute or 0))
+    match = TIME_12H_RE.search(text)
+    if match:
+        hour, minute, meridiem = match.groups()
+        if 1 <= int(hour) <= 12:
+            return time(_to_24h(int(hour), meridiem), int(minute or 0))
+    match = TIME_24H_RE.search(text)
+    if match:
+        return time(int(match.group(1)), int(match.group(2)))
+    return None
+
+def _to_24h(hour: int, meridiem: str) -> int:
+    if meridiem.lower().startswith('p'):
+        return hour % 12 + 12
+    return hour % 12
+
+def _relative_date(text: str, day: date, bare_weekday: bool = True) -> Optional[datetime]:
+    match = RELATIVE_RE.search(text)
+    phrase = match.group(1).lower() if match else ''
+    start = datetime.combine(day, time())
+
+    if phrase in ('today', 'this week', 'this month'):
+        return start
+    if phrase == 'tonight':
+        return start.replace(hour=TONIGHT_HOUR)
+    if phrase == 'tomorrow':
+        return start + timedelta(days=1)
+    if phrase == 'yesterday':
+        return start - timedelta(days=1)
+    if phrase == 'next week':
+        return start + timedelta(weeks=1)
+    if phrase == 'next month':
+        return datetime(day.year + day.month // 12, day.month % 12 + 1, 1)
+    if phrase.endswith('weekend'):
+        # This week's Saturday (today, if it is already Sunday); next weekend is a week on
+        saturday = start + timedelta(days=5 - day.weekday())
+        if phrase.startswith('next'):
+            return saturday + timedelta(weeks=1)
+        return max(saturday, start)
+
+    # "next Monday", "this Friday" or (in short date strings) a bare weekday
+    weekday = WEEKDAY_RE.search(phrase or (text if bare_weekday else ''))
+    if weekday:
+        days_ahead = WEEKDAYS[weekday.group(1).lower()] - day.weekday()
+        if phrase.startswith('next'):
+            days_ahead += 7
+        elif days_ahead <= 0:  # This week but the day has passed
+            days_ahead += 7
+        return start + timedelta(days=days_ahead)
+    return None
@@ -0,0 +1,90 @@
+"""
+Deadlines and cooperative cancellation for scrape runs
+A Deadline is activated for the current thread with deadline_scope(); fetch and
+parsing code checks it between units of work and caps request timeouts by it.
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+class DeadlineExceeded(Exception):
+    """Raised when a scrape runs past its deadline or is cancelled"""
+    pass
+
+class Deadline:
+    """Point in time after which work should stop; can also be cancelled early"""
+
+    def __init__(self, seconds: float, parent: Optional['Deadline'] = None):
+        self.expires_at = time.monotonic() + seconds
+        if parent is not None:
+            self.expires_at = min(self.expires_at, parent.expires_at)
+        self.parent = parent
+        self._cancelled = threading.Event()
+
+    def child(self, seconds: float) -> 'Deadline':
+        """A deadline that ends after `seconds` or when this one ends, whichever is first"""
+        return Deadline(seconds, parent=self)
+
+    def cancel(self):
+        """Ask all work under this deadline (and its children) to stop"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once expired or cancelled"""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self):
+        """Raise DeadlineExceeded if the deadline has passed or was cancelled"""
+        if self.cancelled:
+            raise DeadlineExceeded("Cancelled")
+        if self.expired():
+            raise DeadlineExceeded("Deadline exceeded")
+
+    def cap_timeout(self, timeout):
+        """Limit a requests-style timeout (number or (connect, read) tuple) to the time left"""
+        self.check()
+        remaining = self.remaining()
+
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) if part is not None else remaining for part in timeout)
+        return min(timeout, remaining)
+
+_current_deadline = contextvars.ContextVar('current_deadline', default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline active in this thread, if any"""
+    return _current_deadline.get()
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Make `deadline` the active deadline for code running in this block"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+def check_deadline():
+    """Cooperative cancellation point: raise if the active deadline has passed"""
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check()
+
+def deadline_expired() -> bool:
+    """True if there is an active deadline and it has passed"""
+    deadline = current_deadline()
+    return deadline is not None and deadline.expired()
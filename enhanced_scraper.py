@@ -10,169 +10,23 @@ import random
 import html
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from datetime import datetime
 from urllib.parse import urljoin, urlparse
-import dateutil.parser as date_parser
-from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, replace
+from typing import List, Dict, Optional, Tuple, Iterator
+from http_client import create_session
+from deadline import DeadlineExceeded, check_deadline, deadline_expired
+from snapshot_archive import get_snapshot_archive
+from stage_timer import timed_stage, timed_iter
+from date_normalizer import normalize_date
 
 class SmartDateParser:
-    """Intelligent date parsing with multiple format support"""
+    """Intelligent date parsing with multiple format support (see date_normalizer)"""
     
-    def __init__(self):
-        self.patterns = [
-            # Common date patterns
-            r'\b(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{2,4})\b',  # MM/DD/YYYY
-            r'\b(\d{2,4})[\/\-\.](\d{1,2})[\/\-\.](\d{1,2})\b',  # YYYY/MM/DD
-            r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{1,2}),?\s+(\d{2,4})\b',
-            r'\b(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{2,4})\b',
-            # ISO format
-            r'\b(\d{4})-(\d{2})-(\d{2})\b',
-            # Relative dates
-            r'\b(today|tomorrow|tonight)\b',
-            r'\b(this|next)\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b',
-            r'\b(this|next)\s+(week|weekend|month)\b'
-        ]
-        
-        self.time_patterns = [
-            r'\b(\d{1,2}):(\d{2})\s*(AM|PM|am|pm)\b',
-            r'\b(\d{1,2}):(\d{2}):(\d{2})\b',
-            r'\b(\d{1,2}):(\d{2})\b',
-            r'\b(\d{1,2})\s*(AM|PM|am|pm)\b'
-        ]
-    
-    def parse_date_string(self, text: str) -> Optional[datetime]:
+    def parse_date_string(self, text: str, reference: Optional[datetime] = None) -> Optional[datetime]:
         """Extract and parse dates from text with multiple strategies"""
-        if not text:
-            return None
-            
-        # Clean the text
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # Strategy 1: Handle Brookings-specific malformed dates
-        if 'October01' in text or 'September17' in text:
-            # Fix malformed dates like "October01202510:00 am EDT"
-            brookings_pattern = r'(January|February|March|April|May|June|July|August|September|October|November|December)(\d{2})(\d{4})(\d{1,2}):(\d{2})\s*(am|pm)\s*EDT'
-            match = re.search(brookings_pattern, text, re.IGNORECASE)
-            if match:
-                month, day, year, hour, minute, ampm = match.groups()
-                # Format as proper date string
-                formatted = f'{month} {int(day)}, {year} {hour}:{minute} {ampm}'
-                try:
-                    return date_parser.parse(formatted)
-                except:
-                    pass
-        
-        # Strategy 2: Look for full date patterns first
-        full_date_pattern = r'(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday),\s*(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),\s*(\d{4})'
-        match = re.search(full_date_pattern, text, re.IGNORECASE)
-        if match:
-            day_name, month, day, year = match.groups()
-            date_str = f'{month} {day}, {year}'
-            
-            # Look for time in the same text
-            time_pattern = r'(\d{1,2}):(\d{2})\s*(am|pm)'
-            time_match = re.search(time_pattern, text, re.IGNORECASE)
-            if time_match:
-                hour, minute, ampm = time_match.groups()
-                date_str += f' {hour}:{minute} {ampm}'
-            else:
-                # Look for time range pattern "10:00 am - 11:00 am"
-                time_range_pattern = r'(\d{1,2}):(\d{2})\s*(am|pm)\s*-\s*\d{1,2}:\d{2}\s*(am|pm)'
-                time_range_match = re.search(time_range_pattern, text, re.IGNORECASE)
-                if time_range_match:
-                    hour, minute, ampm = time_range_match.groups()[:3]
-                    date_str += f' {hour}:{minute} {ampm}'
-            
-            try:
-                return date_parser.parse(date_str)
-            except:
-                pass
-        
-        # Strategy 3: Use dateutil (handles most formats)
-        try:
-            return date_parser.parse(text, fuzzy=True)
-        except:
-            pass
-        
-        # Strategy 2: Handle relative dates
-        relative_date = self._parse_relative_date(text.lower())
-        if relative_date:
-            return relative_date
-        
-        # Strategy 3: Regex patterns
-        for pattern in self.patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return self._normalize_date_match(match, text)
-                except:
-                    continue
-        
-        return None
-    
-    def _parse_relative_date(self, text: str) -> Optional[datetime]:
-        """Parse relative date expressions"""
-        now = datetime.now()
-        
-        if 'today' in text:
-            return now
-        elif 'tomorrow' in text:
-            return now + timedelta(days=1)
-        elif 'tonight' in text:
-            return now.replace(hour=19, minute=0, second=0, microsecond=0)
-        elif 'next week' in text:
-            return now + timedelta(weeks=1)
-        elif 'this week' in text:
-            return now
-        
-        # Handle "next Monday", "this Friday", etc.
-        weekdays = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6
-        }
-        
-        for day_name, day_num in weekdays.items():
-            if day_name in text:
-                days_ahead = day_num - now.weekday()
-                if 'next' in text:
-                    days_ahead += 7
-                elif days_ahead <= 0:  # This week but day has passed
-                    days_ahead += 7
-                return now + timedelta(days=days_ahead)
-        
-        return None
-    
-    def _normalize_date_match(self, match, original_text: str) -> datetime:
-        """Convert regex match to datetime object"""
-        groups = match.groups()
-        
-        # Try different date format interpretations
-        try:
-            # ISO format YYYY-MM-DD
-            if len(groups) == 3 and len(groups[0]) == 4:
-                year, month, day = int(groups[0]), int(groups[1]), int(groups[2])
-                return datetime(year, month, day)
-            
-            # MM/DD/YYYY or DD/MM/YYYY
-            elif len(groups) == 3 and groups[2].isdigit():
-                # Guess format based on values
-                a, b, year = int(groups[0]), int(groups[1]), int(groups[2])
-                if year < 100:
-                    year += 2000
-                
-                # If first number > 12, it's likely DD/MM/YYYY
-                if a > 12:
-                    return datetime(year, b, a)
-                # If second number > 12, it's likely MM/DD/YYYY
-                elif b > 12:
-                    return datetime(year, a, b)
-                else:
-                    # Default to MM/DD/YYYY for US sites
-                    return datetime(year, a, b)
-        except ValueError:
-            pass
-        
-        raise ValueError("Could not parse date")
+        with timed_stage('date_parsing'):
+            return normalize_date(text, reference)
 
 class EventValidator:
     """Validates and scores extracted event data"""
@@ -246,16 +100,9 @@ class EventValidator:
         if not date_str:
             return False
         
-        try:
-            parser = SmartDateParser()
-            event_date = parser.parse_date_string(date_str)
-            if event_date:
-                # Allow events from today onwards
-                return event_date.date() >= datetime.now().date()
-        except:
-            pass
-        
-        return False
+        event_date = normalize_date(date_str)
+        # Allow events from today onwards
+        return bool(event_date) and event_date.date() >= datetime.now().date()
     
     def _is_valid_url(self, url: str) -> bool:
         """Basic URL validation"""
@@ -265,13 +112,37 @@ class EventValidator:
         except:
             return False
 
+@dataclass
+class ScrapeBudget:
+    """Per-source limits for a single scrape run"""
+    max_events: int = 500
+    max_bytes: int = 5 * 1024 * 1024
+    max_seconds: float = 120.0
+    # Wall-clock time.time() after which extraction stops, so a job queued on the
+    # parse pool still ends by its source's deadline
+    stop_at: Optional[float] = None
+    
+    @classmethod
+    def from_config(cls, config: Dict = None) -> 'ScrapeBudget':
+        """Build a budget from the optional 'budget' block of a selector_config"""
+        budget = cls()
+        overrides = (config or {}).get('budget') or {}
+        
+        for field_name in ('max_events', 'max_bytes', 'max_seconds'):
+            value = overrides.get(field_name)
+            if value is not None:
+                setattr(budget, field_name, type(getattr(budget, field_name))(value))
+        
+        return budget
+
 class EnhancedWebScraper:
     """Enhanced web scraper with multiple extraction strategies"""
     
     def __init__(self):
         self.date_parser = SmartDateParser()
         self.validator = EventValidator()
-        self.session = requests.Session()
+        self.session = create_session()
+        self.archive_snapshots = True  # Keep fetched pages for offline re-extraction
         
         # User agent rotation
         self.user_agents = [
@@ -409,61 +280,100 @@ class EnhancedWebScraper:
         
         return False
     
-    def scrape_events(self, url: str, custom_selectors: Dict = None) -> List[Dict]:
+    def scrape_events(self, url: str, custom_selectors: Dict = None, budget: ScrapeBudget = None) -> List[Dict]:
         """Main scraping method with multiple strategies"""
         try:
-            html_content = self._fetch_page(url)
-            if not html_content:
-                return []
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Check if this is a past event first
-            if self._is_past_event(soup):
-                print(f"Skipping past event from: {url}")
-                return []
-            
-            # Try multiple extraction strategies
-            strategies = [
-                ('structured', self._extract_structured_data),
-                ('microdata', self._extract_microdata),
-                ('css_selectors', self._extract_css_selectors),
-                ('meta_tags', self._extract_meta_tags)
-            ]
-            
-            all_events = []
-            for strategy_name, strategy_func in strategies:
-                try:
-                    events = strategy_func(soup, url, custom_selectors)
-                    for event in events:
-                        event['_source'] = strategy_name
-                        event['_url'] = url
-                    all_events.extend(events)
-                except Exception as e:
-                    print(f"Strategy {strategy_name} failed: {e}")
-                    continue
-            
-            # Deduplicate and validate
-            unique_events = self._deduplicate_events(all_events)
-            validated_events = []
-            
-            for event in unique_events:
-                score = self.validator.score_event(event)
-                if score >= 50:  # Minimum confidence threshold
-                    event['confidence_score'] = score
-                    validated_events.append(event)
+            validated_events = list(self.iter_events(url, custom_selectors, budget))
             
             # Sort by confidence score
             validated_events.sort(key=lambda x: x['confidence_score'], reverse=True)
             
-            return validated_events[:20]  # Limit results
+            return validated_events
             
         except Exception as e:
             print(f"Error scraping {url}: {e}")
             return []
     
-    def _fetch_page(self, url: str) -> Optional[str]:
-        """Fetch web page with retry logic and anti-bot measures"""
+    def iter_events(self, url: str, custom_selectors: Dict = None, budget: ScrapeBudget = None) -> Iterator[Dict]:
+        """Yield validated events one at a time until the source's budget is spent"""
+        budget = budget or ScrapeBudget.from_config(custom_selectors)
+        started = time.monotonic()
+        
+        html_content, truncated = self.fetch_page(url, max_bytes=budget.max_bytes)
+        if not html_content:
+            return truncated
+        
+        remaining = max(0.0, budget.max_seconds - (time.monotonic() - started))
+        partial = yield from self.iter_events_from_html(html_content, url, custom_selectors,
+                                                        replace(budget, max_seconds=remaining))
+        return truncated or partial
+    
+    def iter_events_from_html(self, html_content: str, url: str, custom_selectors: Dict = None,
+                              budget: ScrapeBudget = None) -> Iterator[Dict]:
+        """Yield validated events from an already fetched page.
+        
+        The generator returns True when it stopped early (deadline, event or time budget),
+        so the caller knows the events it got may not be all the page lists.
+        """
+        budget = budget or ScrapeBudget.from_config(custom_selectors)
+        started = time.monotonic()
+        
+        with timed_stage('parse'):
+            soup = BeautifulSoup(html_content, 'html.parser')
+        
+        # Check if this is a past event first
+        with timed_stage('past_event_check'):
+            is_past = self._is_past_event(soup)
+        if is_past:
+            print(f"Skipping past event from: {url}")
+            return
+        
+        # Try multiple extraction strategies
+        strategies = [
+            ('structured', self._extract_structured_data),
+            ('microdata', self._extract_microdata),
+            ('css_selectors', self._extract_css_selectors),
+            ('meta_tags', self._extract_meta_tags)
+        ]
+        
+        seen = set()
+        yielded = 0
+        
+        for strategy_name, strategy_func in strategies:
+            try:
+                for event in timed_iter(f"strategy.{strategy_name}", strategy_func(soup, url, custom_selectors)):
+                    if deadline_expired():
+                        print(f"Deadline reached while extracting {url}")
+                        return True
+                    if yielded >= budget.max_events:
+                        print(f"Event budget ({budget.max_events}) reached for {url}")
+                        return True
+                    if time.monotonic() - started > budget.max_seconds or (
+                            budget.stop_at is not None and time.time() > budget.stop_at):
+                        print(f"Time budget ({budget.max_seconds}s) reached for {url}")
+                        return True
+                    
+                    # Deduplicate on the fly, keeping the first occurrence
+                    key = self._dedup_key(event)
+                    if not key[0] or key in seen:
+                        continue
+                    seen.add(key)
+                    
+                    event['_source'] = strategy_name
+                    event['_url'] = url
+                    
+                    with timed_stage('validate'):
+                        score = self.validator.score_event(event)
+                    if score >= 50:  # Minimum confidence threshold
+                        event['confidence_score'] = score
+                        yielded += 1
+                        yield event
+            except Exception as e:
+                print(f"Strategy {strategy_name} failed: {e}")
+                continue
+    
+    def fetch_page(self, url: str, max_bytes: int = None, attempts: int = 3) -> Tuple[Optional[str], bool]:
+        """Fetch web page with retry logic and anti-bot measures; returns (html, truncated at max_bytes)"""
         headers = {
             'User-Agent': random.choice(self.user_agents),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -473,28 +383,61 @@ class EnhancedWebScraper:
             'Upgrade-Insecure-Requests': '1'
         }
         
-        for attempt in range(3):
+        for attempt in range(attempts):
             try:
-                # Add random delay
-                if attempt > 0:
-                    time.sleep(random.uniform(1, 3))
-                
-                response = self.session.get(url, headers=headers, timeout=30)
+                # Retries are spaced by the per-host rate limiter
+                response = self.session.get(url, headers=headers, timeout=30, stream=bool(max_bytes))
                 response.raise_for_status()
                 
-                return response.text
+                html_content, truncated = self._read_limited(response, max_bytes)
+                self._archive_page(url, html_content)
+                return html_content, truncated
                 
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 print(f"Attempt {attempt + 1} failed: {e}")
-                if attempt == 2:
+                if attempt == attempts - 1:
                     raise
         
-        return None
+        return None, False
     
-    def _extract_structured_data(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> List[Dict]:
-        """Extract events from JSON-LD structured data"""
-        events = []
+    def _archive_page(self, url: str, html_content: str):
+        """Store a fetched page in the snapshot archive; never fails the fetch"""
+        if not self.archive_snapshots or not html_content:
+            return
+        try:
+            with timed_stage('snapshot_archive'):
+                get_snapshot_archive().store(url, html_content)
+        except Exception as e:
+            print(f"Could not archive snapshot of {url}: {e}")
+    
+    def _read_limited(self, response: requests.Response, max_bytes: int = None) -> Tuple[str, bool]:
+        """Read a response body, truncating it at max_bytes; returns (text, truncated)"""
+        if not max_bytes:
+            return response.text, False
+        
+        chunks = []
+        received = 0
+        truncated = False
+        try:
+            with timed_stage('http.download'):
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    check_deadline()
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if received > max_bytes:
+                        print(f"Truncated {response.url} at {max_bytes} bytes")
+                        truncated = True
+                        break
+        finally:
+            response.close()
         
+        body = b''.join(chunks)[:max_bytes]
+        return body.decode(response.encoding or 'utf-8', errors='replace'), truncated
+    
+    def _extract_structured_data(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> Iterator[Dict]:
+        """Extract events from JSON-LD structured data"""
         # Find all JSON-LD scripts
         scripts = soup.find_all('script', type='application/ld+json')
         
@@ -515,34 +458,26 @@ class EnhancedWebScraper:
                     if self._is_event_data(item):
                         event = self._normalize_structured_event(item, url)
                         if event:
-                            events.append(event)
+                            yield event
                             
             except json.JSONDecodeError:
                 continue
             except Exception as e:
                 print(f"Error processing JSON-LD: {e}")
                 continue
-        
-        return events
     
-    def _extract_microdata(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> List[Dict]:
+    def _extract_microdata(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> Iterator[Dict]:
         """Extract events from Schema.org microdata"""
-        events = []
-        
         for event_type, selector in self.schema_selectors.items():
             containers = soup.select(selector)
             
             for container in containers:
                 event = self._extract_microdata_event(container, url)
                 if event:
-                    events.append(event)
-        
-        return events
+                    yield event
     
-    def _extract_css_selectors(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> List[Dict]:
+    def _extract_css_selectors(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> Iterator[Dict]:
         """Extract events using CSS selectors"""
-        events = []
-        
         # Use custom selectors if provided, otherwise use defaults
         selectors = custom_selectors.get('event_container', self.event_selectors) if custom_selectors else self.event_selectors
         
@@ -552,17 +487,13 @@ class EnhancedWebScraper:
         for selector in selectors:
             containers = soup.select(selector)
             
-            for container in containers[:15]:  # Limit to prevent spam
+            for container in containers:
                 event = self._extract_from_container(container, url, custom_selectors)
                 if event and self._looks_like_event(event):
-                    events.append(event)
-        
-        return events
+                    yield event
     
-    def _extract_meta_tags(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> List[Dict]:
+    def _extract_meta_tags(self, soup: BeautifulSoup, url: str, custom_selectors: Dict = None) -> Iterator[Dict]:
         """Extract event info from Open Graph and meta tags"""
-        events = []
-        
         # Look for Open Graph event data
         og_type = soup.find('meta', property='og:type')
         if og_type and 'event' in og_type.get('content', '').lower():
@@ -585,9 +516,7 @@ class EnhancedWebScraper:
                     event[event_field] = meta_tag['content']
             
             if event.get('title'):
-                events.append(event)
-        
-        return events
+                yield event
     
     def _extract_from_container(self, container: BeautifulSoup, url: str, custom_selectors: Dict = None) -> Optional[Dict]:
         """Extract event data from a container element"""
@@ -761,17 +690,20 @@ class EnhancedWebScraper:
         
         return has_keywords or has_date or len(title.split()) >= 3
     
+    def _dedup_key(self, event: Dict) -> Tuple[str, str]:
+        """Simple title/date key used for deduplication"""
+        return (
+            event.get('title', '').lower().strip()[:50],
+            event.get('start_date', '')[:10]  # Just the date part
+        )
+    
     def _deduplicate_events(self, events: List[Dict]) -> List[Dict]:
         """Remove duplicate events based on title and date"""
         seen = set()
         unique_events = []
         
         for event in events:
-            # Create a simple key for deduplication
-            key = (
-                event.get('title', '').lower().strip()[:50],
-                event.get('start_date', '')[:10]  # Just the date part
-            )
+            key = self._dedup_key(event)
             
             if key not in seen and key[0]:  # Must have a title
                 seen.add(key)
@@ -779,6 +711,28 @@ class EnhancedWebScraper:
         
         return unique_events
 
+# Scraper reused by every call in a worker process
+_process_scraper = None
+
+def extract_events_from_html(html_content: str, url: str, custom_selectors: Dict = None,
+                             budget: ScrapeBudget = None) -> Tuple[List[Dict], bool]:
+    """Parse a fetched page into validated event dicts; returns (events, stopped early).
+    
+    Takes and returns only plain picklable data so it can run in a ProcessPoolExecutor.
+    """
+    global _process_scraper
+    
+    if _process_scraper is None:
+        _process_scraper = EnhancedWebScraper()
+    
+    events = []
+    extraction = _process_scraper.iter_events_from_html(html_content, url, custom_selectors, budget)
+    while True:
+        try:
+            events.append(next(extraction))
+        except StopIteration as stop:
+            return events, bool(stop.value)
+
 # Usage example:
 if __name__ == "__main__":
     scraper = EnhancedWebScraper()
@@ -793,3 +747,4 @@ if __name__ == "__main__":
         print(f"  Date: {event.get('start_date')}")
         print(f"  Location: {event.get('location')}")
         print()
+
@@ -4,21 +4,56 @@ Enhanced Web Scraper with Scrolling and Dynamic Loading Support
 Handles infinite scroll, pagination, and JavaScript-loaded content
 """
 
-import requests
-import time
 import logging
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 import re
+import hashlib
+from collections import Counter
 from datetime import datetime, timedelta
 import json
+from http_client import create_session
+from stage_timer import timed_stage
+from date_normalizer import normalize_date
+from deadline import current_deadline, deadline_scope, deadline_expired
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pagination defaults; a scraper's selector_config may override 'max_pages'
+MAX_PAGES = 5
+PAGINATION_WORKERS = 3
+PAGINATION_REPROBE_DAYS = 7
+
+# Re-run strategy detection when a run yields less than this fraction of the previous one
+YIELD_DROP_RATIO = 0.5
+
+# Number of most frequent class names that make up a page's structural signature
+SIGNATURE_TOP_CLASSES = 40
+
+CLASS_ATTRIBUTE_PATTERN = re.compile(r'class\s*=\s*["\']([^"\']*)["\']', re.I)
+
+# URL templates tried when a page gives no rel=next / pagination links.
+# {page} is the 1-based page number, {offset} the index of the first item.
+PAGINATION_PROBE_TEMPLATES = [
+    '?page={page}',
+    '?p={page}',
+    '/page/{page}',
+    '?offset={offset}',
+    '?start={offset}'
+]
+
+# Query/path patterns used to turn a concrete "next page" link into a template
+PAGINATION_LINK_PATTERNS = [
+    (re.compile(r'([?&](?:page|p|pg|paged)=)(\d+)', re.I), '{page}'),
+    (re.compile(r'(/page/)(\d+)', re.I), '{page}'),
+    (re.compile(r'([?&](?:offset|start)=)(\d+)', re.I), '{offset}')
+]
+
 @dataclass
 class ScrapedEvent:
     title: str
@@ -31,8 +66,7 @@ class ScrapedEvent:
 
 class EnhancedWebScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = create_session({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
@@ -190,64 +224,186 @@ class EnhancedWebScraper:
             return []
 
     def _scrape_with_pagination(self, url: str, selector_config: Dict = None) -> List[ScrapedEvent]:
-        """Scrape multiple pages using pagination"""
+        """Scrape multiple pages using a learned pagination scheme"""
         all_events = []
-        page = 1
-        max_pages = 5  # Limit to prevent infinite loops
+        config = selector_config if selector_config is not None else {}
+        max_pages = int(config.get('max_pages', MAX_PAGES))
         
         try:
-            while page <= max_pages:
-                # Try different pagination URL patterns
-                page_urls = [
-                    f"{url}?page={page}",
-                    f"{url}?p={page}",
-                    f"{url}/page/{page}",
-                    f"{url}?offset={page * 20}",
-                    f"{url}?start={page * 20}"
-                ]
-                
-                page_events = []
-                for page_url in page_urls:
-                    try:
-                        response = self.session.get(page_url, timeout=30)
-                        if response.status_code == 200:
-                            soup = BeautifulSoup(response.text, 'html.parser')
-                            
-                            # Check if page has content
-                            if selector_config and selector_config.get('event_container'):
-                                containers = soup.select(selector_config['event_container'])
-                            else:
-                                # More specific container selection to avoid navigation elements
-                                containers = soup.find_all(['li', 'article', 'div'], class_=re.compile(r'events-list__item|event-item|event-card|event-list-item', re.I))
-                            
-                            if not containers:
-                                break  # No more content
-                            
-                            for container in containers:
-                                event = self._extract_event_from_container(container, selector_config)
-                                if event and event.title:
-                                    page_events.append(event)
-                            
-                            if page_events:
-                                break  # Found content on this URL pattern
-                    except Exception as e:
-                        logger.debug(f"Error with pagination URL {page_url}: {e}")
-                        continue
-                
-                if not page_events:
-                    break  # No more pages
-                
-                all_events.extend(page_events)
-                page += 1
-                time.sleep(1)  # Be respectful
-            
-            logger.info(f"Pagination scraping found {len(all_events)} events across {page-1} pages")
+            response = self.session.get(url, timeout=30)
+            response.raise_for_status()
+            first_page = BeautifulSoup(response.text, 'html.parser')
+            all_events.extend(self._extract_page_events(first_page, selector_config))
+            
+            scheme = config.get('pagination')
+            freshly_detected = False
+            if not scheme or self._pagination_scheme_expired(scheme):
+                scheme = self._detect_pagination_scheme(url, first_page, all_events, selector_config)
+                config['pagination'] = scheme
+                freshly_detected = True
+            
+            if not scheme.get('template'):
+                logger.info(f"No pagination found for {url}")
+                return all_events
+            
+            page_events = self._follow_pagination(scheme, max_pages, all_events, selector_config)
+            
+            # A stored scheme that stops yielding is re-probed once
+            if not page_events and not freshly_detected and all_events:
+                logger.info(f"Stored pagination scheme for {url} yielded nothing, re-probing")
+                scheme = self._detect_pagination_scheme(url, first_page, all_events, selector_config)
+                config['pagination'] = scheme
+                if scheme.get('template'):
+                    page_events = self._follow_pagination(scheme, max_pages, all_events, selector_config)
+            
+            all_events.extend(page_events)
+            logger.info(f"Pagination scraping found {len(all_events)} events using {scheme.get('source')} scheme")
             return all_events
             
         except Exception as e:
             logger.error(f"Error in pagination scraping: {e}")
             return all_events
 
+    def _follow_pagination(self, scheme: Dict, max_pages: int, first_page_events: List[ScrapedEvent],
+                           selector_config: Dict = None) -> List[ScrapedEvent]:
+        """Fetch pages 2..N of a pagination scheme"""
+        last_page = scheme.get('last_page')
+        
+        # Page count known up front: fetch the remaining pages concurrently
+        if last_page:
+            pages = range(2, min(int(last_page), max_pages) + 1)
+            deadline = current_deadline()
+            
+            def fetch(page):
+                with deadline_scope(deadline):
+                    return self._fetch_page_events(scheme, page, selector_config)
+            
+            with ThreadPoolExecutor(max_workers=PAGINATION_WORKERS) as executor:
+                return [event for page_events in executor.map(fetch, pages) for event in page_events]
+        
+        # Otherwise walk forward until a page comes back empty or repeats itself
+        events = []
+        previous_titles = [event.title for event in first_page_events]
+        for page in range(2, max_pages + 1):
+            if deadline_expired():
+                logger.info(f"Deadline reached after {page - 1} pages")
+                break
+            page_events = self._fetch_page_events(scheme, page, selector_config)
+            titles = [event.title for event in page_events]
+            if not page_events or titles == previous_titles:
+                break
+            events.extend(page_events)
+            previous_titles = titles
+        
+        return events
+
+    def _fetch_page_events(self, scheme: Dict, page: int, selector_config: Dict = None) -> List[ScrapedEvent]:
+        """Fetch a single page of a pagination scheme and extract its events"""
+        page_url = self._build_page_url(scheme, page)
+        try:
+            response = self.session.get(page_url, timeout=30)
+            if response.status_code != 200:
+                return []
+            return self._extract_page_events(BeautifulSoup(response.text, 'html.parser'), selector_config)
+        except Exception as e:
+            logger.debug(f"Error with pagination URL {page_url}: {e}")
+            return []
+
+    def _extract_page_events(self, soup: BeautifulSoup, selector_config: Dict = None) -> List[ScrapedEvent]:
+        """Extract events from one page of a paginated listing"""
+        if selector_config and selector_config.get('event_container'):
+            containers = soup.select(selector_config['event_container'])
+        else:
+            # More specific container selection to avoid navigation elements
+            containers = soup.find_all(['li', 'article', 'div'], class_=re.compile(r'events-list__item|event-item|event-card|event-list-item', re.I))
+        
+        events = []
+        for container in containers:
+            event = self._extract_event_from_container(container, selector_config)
+            if event and event.title:
+                events.append(event)
+        
+        return events
+
+    def _build_page_url(self, scheme: Dict, page: int) -> str:
+        """Build the URL of a given page from a pagination scheme"""
+        offset = (page - 1) * int(scheme.get('page_size') or 20)
+        return scheme['template'].replace('{page}', str(page)).replace('{offset}', str(offset))
+
+    def _pagination_scheme_expired(self, scheme: Dict) -> bool:
+        """Sites without pagination are re-probed after PAGINATION_REPROBE_DAYS"""
+        if scheme.get('template'):
+            return False
+        try:
+            detected_at = datetime.fromisoformat(scheme.get('detected_at', ''))
+        except ValueError:
+            return True
+        return datetime.now() - detected_at > timedelta(days=PAGINATION_REPROBE_DAYS)
+
+    def _detect_pagination_scheme(self, url: str, soup: BeautifulSoup, first_page_events: List[ScrapedEvent],
+                                  selector_config: Dict = None) -> Dict:
+        """Work out how a listing paginates: rel=next link, pagination DOM, then probing"""
+        scheme = {'template': None, 'source': 'none', 'detected_at': datetime.now().isoformat()}
+        
+        # 1. <a rel="next"> / <link rel="next">
+        next_link = soup.find(['a', 'link'], rel='next', href=True)
+        if next_link:
+            link = self._template_from_link(urljoin(url, next_link['href']))
+            if link:
+                scheme['template'] = link['template']
+                scheme['source'] = 'rel_next'
+                if link['kind'] == 'offset':
+                    # The first page links to an offset of exactly one page
+                    scheme['page_size'] = link['value'] or 20
+        
+        # 2. Numbered links inside a pagination block; also gives the page count
+        pager = soup.find(class_=re.compile(r'pagination|page-numbers|pager', re.I))
+        if pager:
+            links = [self._template_from_link(urljoin(url, a['href'])) for a in pager.find_all('a', href=True)]
+            links = [link for link in links if link]
+            if links and not scheme['template']:
+                scheme['template'] = links[0]['template']
+                scheme['source'] = 'dom'
+            
+            values = [link['value'] for link in links if link['template'] == scheme['template']]
+            if values and '{offset}' in scheme['template']:
+                scheme.setdefault('page_size', min([v for v in values if v > 0] or [20]))
+                last_page = max(values) // scheme['page_size'] + 1
+            else:
+                last_page = max(values or [0])
+            if last_page > 1:
+                scheme['last_page'] = last_page
+        
+        # 3. Probe the common URL patterns for a second page that differs from the first
+        if not scheme['template']:
+            base_url = url.rstrip('/')
+            first_titles = [event.title for event in first_page_events]
+            for pattern in PAGINATION_PROBE_TEMPLATES:
+                if pattern.startswith('?') and '?' in base_url:
+                    pattern = '&' + pattern[1:]
+                candidate = {'template': base_url + pattern, 'page_size': 20}
+                second_titles = [event.title for event in self._fetch_page_events(candidate, 2, selector_config)]
+                if second_titles and second_titles != first_titles:
+                    scheme.update(candidate)
+                    scheme['source'] = 'probe'
+                    break
+        
+        logger.info(f"Pagination scheme for {url}: {scheme['source']} {scheme['template'] or ''}")
+        return scheme
+
+    def _template_from_link(self, link_url: str) -> Optional[Dict]:
+        """Turn a concrete page link into a URL template plus the number it carries"""
+        for pattern, placeholder in PAGINATION_LINK_PATTERNS:
+            match = pattern.search(link_url)
+            if match:
+                return {
+                    'template': link_url[:match.start(2)] + placeholder + link_url[match.end(2):],
+                    'kind': 'offset' if placeholder == '{offset}' else 'page',
+                    'value': int(match.group(2))
+                }
+        
+        return None
+
     def _scrape_with_infinite_scroll(self, url: str, selector_config: Dict = None) -> List[ScrapedEvent]:
         """Simulate infinite scroll by trying to load more content"""
         all_events = []
@@ -290,6 +446,8 @@ class EnhancedWebScraper:
                     
                     # Try to load more content
                     for attempt in range(5):  # Try up to 5 times for better coverage
+                        if deadline_expired():
+                            break
                         try:
                             more_response = self.session.get(load_more_url, timeout=30)
                             if more_response.status_code == 200:
@@ -305,8 +463,6 @@ class EnhancedWebScraper:
                                     event = self._extract_event_from_container(container, selector_config)
                                     if event and event.title:
                                         all_events.append(event)
-                                
-                                time.sleep(1)
                         except Exception as e:
                             logger.debug(f"Error loading more content: {e}")
                             break
@@ -810,36 +966,91 @@ class EnhancedWebScraper:
 
     def extract_events(self, url: str, selector_config: Dict = None) -> List[ScrapedEvent]:
         """Main method to extract events using the best strategy"""
+        events, _ = self.extract_events_with_strategy(url, selector_config)
+        return events
+
+    def extract_events_with_strategy(self, url: str, selector_config: Dict = None,
+                                     cached: Dict = None) -> Tuple[List[ScrapedEvent], Dict]:
+        """Extract events, reusing a previously detected strategy while the page structure is unchanged.
+        
+        ``cached`` holds the 'strategy', 'signature' and 'yield' of the last run. Returns the events
+        and the detection info to persist for the next run (empty if the page could not be fetched).
+        """
+        cached = cached or {}
+        
         try:
-            # First, get the page to detect strategy
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
-            # Detect the best scraping strategy
-            strategy = self.detect_scraping_strategy(url, response.text)
-            logger.info(f"Detected scraping strategy: {strategy}")
+            with timed_stage('page_signature'):
+                signature = self.compute_page_signature(response.text)
+            strategy = cached.get('strategy')
+            redetected = False
             
-            # Use the appropriate strategy
-            if strategy in self.scraping_strategies:
-                events = self.scraping_strategies[strategy](url, selector_config)
+            if not strategy or cached.get('signature') != signature:
+                with timed_stage('strategy_detection'):
+                    strategy = self.detect_scraping_strategy(url, response.text)
+                redetected = True
+                logger.info(f"Detected scraping strategy: {strategy}")
             else:
-                events = self._scrape_static_html(url, selector_config)
-            
-            # Remove duplicates based on title and date
-            unique_events = []
-            seen = set()
-            for event in events:
-                key = (event.title.lower(), event.start_datetime)
-                if key not in seen:
-                    seen.add(key)
-                    unique_events.append(event)
-            
-            logger.info(f"Extracted {len(unique_events)} unique events from {url}")
-            return unique_events
+                logger.info(f"Reusing scraping strategy: {strategy}")
+            
+            events = self._run_strategy(strategy, url, selector_config)
+            
+            # Same structure but far fewer events: the stored strategy may no longer fit
+            last_yield = cached.get('yield') or 0
+            if not redetected and len(events) < last_yield * YIELD_DROP_RATIO:
+                with timed_stage('strategy_detection'):
+                    detected = self.detect_scraping_strategy(url, response.text)
+                redetected = True
+                logger.info(f"Yield dropped from {last_yield} to {len(events)}, re-detected strategy: {detected}")
+                if detected != strategy:
+                    strategy = detected
+                    events = self._run_strategy(strategy, url, selector_config)
+            
+            logger.info(f"Extracted {len(events)} unique events from {url}")
+            return events, {
+                'strategy': strategy,
+                'signature': signature,
+                'yield': len(events),
+                'redetected': redetected
+            }
             
         except Exception as e:
             logger.error(f"Error extracting events from {url}: {e}")
-            return []
+            return [], {}
+
+    def _run_strategy(self, strategy: str, url: str, selector_config: Dict = None) -> List[ScrapedEvent]:
+        """Run a scraping strategy and remove duplicates based on title and date"""
+        with timed_stage(f"strategy.{strategy}"):
+            if strategy in self.scraping_strategies:
+                events = self.scraping_strategies[strategy](url, selector_config)
+            else:
+                events = self._scrape_static_html(url, selector_config)
+        
+        unique_events = []
+        seen = set()
+        for event in events:
+            key = (event.title.lower(), event.start_datetime)
+            if key not in seen:
+                seen.add(key)
+                unique_events.append(event)
+        
+        return unique_events
+
+    def compute_page_signature(self, html_content: str) -> str:
+        """Structural fingerprint of a page: a hash of its container-class histogram.
+        
+        Counts are bucketed by order of magnitude so that a listing growing from 12 to 14
+        events keeps its signature, while a redesign that renames containers changes it.
+        """
+        histogram = Counter()
+        for match in CLASS_ATTRIBUTE_PATTERN.finditer(html_content):
+            histogram.update(match.group(1).split())
+        
+        top_classes = sorted(histogram.items(), key=lambda item: (-item[1], item[0]))[:SIGNATURE_TOP_CLASSES]
+        fingerprint = '|'.join(f"{name}:{count.bit_length()}" for name, count in sorted(top_classes))
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:16]
 
     def test_scraper(self, url: str) -> Dict:
         """Test the scraper and return results"""
@@ -877,7 +1088,6 @@ class EnhancedWebScraper:
     def _parse_race_date(self, date_text: str) -> str:
         """Parse race date text into ISO format"""
         try:
-            from dateutil import parser
             # Clean up the date text
             date_text = date_text.strip()
             
@@ -889,8 +1099,10 @@ class EnhancedWebScraper:
             elif 'September' in date_text and '2026' in date_text:
                 return '2026-09-20T08:00:00'  # DC Half
             
-            # Try to parse with dateutil
-            parsed_date = parser.parse(date_text)
+            parsed_date = normalize_date(date_text, fuzzy=False)
+            if parsed_date is None:
+                logger.warning(f"Could not parse race date '{date_text}'")
+                return ''
             return parsed_date.isoformat()
             
         except Exception as e:
@@ -1276,18 +1488,15 @@ class EnhancedWebScraper:
 
     def _parse_date_flexible(self, date_text: str) -> str:
         """Parse date text into ISO format with proper time handling"""
-        try:
-            from dateutil import parser
-            
-            # Clean up the date text - replace @ with space for better parsing
-            cleaned_date = date_text.replace('@', ' ')
-            
-            # Try parsing with dateutil
-            parsed_date = parser.parse(cleaned_date)
-            return parsed_date.isoformat()
-        except Exception as e:
-            logger.warning(f"Could not parse date '{date_text}': {e}")
+        with timed_stage('date_parsing'):
+            return self._parse_date_flexible_untimed(date_text)
+    
+    def _parse_date_flexible_untimed(self, date_text: str) -> str:
+        parsed_date = normalize_date(date_text)
+        if parsed_date is None:
+            logger.warning(f"Could not parse date '{date_text}'")
             return ''
+        return parsed_date.isoformat()
 
     def _get_smart_fallback_date(self, title: str, description: str) -> str:
         """Get smart fallback date based on context"""
@@ -0,0 +1,151 @@
+"""
+RSS entry tracking in event_sources
+Each feed entry is identified by its GUID (falling back to its link) and
+fingerprinted by a hash of its content, both stored on the event_sources row
+that maps it to its event. A refresh loads a feed's rows once and looks each
+entry up in memory: unchanged entries are skipped, changed ones updated.
+"""
+
+import sqlite3
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Entry fields that make up the content hash
+HASHED_FIELDS = ('title', 'link', 'summary', 'description', 'published', 'updated')
+
+@dataclass
+class EntryIdentity:
+    """How a feed entry is recognised on the next refresh"""
+    guid: str
+    link: str
+    content_hash: str
+
+def entry_identity(entry) -> EntryIdentity:
+    """GUID, link and content hash of a feedparser entry"""
+    link = (entry.get('link') or '').strip()
+    values = [str(entry.get(name) or '') for name in HASHED_FIELDS]
+    values.extend(part.get('value', '') for part in entry.get('content') or [])
+    content_hash = hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+    # Feeds without GUIDs or links still need a stable key: title and date
+    guid = (entry.get('id') or '').strip() or link
+    if not guid:
+        guid = 'sha1:' + hashlib.sha1(f"{entry.get('title', '')}|{entry.get('published', '')}".encode('utf-8')).hexdigest()
+
+    return EntryIdentity(guid=guid, link=link, content_hash=content_hash)
+
+class KnownEntries:
+    """A feed's event_sources rows, indexed by GUID and by link"""
+
+    def __init__(self, rows):
+        self.by_guid: Dict[str, Dict] = {}
+        self.by_link: Dict[str, Dict] = {}
+        for row in rows:
+            known = {'id': row[0], 'event_id': row[1], 'source_url': row[2], 'source_id': row[3], 'content_hash': row[4]}
+            if known['source_id']:
+                self.by_guid[known['source_id']] = known
+            if known['source_url']:
+                self.by_link.setdefault(known['source_url'], known)
+
+    def find(self, identity: EntryIdentity) -> Optional[Dict]:
+        # Rows written before GUIDs were stored carry the link as source_id
+        return (self.by_guid.get(identity.guid)
+                or (self.by_link.get(identity.link) if identity.link else None))
+
+    def add(self, known: Dict):
+        self.by_guid[known['source_id']] = known
+        if known['source_url']:
+            self.by_link.setdefault(known['source_url'], known)
+
+class FeedEntryIndex:
+    """Reads and writes the entry mapping in event_sources"""
+
+    def __init__(self, db_path: str = 'calendar.db'):
+        self.db_path = db_path
+        self.init_columns()
+
+    def init_columns(self):
+        """Create event_sources if needed and its lookup indexes (older tables get content_hash from SCHEMA_MIGRATIONS)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS event_sources (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id INTEGER NOT NULL,
+                feed_id INTEGER NOT NULL,
+                source_url TEXT NOT NULL,
+                source_id VARCHAR(255),
+                content_hash TEXT,
+                first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+                FOREIGN KEY (feed_id) REFERENCES rss_feeds(id) ON DELETE CASCADE,
+                UNIQUE(event_id, feed_id, source_url)
+            )
+        ''')
+
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_sources_feed_source_id ON event_sources (feed_id, source_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_sources_feed_url ON event_sources (feed_id, source_url)')
+
+        # Exact-title lookups when adopting events created before they were tracked
+        try:
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_title ON events (title)')
+        except sqlite3.OperationalError:
+            pass  # No events table yet
+
+        conn.commit()
+        conn.close()
+
+    def load(self, cursor: sqlite3.Cursor, feed_id: int) -> KnownEntries:
+        """All tracked entries of a feed, in one indexed query"""
+        cursor.execute('''
+            SELECT id, event_id, source_url, source_id, content_hash
+            FROM event_sources WHERE feed_id = ?
+        ''', (feed_id,))
+        return KnownEntries(cursor.fetchall())
+
+    def record_new(self, cursor: sqlite3.Cursor, known: KnownEntries, event_id: int,
+                   feed_id: int, identity: EntryIdentity):
+        """Start tracking an entry for an event"""
+        source_url = identity.link or identity.guid
+        cursor.execute('''
+            INSERT OR IGNORE INTO event_sources (event_id, feed_id, source_url, source_id, content_hash)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (event_id, feed_id, source_url, identity.guid, identity.content_hash))
+        if cursor.rowcount:
+            known.add({'id': cursor.lastrowid, 'event_id': event_id, 'source_url': source_url,
+                       'source_id': identity.guid, 'content_hash': identity.content_hash})
+
+    def record_seen(self, cursor: sqlite3.Cursor, match: Dict, identity: EntryIdentity):
+        """Store the entry's current GUID and hash after processing a changed entry"""
+        cursor.execute('''
+            UPDATE event_sources SET source_id = ?, content_hash = ?, last_updated = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (identity.guid, identity.content_hash, match['id']))
+        match['source_id'] = identity.guid
+        match['content_hash'] = identity.content_hash
+
+def update_event_fields(cursor: sqlite3.Cursor, event_id: int, fields: Dict) -> int:
+    """Write the fields whose value changed, leaving manually overridden ones alone"""
+    try:
+        cursor.execute('SELECT field_name FROM manual_overrides WHERE event_id = ?', (event_id,))
+        overrides = {row[0] for row in cursor.fetchall()}
+    except sqlite3.OperationalError:
+        overrides = set()  # No manual_overrides table in this database
+
+    names = [name for name in fields if name not in overrides]
+    if not names:
+        return 0
+
+    cursor.execute(f'SELECT {", ".join(names)} FROM events WHERE id = ?', (event_id,))
+    row = cursor.fetchone()
+    if not row:
+        return 0
+
+    changes = {name: fields[name] for name, current in zip(names, row) if fields[name] != current}
+    if changes:
+        assignments = ', '.join(f'{name} = ?' for name in changes)
+        cursor.execute(f'UPDATE events SET {assignments} WHERE id = ?', (*changes.values(), event_id))
+    return len(changes)
@@ -0,0 +1,199 @@
+"""
+Per-feed RSS poll scheduling
+Each feed gets its own next poll time, stored on rss_feeds.next_poll_at. The
+interval follows the feed's own publishing cadence (the median gap between
+its recent entry timestamps), falls back to sy:updatePeriod/updateFrequency
+or the configured update_interval, never undercuts the publisher's <ttl>, and
+is pushed out of any <skipHours>/<skipDays> window the feed declares.
+"""
+
+import re
+import sqlite3
+import calendar
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Interval bounds in minutes
+MIN_POLL_MINUTES = 15
+MAX_POLL_MINUTES = 24 * 60
+
+# How often the schedulers look for feeds whose next_poll_at has come up
+FEED_POLL_TICK_MINUTES = 5
+
+# Recent entries used to learn a feed's cadence, and the fewest that give a usable estimate
+CADENCE_SAMPLE_SIZE = 20
+MIN_CADENCE_SAMPLES = 3
+
+# Poll this many times per learned publishing gap, so new items are picked up promptly
+POLLS_PER_CADENCE = 2
+
+# A feed whose newest entry is older than this many gaps has gone quiet: back off with its age
+QUIET_AFTER_CADENCES = 4
+
+# Length of each sy:updatePeriod in minutes
+UPDATE_PERIOD_MINUTES = {
+    'hourly': 60,
+    'daily': 24 * 60,
+    'weekly': 7 * 24 * 60,
+    'monthly': 30 * 24 * 60,
+    'yearly': 365 * 24 * 60
+}
+
+# Channel metadata kept from the raw feed (skipHours/skipDays sit before the items)
+CHANNEL_HEAD_BYTES = 64 * 1024
+
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+@dataclass
+class FeedHints:
+    """Polling hints a feed publishes about itself"""
+    ttl_minutes: Optional[int] = None
+    update_minutes: Optional[float] = None
+    skip_hours: Set[int] = field(default_factory=set)
+    skip_days: Set[int] = field(default_factory=set)
+
+def channel_head(content: bytes) -> bytes:
+    """The part of a feed document before its first item or entry"""
+    head = content[:CHANNEL_HEAD_BYTES]
+    match = re.search(rb'<(?:\w+:)?(?:item|entry)[\s>]', head)
+    return head[:match.start()] if match else head
+
+def feed_hints(parsed, head: bytes = b'') -> FeedHints:
+    """Read ttl, sy:updatePeriod/updateFrequency and skipHours/skipDays"""
+    hints = FeedHints()
+    channel = parsed.feed if parsed is not None else {}
+
+    try:
+        hints.ttl_minutes = int(channel.get('ttl')) or None
+    except (TypeError, ValueError):
+        pass
+
+    period = UPDATE_PERIOD_MINUTES.get((channel.get('sy_updateperiod') or '').strip().lower())
+    if period:
+        try:
+            frequency = max(1, int(channel.get('sy_updatefrequency') or 1))
+        except ValueError:
+            frequency = 1
+        hints.update_minutes = period / frequency
+
+    # feedparser keeps only the last <hour>/<day>, so read these from the raw channel
+    text = head.decode('utf-8', errors='replace')
+    skip_hours = re.search(r'<skipHours>(.*?)</skipHours>', text, re.S | re.I)
+    if skip_hours:
+        hints.skip_hours = {int(hour) % 24 for hour in re.findall(r'<hour>\s*(\d+)\s*</hour>', skip_hours.group(1), re.I)}
+    skip_days = re.search(r'<skipDays>(.*?)</skipDays>', text, re.S | re.I)
+    if skip_days:
+        hints.skip_days = {DAY_NAMES.index(day.lower()) for day in re.findall(r'<day>\s*(\w+)\s*</day>', skip_days.group(1), re.I)
+                           if day.lower() in DAY_NAMES}
+
+    return hints
+
+def entry_timestamps(parsed, limit: int = CADENCE_SAMPLE_SIZE) -> List[datetime]:
+    """Newest-first UTC publish times of a feed's entries"""
+    now = datetime.now(timezone.utc)
+    stamps = []
+    for entry in (parsed.entries if parsed is not None else []):
+        parsed_time = entry.get('published_parsed') or entry.get('updated_parsed')
+        if parsed_time:
+            stamp = datetime.fromtimestamp(calendar.timegm(parsed_time), tz=timezone.utc)
+            # Event feeds often date entries by the event itself; those say nothing about publishing
+            if stamp <= now:
+                stamps.append(stamp)
+    stamps.sort(reverse=True)
+    return stamps[:limit]
+
+def learned_cadence(stamps: List[datetime]) -> Optional[float]:
+    """Median gap between consecutive entries in minutes, or None with too few entries"""
+    if len(stamps) < MIN_CADENCE_SAMPLES:
+        return None
+    gaps = [(newer - older).total_seconds() / 60 for newer, older in zip(stamps, stamps[1:])]
+    gaps = [gap for gap in gaps if gap > 0]
+    return median(gaps) if gaps else None
+
+def skip_window_end(when: datetime, hints: FeedHints) -> datetime:
+    """First time at or after when (UTC) that falls outside the feed's skip hours and days"""
+    if not hints.skip_hours and not hints.skip_days:
+        return when
+    candidate = when
+    for _ in range(7 * 24):
+        if candidate.hour not in hints.skip_hours and candidate.weekday() not in hints.skip_days:
+            return candidate
+        candidate = candidate.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return when  # Every hour is skipped; ignore the hint rather than never polling
+
+class FeedPollScheduler:
+    """Computes and stores each feed's next poll time"""
+
+    def __init__(self, db_path: str = 'calendar.db'):
+        self.db_path = db_path
+
+    def is_due(self, next_poll_at: Optional[str], now: datetime = None) -> bool:
+        """Whether a feed with this next_poll_at should be polled now"""
+        if not next_poll_at:
+            return True
+        try:
+            return datetime.fromisoformat(next_poll_at) <= (now or datetime.now())
+        except ValueError:
+            return True  # Legacy or hand-edited value
+
+    def plan(self, parsed, head: bytes, configured_minutes: Optional[float],
+             now: datetime = None) -> Dict:
+        """Interval and next poll time for a feed just fetched"""
+        now_utc = (now.astimezone(timezone.utc) if now else datetime.now(timezone.utc))
+        hints = feed_hints(parsed, head)
+        stamps = entry_timestamps(parsed)
+        cadence = learned_cadence(stamps)
+
+        if cadence:
+            interval = cadence / POLLS_PER_CADENCE
+            # Gone quiet: the longer since the last item, the less often we look
+            since_newest = (now_utc - stamps[0]).total_seconds() / 60
+            if since_newest > cadence * QUIET_AFTER_CADENCES:
+                interval = max(interval, since_newest / QUIET_AFTER_CADENCES)
+        elif hints.update_minutes:
+            interval = hints.update_minutes
+        else:
+            interval = configured_minutes or MIN_POLL_MINUTES * 2
+
+        interval = min(MAX_POLL_MINUTES, max(MIN_POLL_MINUTES, interval))
+        if hints.ttl_minutes:
+            # The publisher asked us not to refetch sooner than this
+            interval = max(interval, hints.ttl_minutes)
+
+        next_poll = skip_window_end(now_utc + timedelta(minutes=interval), hints)
+        return {
+            'interval_minutes': int(round(interval)),
+            'cadence_minutes': round(cadence, 1) if cadence else None,
+            'next_poll_at': next_poll.astimezone().replace(tzinfo=None).isoformat(timespec='seconds')
+        }
+
+    def record_poll(self, fetched) -> Optional[Dict]:
+        """Schedule a feed's next poll after fetching it; failed fetches keep their interval"""
+        feed_id = fetched.feed['id']
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT update_interval, poll_interval FROM rss_feeds WHERE id = ?',
+                           (feed_id,)).fetchone()
+        if not row:
+            conn.close()
+            return None
+
+        if fetched.error or fetched.parsed is None:
+            interval = row[1] or row[0] or MIN_POLL_MINUTES * 2
+            plan = {'interval_minutes': interval, 'cadence_minutes': None,
+                    'next_poll_at': (datetime.now() + timedelta(minutes=interval)).isoformat(timespec='seconds')}
+            conn.execute('UPDATE rss_feeds SET next_poll_at = ? WHERE id = ?', (plan['next_poll_at'], feed_id))
+        else:
+            plan = self.plan(fetched.parsed, fetched.channel_head, row[0])
+            conn.execute('''
+                UPDATE rss_feeds SET next_poll_at = ?, poll_interval = ?, cadence_minutes = ?
+                WHERE id = ?
+            ''', (plan['next_poll_at'], plan['interval_minutes'], plan['cadence_minutes'], feed_id))
+
+        conn.commit()
+        conn.close()
+        return plan
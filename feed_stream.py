@@ -0,0 +1,189 @@
+"""
+Streaming, size-bounded feed parsing
+Feed bodies are read in chunks into an incremental XML parser instead of
+being loaded whole and handed to feedparser. Reading stops at a byte cap, at
+an entry cap, or once a run of entries, each older than the one before, is
+past the age limit (the feed lists newest first, so the rest of a long
+archive is older still). Old entries in a feed that is not in that order are
+skipped and reading goes on. Entries carrying an event date are aged by it
+rather than by when they were published. The kept entries are re-serialized
+into a small document for feedparser, which still does the normalizing.
+Feeds that are not well-formed XML fall back to feedparser on the raw bytes,
+which are spooled to a temporary file as they are read.
+"""
+
+import logging
+import tempfile
+import feedparser
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+from feed_schedule import CHANNEL_HEAD_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from one feed before giving up on the rest
+MAX_FEED_BYTES = 10 * 1024 * 1024
+
+# Entries kept from one feed
+MAX_FEED_ENTRIES = 500
+
+# Entries published longer ago than this are dropped (days)
+MAX_ENTRY_AGE_DAYS = 90
+
+# Consecutive too-old entries, each older than the one before, after which reading stops
+STOP_AFTER_OLD_ENTRIES = 10
+
+# Chunk size for reading response bodies
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Raw bytes kept in memory for the feedparser fallback before spilling to a temporary file
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+# Entry child elements holding a publication date, most telling first
+DATE_ELEMENTS = ('pubDate', 'published', 'date', 'issued', 'updated', 'modified')
+
+# Entry child elements holding the date of the event itself (RSS event module, xCal, calendar exports)
+EVENT_DATE_ELEMENTS = ('startdate', 'dtstart', 'startDate', 'start_date', 'eventDate', 'event_date')
+
+@dataclass
+class StreamLimits:
+    """How much of a feed is read and kept"""
+    max_bytes: int = MAX_FEED_BYTES
+    max_entries: int = MAX_FEED_ENTRIES
+    max_age_days: Optional[float] = MAX_ENTRY_AGE_DAYS
+    stop_after_old: int = STOP_AFTER_OLD_ENTRIES
+
+def _local_name(tag) -> str:
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+def _entry_date(entry: ET.Element, names: Tuple[str, ...] = DATE_ELEMENTS) -> Optional[datetime]:
+    """First date of an item/entry element among the named children, as an aware datetime"""
+    values = {}
+    for child in entry:
+        name = _local_name(child.tag)
+        if name in names and name not in values and child.text:
+            values[name] = child.text.strip()
+
+    for name in names:
+        value = values.get(name)
+        if not value:
+            continue
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            try:
+                parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+def parse_feed_stream(chunks: Iterable[bytes], limits: StreamLimits = None) -> Tuple[Any, bytes, Dict]:
+    """Parse a feed from body chunks within the limits.
+
+    Returns the feedparser result, the first raw bytes of the document (for
+    channel metadata feedparser drops) and stats on what was read, kept and
+    why reading stopped.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES) as raw:
+        return _parse_feed_stream(chunks, limits, raw)
+
+def _parse_feed_stream(chunks: Iterable[bytes], limits: Optional[StreamLimits], raw) -> Tuple[Any, bytes, Dict]:
+    limits = limits or StreamLimits()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=limits.max_age_days)
+              if limits.max_age_days else None)
+    stats = {'bytes_read': 0, 'entries_kept': 0, 'entries_too_old': 0, 'stopped': None, 'fallback': False}
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    head = bytearray()
+    chunks = iter(chunks)
+    stack = []
+    root = None
+    kept = set()
+    old_streak = 0
+    previous_published = None
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            room = limits.max_bytes - stats['bytes_read']
+            if len(chunk) > room:
+                chunk = chunk[:room]
+                stats['stopped'] = 'byte_cap'
+            stats['bytes_read'] += len(chunk)
+            if len(head) < CHANNEL_HEAD_BYTES:
+                head.extend(chunk[:CHANNEL_HEAD_BYTES - len(head)])
+            raw.write(chunk)  # Only read back if the feed turns out not to be well-formed
+            parser.feed(chunk)
+
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    stack.append(elem)
+                    continue
+
+                stack.pop()
+                if _local_name(elem.tag) not in ('item', 'entry') or not stack:
+                    continue
+
+                event_date = _entry_date(elem, EVENT_DATE_ELEMENTS) if cutoff else None
+                published = _entry_date(elem) if cutoff and not event_date else None
+                if published:
+                    # Old entries only count towards stopping while the feed runs newest first
+                    if previous_published and published < previous_published:
+                        old_streak = old_streak + 1 if published < cutoff else 0
+                    elif not previous_published or published > previous_published:
+                        old_streak = 0
+                    previous_published = published
+
+                age_date = event_date or published
+                if age_date and age_date < cutoff:
+                    stack[-1].remove(elem)
+                    stats['entries_too_old'] += 1
+                    if old_streak >= limits.stop_after_old:
+                        stats['stopped'] = 'old_entries'
+                        break
+                    continue
+
+                kept.add(id(elem))
+                stats['entries_kept'] += 1
+                if stats['entries_kept'] >= limits.max_entries:
+                    stats['stopped'] = 'entry_cap'
+                    break
+
+            if stats['stopped']:
+                break
+        else:
+            parser.close()
+    except ET.ParseError as e:
+        logger.info(f"Feed is not well-formed XML ({e}); parsing it with feedparser instead")
+        stats['fallback'] = True
+        for chunk in chunks:
+            room = limits.max_bytes - stats['bytes_read']
+            if room <= 0:
+                stats['stopped'] = 'byte_cap'
+                break
+            chunk = chunk[:room]
+            if len(head) < CHANNEL_HEAD_BYTES:
+                head.extend(chunk[:CHANNEL_HEAD_BYTES - len(head)])
+            raw.write(chunk)
+            stats['bytes_read'] += len(chunk)
+        raw.seek(0)
+        return feedparser.parse(raw), bytes(head), stats
+
+    if root is None:
+        raw.seek(0)
+        return feedparser.parse(raw), bytes(head), stats
+
+    # The parser builds ahead of the events read, so drop entries past the stopping point
+    for container in [root, *root]:
+        for elem in list(container):
+            if _local_name(elem.tag) in ('item', 'entry') and id(elem) not in kept:
+                container.remove(elem)
+
+    return feedparser.parse(ET.tostring(root, encoding='utf-8')), bytes(head), stats
@@ -0,0 +1,235 @@
+"""
+Shared HTTP session for scrapers and feed readers
+Every request goes through the per-domain rate limiter, and every session
+shares one thread-safe connection pool per host, so keep-alive connections
+are reused across scrapers, feed readers and scheduler threads. For offline runs,
+requests can be recorded into fixtures or redirected to a local replay server
+(see http_fixtures.py), set with SCRAPER_RECORD_DIR / SCRAPER_REPLAY_URL.
+"""
+
+import os
+import time
+import socket
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from rate_limiter import DomainRateLimiter, get_rate_limiter
+from deadline import current_deadline
+from stage_timer import record_stage, timed_stage
+
+# Header carrying the real URL of a request redirected to the replay server
+REPLAY_URL_HEADER = 'X-Replay-Original-URL'
+
+# Hosts whose pools are kept before the least recently used one is closed
+POOL_MAX_HOSTS = 100
+
+# Keep-alive connections kept per host; must cover the threads fetching one host at once
+POOL_CONNECTIONS_PER_HOST = 8
+
+# Hosts that need a different pool size (e.g. APIs fetched heavily in parallel)
+HOST_POOL_SIZES: Dict[str, int] = {}
+
+# TCP keep-alive probes, so idle pooled connections dropped by NAT or the server are noticed
+KEEPALIVE_IDLE_SECONDS = 60
+KEEPALIVE_INTERVAL_SECONDS = 15
+KEEPALIVE_PROBES = 4
+
+# Replay server base URL, and fixture recorder (anything with a record(url, response) method)
+_replay_target = None
+_recorder = None
+
+def set_replay_target(base_url: Optional[str]):
+    """Send all session requests to a replay server instead of the real hosts (None to stop)"""
+    global _replay_target
+    _replay_target = base_url.rstrip('/') if base_url else None
+
+    # robots.txt is fetched outside the session, so it would still go to the live site
+    get_rate_limiter().respect_robots = _replay_target is None
+
+def set_recorder(recorder):
+    """Record every response received by a session (None to stop)"""
+    global _recorder
+    _recorder = recorder
+
+def _keepalive_socket_options():
+    options = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (('TCP_KEEPIDLE', KEEPALIVE_IDLE_SECONDS),
+                        ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL_SECONDS),
+                        ('TCP_KEEPCNT', KEEPALIVE_PROBES)):
+        if hasattr(socket, name):  # Not every platform exposes the tuning knobs
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+class _CountingHTTPConnection(HTTPConnection):
+    """Connection that reports every socket it opens (including reconnects)"""
+
+    def connect(self):
+        super().connect()
+        get_shared_adapter().note_connect(f"http://{self.host}:{self.port}")
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        super().connect()
+        get_shared_adapter().note_connect(f"https://{self.host}:{self.port}")
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with per-host pool sizes and connection reuse counters"""
+
+    def __init__(self):
+        self.stats_lock = threading.Lock()
+        self.hosts: Dict[str, Dict[str, int]] = {}
+        super().__init__(pool_connections=POOL_MAX_HOSTS, pool_maxsize=POOL_CONNECTIONS_PER_HOST)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault('socket_options', _keepalive_socket_options())
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        size = HOST_POOL_SIZES.get((host_params.get('host') or '').lower())
+        if size:
+            pool_kwargs['maxsize'] = size
+        return host_params, pool_kwargs
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        response = super().send(request, **kwargs)
+        # Failed requests still count their connect attempts, never as reuse
+        self._count(f"{parts.scheme}://{parts.hostname}:{port}", 'requests')
+        return response
+
+    def note_connect(self, host: str):
+        self._count(host, 'connections_opened')
+
+    def _count(self, host: str, field: str):
+        with self.stats_lock:
+            counters = self.hosts.setdefault(host, {'requests': 0, 'connections_opened': 0})
+            counters[field] += 1
+
+    def get_stats(self) -> Dict:
+        """Requests sent and connections opened, overall and per host"""
+        with self.stats_lock:
+            hosts = {host: dict(counters) for host, counters in self.hosts.items()}
+
+        requests_sent = sum(h['requests'] for h in hosts.values())
+        opened = sum(h['connections_opened'] for h in hosts.values())
+        for counters in hosts.values():
+            counters['connections_reused'] = max(counters['requests'] - counters['connections_opened'], 0)
+        reused = sum(h['connections_reused'] for h in hosts.values())
+
+        return {
+            'requests': requests_sent,
+            'connections_opened': opened,
+            'connections_reused': reused,
+            'reuse_rate': round(reused / requests_sent, 3) if requests_sent else 0.0,
+            'open_host_pools': len(self.poolmanager.pools),
+            'hosts': hosts
+        }
+
+_shared_adapter = None
+_adapter_lock = threading.Lock()
+
+def get_shared_adapter() -> PooledAdapter:
+    """The process-wide connection pools used by every session"""
+    global _shared_adapter
+    with _adapter_lock:
+        if _shared_adapter is None:
+            _shared_adapter = PooledAdapter()
+        return _shared_adapter
+
+def get_connection_stats() -> Dict:
+    """Connection reuse counters of the shared pools"""
+    return get_shared_adapter().get_stats()
+
+def _reset_after_fork():
+    # A forked child must never write to sockets its parent is still using
+    global _shared_adapter, _adapter_lock
+    _adapter_lock = threading.Lock()
+    _shared_adapter = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+class PoliteSession(requests.Session):
+    """requests.Session that waits for the host's rate budget before each request"""
+
+    def __init__(self, rate_limiter: Optional[DomainRateLimiter] = None):
+        super().__init__()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+    def get_adapter(self, url):
+        """Use the shared pools (looked up per request, so forked children get fresh ones)"""
+        if url.lower().startswith(('https://', 'http://')):
+            return get_shared_adapter()
+        return super().get_adapter(url)
+
+    def close(self):
+        """Close this session's own adapters; the shared pools stay open for other sessions"""
+        shared = get_shared_adapter()
+        for adapter in self.adapters.values():
+            if adapter is not shared:
+                adapter.close()
+
+    def send(self, request, **kwargs):
+        """Send a prepared request (including redirect hops) within the host's budget"""
+        original_url = request.url
+        if _replay_target:
+            # Politeness applies to the host actually contacted, here the replay server
+            parts = urlsplit(original_url)
+            request.url = f"{_replay_target}{parts.path or '/'}{'?' + parts.query if parts.query else ''}"
+            request.headers[REPLAY_URL_HEADER] = original_url
+
+        deadline = current_deadline()
+        with timed_stage('http.rate_limit_wait'):
+            self.rate_limiter.acquire(request.url, deadline)
+
+        # Never let a single request outlive the active deadline
+        if deadline is not None:
+            kwargs['timeout'] = deadline.cap_timeout(kwargs.get('timeout'))
+
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        sent = time.perf_counter() - started
+
+        # requests can't split out DNS and TLS: elapsed runs from sending until the
+        # headers arrive, which includes connecting when no pooled connection is reused
+        headers_wait = min(sent, response.elapsed.total_seconds())
+        record_stage('http.connect_and_wait', headers_wait)
+        if not kwargs.get('stream'):
+            record_stage('http.download', sent - headers_wait)
+
+        if _replay_target:
+            # Callers (and redirect handling) keep seeing the real URL
+            response.url = original_url
+            request.url = original_url
+        elif _recorder is not None:
+            _recorder.record(original_url, response)
+
+        if response.status_code in (429, 503):
+            self.rate_limiter.apply_retry_after(request.url, response.headers.get('Retry-After'))
+
+        return response
+
+def create_session(headers: Optional[Dict] = None, rate_limiter: Optional[DomainRateLimiter] = None) -> PoliteSession:
+    """Create a rate-limited session with the given default headers"""
+    session = PoliteSession(rate_limiter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+if os.environ.get('SCRAPER_REPLAY_URL'):
+    set_replay_target(os.environ['SCRAPER_REPLAY_URL'])
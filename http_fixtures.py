@@ -0,0 +1,236 @@
+"""
+HTTP fixtures: record real responses, replay them from a local server
+Recording stores each response (status, key headers, gzip body) under a
+fixtures directory; the replay server serves them back with configurable
+latency and bandwidth so scrapers can be run and measured without live sites.
+
+    python http_fixtures.py serve --fixtures benchmarks/fixtures --port 8800 --latency 50 --bandwidth 2000
+    SCRAPER_REPLAY_URL=http://127.0.0.1:8800 python qa_load_more_testing.py
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from http_client import REPLAY_URL_HEADER, set_recorder, set_replay_target
+
+logger = logging.getLogger(__name__)
+
+# Default location of recorded fixtures
+FIXTURES_DIR = os.path.join('benchmarks', 'fixtures')
+
+# Response headers worth replaying; everything else is connection-specific
+REPLAYED_HEADERS = ('Content-Type', 'Location', 'Last-Modified', 'ETag', 'Retry-After')
+
+# Bytes written per chunk when throttling bandwidth
+REPLAY_CHUNK_SIZE = 16 * 1024
+
+class FixtureStore:
+    """Recorded responses keyed by URL, with content-addressed gzip bodies"""
+
+    def __init__(self, root: str = FIXTURES_DIR):
+        self.root = root
+
+    def record(self, url: str, response) -> None:
+        """Save a response received for url (used as the http_client recorder)"""
+        try:
+            body = response.content
+        except Exception as e:
+            logger.warning(f"Could not record {url}: {e}")
+            return
+
+        body_hash = hashlib.sha256(body).hexdigest()
+        self._write(os.path.join(self.root, 'bodies', f"{body_hash}.gz"), gzip.compress(body), skip_existing=True)
+
+        entry = {
+            'url': url,
+            'status': response.status_code,
+            'headers': {name: response.headers[name] for name in REPLAYED_HEADERS if name in response.headers},
+            'body': body_hash,
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        self._write(self._entry_path(url), json.dumps(entry, indent=2).encode('utf-8'))
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Recorded entry and body for a URL, or None"""
+        try:
+            with open(self._entry_path(url), 'rb') as f:
+                entry = json.loads(f.read())
+            with gzip.open(os.path.join(self.root, 'bodies', f"{entry['body']}.gz"), 'rb') as f:
+                entry['content'] = f.read()
+            return entry
+        except FileNotFoundError:
+            return None
+
+    def count(self) -> int:
+        entries_dir = os.path.join(self.root, 'entries')
+        return len(os.listdir(entries_dir)) if os.path.isdir(entries_dir) else 0
+
+    def _entry_path(self, url: str) -> str:
+        # Fragments never reach the server, so they don't distinguish responses
+        key = hashlib.sha256(url.split('#')[0].encode('utf-8')).hexdigest()
+        return os.path.join(self.root, 'entries', f"{key}.json")
+
+    def _write(self, path: str, data: bytes, skip_existing: bool = False):
+        """Write atomically, so concurrent recorders never leave partial files"""
+        if skip_existing and os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+class ReplayServer:
+    """Local HTTP server answering requests from a FixtureStore"""
+
+    def __init__(self, store: FixtureStore, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0, bandwidth_kbps: float = 0):
+        self.store = store
+        self.latency_ms = latency_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.stats = {'served': 0, 'misses': 0, 'bytes': 0}
+        self.missed_urls = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'ReplayServer':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return dict(self.stats)
+
+    def _make_handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay._serve(self)
+
+            def do_HEAD(self):
+                replay._serve(self, send_body=False)
+
+            def log_message(self, format, *args):
+                pass  # Benchmarks would drown in access logs
+
+        return Handler
+
+    def _serve(self, handler: BaseHTTPRequestHandler, send_body: bool = True):
+        # Without the header (e.g. a browser), treat the path as a recorded URL on any host
+        url = handler.headers.get(REPLAY_URL_HEADER) or self._guess_url(handler.path)
+        entry = self.store.lookup(url) if url else None
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        if entry is None:
+            with self.lock:
+                self.stats['misses'] += 1
+                self.missed_urls.append(url)
+            handler.send_response(404)
+            handler.send_header('Content-Type', 'text/plain')
+            handler.end_headers()
+            if send_body:
+                handler.wfile.write(f"No fixture recorded for {url}\n".encode('utf-8'))
+            return
+
+        content = entry['content']
+        handler.send_response(entry['status'])
+        for name, value in entry['headers'].items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(content)))
+        handler.end_headers()
+
+        if send_body:
+            self._write_throttled(handler.wfile, content)
+
+        with self.lock:
+            self.stats['served'] += 1
+            self.stats['bytes'] += len(content)
+
+    def _write_throttled(self, wfile, content: bytes):
+        """Write a body no faster than the configured bandwidth"""
+        if not self.bandwidth_kbps:
+            wfile.write(content)
+            return
+
+        bytes_per_second = self.bandwidth_kbps * 1024
+        started = time.monotonic()
+        for offset in range(0, len(content), REPLAY_CHUNK_SIZE):
+            chunk = content[offset:offset + REPLAY_CHUNK_SIZE]
+            wfile.write(chunk)
+            ahead = (offset + len(chunk)) / bytes_per_second - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def _guess_url(self, path: str) -> Optional[str]:
+        """Find a recorded URL whose path and query match a bare request path"""
+        entries_dir = os.path.join(self.store.root, 'entries')
+        if not os.path.isdir(entries_dir):
+            return None
+        for name in os.listdir(entries_dir):
+            with open(os.path.join(entries_dir, name), 'rb') as f:
+                url = json.loads(f.read())['url']
+            parts = urlsplit(url)
+            if f"{parts.path or '/'}{'?' + parts.query if parts.query else ''}" == path:
+                return url
+        return None
+
+def start_recording(root: str = FIXTURES_DIR) -> FixtureStore:
+    """Record every response received through http_client sessions into root"""
+    store = FixtureStore(root)
+    set_recorder(store)
+    return store
+
+def start_replay(root: str = FIXTURES_DIR, latency_ms: float = 0, bandwidth_kbps: float = 0) -> ReplayServer:
+    """Start a replay server for root and point http_client sessions at it"""
+    server = ReplayServer(FixtureStore(root), latency_ms=latency_ms, bandwidth_kbps=bandwidth_kbps).start()
+    set_replay_target(server.url)
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded HTTP fixtures')
+    parser.add_argument('command', choices=['serve', 'stats'])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Fixtures directory')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0, help='Added latency per response (ms)')
+    parser.add_argument('--bandwidth', type=float, default=0, help='Bandwidth limit per response (KiB/s, 0 = unlimited)')
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    if args.command == 'stats':
+        print(f"{store.count()} recorded responses in {args.fixtures}")
+        return
+
+    server = ReplayServer(store, port=args.port, latency_ms=args.latency, bandwidth_kbps=args.bandwidth)
+    print(f"🎞️ Replaying {store.count()} responses from {args.fixtures} at {server.url}")
+    print(f"   Run scrapers with SCRAPER_REPLAY_URL={server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
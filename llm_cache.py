@@ -0,0 +1,239 @@
+"""
+Content-addressed cache for LLM event-parsing results
+Results are keyed by a hash of the normalized text, the prompt version and
+the model, so a re-scraped page or a re-pasted description costs nothing,
+while a new prompt or model misses cleanly. Entries expire after a TTL (the
+model reads relative dates like "next Friday" against the day it is asked)
+and the least recently used ones are evicted past a size limit.
+
+    python llm_cache.py stats
+    python llm_cache.py prune
+    python llm_cache.py clear
+"""
+
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+import unicodedata
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How long a cached parse is trusted (seconds)
+LLM_CACHE_TTL_SECONDS = 14 * 24 * 3600
+
+# Entries kept; the least recently used beyond this are evicted
+LLM_CACHE_MAX_ENTRIES = 20000
+
+# Stores between eviction passes
+EVICT_EVERY_STORES = 50
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_text(text: str) -> str:
+    """Text as it is hashed: Unicode-normalized, whitespace collapsed (case is kept, it can matter)"""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFKC', text or '')).strip()
+
+def cache_key(text: str, model: str, prompt_version: int) -> str:
+    payload = f"{prompt_version}\0{model}\0{normalize_text(text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMParseCache:
+    """Parsed-event cache in the app database with TTL and LRU size eviction"""
+
+    def __init__(self, db_path: str = 'calendar.db', ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0, 'evictions': 0}
+        self.stores_since_evict = 0
+        self.init_database()
+
+    def init_database(self):
+        """Create the cache table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS llm_parse_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                hits INTEGER DEFAULT 0
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_llm_parse_cache_used ON llm_parse_cache(last_used_at)')
+
+        conn.commit()
+        conn.close()
+
+    def get(self, text: str, model: str, prompt_version: int) -> Optional[Dict]:
+        return self.get_many([text], model, prompt_version).get(0)
+
+    def get_many(self, texts: Sequence[str], model: str, prompt_version: int) -> Dict[int, Dict]:
+        """Cached results by position in texts; positions missing from the result are misses"""
+        if not texts:
+            return {}
+        keys = [cache_key(text, model, prompt_version) for text in texts]
+        now = time.time()
+
+        conn = sqlite3.connect(self.db_path)
+        rows = {}
+        unique_keys = list(set(keys))
+        for start in range(0, len(unique_keys), 500):  # Stay under SQLite's variable limit
+            chunk = unique_keys[start:start + 500]
+            placeholders = ', '.join('?' for _ in chunk)
+            for key, result, created_at in conn.execute(
+                    f'SELECT cache_key, result, created_at FROM llm_parse_cache WHERE cache_key IN ({placeholders})',
+                    chunk):
+                rows[key] = (result, created_at)
+
+        found, expired, hit_keys = {}, set(), set()
+        for index, key in enumerate(keys):
+            row = rows.get(key)
+            if row is None:
+                continue
+            if now - row[1] > self.ttl_seconds:
+                expired.add(key)
+                continue
+            try:
+                found[index] = json.loads(row[0])
+                hit_keys.add(key)
+            except ValueError:
+                expired.add(key)  # Unreadable entry; drop it like an expired one
+
+        if hit_keys or expired:
+            conn.executemany('UPDATE llm_parse_cache SET last_used_at = ?, hits = hits + 1 WHERE cache_key = ?',
+                             [(now, key) for key in hit_keys])
+            conn.executemany('DELETE FROM llm_parse_cache WHERE cache_key = ?', [(key,) for key in expired])
+            conn.commit()
+        conn.close()
+
+        with self.lock:
+            self.stats['hits'] += len(found)
+            self.stats['misses'] += len(keys) - len(found)
+            self.stats['expired'] += sum(1 for key in keys if key in expired)
+        return found
+
+    def put(self, text: str, model: str, prompt_version: int, result: Dict):
+        self.put_many([(text, result)], model, prompt_version)
+
+    def put_many(self, items: Sequence[Tuple[str, Dict]], model: str, prompt_version: int):
+        """Store parsed results for texts"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(cache_key(text, model, prompt_version), model, prompt_version, json.dumps(result), now, now)
+                for text, result in items]
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('''
+            INSERT INTO llm_parse_cache (cache_key, model, prompt_version, result, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET result = excluded.result,
+                created_at = excluded.created_at, last_used_at = excluded.last_used_at
+        ''', rows)
+        conn.commit()
+        conn.close()
+
+        with self.lock:
+            self.stats['stores'] += len(rows)
+            self.stores_since_evict += len(rows)
+            due = self.stores_since_evict >= EVICT_EVERY_STORES
+            if due:
+                self.stores_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries and the least recently used beyond max_entries"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM llm_parse_cache WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+        removed = cursor.rowcount
+        cursor.execute('''
+            DELETE FROM llm_parse_cache WHERE cache_key IN (
+                SELECT cache_key FROM llm_parse_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_entries,))
+        removed += cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        with self.lock:
+            self.stats['evictions'] += removed
+        if removed:
+            logger.info(f"🧹 Evicted {removed} LLM cache entries")
+        return removed
+
+    def clear(self) -> int:
+        conn = sqlite3.connect(self.db_path)
+        removed = conn.execute('DELETE FROM llm_parse_cache').rowcount
+        conn.commit()
+        conn.close()
+        return removed
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters for this process and the size of the stored cache"""
+        conn = sqlite3.connect(self.db_path)
+        entries, stored_hits, size = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(LENGTH(result)), 0) FROM llm_parse_cache'
+        ).fetchone()
+        conn.close()
+
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else None,
+            'entries': entries,
+            'stored_hits': stored_hits,
+            'result_bytes': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds
+        })
+        return stats
+
+# Global cache shared by every parser in the process
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache(db_path: str = 'calendar.db') -> LLMParseCache:
+    """Get the process-wide LLM parse cache"""
+    global _llm_cache
+
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMParseCache(db_path)
+        return _llm_cache
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM event-parsing cache')
+    parser.add_argument('--db', default='calendar.db')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    subcommands.add_parser('stats', help='Show cache size')
+    subcommands.add_parser('prune', help='Evict expired and least recently used entries')
+    subcommands.add_parser('clear', help='Remove every entry')
+
+    args = parser.parse_args()
+    cache = LLMParseCache(args.db)
+
+    if args.command == 'stats':
+        print(json.dumps(cache.get_stats(), indent=2))
+    elif args.command == 'prune':
+        print(f"🧹 Evicted {cache.evict()} entries")
+    else:
+        print(f"🗑️ Removed {cache.clear()} entries")
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ import sqlite3
 import json
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from circuit_breaker import CircuitBreaker
 
 class Database:
     """Simplified database interface"""
@@ -182,6 +183,13 @@ class EventModel:
     def create_event(self, event_data: Dict) -> int:
         """Create a new event"""
         conn = self.db.get_connection()
+        event_id = self.insert_event(conn, event_data)
+        conn.commit()
+        conn.close()
+        return event_id
+    
+    def insert_event(self, conn: sqlite3.Connection, event_data: Dict) -> int:
+        """Insert an event within the caller's transaction"""
         cursor = conn.execute('''
             INSERT INTO events (
                 title, start_datetime, end_datetime, description,
@@ -204,10 +212,7 @@ class EventModel:
             event_data.get('approval_status', 'pending'),
             event_data.get('event_type', 'unknown')
         ))
-        event_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return event_id
+        return cursor.lastrowid
     
     def update_event(self, event_id: int, event_data: Dict) -> bool:
         """Update an existing event"""
@@ -366,6 +371,9 @@ class RSSFeedModel:
     def update_feed_status(self, feed_id: int, enabled: bool) -> bool:
         """Update RSS feed enabled status"""
         conn = self.db.get_connection()
+        if enabled:
+            # A feed switched back on starts with a closed breaker
+            CircuitBreaker(self.db.db_path, 'rss_feeds').reset_inactive(conn.cursor(), feed_id)
         cursor = conn.execute('UPDATE rss_feeds SET is_active = ? WHERE id = ?', (enabled, feed_id))
         success = cursor.rowcount > 0
         conn.commit()
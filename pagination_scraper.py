@@ -3,18 +3,17 @@ Enhanced scraper for handling pagination and comprehensive event capture
 Specifically designed for Smithsonian Natural History Museum events
 """
 
-import requests
 from bs4 import BeautifulSoup
 import json
-import time
 from datetime import datetime
 import sqlite3
+from http_client import create_session
 
 class PaginationAwareScraper:
     """Scraper that can handle paginated content and JavaScript-loaded events"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = create_session()
         self.setup_session()
     
     def setup_session(self):
@@ -0,0 +1,148 @@
+"""
+Shared process pool for CPU-bound parsing
+HTML extraction and regex event parsing hold the GIL, so the scheduler,
+snapshot re-extraction and batch text parsing all hand their work to one
+long-lived pool with a worker process per core. Small text batches are parsed
+inline, where pickling the blocks would cost more than the parsing itself.
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# One worker process per core
+PARSE_WORKERS = os.cpu_count() or 2
+
+# Batches smaller than this are parsed in the calling thread
+MIN_POOL_BATCH = 8
+
+# Chunks handed to each worker per batch (more chunks: results arrive sooner, more pickling)
+CHUNKS_PER_WORKER = 4
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+_inline_logged = False
+
+# Parser instances created inside each worker process, by class
+_worker_instances: Dict[type, Any] = {}
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the process-wide parse pool, or None once it can no longer be forked safely"""
+    global _parse_pool, _inline_logged
+
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # Forked workers inherit the loaded modules; spawned ones would re-import
+            # the app module, which starts its own scheduler at import time. Forking
+            # while other threads run can leave a worker holding a copied lock that
+            # nobody will release, so the pool only starts while this process is
+            # single-threaded (see start_parse_pool)
+            if threading.active_count() > 1:
+                if not _inline_logged:
+                    logger.warning("⚠️ Threads already running, not forking parse workers; parsing inline")
+                    _inline_logged = True
+                return None
+            context = None
+            if 'fork' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('fork')
+            pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=context)
+            try:
+                # Launch the workers now, before the pool's own manager thread starts
+                pool.submit(os.getpid).result()
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"⚠️ Could not start parse workers ({e}), parsing inline")
+                pool.shutdown(wait=False)
+                return None
+            _parse_pool = pool
+            logger.info(f"🧮 Started {PARSE_WORKERS} parse worker processes")
+        return _parse_pool
+
+def start_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Start the parse workers; call at startup, before any other threads"""
+    return get_parse_pool()
+
+def submit_parse(fn: Callable[..., Any], *args) -> Future:
+    """Run fn(*args) in the parse pool, or inline when there is no pool"""
+    pool = get_parse_pool()
+    if pool is not None:
+        return pool.submit(fn, *args)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def shutdown_parse_pool():
+    global _parse_pool
+
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = None
+
+def worker_instance(cls):
+    """One instance of cls per process, so pool workers don't rebuild parsers per task"""
+    instance = _worker_instances.get(cls)
+    if instance is None:
+        instance = _worker_instances[cls] = cls()
+    return instance
+
+def _parse_chunk(parse: Callable[[str], Any], texts: List[str]) -> List[Any]:
+    return [parse(text) for text in texts]
+
+def iter_parallel(parse: Callable[[str], Any], items: Sequence[Tuple[int, str]]) -> Iterator[Tuple[int, Any]]:
+    """Apply parse to each (index, text), yielding (index, result) as chunks finish.
+
+    parse must be a module-level function so it can be sent to the workers.
+    Falls back to parsing inline if the pool cannot be used.
+    """
+    items = list(items)
+    pool = get_parse_pool() if len(items) >= MIN_POOL_BATCH else None
+    if pool is None:
+        for index, text in items:
+            yield index, parse(text)
+        return
+
+    chunk_size = max(1, -(-len(items) // (PARSE_WORKERS * CHUNKS_PER_WORKER)))
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+    pending = set(range(len(chunks)))
+
+    try:
+        futures = {pool.submit(_parse_chunk, parse, [text for _, text in chunk]): number
+                   for number, chunk in enumerate(chunks)}
+    except (BrokenProcessPool, RuntimeError) as e:
+        # submit refuses work once the pool is broken or shut down
+        logger.warning(f"⚠️ Parse pool unavailable ({e}), parsing {len(chunks)} chunks inline")
+        shutdown_parse_pool()
+        futures = {}
+
+    broken = None
+    for future in as_completed(futures):
+        number = futures[future]
+        try:
+            results = future.result()
+        except BrokenProcessPool as e:
+            broken = e
+            break
+        except Exception as e:
+            # The parse failed in the worker, not the pool; redo this chunk item by item
+            logger.warning(f"⚠️ Parse chunk failed in worker ({e}), parsing it inline")
+            results = [parse(text) for _, text in chunks[number]]
+        pending.discard(number)
+        for (index, _), result in zip(chunks[number], results):
+            yield index, result
+
+    if broken is not None:
+        logger.warning(f"⚠️ Parse pool broke ({broken}), parsing {len(pending)} chunks inline")
+        shutdown_parse_pool()
+    for number in sorted(pending):
+        for index, text in chunks[number]:
+            yield index, parse(text)
@@ -0,0 +1,102 @@
+"""
+Registry of event-extraction regular expressions
+Every pattern the event text parsers run is compiled once at import through
+register(), which also records it by name so regex_audit.py can fuzz each one
+for super-linear backtracking. Registered patterns must run in linear time:
+no unbounded repetition that can be retried over the same characters from
+every start position, and no adjacent quantifiers over overlapping classes.
+
+The one shape the parsers need that a regex only expresses by backtracking,
+a run of name characters holding a keyword somewhere ("National Gallery of
+Art"), is found by find_keyword_runs() in one pass instead.
+
+A per-document budget bounds the rest: documents are cut to
+MAX_DOCUMENT_CHARS, and parsers stop extracting further fields once the
+document's deadline has passed.
+"""
+
+import re
+import logging
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from deadline import Deadline, current_deadline
+
+logger = logging.getLogger(__name__)
+
+# Regex extraction time allowed per document (seconds); fields not reached in time are left empty
+DOCUMENT_BUDGET_SECONDS = 0.25
+
+# Documents are cut to this many characters before regex extraction
+MAX_DOCUMENT_CHARS = 20000
+
+_patterns: Dict[str, re.Pattern] = {}
+
+_WORD_CHAR_RE = re.compile(r'\w')
+
+def register(name: str, pattern: str, flags: int = 0) -> re.Pattern:
+    """Compile an extraction pattern and record it under name"""
+    compiled = re.compile(pattern, flags)
+    existing = _patterns.get(name)
+    if existing is not None and (existing.pattern, existing.flags) != (compiled.pattern, compiled.flags):
+        raise ValueError(f"Pattern {name} is already registered with a different expression")
+    _patterns[name] = compiled
+    return compiled
+
+def register_all(name: str, patterns: Sequence[str], flags: int = 0) -> List[re.Pattern]:
+    """Register an ordered list of alternatives as name.0, name.1, ..."""
+    return [register(f'{name}.{index}', pattern, flags) for index, pattern in enumerate(patterns)]
+
+def registered_patterns() -> Dict[str, re.Pattern]:
+    return dict(_patterns)
+
+def find_keyword_runs(text: str, prefix_re: re.Pattern, run_re: re.Pattern, keyword_re: re.Pattern,
+                      min_offset: int = 1, to_run_end: bool = True,
+                      word_end: bool = False) -> Iterator[Tuple[int, int, int]]:
+    """
+    (start, name start, end) of each match of the backtracking shape
+
+        PREFIX NAME_CHAR{min_offset,} KEYWORD NAME_CHAR*     (to_run_end)
+        PREFIX NAME_CHAR{min_offset,} KEYWORD                (otherwise)
+
+    left to right and non-overlapping like finditer, in linear time. prefix_re
+    must end where the name starts, run_re match the name characters (C*), and
+    keyword_re the keywords; word_end requires a word boundary after the keyword.
+    As greedy backtracking would, the name reaches the last keyword in its run
+    of name characters (or the end of the run). The run and its last keyword are
+    found once per run, not once per start position.
+    """
+    pos = 0
+    run_end = -1
+    last_keyword = None
+    while True:
+        prefix = prefix_re.search(text, pos)
+        if prefix is None:
+            return
+        name_start = prefix.end()
+        if name_start >= run_end:
+            run_end = run_re.match(text, name_start).end()
+            last_keyword = None
+            for keyword in keyword_re.finditer(text, name_start + min_offset, run_end):
+                # The search stops at the run end, which always counts as a boundary there
+                if word_end and keyword.end() == run_end and _WORD_CHAR_RE.match(text, run_end):
+                    continue
+                last_keyword = keyword
+
+        if last_keyword is not None and last_keyword.start() >= name_start + min_offset:
+            end = run_end if to_run_end else last_keyword.end()
+            yield prefix.start(), name_start, end
+            pos = end
+        else:
+            # Later prefixes in this run start later still, so they cannot reach its last keyword either
+            pos = max(run_end, prefix.start() + 1)
+
+def search_keyword_run(text: str, prefix_re: re.Pattern, run_re: re.Pattern, keyword_re: re.Pattern,
+                       **options) -> Optional[Tuple[int, int, int]]:
+    """The first match find_keyword_runs() would give, or None"""
+    return next(find_keyword_runs(text, prefix_re, run_re, keyword_re, **options), None)
+
+def document_deadline() -> Deadline:
+    """Deadline for extracting fields from one document, within any scrape deadline in force"""
+    return Deadline(DOCUMENT_BUDGET_SECONDS, parent=current_deadline())
+
+def note_budget_overrun(parser: str, chars: int, skipped: str):
+    logger.warning(f"⏱️ {parser} spent its regex budget on a {chars}-char document; skipped {skipped} and later fields")
@@ -0,0 +1,225 @@
+"""
+Per-domain rate limiting for outbound scraper and feed requests
+Token bucket per host, honoring robots.txt Crawl-delay and Retry-After
+"""
+
+import time
+import threading
+import logging
+import requests
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Default politeness: one request per second per host, with a small burst
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_BURST = 2
+
+# robots.txt is re-read once a day per host
+ROBOTS_TTL_SECONDS = 24 * 60 * 60
+
+# Never honor a Retry-After longer than this (seconds)
+MAX_RETRY_AFTER = 300
+
+USER_AGENT = 'DCEventsCalendarBot'
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking under a lock"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Take a token and return how many seconds the caller must wait before using it"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause_until(self, until: float):
+        """Hold back all requests until the given monotonic time"""
+        if until > self.updated:
+            self.tokens = 1
+            self.updated = until
+
+    def set_rate(self, rate: float):
+        """Change the refill rate, keeping the current token balance"""
+        self.rate = rate
+
+class DomainRateLimiter:
+    """Rate limiter keyed by host: different hosts never wait on each other"""
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 burst: float = DEFAULT_BURST, respect_robots: bool = True):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.respect_robots = respect_robots
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.rate_overrides: Dict[str, float] = {}
+        self.robots_rates: Dict[str, float] = {}
+        self.robots_checked: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.robots_locks: Dict[str, threading.Lock] = {}
+        self.stats = {'requests': 0, 'waited_seconds': 0.0, 'retry_after_pauses': 0}
+
+    def acquire(self, url: str, deadline: Optional[Deadline] = None) -> float:
+        """Block until a request to this URL's host is allowed; returns seconds waited.
+
+        Raises DeadlineExceeded instead of waiting past the given deadline.
+        """
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if not host:
+            return 0.0
+
+        if self.respect_robots:
+            self._refresh_robots(parsed.scheme or 'https', host, deadline)
+
+        with self.lock:
+            wait = self._bucket(host).reserve(time.monotonic())
+            self.stats['requests'] += 1
+            self.stats['waited_seconds'] += wait
+
+        if deadline is not None and wait > deadline.remaining():
+            raise DeadlineExceeded(f"Rate limit wait for {host} ({wait:.1f}s) exceeds deadline")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def set_rate(self, host: str, requests_per_second: float):
+        """Pin a host to a specific rate (still capped by its robots.txt Crawl-delay)"""
+        host = host.lower()
+        with self.lock:
+            self.rate_overrides[host] = requests_per_second
+            self._bucket(host).set_rate(self._effective_rate(host))
+
+    def apply_retry_after(self, url: str, retry_after: Optional[str]) -> float:
+        """Pause a host according to a Retry-After header (seconds or HTTP date)"""
+        delay = self._parse_retry_after(retry_after)
+        if delay <= 0:
+            return 0.0
+
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            self._bucket(host).pause_until(time.monotonic() + delay)
+            self.stats['retry_after_pauses'] += 1
+
+        logger.warning(f"⏸️ {host} asked us to back off for {delay:.0f}s")
+        return delay
+
+    def get_stats(self) -> Dict:
+        """Current limiter counters and per-host rates"""
+        with self.lock:
+            return {
+                **self.stats,
+                'hosts': {host: round(bucket.rate, 3) for host, bucket in self.buckets.items()}
+            }
+
+    def _bucket(self, host: str) -> TokenBucket:
+        """Get or create the bucket for a host (caller holds self.lock)"""
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self._effective_rate(host), self.burst)
+            self.buckets[host] = bucket
+        return bucket
+
+    def _effective_rate(self, host: str) -> float:
+        """Configured rate for a host, capped by its robots.txt (caller holds self.lock)"""
+        rate = self.rate_overrides.get(host, self.requests_per_second)
+        robots_rate = self.robots_rates.get(host)
+        return min(rate, robots_rate) if robots_rate else rate
+
+    def _refresh_robots(self, scheme: str, host: str, deadline: Optional[Deadline] = None):
+        """Read the host's robots.txt (at most once per TTL) and apply its Crawl-delay"""
+        with self.lock:
+            checked = self.robots_checked.get(host)
+            if checked and time.monotonic() - checked < ROBOTS_TTL_SECONDS:
+                return
+            host_lock = self.robots_locks.setdefault(host, threading.Lock())
+
+        with host_lock:
+            with self.lock:
+                checked = self.robots_checked.get(host)
+                if checked and time.monotonic() - checked < ROBOTS_TTL_SECONDS:
+                    return
+
+            timeout = min(10, deadline.remaining()) if deadline is not None else 10
+            robots_rate = self._robots_rate(f"{scheme}://{host}/robots.txt", timeout)
+
+            with self.lock:
+                self.robots_checked[host] = time.monotonic()
+                if robots_rate:
+                    self.robots_rates[host] = robots_rate
+                else:
+                    self.robots_rates.pop(host, None)
+                self._bucket(host).set_rate(self._effective_rate(host))
+
+    def _robots_rate(self, robots_url: str, timeout: float = 10) -> Optional[float]:
+        """Requests per second allowed by robots.txt, or None if it sets no limit"""
+        if timeout <= 0:
+            return None
+
+        try:
+            response = requests.get(robots_url, timeout=timeout, headers={'User-Agent': USER_AGENT})
+            if response.status_code != 200:
+                return None
+
+            parser = RobotFileParser()
+            parser.parse(response.text.splitlines())
+
+            rates = []
+            crawl_delay = parser.crawl_delay(USER_AGENT)
+            if crawl_delay:
+                rates.append(1.0 / float(crawl_delay))
+            request_rate = parser.request_rate(USER_AGENT)
+            if request_rate and request_rate.seconds:
+                rates.append(request_rate.requests / request_rate.seconds)
+
+            if rates:
+                logger.info(f"🤖 {robots_url}: limiting to {min(rates):.2f} requests/s")
+                return min(rates)
+            return None
+
+        except Exception as e:
+            logger.debug(f"Could not read {robots_url}: {e}")
+            return None
+
+    def _parse_retry_after(self, retry_after: Optional[str]) -> float:
+        """Convert a Retry-After value to seconds, capped at MAX_RETRY_AFTER"""
+        if not retry_after:
+            return 0.0
+
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                if retry_at.tzinfo is None:
+                    retry_at = retry_at.replace(tzinfo=timezone.utc)
+                delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return 0.0
+
+        return max(0.0, min(delay, MAX_RETRY_AFTER))
+
+# Global limiter shared by every session in the process
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Get the process-wide rate limiter"""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = DomainRateLimiter()
+        return _rate_limiter
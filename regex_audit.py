@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Regex backtracking audit
+Fuzzes every pattern in the extraction registry, and the two regex event
+parsers end to end, with generated inputs at two sizes: repeated pieces of
+text built from the pattern's own words and from characters scraped pages are
+full of, with and without a character that forces the match to fail. The
+inputs that take longest at the small size are timed again at the large size,
+and a pattern whose time grows faster than MAX_GROWTH_EXPONENT (1 = linear,
+2 = quadratic) is flagged. Exits with status 1 if any registered pattern is.
+
+    python regex_audit.py
+    python regex_audit.py --legacy                  # also audit the patterns these replaced
+    python regex_audit.py --only ai_parser. --json audit.json
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import importlib
+from typing import Callable, Dict, List, Tuple
+import pattern_registry
+
+# Modules whose import registers the extraction patterns
+PATTERN_MODULES = ['date_normalizer', 'text_segmenter', 'ai_parser', 'services']
+
+# Input sizes (characters) the growth is measured between
+SMALL_SIZE = 1000
+LARGE_SIZE = 8000
+
+# Growth exponent above which a pattern is flagged
+MAX_GROWTH_EXPONENT = 1.5
+
+# Large-size timings below this are too small to call super-linear
+MIN_FLAG_SECONDS = 0.01
+
+# Inputs from the small-size screen that are timed at the large size
+WORST_INPUTS = 3
+
+# Timing repeats (the best is kept)
+REPEATS = 3
+
+# Text scraped pages are full of, characters that make a match fail at the end,
+# and characters a repeated piece is led by (one match start, then the repeats)
+GENERIC_PIECES = ['a', 'A', 'ab ', 'Ab ', ' ', '\n', ' \n', '1', '12 ', '.', '. ', '-', ',', ';', ':', '&',
+                  '@ ', '/', 'www.', 'http://', '$', '\t', '_', 'é ']
+TERMINATORS = ['', '!', 'x', '1', '\n']
+LEADS = ['x', '1', 'A']
+
+# Words taken from a pattern's source to build inputs from
+MAX_PATTERN_WORDS = 40
+
+# The patterns the registry replaced, audited with --legacy for comparison
+_NAME = r"[A-Za-z\s&\',\-\.]"
+_VENUES = ('Gallery|Museum|Theater|Theatre|Center|Centre|Building|Hall|Room|Plaza|Park|Arena|Stadium|Club|Bar|'
+           'Restaurant|Cafe|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue|Library|'
+           'Auditorium|Pavilion|Convention|Center|Complex|Facility|Institution|Foundation|Society|Association|'
+           'Organization|Institute|Academy|Conservatory|Conservatoire')
+LEGACY_PATTERNS = {
+    'legacy.services.location': (r'\b(at|in|@)\s+[A-Z][A-Za-z\s&\',\-\.]+(?:Center|Theater|Theatre|Museum|Library|Park|Hall|Arena|Stadium|Club|Bar|Restaurant|Cafe|Gallery|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue)\b', re.IGNORECASE),
+    'legacy.services.address': (r'\b\d+\s+[A-Za-z\s,.-]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Way|Place|Pl|Court|Ct|NW|NE|SW|SE)\b', re.IGNORECASE),
+    'legacy.ai_parser.location_at': (rf'at\s+([A-Z]{_NAME}*(?:{_VENUES}){_NAME}*)', re.IGNORECASE),
+    'legacy.ai_parser.location': (rf'([A-Z]{_NAME}*(?:{_VENUES}){_NAME}*)', re.IGNORECASE),
+    'legacy.ai_parser.title_event': (rf'([A-Z]{_NAME}*(?:Gallery|Festival|Night|Day|Show|Concert|Meeting|Workshop|Conference|Event|Program|Series){_NAME}*)', re.IGNORECASE),
+    'legacy.ai_parser.url_domain': (r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?:/[^\s<>"{}|\\^`\[\]]*)?', re.IGNORECASE),
+    'legacy.ai_parser.edge_symbols': (r'^[^\w\s]+|[^\w\s]+$', 0),
+    'legacy.ai_parser.price': (r'(\d+)\s*dollars?', re.IGNORECASE),
+    'legacy.ai_parser.location_suffix': (r'\s+(PM|AM|p\.m\.|a\.m\.|Registration|opens|Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday).*$', re.IGNORECASE),
+    'legacy.ai_parser.title_menu_suffix': (r'\s+Return to menu\s*$', re.IGNORECASE),
+    'legacy.date_normalizer.time_range': (r'\b(\d{1,2})(?::([0-5]\d))?\s*(?:([ap])\.?\s?m\.?)?\s*(?:-|–|to)\s*\d{1,2}(?::[0-5]\d)?\s*([ap])\.?\s?m\b', re.IGNORECASE),
+}
+
+def load_patterns(legacy: bool = False) -> Dict[str, re.Pattern]:
+    for module in PATTERN_MODULES:
+        importlib.import_module(module)
+    patterns = pattern_registry.registered_patterns()
+    if legacy:
+        patterns.update({name: re.compile(source, flags) for name, (source, flags) in LEGACY_PATTERNS.items()})
+    return patterns
+
+def load_extractors() -> Dict[str, Callable[[str], object]]:
+    """Whole-document regex parsers, audited like single patterns"""
+    from ai_parser import EventParser
+    from services import EventParser as SimpleEventParser
+    parser = EventParser(llm_backend=None, llm_cache=False)
+    parser.llm_backend = None
+    return {
+        'extractor.ai_parser': parser._parse_with_regex,
+        'extractor.services': SimpleEventParser().parse_natural_language
+    }
+
+def pattern_words(pattern: re.Pattern) -> List[str]:
+    """Literal words in the pattern source, alone and followed by a space"""
+    words = []
+    for word in re.findall(r'[A-Za-z]{2,}', pattern.pattern):
+        if word not in words:
+            words.append(word)
+    words = words[:MAX_PATTERN_WORDS]
+    return words + [word + ' ' for word in words]
+
+def input_shapes(pieces: List[str], seed: int = 1) -> List[Tuple[str, str, str]]:
+    """(lead, repeated piece, terminator) triples; random piece mixes are repeated as one piece"""
+    shapes = [('', piece, end) for piece in pieces for end in TERMINATORS]
+    shapes += [(lead, piece, 'x') for piece in pieces for lead in LEADS]
+    rng = random.Random(seed)
+    for _ in range(5):
+        shapes.append(('', ''.join(rng.choice(pieces) for _ in range(40)), ''))
+    return shapes
+
+def build_input(lead: str, piece: str, end: str, size: int) -> str:
+    return lead + piece * max(1, (size - len(lead) - len(end)) // len(piece)) + end
+
+def describe_input(lead: str, piece: str, end: str) -> str:
+    return ' + '.join(filter(None, [repr(lead) if lead else '', repr(piece[:24]) + '*', repr(end) if end else '']))
+
+def time_call(run: Callable[[str], object], text: str, repeats: int = REPEATS) -> float:
+    best = math.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def _consume(pattern: re.Pattern) -> Callable[[str], object]:
+    def run(text: str):
+        for _ in pattern.finditer(text):
+            pass
+    return run
+
+def audit(name: str, run: Callable[[str], object], pieces: List[str]) -> Dict:
+    screened = sorted(((time_call(run, build_input(*shape, SMALL_SIZE), repeats=1), shape)
+                       for shape in input_shapes(pieces)), reverse=True)
+
+    worst = None
+    for _, shape in screened[:WORST_INPUTS]:
+        small_seconds = time_call(run, build_input(*shape, SMALL_SIZE))
+        large_seconds = time_call(run, build_input(*shape, LARGE_SIZE))
+        exponent = math.log(max(large_seconds, 1e-9) / max(small_seconds, 1e-9)) / math.log(LARGE_SIZE / SMALL_SIZE)
+        if worst is None or large_seconds > worst['large_ms'] / 1000:
+            worst = {'name': name, 'input': describe_input(*shape),
+                     'small_ms': round(small_seconds * 1000, 3), 'large_ms': round(large_seconds * 1000, 3),
+                     'exponent': round(exponent, 2)}
+    worst['flagged'] = worst['exponent'] > MAX_GROWTH_EXPONENT and worst['large_ms'] / 1000 >= MIN_FLAG_SECONDS
+    return worst
+
+def run_audit(only: str = '', legacy: bool = False, extractors: bool = True) -> List[Dict]:
+    results = []
+    for name, pattern in sorted(load_patterns(legacy).items()):
+        if name.startswith(only):
+            results.append(audit(name, _consume(pattern), GENERIC_PIECES + pattern_words(pattern)))
+
+    if extractors:
+        # Time the parsers' full work, not the part that fits in the per-document budget
+        budget = pattern_registry.DOCUMENT_BUDGET_SECONDS
+        pattern_registry.DOCUMENT_BUDGET_SECONDS = math.inf
+        try:
+            words = [word + ' ' for word in ('at', 'in', 'Gallery', 'National', 'Street', 'Friday', 'Oct', 'pm', 'free')]
+            for name, extract in load_extractors().items():
+                if name.startswith(only):
+                    results.append(audit(name, extract, GENERIC_PIECES + words))
+        finally:
+            pattern_registry.DOCUMENT_BUDGET_SECONDS = budget
+    return results
+
+def print_results(results: List[Dict]):
+    print(f"\n{'pattern':<44} {'worst input':<30} {f'{SMALL_SIZE} ms':>9} {f'{LARGE_SIZE} ms':>9} {'growth':>6}")
+    print('-' * 104)
+    for r in results:
+        flag = '  ⚠️ super-linear' if r['flagged'] else ''
+        print(f"{r['name']:<44} {r['input'][:30]:<30} {r['small_ms']:>9} {r['large_ms']:>9} {r['exponent']:>6}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzz extraction regexes for super-linear backtracking')
+    parser.add_argument('--only', default='', help='Audit only patterns whose name starts with this')
+    parser.add_argument('--legacy', action='store_true', help='Also audit the patterns the registry replaced')
+    parser.add_argument('--no-extractors', action='store_true', help='Skip the end-to-end parser audit')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    results = run_audit(args.only, args.legacy, not args.no_extractors)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    flagged = [r['name'] for r in results if r['flagged'] and not r['name'].startswith('legacy.')]
+    if flagged:
+        print(f"\n❌ Super-linear: {', '.join(flagged)}")
+        sys.exit(1)
+    print(f"\n✅ {len(results)} audited, none super-linear outside the legacy set")
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,10 @@ Adds new RSS events to the main events table with pending approval status
 """
 
 import feedparser
-import requests
 import sqlite3
 from datetime import datetime
 import re
+from http_client import create_session
 
 def clean_html(text):
     """Remove HTML tags from text"""
@@ -38,13 +38,15 @@ def add_rss_events_to_approval_queue():
     feeds = cursor.fetchall()
     
     total_added = 0
+    # Rate-limited per host, and backs off when a feed sends Retry-After
+    session = create_session()
     
     for feed_id, feed_name, feed_url in feeds:
         print(f"Processing RSS feed: {feed_name}")
         
         try:
             # Fetch RSS feed
-            response = requests.get(feed_url, timeout=10)
+            response = session.get(feed_url, timeout=10)
             if response.status_code != 200:
                 print(f"  ❌ Failed to fetch: {response.status_code}")
                 continue
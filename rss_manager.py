@@ -12,10 +12,17 @@ from datetime import datetime, timedelta
 from urllib.parse import urlparse, urljoin
 import time
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import xml.etree.ElementTree as ET
 import schedule
 import threading
+from http_client import create_session
+from circuit_breaker import CircuitBreaker
+from feed_fetcher import FeedFetchResult, fetch_feed, fetch_feeds
+from feed_entries import EntryIdentity, FeedEntryIndex, KnownEntries, entry_identity, update_event_fields
+from websub import WebSubSubscriber
+from feed_schedule import FEED_POLL_TICK_MINUTES, FeedPollScheduler
+from web_scraper_manager import apply_schema_migrations
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,10 +31,15 @@ logger = logging.getLogger(__name__)
 class RSSManager:
     def __init__(self, db_path: str = 'calendar.db'):
         self.db_path = db_path
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Breaker, poll schedule and entry hash columns on databases created before them
+        apply_schema_migrations(db_path)
+        self.breaker = CircuitBreaker(db_path, 'rss_feeds')
+        self.entry_index = FeedEntryIndex(db_path)
+        self.poll_schedule = FeedPollScheduler(db_path)
+        self.session = create_session({
             'User-Agent': 'Mozilla/5.0 (compatible; EventCalendar/1.0)'
         })
+        self.websub = WebSubSubscriber(db_path, session=self.session)
     
     def validate_rss_url(self, url: str) -> Tuple[bool, str]:
         """Validate if URL is a valid RSS feed"""
@@ -171,36 +183,71 @@ class RSSManager:
     
     def process_feed(self, feed_id: int) -> Dict[str, int]:
         """Process a single RSS feed and extract events"""
-        start_time = time.time()
-        results = {'added': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
         
+        # Get feed information
+        cursor.execute('SELECT name, url FROM rss_feeds WHERE id = ?', (feed_id,))
+        feed_info = cursor.fetchone()
+        conn.close()
+        if not feed_info:
+            return {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'errors': 0}
+        
+        # Fetch and parse the RSS feed with timeout
+        fetched = fetch_feed(self.session, {'id': feed_id, 'name': feed_info[0], 'url': feed_info[1]})
+        results = self.store_feed_entries(fetched)
+        self._after_poll(fetched)
+        return results
+    
+    def _after_poll(self, fetched: FeedFetchResult):
+        """Schedule the feed's next poll and subscribe to its WebSub hub, if it advertises one"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get feed information
-            cursor.execute('SELECT name, url FROM rss_feeds WHERE id = ?', (feed_id,))
-            feed_info = cursor.fetchone()
-            if not feed_info:
-                return results
-            
-            feed_name, feed_url = feed_info
-            
-            # Fetch and parse the RSS feed with timeout
-            response = self.session.get(feed_url, timeout=30)
-            response.raise_for_status()
-            feed = feedparser.parse(response.content)
-            
-            if feed.bozo:
-                self.log_feed_check(feed_id, 'error', 0, 0, 0, f"RSS parsing error: {feed.bozo_exception}")
-                return results
+            self.poll_schedule.record_poll(fetched)
+        except Exception as e:
+            logger.warning(f"Could not schedule next poll for feed {fetched.feed['id']}: {e}")
+        try:
+            self.websub.consider(fetched)
+        except Exception as e:
+            logger.warning(f"WebSub check failed for feed {fetched.feed['id']}: {e}")
+    
+    def store_feed_entries(self, fetched: FeedFetchResult) -> Dict[str, int]:
+        """Write a fetched feed's entries in one transaction and log the check"""
+        results = {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'errors': 0}
+        feed_id = fetched.feed['id']
+        feed_name = fetched.feed['name']
+        
+        if fetched.error:
+            logger.error(f"Error processing feed {feed_id}: {fetched.error}")
+            self.log_feed_check(feed_id, 'error', 0, 0, 0, fetched.error)
+            results['errors'] += 1
+            return results
+        
+        feed = fetched.parsed
+        if feed.bozo:
+            self.log_feed_check(feed_id, 'error', 0, 0, 0, f"RSS parsing error: {feed.bozo_exception}")
+            return results
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            # All of the feed's entries go in one transaction (entries use savepoints inside it)
+            cursor.execute('BEGIN')
+            known = self.entry_index.load(cursor, feed_id)
             
             # Process each entry
             for entry in feed.entries:
                 try:
+                    identity = entry_identity(entry)
+                    match = known.find(identity)
+                    if match and match['content_hash'] == identity.content_hash:
+                        results['unchanged'] += 1
+                        continue
+                    
                     event_data = self.extract_event_data(entry, feed_name)
                     if event_data:
-                        result = self.add_or_update_event(event_data, feed_id, entry.get('link', ''))
+                        result = self.add_or_update_event(event_data, feed_id, entry.get('link', ''),
+                                                          cursor, identity, known)
                         results[result] += 1
                     else:
                         results['skipped'] += 1
@@ -209,11 +256,6 @@ class RSSManager:
                     logger.error(f"Error processing entry: {str(e)}")
                     results['errors'] += 1
             
-            # Update feed status
-            response_time = int((time.time() - start_time) * 1000)
-            self.log_feed_check(feed_id, 'success', results['added'], results['updated'], 
-                              results['skipped'], response_time=response_time)
-            
             # Update last checked time
             cursor.execute('''
                 UPDATE rss_feeds 
@@ -222,12 +264,20 @@ class RSSManager:
             ''', (datetime.now().isoformat(), datetime.now().isoformat(), feed_id))
             
             conn.commit()
-            conn.close()
             
         except Exception as e:
+            conn.rollback()
+            conn.close()
             logger.error(f"Error processing feed {feed_id}: {str(e)}")
             self.log_feed_check(feed_id, 'error', 0, 0, 0, str(e))
             results['errors'] += 1
+            return results
+        
+        conn.close()
+        
+        # Update feed status
+        self.log_feed_check(feed_id, 'success', results['added'], results['updated'], 
+                          results['skipped'] + results['unchanged'], response_time=fetched.fetch_ms)
         
         return results
     
@@ -325,52 +375,34 @@ class RSSManager:
         else:
             return 1  # Default to Literature
     
-    def add_or_update_event(self, event_data: Dict, feed_id: int, source_url: str) -> str:
-        """Add new event or update existing one"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def add_or_update_event(self, event_data: Dict, feed_id: int, source_url: str,
+                            cursor: Optional[sqlite3.Cursor] = None,
+                            identity: Optional[EntryIdentity] = None,
+                            known: Optional[KnownEntries] = None) -> str:
+        """Add new event or update existing one.
+        
+        The entry is matched by GUID (or link) against the feed's tracked entries. With
+        a cursor, the change joins the caller's transaction (undone on its own if it
+        fails); without one it is committed immediately.
+        """
+        conn = None
+        if cursor is None:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+        else:
+            cursor.execute('SAVEPOINT feed_entry')
         
         try:
-            # Check if event already exists by source URL
-            cursor.execute('''
-                SELECT e.id FROM events e
-                JOIN event_sources es ON e.id = es.event_id
-                WHERE es.feed_id = ? AND es.source_url = ?
-            ''', (feed_id, source_url))
-            
-            existing_event = cursor.fetchone()
-            
-            if existing_event:
-                # Update existing event (but respect manual overrides)
-                event_id = existing_event[0]
-                
-                # Check for manual overrides
-                cursor.execute('''
-                    SELECT field_name FROM manual_overrides WHERE event_id = ?
-                ''', (event_id,))
-                overrides = [row[0] for row in cursor.fetchall()]
-                
-                # Update only non-overridden fields
-                update_fields = []
-                update_values = []
-                
-                for field, value in event_data.items():
-                    if field not in overrides and field != 'tags':  # Skip tags for updates
-                        update_fields.append(f"{field} = ?")
-                        update_values.append(value)
-                
-                if update_fields:
-                    update_values.append(event_id)
-                    cursor.execute(f'''
-                        UPDATE events SET {', '.join(update_fields)}
-                        WHERE id = ?
-                    ''', update_values)
-                
-                # Update event source timestamp
-                cursor.execute('''
-                    UPDATE event_sources SET last_updated = ?
-                    WHERE event_id = ? AND feed_id = ?
-                ''', (datetime.now().isoformat(), event_id, feed_id))
+            identity = identity or EntryIdentity(guid=source_url, link=source_url, content_hash='')
+            if known is None:
+                known = self.entry_index.load(cursor, feed_id)
+            match = known.find(identity)
+            
+            if match:
+                # Update changed fields of the existing event (but respect manual overrides)
+                fields = {field: value for field, value in event_data.items() if field != 'tags'}  # Skip tags for updates
+                update_event_fields(cursor, match['event_id'], fields)
+                self.entry_index.record_seen(cursor, match, identity)
                 
                 result = 'updated'
             else:
@@ -394,24 +426,26 @@ class RSSManager:
                     datetime.now().isoformat()
                 ))
                 
-                event_id = cursor.lastrowid
-                
                 # Add event source
-                cursor.execute('''
-                    INSERT INTO event_sources (event_id, feed_id, source_url, source_id)
-                    VALUES (?, ?, ?, ?)
-                ''', (event_id, feed_id, source_url, source_url))
+                self.entry_index.record_new(cursor, known, cursor.lastrowid, feed_id, identity)
                 
                 result = 'added'
             
-            conn.commit()
+            if conn:
+                conn.commit()
+            else:
+                cursor.execute('RELEASE SAVEPOINT feed_entry')
             return result
             
         except Exception as e:
             logger.error(f"Error adding/updating event: {str(e)}")
-            return 'error'
+            if not conn:
+                cursor.execute('ROLLBACK TO SAVEPOINT feed_entry')
+                cursor.execute('RELEASE SAVEPOINT feed_entry')
+            return 'errors'
         finally:
-            conn.close()
+            if conn:
+                conn.close()
     
     def log_feed_check(self, feed_id: int, status: str, events_added: int, 
                       events_updated: int, events_skipped: int, 
@@ -426,17 +460,11 @@ class RSSManager:
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (feed_id, status, events_added, events_updated, events_skipped, error_message, response_time))
         
-        # Update consecutive failures
+        # Update consecutive failures and the feed's circuit breaker
         if status == 'error':
-            cursor.execute('''
-                UPDATE rss_feeds SET consecutive_failures = consecutive_failures + 1
-                WHERE id = ?
-            ''', (feed_id,))
+            self.breaker.record_failure(cursor, feed_id)
         else:
-            cursor.execute('''
-                UPDATE rss_feeds SET consecutive_failures = 0
-                WHERE id = ?
-            ''', (feed_id,))
+            self.breaker.record_success(cursor, feed_id)
         
         conn.commit()
         conn.close()
@@ -496,24 +524,65 @@ class RSSManager:
         
         return logs
     
-    def process_all_feeds(self) -> Dict[str, int]:
-        """Process all active feeds"""
+    def process_all_feeds(self, due_only: bool = True) -> Dict[str, int]:
+        """Process active feeds; by default only those whose next poll time has come"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT id FROM rss_feeds WHERE is_active = 1')
-        feed_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute('''
+            SELECT id, consecutive_failures, circuit_open_until, next_poll_at
+            FROM rss_feeds WHERE is_active = 1
+        ''')
+        rows = cursor.fetchall()
         conn.close()
         
-        total_results = {'added': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        if due_only:
+            now = datetime.now()
+            rows = [row for row in rows if self.poll_schedule.is_due(row[3], now)]
+        
+        # Feeds with an open breaker sit out until their backoff expires
+        feed_ids = [row[0] for row in rows
+                    if self.breaker.allows({'consecutive_failures': row[1], 'circuit_open_until': row[2]})]
+        if len(feed_ids) < len(rows):
+            logger.info(f"⚡ Skipping {len(rows) - len(feed_ids)} feeds with open circuit breakers")
         
-        for feed_id in feed_ids:
-            results = self.process_feed(feed_id)
-            for key, value in results.items():
-                total_results[key] += value
+        # Feeds the hub pushes to only need the occasional fallback poll
+        try:
+            self.websub.renew_expiring()
+            covered = self.websub.push_covered(feed_ids)
+        except Exception as e:
+            logger.warning(f"WebSub maintenance failed: {e}")
+            covered = set()
+        if covered:
+            logger.info(f"📡 Skipping {len(covered)} feeds kept current by WebSub pushes")
+            feed_ids = [feed_id for feed_id in feed_ids if feed_id not in covered]
+        
+        total_results = {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'errors': 0}
+        
+        for progress in self.iter_process_feeds(feed_ids):
+            for key in total_results:
+                total_results[key] += progress[key]
         
         return total_results
     
+    def iter_process_feeds(self, feed_ids: List[int]) -> Iterator[Dict]:
+        """Fetch feeds concurrently and store each as it arrives, yielding per-feed results"""
+        if not feed_ids:
+            return
+        
+        conn = sqlite3.connect(self.db_path)
+        placeholders = ','.join('?' * len(feed_ids))
+        feeds = [{'id': row[0], 'name': row[1], 'url': row[2]} for row in conn.execute(
+            f'SELECT id, name, url FROM rss_feeds WHERE id IN ({placeholders})', feed_ids)]
+        conn.close()
+        
+        # Network and parsing run in the fetch workers; database writes stay on this thread
+        for done, fetched in enumerate(fetch_feeds(self.session, feeds), 1):
+            results = self.store_feed_entries(fetched)
+            self._after_poll(fetched)
+            yield dict(results, feed_id=fetched.feed['id'], name=fetched.feed['name'], done=done,
+                       total=len(feeds), fetch_ms=fetched.fetch_ms, error=fetched.error)
+    
     def get_all_feeds(self) -> List[Dict]:
         """Get all RSS feeds"""
         conn = sqlite3.connect(self.db_path)
@@ -567,6 +636,10 @@ class RSSManager:
         cursor = conn.cursor()
         
         try:
+            # A feed switched back on starts with a closed breaker
+            if data.get('enabled', True):
+                self.breaker.reset_inactive(cursor, feed_id)
+            
             cursor.execute('''
                 UPDATE rss_feeds 
                 SET name = ?, url = ?, description = ?, category = ?, 
@@ -597,6 +670,7 @@ class RSSManager:
         cursor = conn.cursor()
         
         try:
+            self.websub.unsubscribe(feed_id)
             cursor.execute('DELETE FROM rss_feeds WHERE id = ?', (feed_id,))
             conn.commit()
             return True
@@ -627,7 +701,7 @@ class RSSManager:
     def refresh_all_feeds(self) -> Dict:
         """Manually refresh all RSS feeds"""
         try:
-            result = self.process_all_feeds()
+            result = self.process_all_feeds(due_only=False)
             return {
                 'success': True,
                 'feeds_processed': len([f for f in self.get_all_feeds() if f['is_active']]),
@@ -742,8 +816,8 @@ def start_rss_scheduler():
         _scheduler_running = True
         logger.info("RSS scheduler started")
         
-        # Schedule RSS feed updates every hour
-        schedule.every().hour.do(lambda: RSSManager().process_all_feeds())
+        # Each feed has its own next poll time; look for due ones every few minutes
+        schedule.every(FEED_POLL_TICK_MINUTES).minutes.do(lambda: RSSManager().process_all_feeds())
         
         # Run scheduler
         while _scheduler_running:
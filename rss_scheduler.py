@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 RSS Feed Scheduler
-Background service to automatically update RSS feeds at configured intervals
+Background service to automatically update RSS feeds, each on its own schedule
 """
 
 import time
@@ -9,6 +9,7 @@ import schedule
 import threading
 from datetime import datetime
 from rss_manager import RSSManager
+from feed_schedule import FEED_POLL_TICK_MINUTES
 import logging
 
 # Configure logging
@@ -46,13 +47,13 @@ class RSSScheduler:
         
         self.running = True
         
-        # Schedule the job to run every 15 minutes
-        schedule.every(15).minutes.do(self.process_feeds_job)
+        # Each feed has its own next poll time; look for due ones every few minutes
+        schedule.every(FEED_POLL_TICK_MINUTES).minutes.do(self.process_feeds_job)
         
         # Also run immediately on startup
         self.process_feeds_job()
         
-        logger.info("RSS Scheduler started - checking feeds every 15 minutes")
+        logger.info(f"RSS Scheduler started - checking for due feeds every {FEED_POLL_TICK_MINUTES} minutes")
         
         # Run scheduler in a separate thread
         self.thread = threading.Thread(target=self._run_scheduler, daemon=True)
@@ -0,0 +1,217 @@
+"""
+Incremental reconciliation of scraped items
+Diffs a scraper's current extraction against the items it found before
+(web_scraper_events): new items are inserted, changed items get only their
+changed fields updated, unchanged items have last_seen bumped, and items that
+are gone from the source are marked inactive. One transaction per run, with a
+savepoint per item: an item the database rejects is logged, counted as failed
+and rolled back on its own, without losing the rest of the run.
+"""
+
+import re
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from date_normalizer import normalize_date
+
+logger = logging.getLogger(__name__)
+
+# Event columns a re-scrape may change on an item we already know
+TRACKED_FIELDS = ('description', 'start_datetime', 'location_name', 'price_info', 'url')
+
+# Longest description stored for a scraped event
+MAX_DESCRIPTION_LENGTH = 2000
+
+class ScrapeReconciler:
+    """Applies one scrape run's items to events and web_scraper_events"""
+
+    def __init__(self, db_path: str = 'calendar.db'):
+        self.db_path = db_path
+        self.init_index()
+
+    def init_index(self):
+        """Index items by scraper and item key (the columns come from SCHEMA_MIGRATIONS)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_web_scraper_events_item
+                ON web_scraper_events (scraper_id, item_key)
+            ''')
+        except sqlite3.OperationalError:
+            pass  # Table or columns not created yet
+
+        conn.commit()
+        conn.close()
+
+    def reconcile(self, scraper_id: int, events: Iterable[Dict], source_url: str,
+                  complete: bool = True) -> Dict[str, int]:
+        """Apply a run's events; only a complete run may mark missing items inactive"""
+        counts = {'added': 0, 'linked': 0, 'updated': 0, 'unchanged': 0, 'vanished': 0, 'skipped': 0, 'failed': 0}
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        try:
+            # Opened explicitly so releasing an item's savepoint never commits the run
+            cursor.execute('BEGIN')
+            known = self._load_known_items(cursor, scraper_id)
+            seen = set()
+            unchanged_ids = []
+
+            for event in events:
+                item = self._normalize(event, source_url)
+                if item is None or item['key'] in seen:
+                    counts['skipped'] += 1
+                    continue
+                seen.add(item['key'])
+
+                known_item = known.get(item['key'])
+                if known_item is not None and known_item['content_hash'] == item['hash'] and known_item['is_active']:
+                    unchanged_ids.append((known_item['id'],))
+                    counts['unchanged'] += 1
+                    continue
+
+                cursor.execute('SAVEPOINT reconcile_item')
+                try:
+                    if known_item is None:
+                        created = self._insert_item(cursor, scraper_id, item)
+                        outcome = 'added' if created else 'linked'
+                    else:
+                        outcome = 'updated' if self._update_item(cursor, known_item, item) else 'unchanged'
+                except sqlite3.IntegrityError as e:
+                    cursor.execute('ROLLBACK TO reconcile_item')
+                    outcome = 'failed'
+                    logger.warning(f"⚠️ Scraper {scraper_id}: could not store '{item['title']}': {e}")
+                cursor.execute('RELEASE reconcile_item')
+                counts[outcome] += 1
+
+            cursor.executemany('''
+                UPDATE web_scraper_events SET last_seen = CURRENT_TIMESTAMP WHERE id = ?
+            ''', unchanged_ids)
+
+            # A truncated or empty run says nothing about what disappeared from the source
+            if complete and seen:
+                vanished = [(row['id'],) for key, row in known.items()
+                            if row['is_active'] and key not in seen]
+                cursor.executemany('UPDATE web_scraper_events SET is_active = 0 WHERE id = ?', vanished)
+                counts['vanished'] = len(vanished)
+
+            conn.commit()
+
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return counts
+
+    def _load_known_items(self, cursor: sqlite3.Cursor, scraper_id: int) -> Dict[str, Dict]:
+        """Items this scraper found on earlier runs, keyed by item_key"""
+        cursor.execute('''
+            SELECT id, event_id, item_key, content_hash, is_active
+            FROM web_scraper_events
+            WHERE scraper_id = ? AND item_key IS NOT NULL
+        ''', (scraper_id,))
+
+        return {row[2]: {'id': row[0], 'event_id': row[1], 'content_hash': row[3], 'is_active': bool(row[4])}
+                for row in cursor.fetchall()}
+
+    def _normalize(self, event: Dict, source_url: str) -> Optional[Dict]:
+        """Clean up a scraped event and compute its item key and content hash"""
+        title = (event.get('title') or '').strip()
+        if len(title) < 3:
+            return None
+
+        raw_start = (event.get('start_date') or '').strip()
+        fields = {
+            'description': (event.get('description') or '').strip()[:MAX_DESCRIPTION_LENGTH],
+            'location_name': (event.get('location') or '').strip(),
+            'price_info': (event.get('price_info') or '').strip(),
+            'url': event.get('url') or source_url
+        }
+
+        # Unparseable dates keep whatever date the stored event already has
+        parsed_start = normalize_date(raw_start)
+        start_datetime = parsed_start.isoformat() if parsed_start else None
+        fields['start_datetime'] = start_datetime
+
+        normalized_title = re.sub(r'\s+', ' ', title.lower())
+        key_source = f"{normalized_title}|{(start_datetime or raw_start)[:10]}"
+        hash_source = '\x1f'.join([title, raw_start] + [fields[name] for name in TRACKED_FIELDS if name != 'start_datetime'])
+
+        return {
+            'title': title,
+            'fields': fields,
+            'key': hashlib.sha1(key_source.encode('utf-8')).hexdigest()[:20],
+            'hash': hashlib.sha1(hash_source.encode('utf-8')).hexdigest()[:20]
+        }
+
+    def _insert_item(self, cursor: sqlite3.Cursor, scraper_id: int, item: Dict) -> bool:
+        """Start tracking a new item; returns True if a new pending event was created"""
+        title = item['title']
+        fields = item['fields']
+
+        # Undated items get a safe default so they still reach the approval queue
+        start_date = fields['start_datetime'] or (datetime.now() + timedelta(days=1)).isoformat()
+
+        # Check for duplicates (title + same day), e.g. from another source
+        cursor.execute('''
+            SELECT id FROM events
+            WHERE title = ? AND (start_datetime = ? OR start_datetime LIKE ?)
+        ''', (title, start_date, f'%{start_date[:10]}%'))
+        existing = cursor.fetchone()
+
+        if existing:
+            event_id = existing[0]
+        else:
+            cursor.execute('''
+                INSERT INTO events (
+                    title, description, start_datetime, location_name,
+                    price_info, url, source, approval_status, created_at, category_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                title, fields['description'], start_date, fields['location_name'],
+                fields['price_info'], fields['url'], 'scraper', 'pending', datetime.now().isoformat(), 1
+            ))
+            event_id = cursor.lastrowid
+
+        cursor.execute('''
+            INSERT INTO web_scraper_events (scraper_id, event_id, source_url, item_key, content_hash,
+                                            scraped_at, last_seen, is_active)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)
+        ''', (scraper_id, event_id, fields['url'], item['key'], item['hash']))
+
+        return not existing
+
+    def _update_item(self, cursor: sqlite3.Cursor, known_item: Dict, item: Dict) -> bool:
+        """Write only the fields that changed; returns True if the event was modified"""
+        cursor.execute(f'SELECT {", ".join(TRACKED_FIELDS)} FROM events WHERE id = ?', (known_item['event_id'],))
+        row = cursor.fetchone()
+
+        changes = {}
+        if row:
+            current = dict(zip(TRACKED_FIELDS, row))
+            for name in TRACKED_FIELDS:
+                value = item['fields'][name]
+                if value is None or value == '':
+                    continue  # Never blank out a field the source stopped showing
+                if value != (current[name] or ''):
+                    changes[name] = value
+
+        if changes:
+            assignments = ', '.join(f'{name} = ?' for name in changes)
+            cursor.execute(f'UPDATE events SET {assignments}, updated_at = ? WHERE id = ?',
+                           (*changes.values(), datetime.now().isoformat(), known_item['event_id']))
+
+        cursor.execute('''
+            UPDATE web_scraper_events
+            SET content_hash = ?, source_url = ?, last_seen = CURRENT_TIMESTAMP, is_active = 1
+            WHERE id = ?
+        ''', (item['hash'], item['fields']['url'], known_item['id']))
+
+        return bool(changes)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Offline scraper benchmark
+Runs every scraper class against recorded fixtures served by a local replay
+server and reports pages/s, events/s, CPU time and peak RSS per source.
+
+    python scraper_benchmark.py --record                 # capture fixtures from the live sites once
+    python scraper_benchmark.py --latency 80 --bandwidth 4000 --json bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from typing import Callable, Dict, List
+
+from http_fixtures import FIXTURES_DIR, start_recording, start_replay
+from http_client import set_replay_target
+from rate_limiter import get_rate_limiter
+
+# URLs exercised by the old live-site test scripts, benchmarked alongside the configured scrapers
+BENCHMARK_URLS = [
+    'https://www.washingtonian.com/calendar-2/',
+    'https://www.kennedy-center.org/events/',
+    'https://www.politics-prose.com/events',
+    'https://www.aspeninstitute.org/our-work/events/',
+    'https://www.wharfdc.com/upcoming-events'
+]
+
+# A single source may not take longer than this (seconds)
+SOURCE_TIMEOUT = 300
+
+def _run_enhanced_scraper(url: str) -> int:
+    from enhanced_scraper import EnhancedWebScraper
+    return len(EnhancedWebScraper().scrape_events(url))
+
+def _run_enhanced_web_scraper(url: str) -> int:
+    from enhanced_web_scraper import EnhancedWebScraper
+    return len(EnhancedWebScraper().extract_events(url, {}))
+
+def _run_web_scraper_manager(url: str) -> int:
+    from web_scraper_manager import WebScraperManager
+    return WebScraperManager().test_scraper_url(url).get('events_found', 0)
+
+def _run_advanced_web_scraper(url: str) -> int:
+    from advanced_web_scraper import AdvancedWebScraper
+    return len(AdvancedWebScraper().extract_events(url))
+
+def _run_advanced_scraper_system(url: str) -> int:
+    from advanced_scraper_system import AdvancedWebScraper
+    return len(AdvancedWebScraper().scrape_events_advanced(url) or [])
+
+def _run_scraper_service(url: str) -> int:
+    from scraper_service import ScraperService
+    service = ScraperService()
+    response = service.fetch_page(url, stream=True)
+    if not response:
+        return 0
+    from text_segmenter import iter_response_text
+    with response:
+        blocks = service.extract_event_blocks(iter_response_text(response))
+    return len(service.parse_event_blocks(blocks or [], url))
+
+def _run_smithsonian(url: str) -> int:
+    from smithsonian_comprehensive_scraper import SmithsonianComprehensiveScraper
+    return len(SmithsonianComprehensiveScraper().scrape_full_calendar(months_ahead=1))
+
+def _run_pagination_scraper(url: str) -> int:
+    from pagination_scraper import PaginationAwareScraper
+    return len(PaginationAwareScraper().scrape_natural_history_comprehensive() or [])
+
+# Scrapers that take any listing URL
+GENERIC_RUNNERS: Dict[str, Callable[[str], int]] = {
+    'enhanced_scraper': _run_enhanced_scraper,
+    'enhanced_web_scraper': _run_enhanced_web_scraper,
+    'web_scraper_manager': _run_web_scraper_manager,
+    'advanced_web_scraper': _run_advanced_web_scraper,
+    'advanced_scraper_system': _run_advanced_scraper_system,
+    'scraper_service': _run_scraper_service
+}
+
+# Site-specific scrapers with their own fixed start URL
+SITE_RUNNERS: Dict[str, tuple] = {
+    'smithsonian_comprehensive': (_run_smithsonian, 'https://www.si.edu/events'),
+    'pagination_scraper': (_run_pagination_scraper, 'https://naturalhistory.si.edu/events')
+}
+
+def load_source_urls(db_path: str = 'calendar.db') -> List[str]:
+    """Active web scraper URLs plus the fixed benchmark URLs"""
+    urls = []
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            urls = [row[0] for row in conn.execute('SELECT url FROM web_scrapers WHERE is_active = 1 ORDER BY name')]
+        except sqlite3.OperationalError:
+            pass  # No web_scrapers table in this database
+        conn.close()
+    return urls + [url for url in BENCHMARK_URLS if url not in urls]
+
+def _measure(runner: Callable[[str], int], url: str, mode: Dict, conn):
+    """Run one source in a fresh child process and send back its measurements"""
+    # Scrapers write databases and snapshots relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix='scraper_bench_'))
+    devnull = open(os.devnull, 'w')
+    sys.stdout = devnull
+
+    limiter = get_rate_limiter()
+    if mode['record']:
+        start_recording(mode['fixtures'])
+    else:
+        set_replay_target(mode['replay_url'])
+        # The replay server is local; politeness delays would only measure the limiter
+        limiter.requests_per_second = limiter.burst = 1000.0
+
+    result = {'events': 0, 'error': None}
+    requests_before = limiter.get_stats()['requests']
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+
+    try:
+        result['events'] = runner(url)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    elapsed = time.perf_counter() - started
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    result.update({
+        'seconds': elapsed,
+        'pages': limiter.get_stats()['requests'] - requests_before,
+        'cpu_seconds': (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime)
+                       + children.ru_utime + children.ru_stime,
+        'peak_rss_mb': max(usage.ru_maxrss, children.ru_maxrss) / 1024.0  # ru_maxrss is in KiB on Linux
+    })
+    conn.send(result)
+    conn.close()
+
+def run_source(runner_name: str, runner: Callable[[str], int], url: str, mode: Dict) -> Dict:
+    """Benchmark one scraper against one source, isolated in its own process"""
+    context = multiprocessing.get_context('fork')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(runner, url, mode, child_conn))
+    process.start()
+    child_conn.close()
+
+    result = {'runner': runner_name, 'url': url}
+    if parent_conn.poll(mode['timeout']):
+        result.update(parent_conn.recv())
+    else:
+        process.kill()
+        result['error'] = f"Timed out after {mode['timeout']}s"
+    process.join()
+
+    seconds = result.get('seconds') or 0
+    result['pages_per_second'] = round(result.get('pages', 0) / seconds, 2) if seconds else 0
+    result['events_per_second'] = round(result.get('events', 0) / seconds, 2) if seconds else 0
+    return result
+
+def print_report(results: List[Dict]):
+    print(f"\n{'runner':<26} {'source':<48} {'pages':>5} {'events':>6} {'sec':>7} "
+          f"{'pages/s':>8} {'events/s':>9} {'cpu s':>6} {'rss MB':>7}")
+    print('-' * 130)
+    for r in results:
+        source = r['url'][:48]
+        if r.get('error') and not r.get('seconds'):
+            print(f"{r['runner']:<26} {source:<48} ❌ {r['error'][:50]}")
+            continue
+        print(f"{r['runner']:<26} {source:<48} {r.get('pages', 0):>5} {r.get('events', 0):>6} "
+              f"{r['seconds']:>7.2f} {r['pages_per_second']:>8.2f} {r['events_per_second']:>9.2f} "
+              f"{r['cpu_seconds']:>6.2f} {r['peak_rss_mb']:>7.1f}" + (f"  ⚠️ {r['error'][:40]}" if r.get('error') else ''))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scrapers against recorded fixtures')
+    parser.add_argument('--record', action='store_true', help='Fetch live pages and record them as fixtures')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Fixtures directory')
+    parser.add_argument('--latency', type=float, default=0, help='Replay latency per response (ms)')
+    parser.add_argument('--bandwidth', type=float, default=0, help='Replay bandwidth per response (KiB/s)')
+    parser.add_argument('--runner', action='append', help='Only these scrapers (repeatable)')
+    parser.add_argument('--url', action='append', help='Only these source URLs (repeatable)')
+    parser.add_argument('--timeout', type=float, default=SOURCE_TIMEOUT, help='Per-source timeout (s)')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    mode = {'record': args.record, 'fixtures': os.path.abspath(args.fixtures), 'timeout': args.timeout}
+    server = None
+    if not args.record:
+        server = start_replay(mode['fixtures'], args.latency, args.bandwidth)
+        set_replay_target(None)  # Only the benchmarked children talk to the replay server
+        mode['replay_url'] = server.url
+        print(f"🎞️ Replaying {server.store.count()} fixtures at {server.url} "
+              f"(latency {args.latency}ms, bandwidth {args.bandwidth or 'unlimited'} KiB/s)")
+
+    urls = args.url or load_source_urls()
+    jobs = []
+    for name, runner in GENERIC_RUNNERS.items():
+        jobs.extend((name, runner, url) for url in urls)
+    for name, (runner, url) in SITE_RUNNERS.items():
+        jobs.append((name, runner, url))
+    if args.runner:
+        jobs = [job for job in jobs if job[0] in args.runner]
+
+    results = []
+    for name, runner, url in jobs:
+        misses_before = server.get_stats()['misses'] if server else 0
+        result = run_source(name, runner, url, mode)
+        if server:
+            result['fixture_misses'] = server.get_stats()['misses'] - misses_before
+        results.append(result)
+        print(f"{'✅' if not result.get('error') else '⚠️'} {name} {url}: {result.get('events', 0)} events "
+              f"in {result.get('seconds', 0):.2f}s")
+
+    if server:
+        server.stop()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -3,21 +3,19 @@ Specific fixes for problematic scrapers
 Addresses JavaScript-heavy sites and bot detection
 """
 
-import requests
-import time
-import random
 from bs4 import BeautifulSoup
 # Selenium imports (optional - install with: pip install selenium)
 # from selenium import webdriver
 import sqlite3
 import json
 from datetime import datetime, timedelta
+from http_client import create_session
 
 class ScraperFixes:
     """Fix specific scraper issues"""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = create_session()
         self.setup_session()
     
     def setup_session(self):
@@ -49,8 +47,6 @@ class ScraperFixes:
         for url in alternative_urls:
             try:
                 print(f"   Trying: {url}")
-                time.sleep(random.uniform(2, 4))  # Random delay
-                
                 response = self.session.get(url, timeout=15)
                 print(f"   Status: {response.status_code}")
                 
@@ -77,8 +73,6 @@ class ScraperFixes:
         for url in alternative_urls:
             try:
                 print(f"   Trying: {url}")
-                time.sleep(random.uniform(2, 4))
-                
                 response = self.session.get(url, timeout=15)
                 print(f"   Status: {response.status_code}")
                 
@@ -110,8 +104,6 @@ class ScraperFixes:
         for url in alternative_urls:
             try:
                 print(f"   Trying: {url}")
-                time.sleep(random.uniform(2, 4))
-                
                 response = self.session.get(url, timeout=15)
                 print(f"   Status: {response.status_code}")
                 
@@ -144,8 +136,6 @@ class ScraperFixes:
         for url in alternative_urls:
             try:
                 print(f"   Trying: {url}")
-                time.sleep(random.uniform(2, 4))
-                
                 response = self.session.get(url, timeout=15)
                 print(f"   Status: {response.status_code}")
                 
@@ -1,6 +1,6 @@
 """
 Production Scraper Scheduler
-Automatically scrapes all sources every 10 minutes with enhanced error handling
+Automatically scrapes each source when it is due, on an adaptive per-source interval
 """
 
 import schedule
@@ -9,9 +9,18 @@ import threading
 import sqlite3
 import json
 import logging
+from dataclasses import replace
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from enhanced_scraper import EnhancedWebScraper
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from enhanced_scraper import EnhancedWebScraper, ScrapeBudget, extract_events_from_html
+from deadline import Deadline, DeadlineExceeded, deadline_scope
+from circuit_breaker import CircuitBreaker, HALF_OPEN
+from adaptive_schedule import AdaptiveScheduler, ContentFingerprint
+from scrape_reconciler import ScrapeReconciler
+from snapshot_archive import get_snapshot_archive
+from parse_pool import shutdown_parse_pool, start_parse_pool, submit_parse
+from web_scraper_manager import apply_schema_migrations
 
 # Configure logging
 logging.basicConfig(
@@ -24,12 +33,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Minimum confidence score for scraped events to enter the approval queue
+MIN_CONFIDENCE_SCORE = 60
+
+# A whole scrape cycle must finish within this many seconds...
+CYCLE_DEADLINE_SECONDS = 300
+
+# ...and no single source may take longer than this
+SOURCE_DEADLINE_SECONDS = 120
+
+# Time cancelled sources get to commit partial results and return
+CANCEL_GRACE_SECONDS = 15
+
+# How often to look for sources whose next_run has come up
+SCHEDULER_TICK_MINUTES = 5
+
 class ProductionScraperScheduler:
-    """Production scheduler that runs all scrapers every 10 minutes"""
+    """Production scheduler that runs each scraper on its own adaptive interval"""
     
     def __init__(self):
         self.scraper = EnhancedWebScraper()
-        self.executor = ThreadPoolExecutor(max_workers=6)  # One per scraper
+        self.executor = ThreadPoolExecutor(max_workers=6)  # Fetching and DB writes; parsing goes to the shared parse pool
+        # Breaker, adaptive schedule and reconciler columns on databases created before them
+        apply_schema_migrations('calendar.db')
+        self.breaker = CircuitBreaker('calendar.db', 'web_scrapers')
+        self.adaptive = AdaptiveScheduler('calendar.db')
+        self.reconciler = ScrapeReconciler('calendar.db')
         self.is_running = False
         self.scheduler_thread = None
         self.stats = {
@@ -37,6 +66,8 @@ class ProductionScraperScheduler:
             'successful_runs': 0,
             'total_events_found': 0,
             'total_events_added': 0,
+            'sources_scraped': 0,
+            'sources_not_due': 0,
             'last_run': None
         }
     
@@ -47,11 +78,11 @@ class ProductionScraperScheduler:
             return
         
         logger.info("🚀 Starting Production Scraper Scheduler")
-        logger.info("📊 Schedule: Every 10 minutes")
+        logger.info(f"📊 Schedule: adaptive per source, checked every {SCHEDULER_TICK_MINUTES} minutes")
         logger.info("🎯 Target: All active web scrapers")
         
-        # Schedule scraping every 10 minutes
-        schedule.every(10).minutes.do(self._run_all_scrapers)
+        # Each tick scrapes only the sources that are due
+        schedule.every(SCHEDULER_TICK_MINUTES).minutes.do(self._run_all_scrapers)
         
         # Schedule health reporting every hour
         schedule.every(1).hours.do(self._report_health_stats)
@@ -61,6 +92,9 @@ class ProductionScraperScheduler:
         
         self.is_running = True
         
+        # Fork the parse workers before the scrape and scheduler threads start
+        start_parse_pool()
+        
         # Run initial scrape immediately
         logger.info("🔄 Running initial scrape...")
         self._run_all_scrapers()
@@ -76,6 +110,8 @@ class ProductionScraperScheduler:
         """Stop the scheduler"""
         self.is_running = False
         logger.info("🛑 Stopping scheduler...")
+        
+        shutdown_parse_pool()
     
     def _scheduler_loop(self):
         """Main scheduler loop"""
@@ -88,28 +124,52 @@ class ProductionScraperScheduler:
                 time.sleep(60)  # Wait longer on error
     
     def _run_all_scrapers(self):
-        """Run all active scrapers in parallel"""
+        """Run all active scrapers that are due, in parallel"""
         start_time = time.time()
         logger.info("🕷️ Starting scheduled scrape run")
         
-        # Get all active scrapers
+        # Get active scrapers whose next_run has come up
         scrapers = self._get_active_scrapers()
         if not scrapers:
-            logger.warning("No active scrapers found")
+            logger.info("No scrapers due")
             return
         
-        logger.info(f"📋 Found {len(scrapers)} active scrapers")
+        logger.info(f"📋 Found {len(scrapers)} scrapers due")
         
-        # Submit all scraping jobs
+        # Submit all scraping jobs under one cycle deadline
+        cycle_deadline = Deadline(CYCLE_DEADLINE_SECONDS)
         futures = {}
         for scraper_data in scrapers:
-            future = self.executor.submit(self._scrape_single_source, scraper_data)
+            future = self.executor.submit(self._scrape_single_source, scraper_data, cycle_deadline)
             futures[future] = scraper_data
         
+        done, not_done = wait(futures, timeout=cycle_deadline.remaining())
+        
+        if not_done:
+            # Sources still running stop at their next cancellation check and commit
+            # what they have; sources that never started are dropped
+            logger.warning(f"⏱️ Cycle deadline reached, cancelling {len(not_done)} sources")
+            cycle_deadline.cancel()
+            for future in not_done:
+                future.cancel()
+            finished, not_done = wait(not_done, timeout=CANCEL_GRACE_SECONDS)
+            done |= finished
+        
         # Collect results
         results = []
-        for future in as_completed(futures, timeout=300):  # 5 minute timeout
-            scraper_data = futures[future]
+        for future, scraper_data in futures.items():
+            if future not in done or future.cancelled():
+                logger.warning(f"⏱️ {scraper_data['name']}: cancelled at cycle deadline")
+                results.append({
+                    'scraper_id': scraper_data['id'],
+                    'name': scraper_data['name'],
+                    'success': False,
+                    'error': 'Cancelled at cycle deadline',
+                    'events_found': 0,
+                    'events_added': 0
+                })
+                continue
+            
             try:
                 result = future.result()
                 results.append(result)
@@ -139,7 +199,7 @@ class ProductionScraperScheduler:
         
         logger.info(f"📊 Scrape run complete: {successful}/{len(results)} successful, {total_events} events added")
     
-    def _scrape_single_source(self, scraper_data):
+    def _scrape_single_source(self, scraper_data, cycle_deadline=None):
         """Scrape a single source with enhanced error handling"""
         scraper_id = scraper_data['id']
         name = scraper_data['name']
@@ -157,133 +217,140 @@ class ProductionScraperScheduler:
         }
         
         start_time = time.time()
+        if cycle_deadline is not None:
+            deadline = cycle_deadline.child(SOURCE_DEADLINE_SECONDS)
+        else:
+            deadline = Deadline(SOURCE_DEADLINE_SECONDS)
         
         try:
-            # Scrape events with timeout
-            events = self.scraper.scrape_events(url, selector_config)
-            result['events_found'] = len(events)
-            
-            if events:
-                # Filter high-confidence events
-                good_events = [e for e in events if e.get('confidence_score', 0) >= 60]
+            with deadline_scope(deadline):
+                deadline.check()
                 
-                # Add events to database
-                events_added = self._add_events_to_db(scraper_id, good_events, url)
-                result['events_added'] = events_added
-                result['success'] = True
+                # Fetch here (I/O, threads); parse and extract in a worker process (CPU)
+                budget = ScrapeBudget.from_config(selector_config)
                 
-                # Update scraper stats
-                self._update_scraper_stats(scraper_id, True, events_added)
+                # A half-open breaker gets a single trial request, not the usual retries
+                attempts = 1 if scraper_data.get('circuit_state') == HALF_OPEN else 3
+                html_content, truncated = self.scraper.fetch_page(url, max_bytes=budget.max_bytes, attempts=attempts)
                 
-            else:
-                # No events found - still successful but no results
-                result['success'] = True
-                self._update_scraper_stats(scraper_id, True, 0)
+                events, partial = [], False
+                if html_content:
+                    # The worker stops on its own when this time is up and returns what it has,
+                    # flagged partial, even if it sat in the pool's queue first
+                    remaining = min(budget.max_seconds - (time.time() - start_time), deadline.remaining())
+                    future = submit_parse(
+                        extract_events_from_html, html_content, url, selector_config,
+                        replace(budget, max_seconds=max(0.0, remaining), stop_at=time.time() + remaining)
+                    )
+                    try:
+                        events, partial = future.result(timeout=deadline.remaining() + CANCEL_GRACE_SECONDS)
+                    except FutureTimeoutError:
+                        # Only a worker stuck inside one strategy gets here; it cannot be
+                        # interrupted, so nothing it found is available to commit
+                        raise DeadlineExceeded("Parsing did not stop at the deadline")
+            
+            # Whatever was extracted before the deadline is still committed
+            fingerprint = ContentFingerprint()
+            good_events = self._filter_good_events(events, result, fingerprint)
+            
+            # Items missing from a page cut at max_bytes, or from a parse stopped by the
+            # deadline or budget, may still be listed
+            complete = not (truncated or partial or deadline.expired())
+            events_added = self._add_events_to_db(scraper_id, good_events, url, complete, result)
+            result['events_added'] = events_added
+            result['success'] = True
+            
+            # Update scraper stats and schedule the next run from what changed
+            schedule_info = self._update_scraper_stats(scraper_id, True, events_added,
+                                                       selector_config, fingerprint)
+            result['next_run'] = schedule_info.get('next_run')
                 
+        except DeadlineExceeded as e:
+            # Running out of cycle or source time is not the source failing
+            result['error'] = f"Deadline exceeded: {e}"
+            result['success'] = False
+            self._update_scraper_stats(scraper_id, False, 0, selector_config, count_failure=False)
+            
         except Exception as e:
             result['error'] = str(e)
             result['success'] = False
             
             # Update failure count
-            self._update_scraper_stats(scraper_id, False, 0)
+            self._update_scraper_stats(scraper_id, False, 0, selector_config)
             
         finally:
             result['execution_time'] = time.time() - start_time
         
         return result
     
+    def _filter_good_events(self, events, result, fingerprint=None):
+        """Count and fingerprint streamed events and pass through the high-confidence ones"""
+        for event in events:
+            result['events_found'] += 1
+            if fingerprint is not None:
+                fingerprint.add(event)
+            if event.get('confidence_score', 0) >= MIN_CONFIDENCE_SCORE:
+                yield event
+    
     def _get_active_scrapers(self):
-        """Get all active scrapers from database"""
+        """Get active scrapers that are due and not held back by their circuit breaker"""
         conn = sqlite3.connect('calendar.db')
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT id, name, url, selector_config 
+            SELECT id, name, url, selector_config, consecutive_failures, circuit_open_until, next_run
             FROM web_scrapers 
             WHERE is_active = 1
             ORDER BY name
         ''')
         
         scrapers = []
+        skipped = 0
+        not_due = 0
+        now = datetime.now()
         for row in cursor.fetchall():
+            if not self.adaptive.is_due(row[6], now):
+                not_due += 1
+                continue
+            
+            circuit_state = self.breaker.state(row[4], row[5])
+            if not self.breaker.allows({'consecutive_failures': row[4], 'circuit_open_until': row[5]}):
+                skipped += 1
+                continue
+            
             scrapers.append({
                 'id': row[0],
                 'name': row[1],
                 'url': row[2],
-                'selector_config': json.loads(row[3]) if row[3] else {}
+                'selector_config': json.loads(row[3]) if row[3] else {},
+                'circuit_state': circuit_state
             })
         
         conn.close()
+        
+        self.stats['sources_not_due'] += not_due
+        if not_due:
+            logger.info(f"💤 {not_due} scrapers not due yet")
+        if skipped:
+            logger.info(f"⚡ Skipping {skipped} scrapers with open circuit breakers")
         return scrapers
     
-    def _add_events_to_db(self, scraper_id, events, source_url):
-        """Add validated events to database"""
-        if not events:
-            return 0
-        
-        conn = sqlite3.connect('calendar.db')
-        cursor = conn.cursor()
-        events_added = 0
-        
-        for event in events:
-            try:
-                title = event.get('title', '').strip()
-                description = event.get('description', '').strip()[:2000]  # Limit length
-                start_date = event.get('start_date', '').strip()
-                location = event.get('location', '').strip()
-                price = event.get('price_info', '').strip()
-                event_url = event.get('url', source_url)
-                
-                if not title or len(title) < 3:
-                    continue
-                
-                # Handle date validation more leniently
-                if not start_date:
-                    start_date = datetime.now().isoformat()
-                else:
-                    # Try to parse the date, but don't fail if it's malformed
-                    try:
-                        from dateutil import parser
-                        parsed_date = parser.parse(start_date, fuzzy=True)
-                        start_date = parsed_date.isoformat()
-                    except:
-                        # If date parsing fails, use tomorrow as a safe default
-                        from datetime import timedelta
-                        start_date = (datetime.now() + timedelta(days=1)).isoformat()
-                
-                # Check for duplicates (title + approximate date)
-                cursor.execute('''
-                    SELECT id FROM events 
-                    WHERE title = ? AND (
-                        start_datetime = ? OR 
-                        start_datetime LIKE ? OR
-                        (start_datetime LIKE ? AND source = 'scraper')
-                    )
-                ''', (title, start_date, f'%{start_date[:10]}%', f'%{title[:20]}%'))
-                
-                if not cursor.fetchone():
-                    # Add new event to approval queue
-                    cursor.execute('''
-                        INSERT INTO events (
-                            title, description, start_datetime, location_name, 
-                            price_info, url, source, approval_status, created_at, category_id
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        title, description, start_date, location, price, 
-                        event_url, 'scraper', 'pending', datetime.now().isoformat(), 1
-                    ))
-                    events_added += 1
-                    
-            except Exception as e:
-                logger.error(f"Error adding event '{title}': {e}")
-                continue
-        
-        conn.commit()
-        conn.close()
-        return events_added
+    def _add_events_to_db(self, scraper_id, events, source_url, complete=True, result=None):
+        """Reconcile a run's events with what this scraper found before; returns events added"""
+        counts = self.reconciler.reconcile(scraper_id, events, source_url, complete=complete)
+        
+        if result is not None:
+            result['events_updated'] = counts['updated']
+            result['events_vanished'] = counts['vanished']
+        if counts['updated'] or counts['vanished']:
+            logger.info(f"🔁 Scraper {scraper_id}: {counts['updated']} updated, "
+                        f"{counts['unchanged']} unchanged, {counts['vanished']} no longer listed")
+        
+        return counts['added']
     
-    def _update_scraper_stats(self, scraper_id, success, events_added):
-        """Update scraper statistics"""
+    def _update_scraper_stats(self, scraper_id, success, events_added, selector_config=None, fingerprint=None,
+                              count_failure=True):
+        """Update scraper statistics and schedule the scraper's next run"""
         conn = sqlite3.connect('calendar.db')
         cursor = conn.cursor()
         
@@ -291,24 +358,30 @@ class ProductionScraperScheduler:
             cursor.execute('''
                 UPDATE web_scrapers 
                 SET last_run = CURRENT_TIMESTAMP,
-                    total_events = total_events + ?,
-                    consecutive_failures = 0
+                    total_events = total_events + ?
                 WHERE id = ?
             ''', (events_added, scraper_id))
+            self.breaker.record_success(cursor, scraper_id)
         else:
             cursor.execute('''
                 UPDATE web_scrapers 
-                SET last_run = CURRENT_TIMESTAMP,
-                    consecutive_failures = consecutive_failures + 1
+                SET last_run = CURRENT_TIMESTAMP
                 WHERE id = ?
             ''', (scraper_id,))
+            if count_failure:
+                self.breaker.record_failure(cursor, scraper_id)
+        
+        schedule_info = self.adaptive.record_run(cursor, scraper_id, selector_config or {},
+                                                 fingerprint if success else None, events_added)
         
         conn.commit()
         conn.close()
+        return schedule_info
     
     def _update_run_stats(self, results, execution_time):
         """Update overall run statistics"""
         self.stats['total_runs'] += 1
+        self.stats['sources_scraped'] += len(results)
         self.stats['successful_runs'] += sum(1 for r in results if r['success'])
         self.stats['total_events_found'] += sum(r['events_found'] for r in results)
         self.stats['total_events_added'] += sum(r['events_added'] for r in results)
@@ -345,12 +418,20 @@ class ProductionScraperScheduler:
         conn.close()
         
         logger.info(f"🗑️ Cleaned up {deleted_count} old rejected events")
+        
+        # Apply page snapshot retention limits
+        try:
+            pruned = get_snapshot_archive().prune()
+            logger.info(f"🗃️ Pruned {pruned['snapshots_expired']} old snapshots, {pruned['blobs_removed']} stored pages")
+        except Exception as e:
+            logger.error(f"Snapshot pruning failed: {e}")
     
     def get_status(self):
         """Get current scheduler status"""
         return {
             'is_running': self.is_running,
-            'stats': self.stats
+            'stats': self.stats,
+            'circuit_breakers': self.breaker.get_states()
         }
 
 # Global scheduler instance
@@ -383,7 +464,11 @@ def get_scheduler_status():
     if _scheduler:
         return _scheduler.get_status()
     else:
-        return {'is_running': False, 'stats': {}}
+        return {
+            'is_running': False,
+            'stats': {},
+            'circuit_breakers': CircuitBreaker('calendar.db', 'web_scrapers').get_states()
+        }
 
 if __name__ == "__main__":
     # Run scheduler directly
@@ -5,16 +5,18 @@ Handles fetching, parsing, and storing events from monitored URLs.
 
 import requests
 import sqlite3
-import re
 import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
-import time
 import json
 from ai_parser import EventParser
+from http_client import create_session
+from sitemap_discovery import SitemapDiscovery
 from event_tracker import event_tracker
 from thingstodo_scraper import ThingsToDoScraper
+from text_segmenter import (EVENT_INDICATOR_RE, MIN_PAGE_CHARS, EventSegmenter, collapse_whitespace,
+                            iter_response_text, iter_text_nodes, segment_text)
 
 class ScraperService:
     """Service for scraping events from monitored URLs."""
@@ -23,10 +25,10 @@ class ScraperService:
         self.database_path = database_path
         self.parser = EventParser()
         self.thingstodo_scraper = ThingsToDoScraper()
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = create_session({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self.discovery = SitemapDiscovery(database_path, self.session)
     
     def get_db_connection(self):
         """Get database connection."""
@@ -38,8 +40,8 @@ class ScraperService:
         """Check if URL is from thingstododc.com."""
         return 'thingstododc.com' in url.lower()
     
-    def scrape_thingstodo_event(self, url: str) -> List[Dict]:
-        """Scrape a single thingstododc.com event page."""
+    def scrape_thingstodo_event(self, url: str) -> Optional[List[Dict]]:
+        """Scrape a single thingstododc.com event page (None if the page could not be scraped)."""
         try:
             # Use the specialized scraper
             scraped_data = self.thingstodo_scraper.scrape_event(url)
@@ -47,7 +49,7 @@ class ScraperService:
             # Check for errors
             if 'error' in scraped_data:
                 print(f"Error scraping {url}: {scraped_data['error']}")
-                return []
+                return None
             
             # Convert to the format expected by the existing system
             event = {
@@ -70,7 +72,32 @@ class ScraperService:
                 
         except Exception as e:
             print(f"Error in scrape_thingstodo_event: {str(e)}")
-            return []
+            return None
+    
+    def scrape_changed_event_pages(self, site_url: str, scrape_page) -> Optional[List[Dict]]:
+        """Scrape only the event pages whose sitemap lastmod is newer than our last visit.
+        
+        Returns None when the site has no usable sitemap, so the caller can fall back
+        to scraping the listing itself. scrape_page returns None for a page it could not
+        fetch; such pages are not marked visited, so the next run tries them again.
+        """
+        pages = self.discovery.discover(site_url)
+        if not pages and not self.discovery.has_pages(site_url):
+            return None
+        
+        events = []
+        visited = []
+        for page in pages:
+            page_events = scrape_page(page['url'])
+            if page_events is None:
+                continue
+            events.extend(page_events)
+            visited.append(page['url'])
+        
+        if len(visited) < len(pages):
+            print(f"{len(pages) - len(visited)} changed pages of {site_url} failed, retrying next run")
+        self.discovery.mark_visited(visited)
+        return events
     
     def run_scraping_cycle(self) -> Dict:
         """Run scraping cycle for all enabled URLs."""
@@ -116,9 +143,6 @@ class ScraperService:
                         'status': 'error',
                         'message': str(e)
                     })
-                
-                # Rate limiting - wait between requests
-                time.sleep(2)
             
             conn.close()
             
@@ -144,27 +168,38 @@ class ScraperService:
         try:
             # Check if this is a thingstododc.com URL and use specialized scraper
             if self.is_thingstodo_url(url):
-                events = self.scrape_thingstodo_event(url)
-                result['events_found'] = len(events) if events else 0
+                events = None
+                if not self.discovery.is_event_page(url):
+                    # A listing: fetch just the detail pages that changed
+                    events = self.scrape_changed_event_pages(url, self.scrape_thingstodo_event)
+                if events is None:
+                    events = self.scrape_thingstodo_event(url)
+                if events is None:
+                    result['status'] = 'error'
+                    result['message'] = 'Failed to fetch page'
+                    self.log_activity(url_id, 'error', 'Failed to fetch page')
+                    return result
+                result['events_found'] = len(events)
             else:
                 # Use the general scraper for other URLs
-                response = self.fetch_page(url)
+                response = self.fetch_page(url, stream=True)
                 if not response:
                     result['status'] = 'error'
                     result['message'] = 'Failed to fetch page'
                     self.log_activity(url_id, 'error', 'Failed to fetch page')
                     return result
                 
-                # Extract text content
-                text_content = self.extract_text_content(response.text, url)
-                if not text_content:
+                # Segment the page into event blocks as it downloads
+                with response:
+                    event_blocks = self.extract_event_blocks(iter_response_text(response))
+                if event_blocks is None:
                     result['status'] = 'error'
                     result['message'] = 'No content found'
                     self.log_activity(url_id, 'error', 'No content found')
                     return result
                 
-                # Parse events from content
-                events = self.parse_events_from_text(text_content, url)
+                # Parse events from the blocks
+                events = self.parse_event_blocks(event_blocks, url)
                 result['events_found'] = len(events)
             
             if not events:
@@ -197,10 +232,10 @@ class ScraperService:
         
         return result
     
-    def fetch_page(self, url: str) -> Optional[requests.Response]:
-        """Fetch a webpage with error handling."""
+    def fetch_page(self, url: str, stream: bool = False) -> Optional[requests.Response]:
+        """Fetch a webpage with error handling (with stream=True the body is left unread)."""
         try:
-            response = self.session.get(url, timeout=30)
+            response = self.session.get(url, timeout=30, stream=stream)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
@@ -208,28 +243,12 @@ class ScraperService:
             return None
     
     def extract_text_content(self, html: str, base_url: str) -> str:
-        """Extract text content from HTML."""
+        """Extract text content from HTML, with blank lines between block elements."""
         try:
-            # Remove script and style elements
-            html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-            html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
-            
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', ' ', html)
-            
-            # Clean up whitespace
-            text = re.sub(r'\s+', ' ', text)
-            text = text.strip()
-            
-            # Look for event-related content
-            event_indicators = [
-                r'event[s]?', r'meeting[s]?', r'conference[s]?', r'workshop[s]?',
-                r'concert[s]?', r'show[s]?', r'exhibition[s]?', r'gallery',
-                r'date[s]?', r'time[s]?', r'location[s]?', r'venue[s]?'
-            ]
+            text = collapse_whitespace(''.join(iter_text_nodes(html))).strip()
             
             # If text is too short or doesn't contain event indicators, return empty
-            if len(text) < 100 or not any(re.search(indicator, text, re.IGNORECASE) for indicator in event_indicators):
+            if len(text) < MIN_PAGE_CHARS or not EVENT_INDICATOR_RE.search(text):
                 return ""
             
             return text
@@ -238,21 +257,29 @@ class ScraperService:
             print(f"Error extracting text content: {str(e)}")
             return ""
     
+    def extract_event_blocks(self, html) -> Optional[List[str]]:
+        """
+        Candidate event blocks of an HTML page (a string or an iterator of chunks),
+        in one pass without building the page text. None if the page has no event content.
+        """
+        try:
+            segmenter = EventSegmenter()
+            blocks = list(segmenter.segment(iter_text_nodes(html)))
+            return blocks if segmenter.looks_like_events() else None
+        except Exception as e:
+            print(f"Error extracting text content: {str(e)}")
+            return None
+    
     def parse_events_from_text(self, text: str, source_url: str) -> List[Dict]:
         """Parse events from text content using the AI parser."""
+        return self.parse_event_blocks(self.split_into_event_blocks(text), source_url)
+    
+    def parse_event_blocks(self, event_blocks: List[str], source_url: str) -> List[Dict]:
+        """Parse candidate event blocks in one batch (concurrent OpenAI requests or the parse pool)."""
         events = []
         
         try:
-            # Split text into potential event blocks
-            event_blocks = self.split_into_event_blocks(text)
-            
-            for block in event_blocks:
-                if len(block.strip()) < 50:  # Skip very short blocks
-                    continue
-                
-                # Parse the block
-                parsed_event = self.parser.parse_natural_language(block)
-                
+            for block, parsed_event in zip(event_blocks, self.parser.parse_batch(event_blocks)):
                 # Validate the parsed event
                 if self.is_valid_event(parsed_event):
                     # Add source information
@@ -266,32 +293,8 @@ class ScraperService:
         return events
     
     def split_into_event_blocks(self, text: str) -> List[str]:
-        """Split text into potential event blocks."""
-        # Common separators for event blocks
-        separators = [
-            r'\n\s*\n',  # Double newlines
-            r'\.\s+(?=[A-Z])',  # Period followed by capital letter
-            r';\s+',  # Semicolons
-            r'Event:', r'Meeting:', r'Conference:', r'Workshop:',  # Event type indicators
-        ]
-        
-        blocks = [text]  # Start with the full text
-        
-        for separator in separators:
-            new_blocks = []
-            for block in blocks:
-                parts = re.split(separator, block, flags=re.IGNORECASE)
-                new_blocks.extend([part.strip() for part in parts if part.strip()])
-            blocks = new_blocks
-        
-        # Filter blocks that look like events
-        event_blocks = []
-        for block in blocks:
-            if (len(block) > 50 and 
-                any(keyword in block.lower() for keyword in ['event', 'meeting', 'date', 'time', 'location', 'venue'])):
-                event_blocks.append(block)
-        
-        return event_blocks
+        """Split text into potential event blocks in one pass."""
+        return segment_text(text)
     
     def is_valid_event(self, event: Dict) -> bool:
         """Check if a parsed event is valid."""
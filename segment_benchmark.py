@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Page segmentation benchmark
+Builds synthetic event listing pages of several sizes and segments each with
+the old approach (regex tag stripping over the whole page, then one re.split
+pass per separator) and with text_segmenter fed in 64 KB chunks as the page
+would stream in, reporting time, peak traced memory and the blocks produced.
+Memory is measured with each block dropped once it is produced, as the
+parser consumes them, so it shows the segmentation's own working set.
+
+    python segment_benchmark.py --sizes 1 4 16 --json segments.json
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+from typing import Callable, Dict, Iterable, List
+import text_segmenter
+
+LISTING = '''
+<div class="event-card">
+  <h3><a href="/events/{n}">{title} #{n}</a></h3>
+  <p class="date">{weekday}, {month} {day}, 2026 &middot; {hour}:30 pm</p>
+  <p class="location">Location: {venue}, Washington, DC</p>
+  <p>{blurb}</p>
+</div>
+'''
+
+FILLER = '<script>var tracking = {{"id": {n}, "events": []}}; function f(){{ return "<div>"; }}</script>' \
+         '<style>.event-card {{ margin: {n}px; }}</style>'
+
+TITLES = ['Jazz Night', 'Author Talk', 'Gallery Opening', 'Community Meeting', 'Film Screening']
+VENUES = ['Kennedy Center', 'Library of Congress', 'National Gallery of Art', 'The Anthem']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+WORDS = 'music history art community free tickets family talk join us evening with guests and'.split()
+
+def build_listing_page(megabytes: float, seed: int = 1) -> str:
+    """A calendar page with event cards, inline scripts and styles"""
+    rng = random.Random(seed)
+    parts = ['<html><head><title>Events</title></head><body><main>']
+    size, n = 0, 0
+    while size < megabytes * 1024 * 1024:
+        card = LISTING.format(
+            n=n, title=rng.choice(TITLES), weekday='Friday', month=rng.choice(MONTHS), day=rng.randint(1, 28),
+            hour=rng.randint(1, 11), venue=rng.choice(VENUES),
+            blurb=' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 60))) + '.')
+        if n % 10 == 0:
+            card += FILLER.format(n=n)
+        parts.append(card)
+        size += len(card)
+        n += 1
+    parts.append('</main></body></html>')
+    return ''.join(parts)
+
+def build_wall_page(megabytes: float, seed: int = 1) -> str:
+    """One huge text node with no separators at all (a minified or broken page)"""
+    rng = random.Random(seed)
+    words = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        word = rng.choice(WORDS + ['event', 'venue'])
+        words.append(word)
+        size += len(word) + 1
+    return '<html><body><div>' + ' '.join(words) + '</div></body></html>'
+
+def legacy_segment(html: str) -> List[str]:
+    """The old ScraperService path: extract_text_content, then split_into_event_blocks"""
+    html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
+    html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'<[^>]+>', ' ', html)
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    separators = [r'\n\s*\n', r'\.\s+(?=[A-Z])', r';\s+', r'Event:', r'Meeting:', r'Conference:', r'Workshop:']
+    blocks = [text]
+    for separator in separators:
+        new_blocks = []
+        for block in blocks:
+            parts = re.split(separator, block, flags=re.IGNORECASE)
+            new_blocks.extend([part.strip() for part in parts if part.strip()])
+        blocks = new_blocks
+    return [block for block in blocks
+            if len(block) > 50 and any(keyword in block.lower()
+                                       for keyword in ['event', 'meeting', 'date', 'time', 'location', 'venue'])]
+
+def streamed_segment(html: str) -> Iterable[str]:
+    """text_segmenter as ScraperService.scrape_url drives it, one network-sized chunk at a time"""
+    size = text_segmenter.STREAM_CHUNK_SIZE
+    chunks = (html[start:start + size] for start in range(0, len(html), size))
+    return text_segmenter.EventSegmenter().segment(text_segmenter.iter_text_nodes(chunks))
+
+def measure(segment: Callable[[str], Iterable[str]], html: str) -> Dict:
+    started = time.perf_counter()
+    blocks = list(segment(html))
+    elapsed = time.perf_counter() - started
+
+    # Memory in a second run: tracing slows allocation down too much to time under it.
+    # The page itself is allocated before tracing starts, so only the segmentation's own memory counts
+    tracemalloc.start()
+    for _ in segment(html):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lengths = [len(block) for block in blocks] or [0]
+    return {'seconds': round(elapsed, 3), 'mb_per_second': round(len(html) / 1048576 / elapsed, 2) if elapsed else 0,
+            'peak_mb': round(peak / 1048576, 2), 'blocks': len(blocks),
+            'median_block_chars': int(statistics.median(lengths)), 'max_block_chars': max(lengths)}
+
+def benchmark(sizes: List[float]) -> List[Dict]:
+    results = []
+    for megabytes in sizes:
+        for kind, build in (('listing', build_listing_page), ('wall', build_wall_page)):
+            html = build(megabytes)
+            results.append({'page': kind, 'mb': round(len(html) / 1048576, 2),
+                            'legacy': measure(legacy_segment, html),
+                            'segmenter': measure(streamed_segment, html)})
+    return results
+
+def print_results(results: List[Dict]):
+    print(f"\n{'page':<8} {'MB':>6} {'mode':<10} {'seconds':>8} {'MB/s':>7} {'peak MB':>8} "
+          f"{'blocks':>7} {'median':>7} {'max':>9}")
+    print('-' * 80)
+    for r in results:
+        for mode in ('legacy', 'segmenter'):
+            m = r[mode]
+            print(f"{r['page']:<8} {r['mb']:>6} {mode:<10} {m['seconds']:>8} {m['mb_per_second']:>7} "
+                  f"{m['peak_mb']:>8} {m['blocks']:>7} {m['median_block_chars']:>7} {m['max_block_chars']:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark text_segmenter against the old page splitting')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 16], help='Page sizes in MB')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    results = benchmark(args.sizes)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -4,44 +4,67 @@ Simplified business logic services for the calendar application
 
 import re
 import json
+import time
 import requests
 import feedparser
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from models import Database, EventModel, CategoryModel, RSSFeedModel
+from http_client import create_session
+from feed_fetcher import fetch_feeds
+from feed_entries import FeedEntryIndex, entry_identity, update_event_fields
+from parse_pool import iter_parallel, worker_instance
+from pattern_registry import (MAX_DOCUMENT_CHARS, document_deadline, note_budget_overrun, register, register_all,
+                              search_keyword_run)
+
+# Blocks shorter than this are not worth parsing as events
+MIN_EVENT_BLOCK_CHARS = 50
+
+def _parse_block(text: str) -> Dict:
+    """Parse one block in a pool worker"""
+    return worker_instance(EventParser).parse_natural_language(text)
+
+# Common date patterns
+DATE_RES = register_all('services.date', [
+    r'(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday),\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\.?\s+\d{1,2}',
+    r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}',
+    r'\d{1,2}/\d{1,2}/\d{2,4}',
+    r'\d{4}-\d{2}-\d{2}'
+], re.IGNORECASE)
+
+# Time patterns
+TIME_RES = register_all('services.time', [
+    r'\b\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)\b',
+    r'\b\d{1,2}\s*(?:AM|PM|am|pm)\b',
+    r'\b(?:at|from|starting)\s+\d{1,2}(?::\d{2})?\s*(?:AM|PM|am|pm)\b'
+], re.IGNORECASE)
+
+# Location patterns: a venue name after "at", "in" or "@" up to its last venue word, or a street
+# address up to its last street suffix (found with find_keyword_runs, in one pass over each run)
+VENUE_PREFIX_RE = register('services.venue_prefix', r'\b(?:at|in|@)\s+(?=[A-Za-z])', re.IGNORECASE)
+VENUE_NAME_RE = register('services.venue_name', r"[A-Za-z\s&',\-.]*")
+VENUE_WORD_RE = register('services.venue_word', r'(?:Center|Theater|Theatre|Museum|Library|Park|Hall|Arena|Stadium|Club|Bar|Restaurant|Cafe|Gallery|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue)\b', re.IGNORECASE)
+ADDRESS_NUMBER_RE = register('services.address_number', r'\b\d+(?=\s)')
+ADDRESS_STREET_RE = register('services.address_street', r'[A-Za-z\s,.-]*')
+ADDRESS_SUFFIX_RE = register('services.address_suffix', r'(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Way|Place|Pl|Court|Ct|NW|NE|SW|SE)\b', re.IGNORECASE)
+LOCATION_FORMS = [
+    (VENUE_PREFIX_RE, VENUE_NAME_RE, VENUE_WORD_RE),
+    (ADDRESS_NUMBER_RE, ADDRESS_STREET_RE, ADDRESS_SUFFIX_RE)
+]
+
+# Price patterns
+PRICE_RES = register_all('services.price', [
+    r'\$\d+(?:\.\d{2})?',
+    r'\b(?:free|Free|FREE)\b',
+    r'\b\d+\s*dollars?\b'
+], re.IGNORECASE)
+
+# Blank lines, or a line break before a capitalized word, separate events in bulk text
+EVENT_BLOCK_SEPARATOR_RE = register('services.event_block_separator', r'\n\s*\n|\n(?=[A-Z][a-z])')
 
 class EventParser:
     """Simplified event parser using regex patterns"""
     
-    def __init__(self):
-        # Common date patterns
-        self.date_patterns = [
-            r'(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday),\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\.?\s+\d{1,2}',
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}',
-            r'\d{1,2}/\d{1,2}/\d{2,4}',
-            r'\d{4}-\d{2}-\d{2}'
-        ]
-        
-        # Time patterns
-        self.time_patterns = [
-            r'\b\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)\b',
-            r'\b\d{1,2}\s*(?:AM|PM|am|pm)\b',
-            r'\b(?:at|from|starting)\s+\d{1,2}(?::\d{2})?\s*(?:AM|PM|am|pm)\b'
-        ]
-        
-        # Location patterns
-        self.location_patterns = [
-            r'\b(at|in|@)\s+[A-Z][A-Za-z\s&\',\-\.]+(?:Center|Theater|Theatre|Museum|Library|Park|Hall|Arena|Stadium|Club|Bar|Restaurant|Cafe|Gallery|Studio|Academy|School|University|College|Church|Temple|Mosque|Synagogue)\b',
-            r'\b\d+\s+[A-Za-z\s,.-]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Way|Place|Pl|Court|Ct|NW|NE|SW|SE)\b'
-        ]
-        
-        # Price patterns
-        self.price_patterns = [
-            r'\$\d+(?:\.\d{2})?',
-            r'\b(?:free|Free|FREE)\b',
-            r'\b\d+\s*dollars?\b'
-        ]
-    
     def parse_natural_language(self, text: str) -> Dict:
         """Parse natural language text to extract event information"""
         result = {
@@ -60,87 +83,167 @@ class EventParser:
             if len(first_line) > 5 and len(first_line) < 100:
                 result['title'] = first_line
         
-        # Extract date
-        for pattern in self.date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result['date'] = match.group()
-                break
-        
-        # Extract time
-        for pattern in self.time_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result['time'] = match.group()
-                break
-        
-        # Extract location
-        for pattern in self.location_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result['location'] = match.group()
-                break
-        
-        # Extract price
-        for pattern in self.price_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result['price_info'] = match.group()
+        # Very long documents are searched only up to MAX_DOCUMENT_CHARS, within the time budget
+        text = text[:MAX_DOCUMENT_CHARS]
+        deadline = document_deadline()
+        for field, extract in (('date', self._first_match(DATE_RES)), ('time', self._first_match(TIME_RES)),
+                               ('location', self._extract_location), ('price_info', self._first_match(PRICE_RES))):
+            if deadline.expired():
+                note_budget_overrun('Event parser', len(text), field)
                 break
+            value = extract(text)
+            if value:
+                result[field] = value
         
         return result
     
+    def _first_match(self, patterns: List[re.Pattern]):
+        """Extractor returning the text of the first pattern that matches"""
+        def extract(text: str) -> str:
+            for pattern in patterns:
+                match = pattern.search(text)
+                if match:
+                    return match.group()
+            return ''
+        return extract
+    
+    def _extract_location(self, text: str) -> str:
+        for prefix_re, name_re, keyword_re in LOCATION_FORMS:
+            match = search_keyword_run(text, prefix_re, name_re, keyword_re, min_offset=2, to_run_end=False,
+                                       word_end=True)
+            if match:
+                return text[match[0]:match[2]]
+        return ''
+    
+    def split_event_blocks(self, text: str) -> List[str]:
+        """Split bulk text into blocks substantial enough to hold an event"""
+        # Split by common separators
+        event_blocks = EVENT_BLOCK_SEPARATOR_RE.split(text)
+        return [block.strip() for block in event_blocks if len(block.strip()) > MIN_EVENT_BLOCK_CHARS]
+    
+    def parse_batch(self, texts: List[str]) -> List[Dict]:
+        """Parse many blocks on the parse pool; results are in the order of texts"""
+        results = [None] * len(texts)
+        for index, result in iter_parallel(_parse_block, list(enumerate(texts))):
+            results[index] = result
+        return results
+    
+    def iter_extract_events(self, text: str) -> Iterator[Tuple[int, Dict]]:
+        """Extract events from bulk text, yielding (block index, event) as blocks finish parsing"""
+        blocks = self.split_event_blocks(text)
+        for index, parsed_event in iter_parallel(_parse_block, list(enumerate(blocks))):
+            if parsed_event.get('title'):
+                yield index, parsed_event
+    
     def extract_multiple_events(self, text: str) -> List[Dict]:
         """Extract multiple events from bulk text"""
-        events = []
-        
-        # Split by common separators
-        event_blocks = re.split(r'\n\s*\n|\n(?=[A-Z][a-z])', text)
-        
-        for block in event_blocks:
-            block = block.strip()
-            if len(block) > 50:  # Only process substantial blocks
-                parsed_event = self.parse_natural_language(block)
-                if parsed_event.get('title'):
-                    events.append(parsed_event)
-        
-        return events
+        blocks = self.split_event_blocks(text)
+        return [parsed_event for parsed_event in self.parse_batch(blocks) if parsed_event.get('title')]
 
 class RSSService:
     """Simplified RSS feed service"""
     
     def __init__(self, event_model: EventModel):
         self.event_model = event_model
+        self.session = create_session()
+        self.entry_index = FeedEntryIndex(event_model.db.db_path)
     
     def parse_rss_feed(self, feed_url: str) -> List[Dict]:
         """Parse RSS feed and extract events"""
         try:
-            feed = feedparser.parse(feed_url)
-            events = []
+            response = self.session.get(feed_url, timeout=30)
+            response.raise_for_status()
+            return self._events_from_feed(feedparser.parse(response.content))
+            
+        except Exception as e:
+            print(f"Error parsing RSS feed {feed_url}: {e}")
+            return []
+    
+    def _events_from_feed(self, feed) -> List[Dict]:
+        """Event dicts for the entries of a parsed feed"""
+        events = []
+        
+        for entry in feed.entries:
+            events.append(self._event_from_entry(entry))
+        
+        return events
+    
+    def _event_from_entry(self, entry) -> Dict:
+        """Event dict for one feed entry"""
+        event_data = {
+            'title': entry.get('title', ''),
+            'description': entry.get('description', ''),
+            'url': entry.get('link', ''),
+            'source': 'rss'
+        }
+        
+        # Try to extract date from published or updated
+        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+            event_data['start_datetime'] = datetime(*entry.published_parsed[:6]).isoformat()
+        elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+            event_data['start_datetime'] = datetime(*entry.updated_parsed[:6]).isoformat()
+        else:
+            event_data['start_datetime'] = datetime.now().isoformat()
+        
+        return event_data
+    
+    def _store_feed_entries(self, feed_id: int, feed) -> Dict[str, int]:
+        """Apply a feed's entries in one transaction: new ones become pending events, changed ones are updated.
+        
+        Entries are looked up by GUID/link in the feed's event_sources rows, so
+        unchanged entries cost a dictionary lookup.
+        """
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0}
+        conn = self.event_model.db.get_connection()
+        
+        try:
+            cursor = conn.cursor()
+            known = self.entry_index.load(cursor, feed_id)
             
             for entry in feed.entries:
-                event_data = {
-                    'title': entry.get('title', ''),
-                    'description': entry.get('description', ''),
-                    'url': entry.get('link', ''),
-                    'source': 'rss'
-                }
+                identity = entry_identity(entry)
+                match = known.find(identity)
+                if match and match['content_hash'] == identity.content_hash:
+                    counts['unchanged'] += 1
+                    continue
                 
-                # Try to extract date from published or updated
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    event_data['start_datetime'] = datetime(*entry.published_parsed[:6]).isoformat()
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    event_data['start_datetime'] = datetime(*entry.updated_parsed[:6]).isoformat()
-                else:
-                    event_data['start_datetime'] = datetime.now().isoformat()
+                event_data = self._event_from_entry(entry)
+                if match:
+                    # start_datetime is only the publication date, so keep whatever the event has
+                    fields = {name: event_data[name] for name in ('title', 'description', 'url')}
+                    update_event_fields(cursor, match['event_id'], fields)
+                    self.entry_index.record_seen(cursor, match, identity)
+                    counts['updated'] += 1
+                    continue
                 
-                events.append(event_data)
-            
-            return events
+                # Entries from before tracking (or already entered by hand) exist under the same title
+                cursor.execute('SELECT id, source FROM events WHERE title = ? LIMIT 1', (event_data['title'],))
+                existing = cursor.fetchone()
+                if existing:
+                    if existing[1] == 'rss':
+                        self.entry_index.record_new(cursor, known, existing[0], feed_id, identity)
+                    counts['unchanged'] += 1
+                    continue
+                
+                # Ensure RSS events require approval
+                event_data['source'] = 'rss'
+                event_data['approval_status'] = 'pending'
+                
+                # Auto-detect event type
+                event_data['event_type'] = self._detect_event_type(event_data)
+                
+                event_id = self.event_model.insert_event(conn, event_data)
+                self.entry_index.record_new(cursor, known, event_id, feed_id, identity)
+                counts['added'] += 1
             
-        except Exception as e:
-            print(f"Error parsing RSS feed {feed_url}: {e}")
-            return []
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        return counts
     
     def _detect_event_type(self, event_data: Dict) -> str:
         """Automatically detect event type based on content"""
@@ -199,44 +302,78 @@ class RSSService:
     
     def refresh_all_feeds(self, rss_model: RSSFeedModel) -> Dict:
         """Refresh all enabled RSS feeds"""
+        summary = {}
+        for progress in self.iter_refresh_feeds(rss_model):
+            if progress['type'] == 'summary':
+                summary = progress
+        
+        return {
+            'total_events': summary.get('total_events', 0),
+            'total_updated': summary.get('total_updated', 0),
+            'successful_feeds': summary.get('successful_feeds', 0),
+            'failed_feeds': summary.get('failed_feeds', 0),
+            'total_feeds': summary.get('total_feeds', 0)
+        }
+    
+    def iter_refresh_feeds(self, rss_model: RSSFeedModel) -> Iterator[Dict]:
+        """Refresh enabled feeds concurrently, yielding one progress record per feed and a summary.
+        
+        Feeds are fetched and parsed in worker threads; each feed's new events are
+        written here, in one transaction per feed.
+        """
         feeds = rss_model.get_all_feeds()
         enabled_feeds = [feed for feed in feeds if feed['is_active']]
         
         total_events = 0
+        total_updated = 0
         successful_feeds = 0
         failed_feeds = 0
+        started = time.time()
         
-        for feed in enabled_feeds:
+        for done, fetched in enumerate(fetch_feeds(self.session, enabled_feeds), 1):
+            feed = fetched.feed
+            progress = {
+                'type': 'feed',
+                'feed_id': feed['id'],
+                'name': feed['name'],
+                'done': done,
+                'total': len(enabled_feeds),
+                'fetch_ms': fetched.fetch_ms,
+                'events_added': 0
+            }
+            
             try:
-                events = self.parse_rss_feed(feed['url'])
+                if fetched.error:
+                    raise Exception(fetched.error)
                 
-                for event_data in events:
-                    # Check if event already exists
-                    existing_events = self.event_model.search_events(event_data['title'])
-                    if not existing_events:
-                        # Ensure RSS events require approval
-                        event_data['source'] = 'rss'
-                        event_data['approval_status'] = 'pending'
-                        
-                        # Auto-detect event type
-                        event_data['event_type'] = self._detect_event_type(event_data)
-                        
-                        self.event_model.create_event(event_data)
-                        total_events += 1
+                counts = self._store_feed_entries(feed['id'], fetched.parsed)
+                total_events += counts['added']
+                total_updated += counts['updated']
+                progress['events_added'] = counts['added']
+                progress['events_updated'] = counts['updated']
+                progress['events_unchanged'] = counts['unchanged']
                 
                 # Update last checked time
                 rss_model.update_feed_status(feed['id'], True)
                 successful_feeds += 1
+                progress['status'] = 'success'
                 
             except Exception as e:
                 print(f"Error refreshing feed {feed['name']}: {e}")
                 failed_feeds += 1
+                progress['status'] = 'error'
+                progress['error'] = str(e)
+            
+            yield progress
         
-        return {
+        yield {
+            'type': 'summary',
             'total_events': total_events,
+            'total_updated': total_updated,
             'successful_feeds': successful_feeds,
             'failed_feeds': failed_feeds,
-            'total_feeds': len(enabled_feeds)
+            'total_feeds': len(enabled_feeds),
+            'elapsed_ms': int((time.time() - started) * 1000)
         }
 
 class EventService:
@@ -287,6 +424,16 @@ class EventService:
         """Extract multiple events from text"""
         return self.parser.extract_multiple_events(text)
     
+    def iter_extract_events_from_text(self, text: str) -> Iterator[Dict]:
+        """Extract events from text, yielding each one as its block is parsed and then a summary"""
+        started = time.time()
+        count = 0
+        for index, event in self.parser.iter_extract_events(text):
+            count += 1
+            yield {'type': 'event', 'block': index, 'event': event}
+        
+        yield {'type': 'summary', 'count': count, 'elapsed_ms': int((time.time() - started) * 1000)}
+    
     def get_categories(self) -> List[Dict]:
         """Get all categories"""
         return self.category_model.get_all_categories()
@@ -307,6 +454,10 @@ class EventService:
         """Refresh all RSS feeds"""
         return self.rss_service.refresh_all_feeds(self.rss_model)
     
+    def iter_refresh_rss_feeds(self) -> Iterator[Dict]:
+        """Refresh all RSS feeds, yielding progress as each feed finishes"""
+        return self.rss_service.iter_refresh_feeds(self.rss_model)
+    
     def get_stats(self) -> Dict:
         """Get basic statistics"""
         events = self.event_model.get_all_events()
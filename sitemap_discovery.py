@@ -0,0 +1,333 @@
+"""
+Sitemap-driven discovery of event detail pages
+Reads a site's sitemaps (found via robots.txt, falling back to /sitemap.xml),
+following sitemap indexes, and keeps the event-detail URLs they list with their
+<lastmod>. Sitemaps are fetched conditionally (ETag / Last-Modified) and child
+sitemaps whose index lastmod hasn't moved are skipped, so a run only fetches
+the detail pages that changed since we last visited them.
+"""
+
+import io
+import re
+import gzip
+import json
+import sqlite3
+import logging
+import argparse
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from dateutil import parser as date_parser
+from http_client import create_session
+
+logger = logging.getLogger(__name__)
+
+# Paths that look like a single event's page on most sites
+EVENT_URL_PATTERNS = [
+    r'/events?/[^/?#]+',
+    r'/calendar/[^/?#]+',
+    r'/happenings?/[^/?#]+',
+    r'/performances?/[^/?#]+',
+    r'/programs?/[^/?#]+'
+]
+
+# Sites whose detail pages need a tighter pattern than the defaults
+SITE_EVENT_PATTERNS: Dict[str, List[str]] = {
+    'thingstododc.com': [r'/events/[^/?#]+/?$']
+}
+
+# Detail pages handed out per discovery run (most recently modified first)
+MAX_PAGES_PER_RUN = 50
+
+# Pages whose sitemap entry has no <lastmod> are revisited this often
+REVISIT_WITHOUT_LASTMOD_DAYS = 7
+
+# Sitemap protocol limit on an uncompressed sitemap
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+# Guards against index loops and runaway nesting
+MAX_INDEX_DEPTH = 3
+
+class SitemapDiscovery:
+    """Tracks sitemap validators and event-page lastmods in the app database"""
+
+    def __init__(self, db_path: str = 'calendar.db', session=None):
+        self.db_path = db_path
+        self.session = session or create_session()
+        self.init_database()
+
+    def init_database(self):
+        """Create the sitemap cache and discovered page tables"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sitemap_sources (
+                url TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                listed_lastmod TEXT,
+                children TEXT,
+                page_count INTEGER DEFAULT 0,
+                fetched_at TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sitemap_pages (
+                url TEXT PRIMARY KEY,
+                site TEXT NOT NULL,
+                lastmod TEXT,
+                first_seen TEXT NOT NULL,
+                last_visited TEXT,
+                visited_lastmod TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sitemap_pages_site ON sitemap_pages (site, last_visited)')
+
+        conn.commit()
+        conn.close()
+
+    def is_event_page(self, url: str) -> bool:
+        """Whether a URL matches the event-detail patterns for its site"""
+        site = _site(url)
+        return any(re.search(pattern, urlsplit(url).path) for pattern in self._patterns(site))
+
+    def discover(self, site_url: str, patterns: Optional[List[str]] = None,
+                 limit: int = MAX_PAGES_PER_RUN) -> List[Dict]:
+        """Refresh the site's sitemaps and return event pages changed since our last visit"""
+        site = _site(site_url)
+        parts = urlsplit(site_url)
+        root = f"{parts.scheme or 'https'}://{parts.netloc}"
+        compiled = [re.compile(pattern) for pattern in (patterns or self._patterns(site))]
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            stats = {'fetched': 0, 'not_modified': 0, 'skipped': 0, 'pages_seen': 0}
+            sitemaps = self._robots_sitemaps(conn, site, f"{root}/robots.txt", stats) or [(f"{root}/sitemap.xml", None)]
+            visited = set()
+            for sitemap_url, listed_lastmod in sitemaps:
+                self._walk(conn, site, sitemap_url, listed_lastmod, compiled, 0, visited, stats)
+            conn.commit()
+
+            pages = self._pending_pages(conn, site, limit)
+        finally:
+            conn.close()
+
+        logger.info(f"🗺️ {site}: {stats['fetched']} sitemaps fetched, {stats['not_modified']} not modified, "
+                    f"{stats['skipped']} skipped; {len(pages)} changed event pages")
+        return pages
+
+    def has_pages(self, site_url: str) -> bool:
+        """Whether the site's sitemaps have listed any event pages"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT 1 FROM sitemap_pages WHERE site = ? LIMIT 1', (_site(site_url),)).fetchone()
+        conn.close()
+        return row is not None
+
+    def mark_visited(self, urls: Iterable[str]):
+        """Record that these pages were fetched, so they wait for their next lastmod change"""
+        now = _utc_now()
+        conn = sqlite3.connect(self.db_path)
+        # Compare later lastmods with the one we saw, not our clock (sites misreport and skew)
+        conn.executemany('UPDATE sitemap_pages SET last_visited = ?, visited_lastmod = lastmod WHERE url = ?',
+                         [(now, url) for url in urls])
+        conn.commit()
+        conn.close()
+
+    def _patterns(self, site: str) -> List[str]:
+        for known_site, patterns in SITE_EVENT_PATTERNS.items():
+            if site == known_site or site.endswith('.' + known_site):
+                return patterns
+        return EVENT_URL_PATTERNS
+
+    def _robots_sitemaps(self, conn: sqlite3.Connection, site: str, robots_url: str,
+                         stats: Dict) -> List[Tuple[str, Optional[str]]]:
+        """Sitemap URLs declared in robots.txt (cached like any sitemap)"""
+        cached = self._load_source(conn, robots_url)
+        response, body = self._fetch(robots_url, cached)
+        if response is None:
+            return []
+        if response.status_code == 304:
+            stats['not_modified'] += 1
+            return [tuple(child) for child in json.loads(cached['children'] or '[]')]
+
+        stats['fetched'] += 1
+        sitemaps = [(line.split(':', 1)[1].strip(), None) for line in body.decode('utf-8', 'replace').splitlines()
+                    if line.lower().startswith('sitemap:') and line.split(':', 1)[1].strip()]
+        self._save_source(conn, robots_url, site, response, None, sitemaps, 0)
+        return sitemaps
+
+    def _walk(self, conn: sqlite3.Connection, site: str, sitemap_url: str, listed_lastmod: Optional[str],
+              patterns: List, depth: int, visited: set, stats: Dict):
+        """Fetch one sitemap (unless unchanged) and follow the sitemaps it lists"""
+        if sitemap_url in visited or depth > MAX_INDEX_DEPTH:
+            return
+        visited.add(sitemap_url)
+
+        cached = self._load_source(conn, sitemap_url)
+        listed_lastmod = _normalize_lastmod(listed_lastmod)
+
+        if cached and cached['fetched_at'] and listed_lastmod and cached['listed_lastmod'] \
+                and listed_lastmod <= cached['listed_lastmod']:
+            # The parent index says this sitemap hasn't changed since we read it
+            stats['skipped'] += 1
+            children = json.loads(cached['children'] or '[]')
+        else:
+            response, body = self._fetch(sitemap_url, cached)
+            if response is None:
+                return
+            if response.status_code == 304:
+                stats['not_modified'] += 1
+                children = json.loads(cached['children'] or '[]')
+                conn.execute('UPDATE sitemap_sources SET listed_lastmod = ? WHERE url = ?',
+                             (listed_lastmod, sitemap_url))
+            else:
+                stats['fetched'] += 1
+                try:
+                    children, pages = _parse_sitemap(_decompress(body))
+                except ET.ParseError as e:
+                    logger.warning(f"Could not parse sitemap {sitemap_url}: {e}")
+                    return
+
+                matching = [(url, lastmod) for url, lastmod in pages
+                            if _site(url) == site and any(p.search(urlsplit(url).path) for p in patterns)]
+                self._upsert_pages(conn, site, matching)
+                stats['pages_seen'] += len(matching)
+                self._save_source(conn, sitemap_url, site, response, listed_lastmod, children, len(matching))
+
+        for child_url, child_lastmod in children:
+            self._walk(conn, site, child_url, child_lastmod, patterns, depth + 1, visited, stats)
+
+    def _fetch(self, url: str, cached: Optional[Dict]) -> Tuple[Optional[object], bytes]:
+        """Conditional GET returning (response, body); response is None if missing or unreachable"""
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=30, stream=True)
+            if response.status_code != 200:
+                response.close()
+                return (response if response.status_code == 304 else None), b''
+
+            body = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                body.extend(chunk)
+                if len(body) > MAX_SITEMAP_BYTES:
+                    response.close()
+                    logger.warning(f"Sitemap {url} is larger than {MAX_SITEMAP_BYTES} bytes, ignoring it")
+                    return None, b''
+            return response, bytes(body)
+
+        except Exception as e:
+            logger.debug(f"Could not fetch {url}: {e}")
+            return None, b''
+
+    def _load_source(self, conn: sqlite3.Connection, url: str) -> Optional[Dict]:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute('SELECT * FROM sitemap_sources WHERE url = ?', (url,)).fetchone()
+        conn.row_factory = None
+        return dict(row) if row else None
+
+    def _save_source(self, conn: sqlite3.Connection, url: str, site: str, response,
+                     listed_lastmod: Optional[str], children: List, page_count: int):
+        conn.execute('''
+            INSERT INTO sitemap_sources (url, site, etag, last_modified, listed_lastmod, children, page_count, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag, last_modified = excluded.last_modified,
+                listed_lastmod = excluded.listed_lastmod, children = excluded.children,
+                page_count = excluded.page_count, fetched_at = excluded.fetched_at
+        ''', (url, site, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+              listed_lastmod, json.dumps(children), page_count, _utc_now()))
+
+    def _upsert_pages(self, conn: sqlite3.Connection, site: str, pages: List[Tuple[str, Optional[str]]]):
+        now = _utc_now()
+        conn.executemany('''
+            INSERT INTO sitemap_pages (url, site, lastmod, first_seen)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET lastmod = excluded.lastmod
+        ''', [(url, site, _normalize_lastmod(lastmod), now) for url, lastmod in pages])
+
+    def _pending_pages(self, conn: sqlite3.Connection, site: str, limit: int) -> List[Dict]:
+        """Never-visited pages, pages whose lastmod moved since our visit, and stale pages without lastmod"""
+        revisit_before = (datetime.now(timezone.utc) - timedelta(days=REVISIT_WITHOUT_LASTMOD_DAYS)) \
+            .strftime('%Y-%m-%dT%H:%M:%S')
+        rows = conn.execute('''
+            SELECT url, lastmod, last_visited FROM sitemap_pages
+            WHERE site = ? AND (
+                last_visited IS NULL OR
+                (lastmod IS NOT NULL AND (visited_lastmod IS NULL OR lastmod > visited_lastmod)) OR
+                (lastmod IS NULL AND last_visited < ?)
+            )
+            ORDER BY lastmod IS NULL, lastmod DESC
+            LIMIT ?
+        ''', (site, revisit_before, limit)).fetchall()
+        return [{'url': row[0], 'lastmod': row[1], 'last_visited': row[2]} for row in rows]
+
+def _site(url: str) -> str:
+    """Host (and non-default port) identifying a site; www. and bare domain are the same site"""
+    host = urlsplit(url).netloc.lower().rsplit('@', 1)[-1]
+    return host[4:] if host.startswith('www.') else host
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+def _normalize_lastmod(value: Optional[str]) -> Optional[str]:
+    """W3C datetime (any precision or offset) as a sortable UTC timestamp"""
+    if not value:
+        return None
+    try:
+        parsed = date_parser.isoparse(value.strip())
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S')
+
+def _decompress(body: bytes) -> bytes:
+    # .xml.gz sitemaps are usually served as application/octet-stream, not Content-Encoding: gzip
+    if body[:2] == b'\x1f\x8b':
+        with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+            body = f.read(MAX_SITEMAP_BYTES + 1)
+        if len(body) > MAX_SITEMAP_BYTES:
+            raise ET.ParseError(f"uncompressed sitemap larger than {MAX_SITEMAP_BYTES} bytes")
+    return body
+
+def _parse_sitemap(body: bytes) -> Tuple[List[Tuple[str, Optional[str]]], List[Tuple[str, Optional[str]]]]:
+    """(child sitemaps, pages) listed in a sitemap or sitemap index, each as (loc, lastmod)"""
+    children, pages = [], []
+    for _, element in ET.iterparse(io.BytesIO(body), events=('end',)):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag not in ('url', 'sitemap'):
+            continue
+        loc = element.findtext('{*}loc') or element.findtext('loc')
+        lastmod = element.findtext('{*}lastmod') or element.findtext('lastmod')
+        if loc and loc.strip():
+            (children if tag == 'sitemap' else pages).append((loc.strip(), lastmod.strip() if lastmod else None))
+        element.clear()
+    return children, pages
+
+def main():
+    parser = argparse.ArgumentParser(description='Find event pages changed since the last visit')
+    parser.add_argument('site_url', help='Site (or listing page) whose sitemaps to read')
+    parser.add_argument('--pattern', action='append', help='Event URL regex (repeatable; default: built-in patterns)')
+    parser.add_argument('--limit', type=int, default=MAX_PAGES_PER_RUN)
+    parser.add_argument('--mark-visited', action='store_true', help='Mark the listed pages as visited')
+    args = parser.parse_args()
+
+    discovery = SitemapDiscovery()
+    pages = discovery.discover(args.site_url, args.pattern, args.limit)
+    for page in pages:
+        print(f"{page['lastmod'] or '(no lastmod)':<20} {page['url']}")
+    print(f"\n{len(pages)} changed event pages")
+    if args.mark_visited:
+        discovery.mark_visited(page['url'] for page in pages)
+
+if __name__ == '__main__':
+    main()
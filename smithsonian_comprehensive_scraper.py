@@ -3,22 +3,33 @@ Comprehensive Smithsonian Calendar Scraper
 Captures ALL events across ALL days and museums, not just single day view
 """
 
-import requests
 from bs4 import BeautifulSoup
-import time
-import random
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import sqlite3
 import json
 import re
 from urllib.parse import urljoin, urlparse
+from http_client import create_session
+
+# Date traversal runs this many day fetches at once...
+DATE_RANGE_WORKERS = 4
+
+# ...but never more than this many requests per second against si.edu
+HOST_REQUESTS_PER_SECOND = 0.5
+
+# Days checkpointed more recently than this are resumed without refetching
+RECRAWL_HOURS = 6
 
 class SmithsonianComprehensiveScraper:
     """Scraper that captures the entire Smithsonian calendar, not just one day"""
     
-    def __init__(self):
+    def __init__(self, db_path='calendar.db'):
         self.base_url = "https://www.si.edu/events"
+        self.db_path = db_path
         self.session = self.setup_session()
+        self._init_checkpoint_tables()
         self.museums = [
             'Natural History Museum',
             'American History Museum',
@@ -33,13 +44,13 @@ class SmithsonianComprehensiveScraper:
     
     def setup_session(self):
         """Setup session with realistic headers"""
-        session = requests.Session()
-        session.headers.update({
+        session = create_session({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Referer': 'https://www.si.edu/'
         })
+        session.rate_limiter.set_rate(urlparse(self.base_url).netloc, HOST_REQUESTS_PER_SECOND)
         return session
     
     def scrape_full_calendar(self, months_ahead=3):
@@ -76,6 +87,40 @@ class SmithsonianComprehensiveScraper:
         print(f'📊 Total comprehensive events: {len(unique_events)}')
         return unique_events
     
+    def _init_checkpoint_tables(self):
+        """Create the tables that let date traversal resume and skip unchanged days"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS smithsonian_crawl_checkpoints (
+                day TEXT PRIMARY KEY,
+                url TEXT,
+                content_hash TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                events_json TEXT,
+                crawled_at DATETIME
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS smithsonian_crawl_state (
+                name TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        conn.commit()
+        conn.close()
+    
+    def _format_day_url(self, pattern, day):
+        """Build the calendar URL for a given day"""
+        if '{date}' in pattern:
+            return pattern.format(date=day.strftime('%Y-%m-%d'))
+        return pattern.format(year=day.year, month=day.month, day=day.day)
+    
     def _scrape_date_range(self, months_ahead):
         """Scrape events by traversing through calendar dates"""
         events = []
@@ -86,7 +131,51 @@ class SmithsonianComprehensiveScraper:
         
         print(f'   📅 Scraping dates from {start_date} to {end_date}')
         
-        # Test different URL patterns for date navigation
+        working_pattern = self._get_state('date_url_pattern') or self._find_date_url_pattern(start_date)
+        if not working_pattern:
+            print(f'   ❌ No working date URL pattern found')
+            return []
+        
+        checkpoints = self._load_checkpoints()
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        
+        counts = {'fetched': 0, 'unchanged': 0, 'resumed': 0}
+        consecutive_failures = 0
+        
+        # Days complete concurrently but are consumed in date order, so the
+        # "stop after 5 empty days in a row" rule still applies
+        executor = ThreadPoolExecutor(max_workers=DATE_RANGE_WORKERS)
+        try:
+            results = executor.map(
+                lambda day: self._crawl_day(working_pattern, day, checkpoints.get(day.isoformat())),
+                days
+            )
+            
+            for day, status, day_events in results:
+                counts[status] = counts.get(status, 0) + 1
+                
+                if day_events:
+                    events.extend(day_events)
+                    consecutive_failures = 0
+                    if status == 'fetched':
+                        print(f'   📅 {day}: {len(day_events)} events')
+                else:
+                    consecutive_failures += 1
+                
+                if consecutive_failures >= 5:
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        # A stored pattern that yields nothing at all is re-probed next run
+        if not events and counts['fetched']:
+            self._set_state('date_url_pattern', None)
+        
+        print(f'   📊 Days fetched: {counts["fetched"]}, unchanged: {counts["unchanged"]}, resumed: {counts["resumed"]}')
+        return events
+    
+    def _find_date_url_pattern(self, start_date):
+        """Test different URL patterns for date navigation and remember the one that works"""
         url_patterns = [
             "https://www.si.edu/events?date={date}",
             "https://www.si.edu/events/{year}/{month:02d}/{day:02d}",
@@ -95,22 +184,12 @@ class SmithsonianComprehensiveScraper:
         
         # Sample a few dates to find working pattern
         test_dates = [start_date + timedelta(days=i) for i in [0, 1, 7, 14]]
-        working_pattern = None
         
         for pattern in url_patterns:
             success_count = 0
             for test_date in test_dates:
                 try:
-                    if '{date}' in pattern:
-                        url = pattern.format(date=test_date.strftime('%Y-%m-%d'))
-                    else:
-                        url = pattern.format(
-                            year=test_date.year,
-                            month=test_date.month,
-                            day=test_date.day
-                        )
-                    
-                    response = self.session.get(url, timeout=10)
+                    response = self.session.get(self._format_day_url(pattern, test_date), timeout=10)
                     if response.status_code == 200 and self._has_events(response.text):
                         success_count += 1
                         
@@ -118,47 +197,97 @@ class SmithsonianComprehensiveScraper:
                     continue
             
             if success_count >= 2:  # Pattern works for most dates
-                working_pattern = pattern
                 print(f'   ✅ Working URL pattern: {pattern}')
-                break
+                self._set_state('date_url_pattern', pattern)
+                return pattern
         
-        if not working_pattern:
-            print(f'   ❌ No working date URL pattern found')
-            return []
+        return None
+    
+    def _crawl_day(self, pattern, day, checkpoint):
+        """Fetch one day unless it was checkpointed recently or is unchanged.
         
-        # Scrape all dates using working pattern
-        current_date = start_date
-        consecutive_failures = 0
+        Returns (day, status, events) where status is 'fetched', 'unchanged',
+        'resumed' or 'failed'.
+        """
+        if checkpoint:
+            crawled_at = datetime.fromisoformat(checkpoint['crawled_at'])
+            if datetime.now() - crawled_at < timedelta(hours=RECRAWL_HOURS):
+                return day, 'resumed', json.loads(checkpoint['events_json'] or '[]')
+        
+        url = self._format_day_url(pattern, day)
+        headers = {}
+        if checkpoint and checkpoint['etag']:
+            headers['If-None-Match'] = checkpoint['etag']
+        if checkpoint and checkpoint['last_modified']:
+            headers['If-Modified-Since'] = checkpoint['last_modified']
         
-        while current_date <= end_date and consecutive_failures < 5:
-            try:
-                if '{date}' in working_pattern:
-                    url = working_pattern.format(date=current_date.strftime('%Y-%m-%d'))
-                else:
-                    url = working_pattern.format(
-                        year=current_date.year,
-                        month=current_date.month,
-                        day=current_date.day
-                    )
-                
-                day_events = self._scrape_single_day(url, current_date)
-                if day_events:
-                    events.extend(day_events)
-                    consecutive_failures = 0
-                    print(f'   📅 {current_date}: {len(day_events)} events')
-                else:
-                    consecutive_failures += 1
-                
-                # Be respectful - random delay
-                time.sleep(random.uniform(1, 3))
-                
-            except Exception as e:
-                consecutive_failures += 1
-                print(f'   ❌ {current_date}: Error - {str(e)[:30]}...')
-            
-            current_date += timedelta(days=1)
+        try:
+            response = self.session.get(url, timeout=15, headers=headers)
+        except Exception as e:
+            print(f'   ❌ {day}: Error - {str(e)[:30]}...')
+            return day, 'failed', []
         
-        return events
+        if response.status_code == 304 and checkpoint:
+            self._save_checkpoint(day, url, checkpoint['content_hash'], response, checkpoint['events_json'])
+            return day, 'unchanged', json.loads(checkpoint['events_json'] or '[]')
+        
+        if response.status_code != 200:
+            return day, 'failed', []
+        
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if checkpoint and checkpoint['content_hash'] == content_hash:
+            self._save_checkpoint(day, url, content_hash, response, checkpoint['events_json'])
+            return day, 'unchanged', json.loads(checkpoint['events_json'] or '[]')
+        
+        day_events = self._extract_day_events(response.content, day)
+        self._save_checkpoint(day, url, content_hash, response, json.dumps(day_events))
+        return day, 'fetched', day_events
+    
+    def _load_checkpoints(self):
+        """Load the per-day checkpoints keyed by ISO date"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM smithsonian_crawl_checkpoints')
+        checkpoints = {row['day']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+        return checkpoints
+    
+    def _save_checkpoint(self, day, url, content_hash, response, events_json):
+        """Record a completed day so an interrupted run can resume from it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO smithsonian_crawl_checkpoints
+                (day, url, content_hash, etag, last_modified, events_json, crawled_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            day.isoformat(), url, content_hash,
+            response.headers.get('ETag'), response.headers.get('Last-Modified'),
+            events_json, datetime.now().isoformat()
+        ))
+        conn.commit()
+        conn.close()
+    
+    def _get_state(self, name):
+        """Read a value remembered between crawls"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT value FROM smithsonian_crawl_state WHERE name = ?', (name,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+    
+    def _set_state(self, name, value):
+        """Remember a value between crawls"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO smithsonian_crawl_state (name, value, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        ''', (name, value))
+        conn.commit()
+        conn.close()
     
     def _scrape_single_day(self, url, date):
         """Scrape all events from a single day's calendar page"""
@@ -167,32 +296,36 @@ class SmithsonianComprehensiveScraper:
             if response.status_code != 200:
                 return []
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            events = []
-            
-            # Look for event containers (based on the HTML structure shown)
-            event_selectors = [
-                'article',
-                '[class*="event"]',
-                '.event-item',
-                '.calendar-event',
-                '[data-event]'
-            ]
-            
-            for selector in event_selectors:
-                containers = soup.select(selector)
-                
-                for container in containers:
-                    event = self._extract_event_from_container(container, date)
-                    if event and self._is_valid_smithsonian_event(event):
-                        events.append(event)
-            
-            return events
+            return self._extract_day_events(response.content, date)
             
         except Exception as e:
             print(f'   Error scraping {url}: {e}')
             return []
     
+    def _extract_day_events(self, html_content, date):
+        """Extract all events from a day's calendar page"""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        events = []
+        
+        # Look for event containers (based on the HTML structure shown)
+        event_selectors = [
+            'article',
+            '[class*="event"]',
+            '.event-item',
+            '.calendar-event',
+            '[data-event]'
+        ]
+        
+        for selector in event_selectors:
+            containers = soup.select(selector)
+            
+            for container in containers:
+                event = self._extract_event_from_container(container, date)
+                if event and self._is_valid_smithsonian_event(event):
+                    events.append(event)
+        
+        return events
+    
     def _extract_event_from_container(self, container, date):
         """Extract event data from a single event container"""
         try:
@@ -357,8 +490,6 @@ class SmithsonianComprehensiveScraper:
                         print(f'   ✅ {url}: {len(museum_events)} events')
                         events.extend(museum_events)
                 
-                time.sleep(random.uniform(1, 2))
-                
             except Exception as e:
                 continue
         
@@ -0,0 +1,352 @@
+"""
+Page snapshot archive
+Every page fetched for scraping is stored gzip-compressed and content-addressed
+(identical pages are stored once), so selector and parser changes can be
+re-run over stored pages without touching the network.
+
+A body and the rows referring to it change together: store() writes the blob
+and its row, and prune() deletes rows and the blobs left unreferenced, each
+under the archive lock and inside one write transaction, so a prune in this
+or another process never removes a body a new snapshot has just claimed.
+"""
+
+import os
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from parse_pool import submit_parse
+
+logger = logging.getLogger(__name__)
+
+# Where compressed page bodies are kept, relative to the working directory
+SNAPSHOT_DIR = 'page_snapshots'
+
+# Retention: snapshots kept per URL, and maximum age (the latest one per URL is always kept)
+MAX_SNAPSHOTS_PER_URL = 10
+MAX_SNAPSHOT_AGE_DAYS = 30
+
+# gzip level 6 is close to level 9 in size for HTML at a fraction of the CPU
+COMPRESSION_LEVEL = 6
+
+class SnapshotArchive:
+    """Content-addressed store of fetched pages with an index in the app database"""
+
+    def __init__(self, db_path: str = 'calendar.db', root: str = SNAPSHOT_DIR):
+        self.db_path = db_path
+        self.root = root
+        self.lock = threading.Lock()
+        self.init_database()
+
+    def init_database(self):
+        """Create the snapshot index table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS page_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                fetched_at DATETIME NOT NULL,
+                size INTEGER,
+                compressed_size INTEGER
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_snapshots_url ON page_snapshots (url, fetched_at)')
+
+        conn.commit()
+        conn.close()
+
+    def store(self, url: str, html_content: str) -> str:
+        """Archive a fetched page and return its content hash"""
+        body = html_content.encode('utf-8')
+        content_hash = hashlib.sha256(body).hexdigest()
+        # Compress outside the lock; the blob is only written (if still missing) inside it
+        compressed = None if os.path.exists(self._blob_path(content_hash)) else self._compress(body)
+        now = datetime.now().isoformat()
+
+        with self.lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                compressed_size = self._write_blob(content_hash, body, compressed)
+
+                cursor.execute('''
+                    SELECT id, content_hash FROM page_snapshots
+                    WHERE url = ? ORDER BY fetched_at DESC LIMIT 1
+                ''', (url,))
+                latest = cursor.fetchone()
+
+                if latest and latest[1] == content_hash:
+                    # Page unchanged since the last fetch: just note that we saw it again
+                    cursor.execute('UPDATE page_snapshots SET fetched_at = ? WHERE id = ?', (now, latest[0]))
+                else:
+                    cursor.execute('''
+                        INSERT INTO page_snapshots (url, content_hash, fetched_at, size, compressed_size)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (url, content_hash, now, len(body), compressed_size))
+                    self._prune_url(cursor, url)
+
+                conn.commit()
+            finally:
+                conn.close()
+
+        return content_hash
+
+    def load(self, content_hash: str) -> Optional[str]:
+        """Decompressed page body for a content hash, or None if it is gone"""
+        try:
+            with gzip.open(self._blob_path(content_hash), 'rb') as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+    def latest(self, url: str) -> Optional[Dict]:
+        """Most recent snapshot of a URL, including its body"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT content_hash, fetched_at, size FROM page_snapshots
+            WHERE url = ? ORDER BY fetched_at DESC LIMIT 1
+        ''', (url,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+        html_content = self.load(row[0])
+        if html_content is None:
+            return None
+        return {'url': url, 'content_hash': row[0], 'fetched_at': row[1], 'size': row[2], 'html': html_content}
+
+    def prune(self) -> Dict[str, int]:
+        """Apply retention limits and delete bodies no snapshot refers to any more"""
+        cutoff = (datetime.now() - timedelta(days=MAX_SNAPSHOT_AGE_DAYS)).isoformat()
+
+        with self.lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+
+                # Old snapshots go, except the newest one of each URL
+                cursor.execute('''
+                    DELETE FROM page_snapshots
+                    WHERE fetched_at < ? AND id NOT IN (
+                        SELECT id FROM page_snapshots p
+                        WHERE fetched_at = (SELECT MAX(fetched_at) FROM page_snapshots WHERE url = p.url)
+                    )
+                ''', (cutoff,))
+                expired = cursor.rowcount
+
+                cursor.execute('SELECT DISTINCT url FROM page_snapshots')
+                for (url,) in cursor.fetchall():
+                    self._prune_url(cursor, url)
+
+                # Still holding the write lock, so no store() can claim a blob between this check and the unlink
+                cursor.execute('SELECT DISTINCT content_hash FROM page_snapshots')
+                referenced = {row[0] for row in cursor.fetchall()}
+                blobs_removed = 0
+                for content_hash, path in self._iter_blobs():
+                    if content_hash not in referenced:
+                        os.remove(path)
+                        blobs_removed += 1
+
+                conn.commit()
+            finally:
+                conn.close()
+
+        return {'snapshots_expired': expired, 'blobs_removed': blobs_removed}
+
+    def get_stats(self) -> Dict:
+        """Snapshot counts and sizes, raw and compressed"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT content_hash) FROM page_snapshots')
+        snapshots, urls, unique_pages = cursor.fetchone()
+        conn.close()
+
+        stored_bytes = sum(os.path.getsize(path) for _, path in self._iter_blobs())
+        return {'snapshots': snapshots, 'urls': urls, 'unique_pages': unique_pages, 'stored_bytes': stored_bytes}
+
+    def _prune_url(self, cursor: sqlite3.Cursor, url: str):
+        """Keep only the newest MAX_SNAPSHOTS_PER_URL snapshots of a URL"""
+        cursor.execute('''
+            DELETE FROM page_snapshots WHERE url = ? AND id NOT IN (
+                SELECT id FROM page_snapshots WHERE url = ? ORDER BY fetched_at DESC LIMIT ?
+            )
+        ''', (url, url, MAX_SNAPSHOTS_PER_URL))
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}.html.gz")
+
+    def _compress(self, body: bytes) -> bytes:
+        return gzip.compress(body, compresslevel=COMPRESSION_LEVEL)
+
+    def _write_blob(self, content_hash: str, body: bytes, compressed: Optional[bytes] = None) -> int:
+        """Write a compressed body unless it is already stored; returns its compressed size"""
+        path = self._blob_path(content_hash)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if compressed is None:
+            compressed = self._compress(body)
+
+        # Write to a temp file first so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return len(compressed)
+
+    def _iter_blobs(self):
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith('.html.gz'):
+                    yield name[:-len('.html.gz')], os.path.join(directory, name)
+
+    def reextract(self, scraper_ids: List[int] = None, selector_config: Dict = None) -> List[Dict]:
+        """Re-run event extraction over the latest snapshot of each scraper, offline, on the parse pool.
+
+        selector_config, if given, replaces the stored config so selectors can be tried out.
+        """
+        from enhanced_scraper import extract_events_from_html
+
+        jobs = []
+        for scraper in self._load_scrapers(scraper_ids):
+            snapshot = self.latest(scraper['url'])
+            if snapshot is None:
+                jobs.append((scraper, None))
+                continue
+            config = selector_config if selector_config is not None else scraper['selector_config']
+            jobs.append((scraper, dict(snapshot, selector_config=config)))
+
+        results = []
+        started = time.time()
+        futures = []
+        for scraper, snapshot in jobs:
+            if snapshot is None:
+                futures.append((scraper, snapshot, None))
+                continue
+            future = submit_parse(_timed_extract, extract_events_from_html,
+                                  snapshot['html'], snapshot['url'], snapshot['selector_config'])
+            futures.append((scraper, snapshot, future))
+
+        for scraper, snapshot, future in futures:
+            result = {'scraper_id': scraper['id'], 'name': scraper['name'], 'url': scraper['url']}
+            if snapshot is None:
+                result['error'] = 'No snapshot stored for this URL'
+                results.append(result)
+                continue
+
+            try:
+                events, partial, seconds = future.result()
+                result.update({
+                    'content_hash': snapshot['content_hash'],
+                    'fetched_at': snapshot['fetched_at'],
+                    'events_found': len(events),
+                    'partial': partial,
+                    'extract_seconds': round(seconds, 3),
+                    'sample_events': [{
+                        'title': event.get('title'),
+                        'date': event.get('start_date'),
+                        'location': event.get('location'),
+                        'confidence': event.get('confidence_score', 0)
+                    } for event in events[:5]]
+                })
+            except Exception as e:
+                result['error'] = str(e)
+            results.append(result)
+
+        logger.info(f"🗃️ Re-extracted {len(jobs)} scrapers from snapshots in {time.time() - started:.2f}s")
+        return results
+
+    def _load_scrapers(self, scraper_ids: List[int] = None) -> List[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        if scraper_ids:
+            placeholders = ', '.join('?' for _ in scraper_ids)
+            cursor.execute(f'SELECT id, name, url, selector_config FROM web_scrapers WHERE id IN ({placeholders})',
+                           list(scraper_ids))
+        else:
+            cursor.execute('SELECT id, name, url, selector_config FROM web_scrapers WHERE is_active = 1 ORDER BY name')
+
+        scrapers = []
+        for row in cursor.fetchall():
+            try:
+                selector_config = json.loads(row[3]) if row[3] else {}
+            except (TypeError, ValueError):
+                selector_config = {}
+            scrapers.append({'id': row[0], 'name': row[1], 'url': row[2], 'selector_config': selector_config})
+
+        conn.close()
+        return scrapers
+
+def _timed_extract(extract, html_content: str, url: str, selector_config: Dict):
+    """Run an extraction in a worker process and time it there"""
+    started = time.perf_counter()
+    events, partial = extract(html_content, url, selector_config)
+    events.sort(key=lambda event: event.get('confidence_score', 0), reverse=True)
+    return events, partial, time.perf_counter() - started
+
+# Global archive shared by every scraper in the process
+_snapshot_archive = None
+_snapshot_archive_lock = threading.Lock()
+
+def get_snapshot_archive() -> SnapshotArchive:
+    """Get the process-wide snapshot archive"""
+    global _snapshot_archive
+
+    with _snapshot_archive_lock:
+        if _snapshot_archive is None:
+            _snapshot_archive = SnapshotArchive()
+        return _snapshot_archive
+
+def main():
+    parser = argparse.ArgumentParser(description='Page snapshot archive')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    reextract_parser = subcommands.add_parser('reextract', help='Re-run extraction over stored snapshots')
+    reextract_parser.add_argument('--scraper', type=int, action='append', dest='scraper_ids',
+                                  help='Scraper id (repeatable; default: all active scrapers)')
+    reextract_parser.add_argument('--selectors', help='JSON selector_config to try instead of the stored one')
+
+    subcommands.add_parser('prune', help='Apply retention limits')
+    subcommands.add_parser('stats', help='Show archive size')
+
+    args = parser.parse_args()
+    archive = SnapshotArchive()
+
+    if args.command == 'reextract':
+        selector_config = json.loads(args.selectors) if args.selectors else None
+        for result in archive.reextract(args.scraper_ids, selector_config):
+            if 'error' in result:
+                print(f"❌ {result['name']}: {result['error']}")
+            else:
+                print(f"✅ {result['name']}: {result['events_found']} events in {result['extract_seconds']}s "
+                      f"(snapshot {result['fetched_at']})")
+                for sample in result['sample_events']:
+                    print(f"   - {sample['title']} | {sample['date']} | {sample['location']}")
+    elif args.command == 'prune':
+        print(archive.prune())
+    else:
+        print(archive.get_stats())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Lightweight per-stage timing for scrape runs
+A StageTimer activated with stage_scope() collects time spent in named stages
+(HTTP wait, download, parse, each strategy, date parsing, DB work). Code that
+runs outside a scope pays only a context-variable lookup.
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+class StageTimer:
+    """Accumulated seconds and call counts per stage name"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self.lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def as_dict(self) -> Dict:
+        """Breakdown in milliseconds, slowest stage first, plus the total wall time.
+
+        Stages can nest (a strategy's time includes the date parsing it does), so
+        they do not necessarily add up to the total.
+        """
+        with self.lock:
+            stages = {name: {'ms': round(seconds * 1000, 1), 'calls': self.counts[name]}
+                      for name, seconds in sorted(self.totals.items(), key=lambda item: -item[1])}
+        return {'total_ms': round((time.perf_counter() - self.started) * 1000, 1), 'stages': stages}
+
+_current_timer = contextvars.ContextVar('current_stage_timer', default=None)
+
+def current_timer() -> Optional[StageTimer]:
+    """The stage timer active in this thread, if any"""
+    return _current_timer.get()
+
+@contextmanager
+def stage_scope(timer: Optional[StageTimer]):
+    """Make `timer` collect the stages run in this block"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+@contextmanager
+def timed_stage(name: str):
+    """Time the enclosed block as stage `name` (no-op without an active timer)"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+def record_stage(name: str, seconds: float):
+    """Add an externally measured duration to the active timer"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+def timed_iter(name: str, items: Iterable) -> Iterator:
+    """Yield from `items`, timing only the work done producing each item"""
+    iterator = iter(items)
+    while True:
+        timer = _current_timer.get()
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            if timer is not None:
+                timer.add(name, time.perf_counter() - started)
+            return
+        if timer is not None:
+            timer.add(name, time.perf_counter() - started)
+        yield item
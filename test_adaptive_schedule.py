@@ -0,0 +1,99 @@
+"""
+Adaptive scrape interval tests
+Intervals shrink on change, grow while content stays the same by steps scaled
+by the source's history, respect each source's bounds, and tighten when an
+event starts soon
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import adaptive_schedule
+from adaptive_schedule import AdaptiveScheduler, ContentFingerprint, IntervalBounds
+from web_scraper_manager import apply_schema_migrations
+
+NOW = datetime(2026, 10, 14, 12)
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(path)
+    with open('web_scrapers_schema.sql') as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO web_scrapers (id, name, url, update_interval) VALUES (1, 'Listings', 'https://example.org/events', 60)")
+    conn.commit()
+    conn.close()
+    apply_schema_migrations(path)
+    return path
+
+def fingerprint(*events):
+    result = ContentFingerprint()
+    for title, start in events:
+        result.add({'title': title, 'start_date': start})
+    return result
+
+def run(db_path, found, events_added=0, config=None):
+    conn = sqlite3.connect(db_path)
+    plan = AdaptiveScheduler(db_path).record_run(conn.cursor(), 1, config or {}, found, events_added)
+    conn.commit()
+    conn.close()
+    return plan
+
+def test_next_interval_speeds_up_backs_off_and_stays_in_bounds():
+    scheduler = AdaptiveScheduler(':memory:')
+    bounds = IntervalBounds.from_config({'schedule': {'min_interval': 30, 'max_interval': 120}})
+    assert scheduler.next_interval(100, bounds, changed=True, now=NOW) == 50
+    assert scheduler.next_interval(40, bounds, changed=True, now=NOW) == 30
+    assert scheduler.next_interval(100, bounds, changed=False, now=NOW) == 120
+
+    soon = NOW + timedelta(hours=adaptive_schedule.IMMINENT_EVENT_HOURS - 1)
+    assert scheduler.next_interval(600, IntervalBounds(), changed=False, soonest_start=soon, now=NOW) == \
+        adaptive_schedule.IMMINENT_MAX_INTERVAL_MINUTES
+
+def test_history_scales_the_step():
+    scheduler = AdaptiveScheduler(':memory:')
+    bounds = IntervalBounds()
+    # A usually busy source backs off less after a quiet run than a usually static one
+    busy = scheduler.next_interval(100, bounds, changed=False, now=NOW, change_rate=0.9, yield_rate=0.0)
+    static = scheduler.next_interval(100, bounds, changed=False, now=NOW, change_rate=0.1, yield_rate=0.0)
+    assert 100 < busy < static == pytest.approx(145)
+    # A one-off change on a static source speeds it up less, unless it keeps yielding events
+    assert scheduler.next_interval(100, bounds, changed=True, now=NOW, change_rate=0.3, yield_rate=0.0) == \
+        pytest.approx(100 / 1.3)
+    assert scheduler.next_interval(100, bounds, changed=True, now=NOW, change_rate=0.3, yield_rate=2.0) == 50
+
+def test_bounds_never_invert():
+    bounds = IntervalBounds.from_config({'schedule': {'min_interval': 90, 'max_interval': 30}})
+    assert (bounds.min_minutes, bounds.max_minutes) == (90, 90)
+
+def test_fingerprint_ignores_order_and_tracks_the_soonest_upcoming_event():
+    later = (datetime.now() + timedelta(days=30)).strftime('%B %d, %Y')
+    sooner = (datetime.now() + timedelta(days=3)).strftime('%B %d, %Y')
+    first = fingerprint(('Jazz Night', later), ('Book Talk', sooner), ('Old Fair', 'January 5, 2001'))
+    second = fingerprint(('Old Fair', 'January 5, 2001'), ('Book Talk', sooner), ('Jazz Night', later))
+    assert first.digest() == second.digest()
+    assert first.soonest_start.date() == (datetime.now() + timedelta(days=3)).date()
+
+def test_runs_record_history_and_schedule_the_next_one(db_path):
+    listing = fingerprint(('Jazz Night', 'January 5, 2001'))
+    plan = run(db_path, listing, events_added=1)
+    assert (plan['changed'], plan['interval_minutes']) == (True, 30)
+    # Quiet after a change: change_rate 0.7, so only 30% of the usual backoff
+    plan = run(db_path, listing)
+    assert (plan['changed'], plan['interval_minutes']) == (False, 34)
+    # change_rate 0.79: 79% of the usual speedup
+    plan = run(db_path, fingerprint(('Jazz Night', 'January 5, 2001'), ('Book Talk', 'January 6, 2001')))
+    assert (plan['changed'], plan['interval_minutes']) == (True, 19)
+
+    # A failed run keeps the interval and the stored fingerprint
+    plan = run(db_path, None)
+    assert (plan['changed'], plan['interval_minutes']) == (False, 19)
+
+    conn = sqlite3.connect(db_path)
+    change_rate, yield_rate, next_run = conn.execute(
+        'SELECT change_rate, yield_rate, next_run FROM web_scrapers WHERE id = 1').fetchone()
+    conn.close()
+    assert change_rate == pytest.approx(0.3 * 1 + 0.7 * (0.7 * 1))
+    assert yield_rate == pytest.approx(0.7 * 0.7)
+    assert AdaptiveScheduler(db_path).is_due(next_run, datetime.now() + timedelta(minutes=23))
+    assert not AdaptiveScheduler(db_path).is_due(next_run)
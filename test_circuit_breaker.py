@@ -0,0 +1,135 @@
+"""
+Circuit breaker tests
+Opening after repeated failures, half-open trial runs, deactivation, the
+breaker columns coming from the startup migrations, and a reactivated source
+starting over from closed
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from models import Database, RSSFeedModel
+from rss_manager import RSSManager
+from web_scraper_manager import WebScraperManager, apply_schema_migrations
+
+# rss_feeds as the running calendar.db has it (models.Database creates it with 'enabled')
+RSS_FEEDS_TABLE = '''
+    CREATE TABLE rss_feeds (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        url TEXT NOT NULL UNIQUE,
+        update_interval INTEGER DEFAULT 60,
+        is_active BOOLEAN DEFAULT 1,
+        consecutive_failures INTEGER DEFAULT 0
+    )
+'''
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = WebScraperManager(str(tmp_path / 'calendar.db'))
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("INSERT INTO web_scrapers (id, name, url) VALUES (1, 'Listings', 'https://example.org/events')")
+    conn.commit()
+    conn.close()
+    return manager
+
+def fail(breaker, times):
+    conn = sqlite3.connect(breaker.db_path)
+    for _ in range(times):
+        state = breaker.record_failure(conn.cursor(), 1)
+    conn.commit()
+    conn.close()
+    return state
+
+def source(db_path, table='web_scrapers'):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return dict(conn.execute(f'SELECT * FROM {table} WHERE id = 1').fetchone())
+    finally:
+        conn.close()
+
+def test_state_follows_failures_and_backoff():
+    breaker = CircuitBreaker(':memory:')
+    now = datetime(2026, 10, 14, 12)
+    assert breaker.state(circuit_breaker.FAILURE_THRESHOLD - 1, None, now) == CLOSED
+    assert breaker.state(circuit_breaker.FAILURE_THRESHOLD, (now + timedelta(minutes=5)).isoformat(), now) == OPEN
+    assert breaker.state(circuit_breaker.FAILURE_THRESHOLD, (now - timedelta(minutes=5)).isoformat(), now) == HALF_OPEN
+
+    for failures in range(circuit_breaker.FAILURE_THRESHOLD, 30):
+        backoff = breaker.backoff(failures).total_seconds() / 60
+        ceiling = min(circuit_breaker.MAX_BACKOFF_MINUTES,
+                      circuit_breaker.BASE_BACKOFF_MINUTES * 2 ** (failures - circuit_breaker.FAILURE_THRESHOLD))
+        assert ceiling / 2 <= backoff <= ceiling
+
+def test_failures_open_the_breaker_and_success_closes_it(manager):
+    breaker = CircuitBreaker(manager.db_path)
+    assert fail(breaker, circuit_breaker.FAILURE_THRESHOLD - 1) == CLOSED
+    assert fail(breaker, 1) == OPEN
+    row = source(manager.db_path)
+    assert not breaker.allows(row)
+    assert 'circuit_state' not in row
+
+    conn = sqlite3.connect(manager.db_path)
+    breaker.record_success(conn.cursor(), 1)
+    conn.commit()
+    conn.close()
+    row = source(manager.db_path)
+    assert (row['consecutive_failures'], row['circuit_open_until']) == (0, None)
+    assert breaker.get_states()[0]['circuit_state'] == CLOSED
+
+def test_reactivated_scraper_starts_closed(manager):
+    breaker = CircuitBreaker(manager.db_path)
+    fail(breaker, circuit_breaker.DEACTIVATE_AFTER_FAILURES)
+    assert not source(manager.db_path)['is_active']
+
+    assert manager.update_scraper(1, {'is_active': True})
+    row = source(manager.db_path)
+    assert row['is_active'] and row['consecutive_failures'] == 0 and breaker.allows(row)
+
+    # Edits to a source that is already active keep its failure history
+    fail(breaker, circuit_breaker.FAILURE_THRESHOLD)
+    assert manager.update_scraper(1, {'is_active': True, 'description': 'Weekly listings'})
+    assert not breaker.allows(source(manager.db_path))
+
+def test_reactivated_feed_starts_closed(tmp_path):
+    db_path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(RSS_FEEDS_TABLE)
+    conn.execute("INSERT INTO rss_feeds (id, name, url) VALUES (1, 'Listings', 'https://example.org/feed')")
+    conn.commit()
+    conn.close()
+    apply_schema_migrations(db_path)
+
+    breaker = CircuitBreaker(db_path, 'rss_feeds')
+    fail(breaker, circuit_breaker.DEACTIVATE_AFTER_FAILURES)
+    assert RSSFeedModel(Database(db_path)).update_feed_status(1, True)
+    row = source(db_path, 'rss_feeds')
+    assert row['is_active'] and row['consecutive_failures'] == 0 and row['circuit_open_until'] is None
+
+def test_breaker_columns_come_from_the_startup_migrations(tmp_path):
+    db_path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(RSS_FEEDS_TABLE)
+    conn.commit()
+
+    CircuitBreaker(db_path, 'rss_feeds')
+    assert 'circuit_open_until' not in [row[1] for row in conn.execute('PRAGMA table_info(rss_feeds)')]
+
+    apply_schema_migrations(db_path)
+    apply_schema_migrations(db_path)
+    assert 'circuit_open_until' in [row[1] for row in conn.execute('PRAGMA table_info(rss_feeds)')]
+    conn.close()
+
+def test_feed_polling_migrates_a_database_it_did_not_create(tmp_path):
+    db_path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(RSS_FEEDS_TABLE)
+    conn.execute("INSERT INTO rss_feeds (id, name, url, is_active) VALUES (1, 'Listings', 'https://example.org/feed', 0)")
+    conn.commit()
+    conn.close()
+
+    assert RSSManager(db_path).process_all_feeds()['errors'] == 0
+    assert 'circuit_open_until' in source(db_path, 'rss_feeds')
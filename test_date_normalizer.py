@@ -0,0 +1,88 @@
+"""
+Date normalization tests
+Formats scrapers and feeds send, relative phrases against a fixed reference
+day, naive results throughout, and the scrapers' date paths going through it
+"""
+
+from datetime import date, datetime
+import pytest
+import date_normalizer
+from date_normalizer import find_date, normalize_date, within_window
+from adaptive_schedule import parse_start
+from scrape_reconciler import ScrapeReconciler
+
+# A Wednesday
+REFERENCE = date(2026, 10, 14)
+
+@pytest.mark.parametrize('text, expected', [
+    ('2026-10-04T19:30:00', datetime(2026, 10, 4, 19, 30)),
+    ('Sept. 11, 2025 6 to 9 p.m.', datetime(2025, 9, 11, 18)),
+    ('Friday, October 24, 2025 @ 7:30 pm', datetime(2025, 10, 24, 19, 30)),
+    ('October01202510:00 am EDT', datetime(2025, 10, 1, 10)),
+    ('Oct 4 - 10 2025', datetime(2025, 10, 4)),
+    ('Oct 4 – 10, 2025', datetime(2025, 10, 4)),
+    ('24 September 2025, 19:00', datetime(2025, 9, 24, 19)),
+    ('9/24/2025', datetime(2025, 9, 24)),
+    ('24/9/2025', datetime(2025, 9, 24)),
+    ('December 5', datetime(2026, 12, 5)),
+])
+def test_explicit_dates(text, expected):
+    assert normalize_date(text, REFERENCE) == expected
+
+@pytest.mark.parametrize('text', [
+    '2025-10-04T19:00:00-04:00',
+    '2025-10-04T19:00:00Z',
+    'Sat, 04 Oct 2025 19:00:00 +0000',
+    'Oct 4, 2025 7 pm EDT',
+])
+def test_results_are_naive_wall_clock_times(text):
+    assert normalize_date(text, REFERENCE) == datetime(2025, 10, 4, 19)
+
+@pytest.mark.parametrize('text, expected', [
+    ('today', datetime(2026, 10, 14)),
+    ('tonight', datetime(2026, 10, 14, 19)),
+    ('tomorrow at 7pm', datetime(2026, 10, 15, 19)),
+    ('this Friday', datetime(2026, 10, 16)),
+    ('next week', datetime(2026, 10, 21)),
+    ('this weekend', datetime(2026, 10, 17)),
+    ('next weekend', datetime(2026, 10, 24)),
+    ('this month', datetime(2026, 10, 14)),
+    ('next month', datetime(2026, 11, 1)),
+])
+def test_relative_phrases(text, expected):
+    assert normalize_date(text, REFERENCE) == expected
+
+def test_relative_phrases_at_the_edges_of_a_week_and_year():
+    assert normalize_date('this weekend', date(2026, 10, 18)) == datetime(2026, 10, 18)  # Sunday
+    assert normalize_date('next weekend', date(2026, 10, 18)) == datetime(2026, 10, 24)
+    assert normalize_date('next month', date(2026, 12, 5)) == datetime(2027, 1, 1)
+
+def test_every_relative_phrase_resolves():
+    for match in ('this week', 'next week', 'this weekend', 'next weekend', 'this month', 'next month'):
+        assert date_normalizer.RELATIVE_RE.fullmatch(match)
+        assert normalize_date(f'Open house {match}', REFERENCE, fuzzy=False) is not None
+
+def test_strict_mode_ignores_stray_weekdays_and_numbers():
+    assert normalize_date('Open every Friday, room 12', REFERENCE, fuzzy=False) is None
+    assert normalize_date('', REFERENCE) is None
+
+def test_find_date_and_window():
+    assert find_date('Posted 3/2/2024; event on Oct 9', REFERENCE) == date(2024, 3, 2)
+    assert find_date('event on Oct 9', REFERENCE, require_year=True) is None
+    assert within_window(datetime(2026, 11, 1), REFERENCE)
+    assert not within_window(datetime(2010, 10, 4), REFERENCE)
+
+def test_results_are_cached_per_reference_day():
+    date_normalizer.clear_cache()
+    normalize_date('October 4 2025', REFERENCE)
+    normalize_date('October  4 2025', REFERENCE)
+    assert date_normalizer.cache_info()['hits'] == 1
+
+def test_scraper_date_paths_use_the_normalizer(tmp_path):
+    reconciler = ScrapeReconciler(str(tmp_path / 'calendar.db'))
+    item = reconciler._normalize({'title': 'Fall Festival', 'start_date': 'Oct 4 - 10 2025'}, 'https://example.org')
+    assert item['fields']['start_datetime'] == '2025-10-04T00:00:00'
+
+    assert parse_start('Oct 4 - 10 2025 7pm') == datetime(2025, 10, 4, 19)
+    assert parse_start('2025-10-04T19:00:00+02:00').tzinfo is None
+    assert parse_start('') is None
@@ -0,0 +1,48 @@
+"""
+Deadline tests
+Expiry, cancellation reaching child deadlines, timeout capping, and the
+thread's active deadline set by deadline_scope
+"""
+
+import threading
+import pytest
+from deadline import Deadline, DeadlineExceeded, check_deadline, current_deadline, deadline_expired, deadline_scope
+
+def test_child_ends_with_its_parent():
+    parent = Deadline(0.05)
+    child = parent.child(60)
+    assert child.remaining() <= 0.05
+    parent.cancel()
+    assert child.cancelled and child.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded, match='Cancelled'):
+        child.check()
+
+def test_expired_deadline_raises():
+    deadline = Deadline(0)
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded, match='Deadline exceeded'):
+        deadline.check()
+
+def test_cap_timeout():
+    deadline = Deadline(5)
+    assert deadline.cap_timeout(30) <= 5
+    assert deadline.cap_timeout(2) == 2
+    connect, read = deadline.cap_timeout((3, 30))
+    assert connect == 3 and read <= 5
+    assert deadline.cap_timeout(None) <= 5
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0).cap_timeout(10)
+
+def test_scope_sets_the_active_deadline_for_this_thread_only():
+    deadline = Deadline(0)
+    seen = []
+    with deadline_scope(deadline):
+        assert current_deadline() is deadline and deadline_expired()
+        with pytest.raises(DeadlineExceeded):
+            check_deadline()
+        thread = threading.Thread(target=lambda: seen.append(current_deadline()))
+        thread.start()
+        thread.join()
+    assert seen == [None]
+    assert current_deadline() is None and not deadline_expired()
+    check_deadline()
@@ -0,0 +1,56 @@
+"""
+Enhanced scraper tests
+Pages cut at the byte budget and extractions stopped by the event or time
+budget are reported as such, so reconciliation never retires items past the
+cut-off
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from enhanced_scraper import EnhancedWebScraper, ScrapeBudget, extract_events_from_html
+
+class FakeResponse:
+    """Streams a body in fixed-size chunks, like requests with stream=True"""
+
+    url = 'https://example.org/events'
+    encoding = 'utf-8'
+
+    def __init__(self, body, chunk=10):
+        self.body = body
+        self.chunk = chunk
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.chunk):
+            yield self.body[start:start + self.chunk]
+
+    def close(self):
+        pass
+
+def listing(count):
+    start = (datetime.now() + timedelta(days=10)).strftime('%Y-%m-%dT19:00:00')
+    events = [{'@type': 'Event', 'name': f'Gallery Talk {n}', 'startDate': start,
+               'location': {'name': 'National Gallery of Art'},
+               'description': 'An evening talk on the collection with the curator.',
+               'url': f'https://example.org/events/{n}'} for n in range(count)]
+    return f'<html><script type="application/ld+json">{json.dumps(events)}</script></html>'
+
+def test_read_limited_reports_truncation():
+    scraper = EnhancedWebScraper()
+    assert scraper._read_limited(FakeResponse(b'x' * 100), max_bytes=100) == ('x' * 100, False)
+    assert scraper._read_limited(FakeResponse(b'x' * 101), max_bytes=100) == ('x' * 100, True)
+
+def test_extraction_reports_budget_stops():
+    page = listing(6)
+    events, partial = extract_events_from_html(page, 'https://example.org/events')
+    assert len(events) == 6 and not partial
+
+    events, partial = extract_events_from_html(page, 'https://example.org/events', budget=ScrapeBudget(max_events=4))
+    assert len(events) == 4 and partial
+
+    events, partial = extract_events_from_html(page, 'https://example.org/events', budget=ScrapeBudget(max_seconds=0))
+    assert partial
+
+    # A job that waited in the parse pool's queue past its source's deadline
+    events, partial = extract_events_from_html(page, 'https://example.org/events', budget=ScrapeBudget(stop_at=time.time() - 1))
+    assert partial
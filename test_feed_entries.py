@@ -0,0 +1,87 @@
+"""
+Feed entry tracking tests
+Entries are recognised across refreshes by GUID or, for rows stored before
+GUIDs were, by link; unchanged entries are told apart by their content hash,
+and the same entry is never tracked twice
+"""
+
+import sqlite3
+import pytest
+import feedparser
+from feed_entries import FeedEntryIndex, entry_identity, update_event_fields
+from web_scraper_manager import apply_schema_migrations
+
+def entries(*items):
+    body = ''.join(f'<item>{item}</item>' for item in items)
+    return feedparser.parse(f'<rss version="2.0"><channel><title>Listings</title>{body}</channel></rss>').entries
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, description TEXT, location_name TEXT)')
+    conn.execute("INSERT INTO events VALUES (1, 'Jazz Night', 'Live music', 'Kennedy Center')")
+    conn.commit()
+    conn.close()
+    return path
+
+def test_identity_prefers_guid_then_link_then_title_and_date():
+    guid, link, bare = entries(
+        '<guid>event-1</guid><link>https://example.org/1</link><title>Jazz Night</title>',
+        '<link>https://example.org/2</link><title>Book Talk</title>',
+        '<title>Gallery Tour</title><pubDate>Sat, 04 Oct 2025 19:00:00 GMT</pubDate>')
+    assert entry_identity(guid).guid == 'event-1'
+    assert entry_identity(link).guid == 'https://example.org/2'
+    assert entry_identity(bare).guid.startswith('sha1:')
+    assert entry_identity(bare) == entry_identity(entries(
+        '<title>Gallery Tour</title><pubDate>Sat, 04 Oct 2025 19:00:00 GMT</pubDate>')[0])
+
+def test_entries_are_tracked_once_and_found_by_guid_or_legacy_link(db_path):
+    index = FeedEntryIndex(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    # A row written before GUIDs were stored: the link doubles as source_id
+    cursor.execute("INSERT INTO event_sources (event_id, feed_id, source_url, source_id) "
+                   "VALUES (1, 7, 'https://example.org/1', 'https://example.org/1')")
+
+    original, = entries('<guid>event-1</guid><link>https://example.org/1</link><title>Jazz Night</title>')
+    identity = entry_identity(original)
+    known = index.load(cursor, 7)
+    match = known.find(identity)
+    assert match['event_id'] == 1 and match['content_hash'] is None
+
+    index.record_seen(cursor, match, identity)
+    index.record_new(cursor, known, 1, 7, identity)
+    assert cursor.execute('SELECT source_id, content_hash FROM event_sources').fetchall() == [
+        ('event-1', identity.content_hash)]
+
+    known = index.load(cursor, 7)
+    assert known.find(identity)['content_hash'] == identity.content_hash
+    edited, = entries('<guid>event-1</guid><link>https://example.org/1</link><title>Jazz Night (sold out)</title>')
+    assert known.find(entry_identity(edited))['content_hash'] != entry_identity(edited).content_hash
+    assert index.load(cursor, 8).find(identity) is None
+    conn.close()
+
+def test_older_event_sources_tables_get_content_hash_from_the_migrations(tmp_path):
+    path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE event_sources (id INTEGER PRIMARY KEY, event_id INTEGER, feed_id INTEGER, '
+                 'source_url TEXT, source_id TEXT, last_updated DATETIME)')
+    conn.commit()
+    FeedEntryIndex(path)
+    apply_schema_migrations(path)
+    assert 'content_hash' in [row[1] for row in conn.execute('PRAGMA table_info(event_sources)')]
+    conn.close()
+
+def test_only_changed_fields_without_manual_overrides_are_written(db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('CREATE TABLE manual_overrides (event_id INTEGER, field_name TEXT)')
+    cursor.execute("INSERT INTO manual_overrides VALUES (1, 'location_name')")
+
+    fields = {'title': 'Jazz Night', 'description': 'Live music, doors at 7', 'location_name': 'The Anthem'}
+    assert update_event_fields(cursor, 1, fields) == 1
+    assert cursor.execute('SELECT description, location_name FROM events').fetchone() == (
+        'Live music, doors at 7', 'Kennedy Center')
+    assert update_event_fields(cursor, 1, fields) == 0
+    conn.close()
@@ -0,0 +1,71 @@
+"""
+Per-feed poll scheduling tests
+Intervals learned from the feed's publishing cadence, quiet feeds backing off,
+publisher hints (ttl, sy:updatePeriod, skipHours/skipDays), and failed fetches
+keeping their interval
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+import feedparser
+import feed_schedule
+from feed_schedule import FeedPollScheduler, channel_head, feed_hints, skip_window_end
+from web_scraper_manager import apply_schema_migrations
+
+NOW = datetime(2026, 10, 14, 12, tzinfo=timezone.utc)
+
+def feed(ages_minutes, channel='', now=NOW):
+    items = ''.join(f'<item><title>Event {n}</title><link>https://example.org/{n}</link>'
+                    f'<pubDate>{format_datetime(now - timedelta(minutes=age))}</pubDate></item>'
+                    for n, age in enumerate(ages_minutes))
+    return ('<?xml version="1.0"?><rss version="2.0" xmlns:sy="http://purl.org/rss/1.0/modules/syndication/">'
+            f'<channel><title>Listings</title>{channel}{items}</channel></rss>').encode('utf-8')
+
+def plan(body, configured=60):
+    return FeedPollScheduler(':memory:').plan(feedparser.parse(body), channel_head(body), configured, NOW)
+
+def test_interval_follows_the_publishing_cadence():
+    assert plan(feed([10, 130, 250, 370]))['interval_minutes'] == 60
+    assert plan(feed([10, 130, 250, 370]))['cadence_minutes'] == 120
+    # Quiet for days: back off with the age of the newest entry, up to the cap
+    assert plan(feed([2000, 2120, 2240]))['interval_minutes'] == 500
+    assert plan(feed([20000, 20120, 20240]))['interval_minutes'] == feed_schedule.MAX_POLL_MINUTES
+
+def test_hints_without_a_cadence():
+    assert plan(feed([10]))['interval_minutes'] == 60
+    daily = '<sy:updatePeriod>daily</sy:updatePeriod><sy:updateFrequency>4</sy:updateFrequency>'
+    assert plan(feed([10], daily))['interval_minutes'] == 360
+    # Never poll sooner than the publisher's ttl
+    assert plan(feed([10, 20, 30, 40], '<ttl>180</ttl>'))['interval_minutes'] == 180
+
+def test_skip_hours_and_days_push_the_next_poll_out():
+    channel = ('<skipHours><hour>12</hour><hour>13</hour></skipHours>'
+               '<skipDays><day>Thursday</day></skipDays>')
+    hints = feed_hints(feedparser.parse(feed([10], channel)), channel_head(feed([10], channel)))
+    assert (hints.skip_hours, hints.skip_days) == ({12, 13}, {3})
+    assert skip_window_end(NOW.replace(minute=30), hints) == NOW.replace(hour=14)
+    assert skip_window_end(NOW + timedelta(days=1), hints) == (NOW + timedelta(days=2)).replace(hour=0)
+
+def test_record_poll_stores_the_plan_and_keeps_the_interval_on_failure(tmp_path):
+    db_path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE rss_feeds (id INTEGER PRIMARY KEY, name TEXT, url TEXT, update_interval INTEGER)')
+    conn.execute("INSERT INTO rss_feeds VALUES (1, 'Listings', 'https://example.org/feed', 60)")
+    conn.commit()
+    apply_schema_migrations(db_path)
+
+    scheduler = FeedPollScheduler(db_path)
+    body = feed([10, 130, 250], now=datetime.now(timezone.utc))
+    fetched = SimpleNamespace(feed={'id': 1}, error=None, parsed=feedparser.parse(body), channel_head=channel_head(body))
+    assert scheduler.record_poll(fetched)['interval_minutes'] == 60
+
+    failed = SimpleNamespace(feed={'id': 1}, error='timeout', parsed=None, channel_head=b'')
+    assert scheduler.record_poll(failed)['interval_minutes'] == 60
+    next_poll_at, poll_interval = conn.execute('SELECT next_poll_at, poll_interval FROM rss_feeds').fetchone()
+    conn.close()
+    assert poll_interval == 60
+    assert not scheduler.is_due(next_poll_at)
+    assert scheduler.is_due(next_poll_at, datetime.now() + timedelta(minutes=61))
+    assert scheduler.is_due(None) and scheduler.is_due('soon')
@@ -0,0 +1,75 @@
+"""
+Streaming feed parsing tests
+Byte, entry and age limits, early stopping only on feeds that run newest
+first, event dates over publication dates, and the feedparser fallback
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import feed_stream
+from feed_stream import StreamLimits, parse_feed_stream
+
+NOW = datetime.now(timezone.utc)
+
+def item(n, age_days, event_in_days=None):
+    event = (f'<ev:startdate>{(NOW + timedelta(days=event_in_days)).isoformat()}</ev:startdate>'
+             if event_in_days is not None else '')
+    return (f'<item><title>Event {n}</title><link>https://example.org/events/{n}</link>'
+            f'<pubDate>{format_datetime(NOW - timedelta(days=age_days))}</pubDate>{event}</item>')
+
+def feed(items):
+    return ('<?xml version="1.0"?><rss version="2.0" xmlns:ev="http://purl.org/rss/1.0/modules/event/">'
+            '<channel><title>Listings</title><link>https://example.org</link>'
+            + ''.join(items) + '</channel></rss>').encode('utf-8')
+
+def chunked(body, size=100):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+def titles(parsed):
+    return [entry.title for entry in parsed.entries]
+
+def test_newest_first_feed_stops_after_a_run_of_old_entries():
+    body = feed([item(n, n) for n in range(5)] + [item(n, 200 + n) for n in range(5, 40)])
+    parsed, head, stats = parse_feed_stream(chunked(body))
+    assert titles(parsed) == [f'Event {n}' for n in range(5)]
+    assert stats['stopped'] == 'old_entries'
+    assert stats['entries_too_old'] == feed_stream.STOP_AFTER_OLD_ENTRIES
+    assert stats['bytes_read'] < len(body)
+    assert head.startswith(b'<?xml')
+
+def test_oldest_first_feed_skips_old_entries_and_keeps_reading():
+    body = feed([item(n, 300 - n) for n in range(15)] + [item(n, 20 - n) for n in range(15, 20)])
+    parsed, _, stats = parse_feed_stream(chunked(body))
+    assert titles(parsed) == [f'Event {n}' for n in range(15, 20)]
+    assert stats['stopped'] is None
+    assert stats['entries_too_old'] == 15
+
+def test_unordered_old_entries_do_not_stop_reading():
+    ages = [200, 300, 250, 400, 350, 500, 450, 600, 550, 700, 650, 800, 750]
+    body = feed([item(n, age) for n, age in enumerate(ages)] + [item(99, 1)])
+    parsed, _, stats = parse_feed_stream(chunked(body))
+    assert titles(parsed) == ['Event 99']
+    assert stats['stopped'] is None
+
+def test_entries_are_aged_by_their_event_date():
+    body = feed([item(1, 400, event_in_days=10), item(2, 1, event_in_days=-400), item(3, 1)])
+    parsed, _, stats = parse_feed_stream(chunked(body))
+    assert titles(parsed) == ['Event 1', 'Event 3']
+    assert stats['entries_too_old'] == 1
+
+def test_entry_and_byte_caps():
+    body = feed([item(n, 1) for n in range(50)])
+    parsed, _, stats = parse_feed_stream(chunked(body), StreamLimits(max_entries=7))
+    assert len(parsed.entries) == 7 and stats['stopped'] == 'entry_cap'
+
+    parsed, _, stats = parse_feed_stream(chunked(body), StreamLimits(max_bytes=len(body) // 2))
+    assert stats['stopped'] == 'byte_cap' and stats['bytes_read'] == len(body) // 2
+    assert 0 < len(parsed.entries) < 50
+
+def test_malformed_feed_falls_back_to_feedparser_on_the_spooled_body(monkeypatch):
+    monkeypatch.setattr(feed_stream, 'SPOOL_MEMORY_BYTES', 256)  # Spill to disk part way through
+    body = feed([item(n, 1) for n in range(10)]).replace(b'Event 3', b'Event 3 & more')
+    parsed, head, stats = parse_feed_stream(chunked(body))
+    assert stats['fallback'] and stats['bytes_read'] == len(body)
+    assert len(parsed.entries) == 10
+    assert head == body[:len(head)]
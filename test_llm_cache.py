@@ -0,0 +1,78 @@
+"""
+LLM parse cache tests
+Run offline against the stub backend and a throwaway database
+"""
+
+import time
+import pytest
+import ai_parser
+from ai_parser import EventParser, StubBackend
+from llm_cache import LLMParseCache, cache_key
+
+TEXT = "Gallery Nights at the National Gallery of Art\nOctober 30, 2026, 6 to 9 p.m. Free"
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMParseCache(str(tmp_path / 'cache.db'))
+
+@pytest.fixture
+def parser(cache, monkeypatch):
+    monkeypatch.setattr(ai_parser, '_wait_for_llm_slot', lambda: None)
+    parser = EventParser(llm_cache=cache)
+    parser.llm_backend = StubBackend(parser._parse_with_regex, latency=0)
+    return parser
+
+def test_key_ignores_whitespace_but_not_prompt_or_model():
+    key = cache_key(TEXT, 'gpt-3.5-turbo', 2)
+    assert cache_key("  " + TEXT.replace(' ', '\n ') + "\n", 'gpt-3.5-turbo', 2) == key
+    assert cache_key(TEXT, 'gpt-3.5-turbo', 3) != key
+    assert cache_key(TEXT, 'gpt-4', 2) != key
+    assert cache_key(TEXT.upper(), 'gpt-3.5-turbo', 2) != key
+
+def test_repeat_parse_is_served_from_cache(parser, cache):
+    first = parser.parse_natural_language(TEXT)
+    assert parser.parse_natural_language(TEXT + "  ") == first
+    assert parser.llm_backend.requests == 1
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+def test_batch_only_sends_misses(parser):
+    texts = [f"{TEXT} Session {n}." for n in range(7)]
+    parser.parse_batch(texts[:3])
+    requests = parser.llm_backend.requests
+    assert parser.parse_batch(texts) == [parser._parse_with_regex(text) for text in texts]
+    # Four misses fit in one pack
+    assert parser.llm_backend.requests == requests + 1
+
+def test_expired_entries_miss(cache):
+    cache.ttl_seconds = 60
+    cache.put(TEXT, 'stub', 2, {'title': 'old'})
+    assert cache.get(TEXT, 'stub', 2) == {'title': 'old'}
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get(TEXT, 'stub', 2) is None
+    assert cache.get_stats()['entries'] == 0
+
+def test_size_eviction_keeps_recently_used(cache):
+    cache.max_entries = 3
+    for n in range(5):
+        cache.put(f"event {n}", 'stub', 2, {'title': str(n)})
+        time.sleep(0.01)
+    cache.get("event 0", 'stub', 2)
+    assert cache.evict() == 2
+    assert cache.get("event 0", 'stub', 2) == {'title': '0'}
+    assert cache.get("event 1", 'stub', 2) is None
+    assert cache.get("event 4", 'stub', 2) == {'title': '4'}
+
+def test_failed_llm_reply_is_not_cached(cache, monkeypatch):
+    monkeypatch.setattr(ai_parser, '_wait_for_llm_slot', lambda: None)
+
+    class BrokenBackend:
+        model = 'broken'
+        def parse(self, texts):
+            raise ValueError('not json')
+
+    parser = EventParser(llm_backend=BrokenBackend(), llm_cache=cache)
+    assert parser.parse_natural_language(TEXT) == parser._parse_with_regex(TEXT)
+    assert cache.get_stats()['entries'] == 0
@@ -0,0 +1,112 @@
+"""
+Batch event parsing tests
+The pooled batch path must return exactly what parsing block by block does
+"""
+
+import re
+import json
+import types
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import ai_parser
+import parse_pool
+from ai_parser import EventParser, OpenAIBackend, pack_blocks
+from services import EventParser as RegexEventParser
+
+BLOCKS = [
+    f"Jazz Night {n} at the Kennedy Center\n"
+    f"Friday, Oct {n % 28 + 1}, 2026 from 7:30 pm to 9 pm. Tickets $25 at 2700 F Street NW. "
+    f"An evening of music and conversation with quartet number {n}."
+    for n in range(3 * parse_pool.MIN_POOL_BATCH)
+]
+
+def test_ai_parser_batch_matches_serial():
+    parser = EventParser()
+    parser.llm_backend = None
+    assert parser.parse_batch(BLOCKS) == [parser._parse_with_regex(block) for block in BLOCKS]
+
+def test_regex_parser_batch_matches_serial():
+    parser = RegexEventParser()
+    # Continuation lines start with a digit so each listing stays one block
+    text = "\n\n".join(block.replace("\nFriday", "\n7:30 pm Friday") for block in BLOCKS)
+    blocks = parser.split_event_blocks(text)
+    serial = [parser.parse_natural_language(block) for block in blocks]
+    assert len(blocks) == len(BLOCKS) and all(event['title'] for event in serial)
+    assert parser.extract_multiple_events(text) == serial
+    assert dict(parser.iter_extract_events(text)) == dict(enumerate(serial))
+
+def test_small_batch_parses_inline():
+    items = list(enumerate(BLOCKS[:parse_pool.MIN_POOL_BATCH - 1]))
+    assert list(parse_pool.iter_parallel(len, items)) == [(index, len(text)) for index, text in items]
+
+def test_threaded_process_parses_inline_instead_of_forking(monkeypatch):
+    monkeypatch.setattr(parse_pool, '_parse_pool', None)
+    release = threading.Event()
+    thread = threading.Thread(target=release.wait)
+    thread.start()
+    try:
+        assert parse_pool.get_parse_pool() is None
+        assert parse_pool.submit_parse(len, 'abc').result() == 3
+        items = list(enumerate(BLOCKS))
+        assert list(parse_pool.iter_parallel(len, items)) == [(index, len(text)) for index, text in items]
+    finally:
+        release.set()
+        thread.join()
+
+def _fails_off_main_thread(text):
+    if threading.current_thread() is not threading.main_thread():
+        raise RuntimeError('parser bug')
+    return len(text)
+
+def _pooled(monkeypatch, pool):
+    shutdowns = []
+    monkeypatch.setattr(parse_pool, 'get_parse_pool', lambda: pool)
+    monkeypatch.setattr(parse_pool, 'shutdown_parse_pool', lambda: shutdowns.append(True))
+    return shutdowns
+
+def test_parse_error_in_worker_reparses_inline_and_keeps_pool(monkeypatch):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        shutdowns = _pooled(monkeypatch, pool)
+        items = list(enumerate(BLOCKS))
+        assert sorted(parse_pool.iter_parallel(_fails_off_main_thread, items)) == [(index, len(text)) for index, text in items]
+    assert not shutdowns
+
+def test_broken_pool_is_shut_down_and_batch_parsed_inline(monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            future = Future()
+            future.set_exception(BrokenProcessPool('worker died'))
+            return future
+
+    shutdowns = _pooled(monkeypatch, BrokenPool())
+    items = list(enumerate(BLOCKS))
+    assert sorted(parse_pool.iter_parallel(len, items)) == [(index, len(text)) for index, text in items]
+    assert shutdowns == [True]
+
+def test_pack_blocks_limits_count_and_size():
+    items = list(enumerate(['x' * 100] * 12))
+    assert [len(pack) for pack in pack_blocks(items, max_blocks=5)] == [5, 5, 2]
+    assert [len(pack) for pack in pack_blocks(items, max_blocks=5, max_chars=250)] == [2] * 6
+
+def test_failed_llm_pack_falls_back_to_regex(monkeypatch):
+    def create(model, messages, max_tokens, temperature):
+        prompt = messages[0]['content']
+        count = len(re.findall(r'Block \d+:', prompt)) or 1
+        # The pack holding block 0 gets a reply that doesn't match the request
+        content = 'not json' if 'Jazz Night 0 ' in prompt else json.dumps([{'title': 'llm'}] * count)
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(ai_parser, '_wait_for_llm_slot', lambda: None)
+    client = types.SimpleNamespace(ChatCompletion=types.SimpleNamespace(create=create))
+    parser = EventParser(llm_backend=OpenAIBackend(client), llm_cache=False)
+
+    blocks = BLOCKS[:12]
+    results = parser.parse_batch(blocks)
+    failed = {index for index, _ in pack_blocks(list(enumerate(blocks)))[0]}
+    for index, result in enumerate(results):
+        if index in failed:
+            assert result == parser._parse_with_regex(blocks[index])
+        else:
+            assert result == {'title': 'llm'}
@@ -0,0 +1,110 @@
+"""
+Extraction pattern registry tests
+The one-pass keyword-run search must find what the backtracking patterns it
+replaced found, the audit must tell those patterns apart from the registered
+ones, and the per-document budget must bound what a parser works through
+"""
+
+import re
+import random
+import logging
+import pytest
+import pattern_registry
+import regex_audit
+from pattern_registry import find_keyword_runs, register, search_keyword_run
+import ai_parser
+import services
+
+_NAME = r"[A-Za-z\s&',\-.]"
+
+# Pieces that make venue, organization and address runs (and near misses) likely in random text
+PIECES = ['at ', 'in ', '@ ', 'Gallery', 'Hall', 'Halls', 'Center', 'Boulevard', 'Rd', 'Street', 'St', 'NW',
+          'National ', 'of ', 'Art', 'a', 'x', ' ', '  ', '\n', ',', '.', "'", '-', '1', '12 ', '!', ':']
+
+def random_texts(count=3000, seed=7):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(PIECES) for _ in range(rng.randint(1, 25))) for _ in range(count)]
+
+def legacy_ai_parser(prefix, keywords):
+    return re.compile(rf'{prefix}([A-Z]{_NAME}*(?:{keywords}){_NAME}*)', re.IGNORECASE)
+
+AI_PARSER_SHAPES = [
+    (legacy_ai_parser(r'at\s+', ai_parser.VENUE_WORD_RE.pattern), ai_parser.AT_NAME_RE, ai_parser.VENUE_WORD_RE),
+    (legacy_ai_parser(r'in\s+', ai_parser.VENUE_WORD_RE.pattern), ai_parser.IN_NAME_RE, ai_parser.VENUE_WORD_RE),
+    (legacy_ai_parser('', ai_parser.VENUE_WORD_RE.pattern), ai_parser.NAME_START_RE, ai_parser.VENUE_WORD_RE),
+    (legacy_ai_parser('', ai_parser.ORG_WORD_RE.pattern), ai_parser.NAME_START_RE, ai_parser.ORG_WORD_RE),
+]
+
+SERVICES_SHAPES = [
+    (re.compile(r'\b(at|in|@)\s+[A-Z][A-Za-z\s&\',\-\.]+(?:Center|Theater|Theatre|Museum|Library|Park|Hall|Arena|'
+                r'Stadium|Club|Bar|Restaurant|Cafe|Gallery|Studio|Academy|School|University|College|Church|Temple|'
+                r'Mosque|Synagogue)\b', re.IGNORECASE), services.LOCATION_FORMS[0]),
+    (re.compile(r'\b\d+\s+[A-Za-z\s,.-]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Way|Place|'
+                r'Pl|Court|Ct|NW|NE|SW|SE)\b', re.IGNORECASE), services.LOCATION_FORMS[1]),
+]
+
+@pytest.mark.parametrize('legacy, prefix_re, keyword_re', AI_PARSER_SHAPES)
+def test_keyword_runs_match_the_ai_parser_patterns(legacy, prefix_re, keyword_re):
+    for text in random_texts():
+        expected = [(m.start(), m.start(1), m.end()) for m in legacy.finditer(text)]
+        assert list(find_keyword_runs(text, prefix_re, ai_parser.NAME_RUN_RE, keyword_re)) == expected, text
+
+@pytest.mark.parametrize('legacy, form', SERVICES_SHAPES)
+def test_keyword_runs_match_the_services_patterns(legacy, form):
+    for text in random_texts():
+        match = legacy.search(text)
+        found = search_keyword_run(text, *form, min_offset=2, to_run_end=False, word_end=True)
+        assert (found and text[found[0]:found[2]]) == (match and match.group()), text
+
+def test_rewritten_patterns_match_their_originals():
+    originals = {
+        ai_parser.URL_RES[2]: re.compile(r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(?:/[^\s<>"{}|\\^`\[\]]*)?', re.IGNORECASE),
+        ai_parser.EDGE_SYMBOLS_RE: re.compile(r'^[^\w\s]+|[^\w\s]+$'),
+        ai_parser.PRICE_RES[2]: re.compile(r'(\d+)\s*dollars?', re.IGNORECASE),
+        ai_parser.LOCATION_SUFFIX_RE: re.compile(r'\s+(PM|AM|p\.m\.|a\.m\.|Registration|opens|Monday|Tuesday|'
+                                                 r'Wednesday|Thursday|Friday|Saturday|Sunday).*$', re.IGNORECASE),
+        ai_parser.TITLE_MENU_SUFFIX_RE: re.compile(r'\s+Return to menu\s*$', re.IGNORECASE),
+    }
+    rng = random.Random(3)
+    pieces = ['a', 'B', '.', '-', '!!', ' ', '  ', '\t', '1', '22', 'dollars', 'pm', 'Friday', 'Return to menu',
+              'www', 'example.com', '/path', 'x.org']
+    for _ in range(3000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+        for pattern, original in originals.items():
+            assert pattern.sub('|', text) == original.sub('|', text), (pattern.pattern, text)
+
+def test_register_rejects_a_different_pattern_under_the_same_name(monkeypatch):
+    monkeypatch.setattr(pattern_registry, '_patterns', {})
+    first = register('test.word', r'\bword\b', re.IGNORECASE)
+    assert register('test.word', r'\bword\b', re.IGNORECASE) is not None
+    assert pattern_registry.registered_patterns() == {'test.word': first}
+    with pytest.raises(ValueError):
+        register('test.word', r'\bwords?\b', re.IGNORECASE)
+
+def test_audit_flags_backtracking_patterns_and_passes_registered_ones(monkeypatch):
+    monkeypatch.setattr(regex_audit, 'SMALL_SIZE', 250)
+    monkeypatch.setattr(regex_audit, 'LARGE_SIZE', 2000)
+    pieces = ['at ', 'A', ' ', '1', '.']
+
+    source, flags = regex_audit.LEGACY_PATTERNS['legacy.services.location']
+    assert regex_audit.audit('legacy', regex_audit._consume(re.compile(source, flags)), pieces)['flagged']
+
+    for name, pattern in regex_audit.load_patterns().items():
+        assert not regex_audit.audit(name, regex_audit._consume(pattern), pieces)['flagged'], name
+
+def test_fields_past_the_document_budget_are_skipped(monkeypatch, caplog):
+    text = 'Jazz Night\nFriday, Oct 3 at 7:30 PM at the Kennedy Center. Free'
+    parsed = services.EventParser().parse_natural_language(text)
+    assert parsed['date'] and parsed['time'] and parsed['location']
+
+    monkeypatch.setattr(pattern_registry, 'DOCUMENT_BUDGET_SECONDS', 0)
+    with caplog.at_level(logging.WARNING, logger='pattern_registry'):
+        parsed = services.EventParser().parse_natural_language(text)
+    assert parsed['title'] == 'Jazz Night'
+    assert (parsed['date'], parsed['time'], parsed['location']) == ('', '', '')
+    assert 'skipped date' in caplog.text
+
+def test_long_documents_are_cut_before_extraction():
+    venue = ' at the Kennedy Center'
+    assert services.EventParser().parse_natural_language('x ' * 100 + venue)['location']
+    assert not services.EventParser().parse_natural_language('x' * pattern_registry.MAX_DOCUMENT_CHARS + venue)['location']
@@ -0,0 +1,80 @@
+"""
+Per-domain rate limiter tests
+Token bucket bursts and refills, hosts not waiting on each other, Retry-After
+pauses, robots.txt Crawl-delay, and waits that would overrun a deadline
+"""
+
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import pytest
+import rate_limiter
+from deadline import Deadline, DeadlineExceeded
+from rate_limiter import DomainRateLimiter, TokenBucket
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep so waits are measured, not slept"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', clock.sleep)
+    return clock
+
+def test_bucket_allows_a_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    start = bucket.updated
+    assert [bucket.reserve(start) for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    assert bucket.reserve(start + 10) == 0.0  # Refilled, but never past capacity
+    assert bucket.tokens == 1
+
+def test_hosts_are_limited_independently(clock):
+    limiter = DomainRateLimiter(requests_per_second=1.0, burst=1, respect_robots=False)
+    assert limiter.acquire('https://a.example.org/events') == 0.0
+    assert limiter.acquire('https://b.example.org/events') == 0.0
+    assert limiter.acquire('https://a.example.org/events?page=2') == pytest.approx(1.0)
+    assert clock.slept == [pytest.approx(1.0)]
+    assert limiter.get_stats()['requests'] == 3
+
+def test_retry_after_pauses_the_host(clock):
+    limiter = DomainRateLimiter(respect_robots=False)
+    assert limiter.apply_retry_after('https://a.example.org/feed', '30') == 30
+    assert limiter.acquire('https://a.example.org/feed') == pytest.approx(30)
+    assert limiter.acquire('https://b.example.org/feed') == 0.0
+
+    retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(hours=2), usegmt=True)
+    assert limiter.apply_retry_after('https://a.example.org/feed', retry_at) == rate_limiter.MAX_RETRY_AFTER
+    assert limiter.apply_retry_after('https://a.example.org/feed', 'soon') == 0.0
+
+def test_robots_crawl_delay_caps_the_configured_rate(clock, monkeypatch):
+    fetched = []
+    def robots_rate(url, timeout=10):
+        fetched.append(url)
+        return 0.1
+    limiter = DomainRateLimiter(requests_per_second=5.0, burst=1)
+    monkeypatch.setattr(limiter, '_robots_rate', robots_rate)
+
+    limiter.acquire('https://a.example.org/events')
+    limiter.set_rate('a.example.org', 10.0)
+    assert limiter.acquire('https://a.example.org/events') == pytest.approx(10.0)
+    assert fetched == ['https://a.example.org/robots.txt']
+
+def test_wait_past_the_deadline_raises_instead_of_sleeping(clock):
+    limiter = DomainRateLimiter(requests_per_second=0.1, burst=1, respect_robots=False)
+    limiter.acquire('https://a.example.org/events')
+    deadline = Deadline(5)
+    deadline.expires_at = clock.now + 5
+    with pytest.raises(DeadlineExceeded):
+        limiter.acquire('https://a.example.org/events', deadline)
+    assert clock.slept == []
@@ -0,0 +1,94 @@
+"""
+Scrape reconciliation tests
+New, changed, unchanged and vanished items across runs, duplicate linking,
+and items the database rejects failing alone instead of rolling back the run
+"""
+
+import sqlite3
+import pytest
+from scrape_reconciler import ScrapeReconciler
+
+EVENTS_TABLE = '''
+    CREATE TABLE events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        start_datetime TEXT NOT NULL,
+        description TEXT,
+        location_name TEXT,
+        price_info TEXT,
+        url TEXT,
+        category_id INTEGER,
+        source TEXT DEFAULT 'manual',
+        approval_status TEXT DEFAULT 'pending',
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+SOURCE = 'https://example.org/events'
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'calendar.db')
+    conn = sqlite3.connect(path)
+    with open('web_scrapers_schema.sql') as f:
+        conn.executescript(f.read())
+    conn.execute(EVENTS_TABLE)
+    conn.execute("INSERT INTO web_scrapers (id, name, url) VALUES (1, 'Listings', ?)", (SOURCE,))
+    conn.commit()
+    conn.close()
+    return path
+
+def event(title, start='Oct 4 - 10 2025', **fields):
+    return {'title': title, 'start_date': start, **fields}
+
+def rows(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+def test_runs_add_update_and_retire_items(db_path):
+    reconciler = ScrapeReconciler(db_path)
+    counts = reconciler.reconcile(1, [event('Fall Festival'), event('Jazz Night', 'November 7, 2025 7 pm')], SOURCE)
+    assert (counts['added'], counts['failed']) == (2, 0)
+    assert rows(db_path, 'SELECT title, start_datetime FROM events ORDER BY id') == [
+        ('Fall Festival', '2025-10-04T00:00:00'), ('Jazz Night', '2025-11-07T19:00:00')]
+
+    counts = reconciler.reconcile(1, [event('Fall Festival', description='Rides and music')], SOURCE)
+    assert (counts['updated'], counts['vanished']) == (1, 1)
+    assert rows(db_path, "SELECT description FROM events WHERE title = 'Fall Festival'") == [('Rides and music',)]
+    assert rows(db_path, 'SELECT is_active FROM web_scraper_events ORDER BY id') == [(1,), (0,)]
+
+    counts = reconciler.reconcile(1, [event('Fall Festival', description='Rides and music')], SOURCE)
+    assert counts['unchanged'] == 1
+
+def test_rejected_item_fails_alone(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TRIGGER reject_cancelled BEFORE INSERT ON events WHEN NEW.title LIKE '%cancelled%'
+        BEGIN SELECT RAISE(ABORT, 'cancelled events are not stored'); END
+    ''')
+    conn.commit()
+    conn.close()
+
+    counts = ScrapeReconciler(db_path).reconcile(
+        1, [event('Book Talk'), event('Concert (cancelled)'), event('Gallery Tour')], SOURCE)
+    assert (counts['added'], counts['failed']) == (2, 1)
+    assert rows(db_path, 'SELECT title FROM events ORDER BY id') == [('Book Talk',), ('Gallery Tour',)]
+    assert len(rows(db_path, 'SELECT id FROM web_scraper_events')) == 2
+
+def test_duplicates_are_linked_by_title_and_day_only(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO events (title, start_datetime, source) VALUES ('Jazz Night', '2025-11-07T18:00:00', 'rss')")
+    # A stray row whose date field holds text, which the old title LIKE clause matched
+    conn.execute("INSERT INTO events (title, start_datetime, source) VALUES ('Jazz Night', 'Jazz Night TBA', 'scraper')")
+    conn.commit()
+    conn.close()
+
+    counts = ScrapeReconciler(db_path).reconcile(
+        1, [event('Jazz Night', 'November 7, 2025 7 pm'), event('Jazz Night', 'December 5, 2025 7 pm')], SOURCE)
+    assert (counts['linked'], counts['added']) == (1, 1)
+    linked = rows(db_path, 'SELECT e.start_datetime FROM web_scraper_events w JOIN events e ON e.id = w.event_id ORDER BY w.id')
+    assert linked == [('2025-11-07T18:00:00',), ('2025-12-05T19:00:00',)]
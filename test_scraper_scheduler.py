@@ -0,0 +1,81 @@
+"""
+Scheduled scrape tests
+Runs cut short by a budget or deadline commit what they found without
+retiring the rest, and deadline stops do not count against the source's
+circuit breaker
+"""
+
+import shutil
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import scraper_scheduler
+from deadline import DeadlineExceeded
+from scraper_scheduler import ProductionScraperScheduler
+from test_enhanced_scraper import listing
+from test_scrape_reconciler import EVENTS_TABLE
+
+URL = 'https://example.org/events'
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    # The scheduler works on calendar.db in the working directory
+    shutil.copy('web_scrapers_schema.sql', tmp_path)
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect('calendar.db')
+    with open('web_scrapers_schema.sql') as f:
+        conn.executescript(f.read())
+    conn.execute(EVENTS_TABLE)
+    conn.execute("INSERT INTO web_scrapers (id, name, url) VALUES (1, 'Listings', ?)", (URL,))
+    conn.commit()
+    conn.close()
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(scraper_scheduler, 'submit_parse', pool.submit)
+    yield ProductionScraperScheduler()
+    pool.shutdown()
+
+def scrape(scheduler, monkeypatch, page, truncated=False, selector_config=None):
+    monkeypatch.setattr(scheduler.scraper, 'fetch_page', lambda *args, **kwargs: (page, truncated))
+    return scheduler._scrape_single_source({'id': 1, 'name': 'Listings', 'url': URL,
+                                            'selector_config': selector_config or {}})
+
+def active_items():
+    conn = sqlite3.connect('calendar.db')
+    try:
+        return conn.execute('SELECT COUNT(*) FROM web_scraper_events WHERE is_active = 1').fetchone()[0]
+    finally:
+        conn.close()
+
+def failures():
+    conn = sqlite3.connect('calendar.db')
+    try:
+        return conn.execute('SELECT consecutive_failures FROM web_scrapers WHERE id = 1').fetchone()[0]
+    finally:
+        conn.close()
+
+def test_budget_and_truncation_stops_keep_unseen_items(scheduler, monkeypatch):
+    assert scrape(scheduler, monkeypatch, listing(6))['events_added'] == 6
+
+    result = scrape(scheduler, monkeypatch, listing(6), selector_config={'budget': {'max_events': 3}})
+    assert result['success'] and result['events_vanished'] == 0
+    result = scrape(scheduler, monkeypatch, listing(2), truncated=True)
+    assert result['success'] and result['events_vanished'] == 0
+    assert active_items() == 6
+
+    assert scrape(scheduler, monkeypatch, listing(2))['events_vanished'] == 4
+
+def test_deadline_stops_are_not_breaker_failures(scheduler, monkeypatch):
+    def fetch_past_deadline(*args, **kwargs):
+        raise DeadlineExceeded('Cancelled')
+    monkeypatch.setattr(scheduler.scraper, 'fetch_page', fetch_past_deadline)
+    for _ in range(3):
+        result = scheduler._scrape_single_source({'id': 1, 'name': 'Listings', 'url': URL, 'selector_config': {}})
+        assert not result['success']
+    assert failures() == 0
+
+    def fetch_fails(*args, **kwargs):
+        raise ConnectionError('refused')
+    monkeypatch.setattr(scheduler.scraper, 'fetch_page', fetch_fails)
+    scheduler._scrape_single_source({'id': 1, 'name': 'Listings', 'url': URL, 'selector_config': {}})
+    assert failures() == 1
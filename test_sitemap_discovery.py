@@ -0,0 +1,127 @@
+"""
+Sitemap discovery tests
+Following robots.txt and sitemap indexes, conditional refetches, skipping
+child sitemaps the index says are unchanged, and which event pages are
+handed out again after a visit
+"""
+
+import gzip
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import pytest
+import sitemap_discovery
+from sitemap_discovery import SitemapDiscovery
+
+SITE = 'https://www.example.org'
+
+class FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+class FakeSession:
+    """Serves a fixed set of documents, answering 304 when the ETag still matches"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, dict(headers or {})))
+        if url not in self.documents:
+            return FakeResponse(404)
+        body = self.documents[url]
+        etag = f'"{hash(body)}"'
+        if (headers or {}).get('If-None-Match') == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, body, {'ETag': etag})
+
+    def fetched(self, url):
+        return sum(1 for requested, _ in self.requests if requested == url)
+
+def urlset(*entries):
+    urls = ''.join(f'<url><loc>{loc}</loc>' + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</url>'
+                   for loc, lastmod in entries)
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'.encode()
+
+def index(*entries):
+    maps = ''.join(f'<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>' for loc, lastmod in entries)
+    return f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{maps}</sitemapindex>'.encode()
+
+@pytest.fixture
+def documents():
+    return {
+        f'{SITE}/robots.txt': f'User-agent: *\nSitemap: {SITE}/sitemap_index.xml\n'.encode(),
+        f'{SITE}/sitemap_index.xml': index((f'{SITE}/events.xml.gz', '2026-10-01'), (f'{SITE}/posts.xml', '2026-10-01')),
+        f'{SITE}/events.xml.gz': gzip.compress(urlset(
+            (f'{SITE}/events/jazz-night', '2026-10-10T19:00:00-04:00'),
+            (f'{SITE}/events/book-talk', '2026-10-12'),
+            (f'{SITE}/events/open-studio', None),
+            ('https://other.example.com/events/elsewhere', '2026-10-12'))),
+        f'{SITE}/posts.xml': urlset((f'{SITE}/blog/recap', '2026-10-12')),
+    }
+
+@pytest.fixture
+def discovery(tmp_path, documents):
+    return SitemapDiscovery(str(tmp_path / 'calendar.db'), FakeSession(documents))
+
+def urls(pages):
+    return [page['url'] for page in pages]
+
+def test_walk_follows_robots_and_indexes_and_keeps_event_pages_of_the_site(discovery):
+    pages = discovery.discover(f'{SITE}/events/')
+    assert urls(pages) == [f'{SITE}/events/book-talk', f'{SITE}/events/jazz-night', f'{SITE}/events/open-studio']
+    assert pages[1]['lastmod'] == '2026-10-10T23:00:00'
+    assert discovery.has_pages(SITE) and discovery.is_event_page(f'{SITE}/events/book-talk')
+
+def test_unchanged_sitemaps_are_not_downloaded_again(discovery, documents):
+    session = discovery.session
+    discovery.discover(SITE)
+
+    # The index answers 304; its children are skipped because their listed lastmod has not moved
+    discovery.discover(SITE)
+    assert session.fetched(f'{SITE}/events.xml.gz') == 1
+    assert any(headers.get('If-None-Match') for url, headers in session.requests if url == f'{SITE}/sitemap_index.xml')
+
+    # A newer lastmod in the index sends us back to the child sitemap
+    documents[f'{SITE}/sitemap_index.xml'] = index((f'{SITE}/events.xml.gz', '2026-10-15'), (f'{SITE}/posts.xml', '2026-10-01'))
+    documents[f'{SITE}/events.xml.gz'] = gzip.compress(urlset((f'{SITE}/events/jazz-night', '2026-10-16')))
+    discovery.mark_visited(urls(discovery.discover(SITE)))
+    assert session.fetched(f'{SITE}/events.xml.gz') == 2
+    assert session.fetched(f'{SITE}/posts.xml') == 1
+
+def test_pending_pages_after_visits(discovery, documents):
+    pages = discovery.discover(SITE)
+    # The failed page (book-talk) is not marked visited, so it comes back
+    discovery.mark_visited([f'{SITE}/events/jazz-night', f'{SITE}/events/open-studio'])
+    assert urls(discovery.discover(SITE)) == [f'{SITE}/events/book-talk']
+    assert len(pages) == 3
+
+    # Pages without a lastmod come back once REVISIT_WITHOUT_LASTMOD_DAYS have passed
+    discovery.mark_visited([f'{SITE}/events/book-talk'])
+    stale = (datetime.now(timezone.utc) - timedelta(days=sitemap_discovery.REVISIT_WITHOUT_LASTMOD_DAYS + 1))
+    conn = sqlite3.connect(discovery.db_path)
+    conn.execute('UPDATE sitemap_pages SET last_visited = ?', (stale.strftime('%Y-%m-%dT%H:%M:%S'),))
+    conn.commit()
+    assert urls(discovery._pending_pages(conn, 'example.org', 10)) == [f'{SITE}/events/open-studio']
+
+    # A lastmod that moves past the one we saw brings a page back, most recent first
+    conn.execute("UPDATE sitemap_pages SET lastmod = '2026-10-20T00:00:00' WHERE url LIKE '%jazz-night'")
+    conn.commit()
+    assert urls(discovery._pending_pages(conn, 'example.org', 1)) == [f'{SITE}/events/jazz-night']
+    conn.close()
+
+def test_sitemap_xml_is_the_fallback_and_bad_sitemaps_are_ignored(tmp_path):
+    session = FakeSession({f'{SITE}/sitemap.xml': b'<urlset><url><loc>'})
+    discovery = SitemapDiscovery(str(tmp_path / 'calendar.db'), session)
+    assert discovery.discover(SITE) == []
+    assert session.fetched(f'{SITE}/sitemap.xml') == 1
+    assert not discovery.has_pages(SITE)
@@ -0,0 +1,69 @@
+"""
+Page snapshot archive tests
+Content-addressed storage, retention, and pruning never deleting a body that
+a snapshot stored at the same moment refers to
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+import snapshot_archive
+from snapshot_archive import SnapshotArchive
+
+@pytest.fixture
+def archive(tmp_path):
+    return SnapshotArchive(str(tmp_path / 'calendar.db'), str(tmp_path / 'snapshots'))
+
+def age_snapshots(archive, url, days):
+    conn = sqlite3.connect(archive.db_path)
+    conn.execute("UPDATE page_snapshots SET fetched_at = datetime('now', ?) WHERE url = ?", (f'-{days} days', url))
+    conn.commit()
+    conn.close()
+
+def test_identical_pages_share_one_body(archive):
+    first = archive.store('https://example.org/a', '<p>Jazz Night</p>')
+    second = archive.store('https://example.org/b', '<p>Jazz Night</p>')
+    assert first == second
+    assert archive.get_stats()['unique_pages'] == 1 and archive.get_stats()['snapshots'] == 2
+    assert archive.latest('https://example.org/b')['html'] == '<p>Jazz Night</p>'
+
+def test_prune_applies_retention_and_removes_unreferenced_bodies(archive, monkeypatch):
+    url = 'https://example.org/events'
+    old = archive.store(url, '<p>Old listing</p>')
+    age_snapshots(archive, url, snapshot_archive.MAX_SNAPSHOT_AGE_DAYS + 1)
+    hashes = [archive.store(url, f'<p>Listing {n}</p>') for n in range(3)]
+
+    assert archive.prune() == {'snapshots_expired': 1, 'blobs_removed': 1}
+    assert archive.load(old) is None and archive.load(hashes[0]) is not None
+
+    monkeypatch.setattr(snapshot_archive, 'MAX_SNAPSHOTS_PER_URL', 2)
+    assert archive.prune() == {'snapshots_expired': 0, 'blobs_removed': 1}
+    assert archive.load(hashes[0]) is None
+    assert archive.latest(url)['content_hash'] == hashes[-1]
+
+def test_store_during_prune_keeps_its_body(archive):
+    url = 'https://example.org/events'
+    page = '<p>Gallery Tour</p>'
+    content_hash = archive.store(url, page)
+    age_snapshots(archive, url, snapshot_archive.MAX_SNAPSHOT_AGE_DAYS + 1)
+    archive.store(url, '<p>Gallery Tour, rescheduled</p>')
+
+    # Another scrape archives the same page while prune is deciding which bodies to delete
+    iter_blobs = archive._iter_blobs
+    storing = []
+
+    def iter_blobs_while_storing():
+        thread = threading.Thread(target=archive.store, args=('https://example.org/mirror', page))
+        thread.start()
+        storing.append(thread)
+        time.sleep(0.2)
+        return iter_blobs()
+
+    archive._iter_blobs = iter_blobs_while_storing
+    archive.prune()
+    archive._iter_blobs = iter_blobs
+    storing[0].join()
+
+    assert archive.latest('https://example.org/mirror')['content_hash'] == content_hash
+    assert archive.load(content_hash) == page
@@ -0,0 +1,79 @@
+"""
+Page segmentation tests
+Blocks must not depend on how the page is chunked, and must match what the
+old tag stripping plus separator splitting produced for the same text
+"""
+
+import types
+from text_segmenter import EventSegmenter, iter_response_text, segment_html, segment_text
+
+CARD = '''
+<div class="event-card">
+  <h3><a href="/events/{n}">Jazz Night {n}</a></h3>
+  <p>Friday, Oct {n}, 2026 7:30 pm</p>
+  <p>Location: Kennedy Center, 2700 F Street NW</p>
+</div>
+'''
+
+PAGE = ('<html><head><title>Events</title><style>.card { color: red; }</style></head><body>'
+        '<script>var events = "<div>Event: not content, location, date</div>";</script>'
+        + ''.join(CARD.format(n=n) for n in range(1, 21)) + '</body></html>')
+
+def feed_in_pieces(text, size):
+    segmenter = EventSegmenter()
+    blocks = []
+    for start in range(0, len(text), size):
+        blocks += segmenter.feed(text[start:start + size])
+    return blocks + segmenter.close()
+
+def test_flat_text_splits_on_every_separator():
+    text = ('Event: Book talk with the author at the library, date to be announced soon. '
+            'Jazz on the lawn, every Friday at the museum sculpture garden, time 7 pm; '
+            'short; Meeting: Neighborhood association meeting at the community center venue')
+    assert segment_text(text) == [
+        'Book talk with the author at the library, date to be announced soon',
+        'Jazz on the lawn, every Friday at the museum sculpture garden, time 7 pm',
+        'Neighborhood association meeting at the community center venue'
+    ]
+
+def test_blocks_do_not_depend_on_chunking():
+    text = ''.join(f'Event: Lecture {n} at the downtown venue by the river, date Oct {n}.\n \n'
+                   f'Workshop: printmaking session {n} for adults and teens at the venue; '
+                   f'time 6 pm at the upstairs location in the east wing. ' for n in range(40))
+    expected = segment_text(text)
+    assert len(expected) == 120
+    for size in (1, 7, 64, 1000):
+        assert feed_in_pieces(text, size) == expected
+
+def test_html_cards_are_one_block_each_and_scripts_are_skipped():
+    blocks = segment_html(PAGE)
+    assert blocks == [f'Jazz Night {n} Friday, Oct {n}, 2026 7:30 pm Location: Kennedy Center, 2700 F Street NW'
+                      for n in range(1, 21)]
+    chunks = [PAGE[start:start + 13] for start in range(0, len(PAGE), 13)]
+    assert segment_html(chunks) == blocks
+
+def test_long_runs_are_cut_at_max_block_chars():
+    text = 'event venue ' * 5000
+    blocks = segment_text(text, max_block_chars=1000)
+    assert blocks and all(len(block) <= 1000 for block in blocks)
+    assert ' '.join(blocks) == text.strip()
+
+def test_pages_without_event_words_have_no_content():
+    segmenter = EventSegmenter()
+    list(segmenter.segment(['Privacy policy. ' * 20]))
+    assert not segmenter.looks_like_events()
+
+    segmenter = EventSegmenter()
+    list(segmenter.segment(['Upcoming concerts. '] * 10))
+    assert segmenter.looks_like_events()
+
+    segmenter = EventSegmenter()
+    list(segmenter.segment(['Concerts']))
+    assert not segmenter.looks_like_events()  # Too short to be a listing
+
+def test_response_text_decodes_across_chunk_boundaries():
+    body = ('<p>Café concert — ' + 'é' * 100 + '</p>').encode('utf-8')
+    response = types.SimpleNamespace(
+        encoding='utf-8',
+        iter_content=lambda chunk_size: (body[start:start + 3] for start in range(0, len(body), 3)))
+    assert ''.join(iter_response_text(response)) == body.decode('utf-8')
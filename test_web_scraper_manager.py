@@ -0,0 +1,49 @@
+"""
+Web scraper manager tests
+Databases built from web_scrapers_schema.sql declare every column
+SCHEMA_MIGRATIONS adds, and accept the run logs the manager and the scrape
+endpoints write
+"""
+
+import sqlite3
+import pytest
+from web_scraper_manager import SCHEMA_MIGRATIONS, WebScraperManager
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = WebScraperManager(str(tmp_path / 'calendar.db'))
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("INSERT INTO web_scrapers (id, name, url) VALUES (1, 'Listings', 'https://example.org/events')")
+    conn.commit()
+    conn.close()
+    return manager
+
+def test_runs_are_logged_on_a_schema_built_database(manager):
+    manager._log_scraper_run(1, True, 5, 2, 340, {'http': 120.0})
+    manager._log_scraper_run(1, False, 0, 0, 90)
+
+    conn = sqlite3.connect(manager.db_path)
+    # The inserts app_simplified's scrape endpoint makes
+    conn.execute('''
+        INSERT INTO web_scraper_logs (scraper_id, status, events_found, events_added, response_time_ms, stage_timings)
+        VALUES (?, 'success', ?, ?, ?, ?)
+    ''', (1, 3, 1, 200, '{}'))
+    conn.execute('''
+        INSERT INTO web_scraper_logs (scraper_id, status, error_message, response_time_ms, stage_timings)
+        VALUES (?, 'error', ?, ?, ?)
+    ''', (1, 'timed out', 30000, '{}'))
+    conn.commit()
+    conn.close()
+
+    logs = manager.get_scraper_logs(1)
+    assert sorted(log['status'] for log in logs) == ['error', 'error', 'success', 'success']
+
+def test_schema_file_declares_every_migrated_column(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'fresh.db'))
+    with open('web_scrapers_schema.sql') as f:
+        conn.executescript(f.read())
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [(table, column) for table, column, _ in SCHEMA_MIGRATIONS if table in tables
+               and column not in {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}]
+    conn.close()
+    assert missing == []
@@ -0,0 +1,42 @@
+"""
+WebSub push tests
+Signature checks and the pushed-body size limit, which must also hold for
+chunked pushes that send no Content-Length
+"""
+
+import io
+import hmac
+import hashlib
+from flask import Flask, Response, request
+import websub
+from websub import read_push_body, verify_signature
+
+def test_signature_is_checked_against_the_body():
+    body = b'<rss></rss>'
+    digest = hmac.new(b'secret', body, hashlib.sha256).hexdigest()
+    assert verify_signature('secret', body, f'sha256={digest}')
+    assert not verify_signature('secret', body + b' ', f'sha256={digest}')
+    assert not verify_signature('secret', body, f'md5={digest}')
+
+def test_push_bodies_past_the_limit_are_refused(monkeypatch):
+    monkeypatch.setattr(websub, 'PUSH_READ_CHUNK_BYTES', 7)
+    assert read_push_body(io.BytesIO(b'x' * 100), limit=100) == b'x' * 100
+    assert read_push_body(io.BytesIO(b'x' * 101), limit=100) is None
+    assert read_push_body(io.BytesIO(b''), limit=100) == b''
+
+def test_chunked_push_without_content_length_is_limited():
+    app = Flask(__name__)
+
+    @app.route('/push', methods=['POST'])
+    def push():
+        body = read_push_body(request.stream, limit=1000)
+        return Response(status=413) if body is None else Response(str(len(body)), status=202)
+
+    # As servers pass chunked requests on: no CONTENT_LENGTH, input read to its end
+    def post(body):
+        return app.test_client().post('/push', input_stream=io.BytesIO(body), headers={'Transfer-Encoding': 'chunked'},
+                                      environ_overrides={'wsgi.input_terminated': True})
+
+    assert post(b'x' * 5000).status_code == 413
+    response = post(b'x' * 500)
+    assert (response.status_code, response.data) == (202, b'500')
@@ -0,0 +1,202 @@
+"""
+Single-pass page text segmentation
+Turns HTML (or plain text) into candidate event blocks in one streaming pass.
+An incremental HTML parser yields text nodes, skipping script/style, with a
+paragraph break at every block-level element; the segmenter splits that
+stream on all event separators with one combined pattern as it arrives. Only
+the block being built is held in memory, and it is cut at MAX_BLOCK_CHARS.
+"""
+
+import re
+import codecs
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Union
+from pattern_registry import register
+
+# Candidate blocks shorter than this are dropped
+MIN_BLOCK_CHARS = 50
+
+# A block growing past this without a separator is cut at the last space (event listings are far shorter)
+MAX_BLOCK_CHARS = 4000
+
+# Pages with less text than this, or no event words at all, are treated as having no content
+MIN_PAGE_CHARS = 100
+
+# Bytes read (and characters segmented) per chunk when streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Elements whose text is never content
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head'}
+
+# Container elements that start a new paragraph; inline and in-card elements (p, h3, span, br) only
+# separate words, so a card's title, date and venue stay in one block as they did with tag stripping
+BLOCK_TAGS = {
+    'article', 'aside', 'blockquote', 'dd', 'details', 'div', 'dl', 'dt', 'fieldset', 'figure', 'footer',
+    'form', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'section', 'table', 'tbody', 'tr', 'ul'
+}
+
+PARAGRAPH = '\n\n'
+
+# Every block separator in one alternation: blank lines, sentence ends, semicolons, "Event:"-style labels.
+# A full stop or semicolon right before a paragraph break stays with its block, as when blank lines were split first
+SEPARATOR_RE = register('text_segmenter.separator', r'\n\s*\n|\.(?!\n\n)\s+(?=[A-Z])|;(?!\n\n)\s+|Event:|Meeting:|Conference:|Workshop:', re.IGNORECASE)
+
+# Longest text a separator match can span, plus the lookahead character
+SEPARATOR_LOOKBACK = len('Conference:') + 1
+
+# A block must mention one of these to be kept
+BLOCK_KEYWORD_RE = register('text_segmenter.block_keyword', r'event|meeting|date|time|location|venue', re.IGNORECASE)
+
+# A page must mention one of these at all to be segmented
+EVENT_INDICATOR_RE = register('text_segmenter.event_indicator', r'events?|meetings?|conferences?|workshops?|concerts?|shows?|exhibitions?'
+                                r'|gallery|dates?|times?|locations?|venues?', re.IGNORECASE)
+
+# Whitespace other than line breaks; after collapsing it, a run holding a blank line becomes a
+# paragraph break and any other line break a space (two C-level passes, no per-match callback)
+_SPACES_RE = register('text_segmenter.spaces', r'[^\S\n]+')
+_PARAGRAPH_RE = register('text_segmenter.paragraph', r' ?\n ?\n[ \n]*')
+_LINE_BREAK_RE = register('text_segmenter.line_break', r'(?<!\n) ?\n(?!\n) ?')
+
+def collapse_whitespace(text: str) -> str:
+    """Runs of whitespace as one space, or a paragraph break where they hold a blank line"""
+    text = _SPACES_RE.sub(' ', text)
+    if '\n' not in text:
+        return text
+    return _LINE_BREAK_RE.sub(' ', _PARAGRAPH_RE.sub(PARAGRAPH, text))
+
+class _TextNodeParser(HTMLParser):
+    """Collects visible text nodes and paragraph breaks as the document is fed"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces: List[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif not self.skip_depth:
+            # Every tag separates words, as the old tag stripping replaced tags with a space
+            self.pieces.append(PARAGRAPH if tag in BLOCK_TAGS else ' ')
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.skip_depth:
+            self.pieces.append(PARAGRAPH if tag in BLOCK_TAGS else ' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif not self.skip_depth:
+            self.pieces.append(PARAGRAPH if tag in BLOCK_TAGS else ' ')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            # Line breaks inside text nodes are layout, never a paragraph break
+            self.pieces.append(data.replace('\n', ' '))
+
+def iter_text_nodes(html: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Visible text of an HTML document (whole or in chunks), with paragraph breaks at block elements.
+    Yields the text of each input chunk as one piece."""
+    parser = _TextNodeParser()
+    for chunk in ([html] if isinstance(html, str) else html):
+        parser.feed(chunk)
+        if parser.pieces:
+            yield ''.join(parser.pieces)
+            parser.pieces.clear()
+    parser.close()
+    yield ''.join(parser.pieces)
+
+def iter_response_text(response, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Decoded text of a (streamed) requests response, chunk by chunk"""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+class EventSegmenter:
+    """Splits a stream of text into candidate event blocks in one pass"""
+
+    def __init__(self, max_block_chars: int = MAX_BLOCK_CHARS, min_block_chars: int = MIN_BLOCK_CHARS):
+        self.max_block_chars = max_block_chars
+        self.min_block_chars = min_block_chars
+        self.buffer = ''
+        self.scan_from = 0
+        self.held_whitespace = ''
+        self.text_chars = 0
+        self.has_event_words = False
+
+    def segment(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Candidate event blocks from an iterable of text pieces"""
+        for piece in pieces:
+            yield from self.feed(piece)
+        yield from self.close()
+
+    def looks_like_events(self) -> bool:
+        """Whether the text seen so far is long enough and mentions events at all"""
+        return self.text_chars >= MIN_PAGE_CHARS and self.has_event_words
+
+    def feed(self, piece: str) -> List[str]:
+        """Add text; returns the blocks it completed"""
+        if not piece:
+            return []
+        # Hold trailing whitespace back: the next piece may continue the run into a blank line
+        piece = self.held_whitespace + piece
+        stripped = piece.rstrip()
+        self.held_whitespace = piece[len(stripped):]
+        self.buffer += collapse_whitespace(stripped)
+        return self._split(final=False)
+
+    def close(self) -> List[str]:
+        """Flush the last block"""
+        self.buffer += collapse_whitespace(self.held_whitespace)
+        self.held_whitespace = ''
+        return self._split(final=True)
+
+    def _split(self, final: bool) -> List[str]:
+        blocks = []
+        start = 0
+        for match in SEPARATOR_RE.finditer(self.buffer, self.scan_from):
+            if not final and match.end() == len(self.buffer):
+                break  # More text may extend this separator or decide its lookahead
+            self._emit(self.buffer[self._cut_long(start, match.start(), blocks):match.start()], blocks)
+            start = match.end()
+
+        start = self._cut_long(start, len(self.buffer), blocks)
+        rest = self.buffer[start:]
+        if final:
+            self._emit(rest, blocks)
+            rest = ''
+        self.buffer = rest
+        # Separators can only start in the unscanned tail of what is left
+        self.scan_from = max(0, len(rest) - SEPARATOR_LOOKBACK)
+        return blocks
+
+    def _cut_long(self, start: int, end: int, blocks: List[str]) -> int:
+        """Emit max_block_chars pieces of buffer[start:end] while it is too long; returns the new start"""
+        while end - start > self.max_block_chars:
+            limit = start + self.max_block_chars
+            cut = self.buffer.rfind(' ', start + 1, limit)
+            cut = cut if cut > 0 else limit
+            self._emit(self.buffer[start:cut], blocks)
+            start = cut
+        return start
+
+    def _emit(self, block: str, blocks: List[str]):
+        block = block.strip()
+        if not block:
+            return
+        self.text_chars += len(block)
+        if not self.has_event_words and EVENT_INDICATOR_RE.search(block):
+            self.has_event_words = True
+        if len(block) > self.min_block_chars and BLOCK_KEYWORD_RE.search(block):
+            blocks.append(block)
+
+def segment_text(text: str, **options) -> List[str]:
+    """Candidate event blocks of a plain text document"""
+    pieces = (text[start:start + STREAM_CHUNK_SIZE] for start in range(0, len(text), STREAM_CHUNK_SIZE))
+    return list(EventSegmenter(**options).segment(pieces))
+
+def segment_html(html: Union[str, Iterable[str]], **options) -> List[str]:
+    """Candidate event blocks of an HTML document (whole or in chunks)"""
+    return list(EventSegmenter(**options).segment(iter_text_nodes(html)))
@@ -8,8 +8,15 @@ import re
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-import dateparser
 from dataclasses import dataclass
+from date_normalizer import normalize_date
+
+# Listing date line: "Tue, Sep 16"
+LISTING_DATE_RE = re.compile(r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun),?\s+(\w+)\s+(\d+)')
+
+# "7:00pm - 9:00pm" / "7:00pm to 9:00pm", and a lone "7:00pm"
+TIME_RANGE_RE = re.compile(r'(\d{1,2}:\d{2}(?:am|pm)?)\s*(?:-|to)\s*(\d{1,2}:\d{2}(?:am|pm)?)', re.IGNORECASE)
+SINGLE_TIME_RE = re.compile(r'(\d{1,2}:\d{2}(?:am|pm)?)', re.IGNORECASE)
 
 
 @dataclass
@@ -181,23 +188,21 @@ class WashingtonPostParser:
         
         for line in lines:
             # Date pattern: "Tue, Sep 16" or "Mon, Sep 16"
-            date_match = re.search(r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun),?\s+(\w+)\s+(\d+)', line)
+            date_match = LISTING_DATE_RE.search(line)
             if date_match and not date:
                 day, month, day_num = date_match.groups()
-                # Convert to full date (assuming current year)
-                current_year = datetime.now().year
-                date_str = f"{month} {day_num}, {current_year}"
-                parsed_date = dateparser.parse(date_str)
+                # The listing omits the year: normalize_date assumes the current one
+                parsed_date = normalize_date(f"{month} {day_num}", fuzzy=False)
                 if parsed_date:
                     date = parsed_date.strftime('%Y-%m-%d')
             
             # Time patterns
-            time_match = re.search(r'(\d{1,2}:\d{2}(?:am|pm)?)\s*(?:-|to)\s*(\d{1,2}:\d{2}(?:am|pm)?)', line, re.IGNORECASE)
+            time_match = TIME_RANGE_RE.search(line)
             if time_match:
                 time = time_match.group(1)
                 end_time = time_match.group(2)
             else:
-                time_match = re.search(r'(\d{1,2}:\d{2}(?:am|pm)?)', line, re.IGNORECASE)
+                time_match = SINGLE_TIME_RE.search(line)
                 if time_match and not time:
                     time = time_match.group(1)
         
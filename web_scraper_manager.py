@@ -4,7 +4,6 @@ Handles web scraping of event websites with scheduling and history tracking
 """
 
 import sqlite3
-import requests
 import json
 import time
 import logging
@@ -16,6 +15,11 @@ import re
 import schedule
 import threading
 from dataclasses import dataclass
+from circuit_breaker import CircuitBreaker
+from http_client import create_session
+from deadline import Deadline, deadline_scope
+from stage_timer import StageTimer, stage_scope, timed_stage
+from date_normalizer import normalize_date, within_window
 
 # Import advanced scraping components
 try:
@@ -33,6 +37,47 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on a single advanced scrape, including pagination
+SCRAPE_DEADLINE_SECONDS = 300
+
+# Columns added after the original schema, applied to existing databases on startup
+# (web_scrapers_schema.sql declares them too, for new databases)
+SCHEMA_MIGRATIONS = [
+    ('web_scrapers', 'detected_strategy', 'TEXT'),
+    ('web_scrapers', 'page_signature', 'TEXT'),
+    ('web_scrapers', 'last_yield', 'INTEGER'),
+    ('web_scraper_logs', 'stage_timings', 'TEXT'),
+    # circuit_breaker
+    ('web_scrapers', 'circuit_open_until', 'DATETIME'),
+    ('rss_feeds', 'circuit_open_until', 'DATETIME'),
+    # adaptive_schedule
+    ('web_scrapers', 'content_hash', 'TEXT'),
+    ('web_scrapers', 'change_rate', 'REAL'),
+    ('web_scrapers', 'yield_rate', 'REAL'),
+    ('web_scrapers', 'current_interval', 'INTEGER'),
+    # scrape_reconciler
+    ('web_scraper_events', 'item_key', 'TEXT'),
+    ('web_scraper_events', 'content_hash', 'TEXT'),
+    # feed_entries
+    ('event_sources', 'content_hash', 'TEXT'),
+    # feed_schedule
+    ('rss_feeds', 'next_poll_at', 'TEXT'),
+    ('rss_feeds', 'poll_interval', 'INTEGER'),
+    ('rss_feeds', 'cadence_minutes', 'REAL')
+]
+
+def apply_schema_migrations(db_path: str = "calendar.db"):
+    """Add the SCHEMA_MIGRATIONS columns an existing database is missing (run once at startup)"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for table, column, definition in SCHEMA_MIGRATIONS:
+        try:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        except sqlite3.OperationalError:
+            pass  # Column already exists, or its table is not created yet
+    conn.commit()
+    conn.close()
+
 @dataclass
 class ScrapedEvent:
     """Data class for scraped event information"""
@@ -52,8 +97,7 @@ class WebScraperManager:
     
     def __init__(self, db_path: str = "calendar.db"):
         self.db_path = db_path
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = create_session({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         
@@ -83,6 +127,8 @@ class WebScraperManager:
             cursor.executescript(schema)
             conn.commit()
             conn.close()
+            
+            apply_schema_migrations(self.db_path)
             logger.info("Web scraper database initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing web scraper database: {e}")
@@ -190,6 +236,7 @@ class WebScraperManager:
     def scrape_website(self, scraper_id: int) -> Dict:
         """Scrape a specific website for events"""
         start_time = time.time()
+        timer = StageTimer()
         
         try:
             conn = sqlite3.connect(self.db_path)
@@ -208,25 +255,29 @@ class WebScraperManager:
             name, url, selector_config_json, category = scraper_data
             selector_config = json.loads(selector_config_json or '{}')
             
-            # Fetch the webpage
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract events using the selector configuration
-            events = self._extract_events(soup, selector_config, url)
-            
-            # Process and store events
-            events_added = 0
-            events_updated = 0
-            
-            for event_data in events:
-                result = self._process_scraped_event(scraper_id, event_data, category)
-                if result['action'] == 'added':
-                    events_added += 1
-                elif result['action'] == 'updated':
-                    events_updated += 1
+            with stage_scope(timer):
+                # Fetch the webpage
+                response = self.session.get(url, timeout=30)
+                response.raise_for_status()
+                
+                with timed_stage('parse'):
+                    soup = BeautifulSoup(response.content, 'html.parser')
+                
+                # Extract events using the selector configuration
+                with timed_stage('strategy.selectors'):
+                    events = self._extract_events(soup, selector_config, url)
+                
+                # Process and store events
+                events_added = 0
+                events_updated = 0
+                
+                with timed_stage('db_dedupe'):
+                    for event_data in events:
+                        result = self._process_scraped_event(scraper_id, event_data, category)
+                        if result['action'] == 'added':
+                            events_added += 1
+                        elif result['action'] == 'updated':
+                            events_updated += 1
             
             # Update scraper statistics
             cursor.execute('''
@@ -240,11 +291,12 @@ class WebScraperManager:
             
             # Log the scraping operation
             response_time = int((time.time() - start_time) * 1000)
+            stage_timings = timer.as_dict()
             cursor.execute('''
                 INSERT INTO web_scraper_logs 
-                (scraper_id, status, events_found, events_added, events_updated, response_time_ms)
-                VALUES (?, 'success', ?, ?, ?, ?)
-            ''', (scraper_id, len(events), events_added, events_updated, response_time))
+                (scraper_id, status, events_found, events_added, events_updated, response_time_ms, stage_timings)
+                VALUES (?, 'success', ?, ?, ?, ?, ?)
+            ''', (scraper_id, len(events), events_added, events_updated, response_time, json.dumps(stage_timings)))
             
             conn.commit()
             conn.close()
@@ -254,7 +306,8 @@ class WebScraperManager:
                 'message': f"Scraping completed. Found {len(events)} events, added {events_added}, updated {events_updated}",
                 'events_found': len(events),
                 'events_added': events_added,
-                'events_updated': events_updated
+                'events_updated': events_updated,
+                'stage_timings': stage_timings
             }
             
         except Exception as e:
@@ -274,9 +327,9 @@ class WebScraperManager:
                 # Log the error
                 cursor.execute('''
                     INSERT INTO web_scraper_logs 
-                    (scraper_id, status, error_message, response_time_ms)
-                    VALUES (?, 'error', ?, ?)
-                ''', (scraper_id, str(e), int((time.time() - start_time) * 1000)))
+                    (scraper_id, status, error_message, response_time_ms, stage_timings)
+                    VALUES (?, 'error', ?, ?, ?)
+                ''', (scraper_id, str(e), int((time.time() - start_time) * 1000), json.dumps(timer.as_dict())))
                 
                 conn.commit()
                 conn.close()
@@ -566,7 +619,8 @@ class WebScraperManager:
             cursor.execute('''
                 SELECT ws.id, ws.name, ws.url, ws.description, ws.category, 
                        ws.update_interval, ws.is_active, ws.last_run, ws.next_run,
-                       ws.consecutive_failures, ws.total_events, ws.selector_config
+                       ws.consecutive_failures, ws.total_events, ws.selector_config,
+                       ws.detected_strategy, ws.page_signature, ws.last_yield
                 FROM web_scrapers ws
                 WHERE ws.id = ?
             ''', (scraper_id,))
@@ -587,7 +641,10 @@ class WebScraperManager:
                     'next_run': row[8],
                     'consecutive_failures': row[9],
                     'total_events': row[10],
-                    'selector_config': row[11]
+                    'selector_config': row[11],
+                    'detected_strategy': row[12],
+                    'page_signature': row[13],
+                    'last_yield': row[14]
                 }
             return None
             
@@ -665,6 +722,10 @@ class WebScraperManager:
                 update_fields.append("updated_at = CURRENT_TIMESTAMP")
                 values.append(scraper_id)
                 
+                # A scraper switched back on starts with a closed breaker
+                if data.get('is_active'):
+                    CircuitBreaker(self.db_path, 'web_scrapers').reset_inactive(cursor, scraper_id)
+                
                 query = f"UPDATE web_scrapers SET {', '.join(update_fields)} WHERE id = ?"
                 cursor.execute(query, values)
                 
@@ -696,22 +757,42 @@ class WebScraperManager:
             logger.error(f"Error deleting web scraper: {e}")
             return False
     
-    def _log_scraper_run(self, scraper_id: int, success: bool, events_found: int, events_added: int, response_time: int):
+    def _log_scraper_run(self, scraper_id: int, success: bool, events_found: int, events_added: int, response_time: int,
+                         stage_timings: Dict = None):
         """Log a scraper run"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
-                INSERT INTO web_scraper_logs (scraper_id, success, events_found, events_added, response_time_ms, run_time)
-                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (scraper_id, success, events_found, events_added, response_time))
+                INSERT INTO web_scraper_logs (scraper_id, status, events_found, events_added, response_time_ms,
+                                              stage_timings, run_time)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (scraper_id, 'success' if success else 'error', events_found, events_added, response_time,
+                  json.dumps(stage_timings) if stage_timings else None))
             
             conn.commit()
             conn.close()
         except Exception as e:
             logger.error(f"Error logging scraper run: {e}")
     
+    def _save_strategy_detection(self, scraper_id: int, detection: Dict):
+        """Store the scraping strategy and page signature for reuse on the next run"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE web_scrapers 
+                SET detected_strategy = ?, page_signature = ?, last_yield = ?
+                WHERE id = ?
+            ''', (detection['strategy'], detection['signature'], detection['yield'], scraper_id))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error saving strategy detection: {e}")
+    
     def _update_scraper_stats(self, scraper_id: int, events_found: int, events_added: int, success: bool):
         """Update scraper statistics"""
         try:
@@ -770,101 +851,13 @@ class WebScraperManager:
         if not date_text or date_text.lower() in ['invalid date', 'tbd', 'tba', 'coming soon']:
             return ""
         
-        try:
-            from dateutil import parser
-            import datetime
-            
-            # Clean the date text
-            cleaned_text = date_text.strip()
-            
-            # Handle common date patterns
-            date_patterns = [
-                # Full date formats
-                r'(\w{3,9}\s+\d{1,2},?\s+\d{4})',  # "Wed Sep 24, 2025" or "September 24, 2025"
-                r'(\d{1,2}/\d{1,2}/\d{4})',         # "09/24/2025"
-                r'(\d{4}-\d{2}-\d{2})',             # "2025-09-24"
-                r'(\d{1,2}-\d{1,2}-\d{4})',         # "09-24-2025"
-                r'(\w{3,9}\s+\d{1,2})',             # "Sep 24" (assume current year)
-                r'(\d{1,2}\s+\w{3,9})',             # "24 Sep" (assume current year)
-            ]
-            
-            # Try to extract a date pattern first
-            import re
-            for pattern in date_patterns:
-                match = re.search(pattern, cleaned_text, re.IGNORECASE)
-                if match:
-                    date_str = match.group(1)
-                    try:
-                        # Parse the date
-                        parsed_date = parser.parse(date_str, fuzzy=True)
-                        
-                        # If no year specified, assume current year
-                        if parsed_date.year == 1900:  # dateutil default for missing year
-                            current_year = datetime.datetime.now().year
-                            parsed_date = parsed_date.replace(year=current_year)
-                        
-                        # Validate the date is reasonable (not too far in past/future)
-                        current_date = datetime.datetime.now()
-                        if parsed_date < current_date - datetime.timedelta(days=365*2):  # More than 2 years ago
-                            continue
-                        if parsed_date > current_date + datetime.timedelta(days=365*3):  # More than 3 years future
-                            continue
-                        
-                        # Return in standardized format
-                        return parsed_date.strftime('%Y-%m-%d %H:%M:%S')
-                        
-                    except (ValueError, TypeError):
-                        continue
-            
-            # If no pattern matched, try direct parsing
-            try:
-                parsed_date = parser.parse(cleaned_text, fuzzy=True)
-                if parsed_date.year == 1900:
-                    current_year = datetime.datetime.now().year
-                    parsed_date = parsed_date.replace(year=current_year)
-                
-                # Validate date is reasonable
-                current_date = datetime.datetime.now()
-                if (parsed_date >= current_date - datetime.timedelta(days=365*2) and 
-                    parsed_date <= current_date + datetime.timedelta(days=365*3)):
-                    return parsed_date.strftime('%Y-%m-%d %H:%M:%S')
-                    
-            except (ValueError, TypeError):
-                pass
-            
-            # If all parsing fails, return empty string
+        # Year-less dates resolve to the current year; implausibly old or distant dates are misparses
+        parsed_date = normalize_date(date_text)
+        if not within_window(parsed_date):
+            logger.debug(f"Could not parse a plausible date from '{date_text}'")
             return ""
-            
-        except ImportError:
-            # Fallback if dateutil not available
-            logger.warning("dateutil not available, using basic date parsing")
-            return self._basic_date_parse(date_text)
-        except Exception as e:
-            logger.debug(f"Date parsing error for '{date_text}': {e}")
-            return ""
-    
-    def _basic_date_parse(self, date_text: str) -> str:
-        """Basic date parsing fallback when dateutil is not available"""
-        import re
-        import datetime
         
-        # Simple patterns
-        patterns = [
-            (r'(\d{4}-\d{2}-\d{2})', '%Y-%m-%d'),
-            (r'(\d{1,2}/\d{1,2}/\d{4})', '%m/%d/%Y'),
-            (r'(\d{1,2}-\d{1,2}-\d{4})', '%m-%d-%Y'),
-        ]
-        
-        for pattern, format_str in patterns:
-            match = re.search(pattern, date_text)
-            if match:
-                try:
-                    date_obj = datetime.datetime.strptime(match.group(1), format_str)
-                    return date_obj.strftime('%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    continue
-        
-        return ""
+        return parsed_date.strftime('%Y-%m-%d %H:%M:%S')
     
     def _clean_location_text(self, text: str) -> str:
         """Clean up location strings by removing icon text and formatting."""
@@ -877,6 +870,7 @@ class WebScraperManager:
     def scrape_website_advanced(self, scraper_id: int) -> Dict:
         """Enhanced scraping using advanced techniques for various website types"""
         start_time = time.time()
+        timer = StageTimer()
         
         try:
             # Get scraper details
@@ -897,37 +891,50 @@ class WebScraperManager:
                         'suggestions': connectivity['suggestions']
                     }
             
+            selector_config = json.loads(scraper['selector_config']) if scraper['selector_config'] else {}
+            original_config = json.dumps(selector_config, sort_keys=True)
+            
             # Use enhanced scraper if available (handles scrolling/pagination)
             if self.enhanced_scraper:
-                events = self.enhanced_scraper.extract_events(
-                    scraper['url'], 
-                    json.loads(scraper['selector_config']) if scraper['selector_config'] else {}
-                )
+                with deadline_scope(Deadline(SCRAPE_DEADLINE_SECONDS)), stage_scope(timer):
+                    events, detection = self.enhanced_scraper.extract_events_with_strategy(
+                        scraper['url'], selector_config, {
+                            'strategy': scraper['detected_strategy'],
+                            'signature': scraper['page_signature'],
+                            'yield': scraper['last_yield']
+                        }
+                    )
+                if detection:
+                    self._save_strategy_detection(scraper_id, detection)
                 method = 'enhanced'
             elif self.advanced_scraper:
-                events = self.advanced_scraper.extract_events(
-                    scraper['url'], 
-                    json.loads(scraper['selector_config']) if scraper['selector_config'] else {}
-                )
+                with stage_scope(timer), timed_stage('strategy.advanced'):
+                    events = self.advanced_scraper.extract_events(scraper['url'], selector_config)
                 method = 'advanced'
             else:
                 # Fallback to basic scraping
                 return self.scrape_website(scraper_id)
             
+            # Persist anything the scraper learned about the site (e.g. pagination scheme)
+            if json.dumps(selector_config, sort_keys=True) != original_config:
+                self.update_scraper(scraper_id, {'selector_config': selector_config})
+            
             # Process and save events
             events_added = 0
             events_updated = 0
             
-            for event in events:
-                result = self._process_scraped_event(scraper_id, event, scraper['category'])
-                if result['action'] == 'added':
-                    events_added += 1
-                elif result['action'] == 'updated':
-                    events_updated += 1
+            with stage_scope(timer), timed_stage('db_dedupe'):
+                for event in events:
+                    result = self._process_scraped_event(scraper_id, event, scraper['category'])
+                    if result['action'] == 'added':
+                        events_added += 1
+                    elif result['action'] == 'updated':
+                        events_updated += 1
             
             # Update scraper statistics
             response_time = int((time.time() - start_time) * 1000)
-            self._log_scraper_run(scraper_id, True, len(events), events_added, response_time)
+            stage_timings = timer.as_dict()
+            self._log_scraper_run(scraper_id, True, len(events), events_added, response_time, stage_timings)
             self._update_scraper_stats(scraper_id, len(events), events_added, True)
             
             return {
@@ -937,7 +944,8 @@ class WebScraperManager:
                 'events_added': events_added,
                 'events_updated': events_updated,
                 'response_time': response_time,
-                'method': method
+                'method': method,
+                'stage_timings': stage_timings
             }
             
         except Exception as e:
@@ -1,5 +1,11 @@
 -- Web Scrapers Database Schema
 -- This schema supports web scraping management with scheduling and history tracking
+--
+-- Columns added after the original schema are declared twice on purpose: here, so a
+-- new database is created complete and this file shows every column, and in
+-- web_scraper_manager.SCHEMA_MIGRATIONS, which adds them to existing databases
+-- (CREATE TABLE IF NOT EXISTS leaves those untouched). Add a new column to both;
+-- test_web_scraper_manager checks that they agree.
 
 -- Web scrapers table
 CREATE TABLE IF NOT EXISTS web_scrapers (
@@ -16,7 +22,15 @@ CREATE TABLE IF NOT EXISTS web_scrapers (
     consecutive_failures INTEGER DEFAULT 0,
     total_events INTEGER DEFAULT 0,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    detected_strategy TEXT, -- Scraping strategy reused while the page structure is unchanged
+    page_signature TEXT, -- Hash of the page's container-class histogram
+    last_yield INTEGER, -- Events found by the last run of detected_strategy
+    circuit_open_until DATETIME, -- Skipped by the scheduler until this time
+    content_hash TEXT, -- Fingerprint of the last run's extracted events
+    change_rate REAL, -- Smoothed share of runs that found changed content
+    yield_rate REAL, -- Smoothed new events added per run
+    current_interval INTEGER -- Adaptive minutes between runs (bounded by selector_config.schedule)
 );
 
 -- Web scraper logs table
@@ -30,6 +44,7 @@ CREATE TABLE IF NOT EXISTS web_scraper_logs (
     events_updated INTEGER DEFAULT 0,
     response_time_ms INTEGER,
     error_message TEXT,
+    stage_timings TEXT, -- JSON per-stage breakdown in ms (http, parse, strategies, date parsing, db)
     FOREIGN KEY (scraper_id) REFERENCES web_scrapers (id)
 );
 
@@ -43,6 +58,8 @@ CREATE TABLE IF NOT EXISTS web_scraper_events (
     scraped_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
     is_active BOOLEAN DEFAULT 1, -- False if event no longer found on source
+    item_key TEXT, -- Stable identity of the item on its source (title + date)
+    content_hash TEXT, -- Hash of the item's scraped fields, to skip unchanged items
     FOREIGN KEY (scraper_id) REFERENCES web_scrapers (id),
     FOREIGN KEY (event_id) REFERENCES events (id)
 );
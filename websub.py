@@ -0,0 +1,428 @@
+"""
+WebSub (PubSubHubbub) subscriptions for RSS/Atom feeds
+Feeds that advertise a hub (rel="hub" in the feed or its Link header) are
+subscribed to once polling has seen them. The hub verifies the subscription
+against our callback, then POSTs new feed content there; signed payloads are
+checked against the subscription's secret and handed to the normal RSS ingest
+path. Subscriptions are renewed before their lease runs out, and feeds with a
+live subscription are still polled, just rarely, in case pushes go missing.
+
+Pushes need a publicly reachable callback, set with WEBSUB_CALLBACK_URL
+(e.g. https://calendar.example.org); without it hubs are recorded but no
+subscriptions are made.
+"""
+
+import os
+import hmac
+import json
+import sqlite3
+import hashlib
+import logging
+import secrets
+import threading
+import feedparser
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+from requests.utils import parse_header_links
+from http_client import create_session
+from feed_fetcher import FeedFetchResult
+
+logger = logging.getLogger(__name__)
+
+# Public base URL hubs deliver to; callbacks live under /websub/callback/<token>
+CALLBACK_BASE_URL = os.getenv('WEBSUB_CALLBACK_URL', '')
+
+# Callback path, shared with the Flask routes
+CALLBACK_PATH = '/websub/callback/'
+
+# Lease we ask hubs for (seconds); hubs may grant a different one
+REQUESTED_LEASE_SECONDS = 7 * 24 * 3600
+
+# Renew subscriptions this long before their lease expires
+RENEW_BEFORE = timedelta(hours=12)
+
+# Re-send a subscription request the hub never verified after this long
+PENDING_RETRY_AFTER = timedelta(hours=1)
+
+# Feeds with a live subscription are still polled this often, in case pushes are lost
+PUSH_FALLBACK_POLL_INTERVAL = timedelta(hours=6)
+
+# Largest pushed payload accepted (bytes)
+MAX_PUSH_BYTES = 5 * 1024 * 1024
+
+# Pushed bodies are read in chunks of this size so oversized ones are cut off early
+PUSH_READ_CHUNK_BYTES = 64 * 1024
+
+# Signature algorithms hubs may use in X-Hub-Signature
+SIGNATURE_ALGORITHMS = {
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'sha384': hashlib.sha384,
+    'sha512': hashlib.sha512
+}
+
+def discover_hub(parsed, link_header: str = '', feed_url: str = '') -> Optional[Tuple[str, str]]:
+    """(hub, topic) advertised by a feed, or None; the Link header wins over links in the body"""
+    hub = topic = None
+
+    for link in parse_header_links(link_header) if link_header else []:
+        rels = link.get('rel', '').split()
+        if 'hub' in rels and not hub:
+            hub = link.get('url')
+        if 'self' in rels and not topic:
+            topic = link.get('url')
+
+    feed_links = (parsed.feed.get('links') or []) if parsed is not None else []
+    for link in feed_links:
+        if link.get('rel') == 'hub' and not hub:
+            hub = link.get('href')
+        elif link.get('rel') == 'self' and not topic:
+            topic = link.get('href')
+
+    if not hub:
+        return None
+    return hub, topic or feed_url
+
+def verify_signature(secret: str, body: bytes, header: str) -> bool:
+    """Check an X-Hub-Signature header ("<algorithm>=<hex digest>") against the body"""
+    algorithm, _, digest = (header or '').partition('=')
+    hash_function = SIGNATURE_ALGORITHMS.get(algorithm.strip().lower())
+    if not hash_function or not digest:
+        return False
+    expected = hmac.new(secret.encode('utf-8'), body, hash_function).hexdigest()
+    return hmac.compare_digest(expected, digest.strip().lower())
+
+def read_push_body(stream, limit: int = MAX_PUSH_BYTES) -> Optional[bytes]:
+    """Read a pushed body, or None once it runs past limit (chunked pushes send no Content-Length)"""
+    chunks = []
+    size = 0
+    while True:
+        chunk = stream.read(min(PUSH_READ_CHUNK_BYTES, limit + 1 - size))
+        if not chunk:
+            return b''.join(chunks)
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+
+class WebSubSubscriber:
+    """Subscription lifecycle and push handling, stored in websub_subscriptions"""
+
+    def __init__(self, db_path: str = 'calendar.db', callback_base_url: Optional[str] = None,
+                 session=None):
+        self.db_path = db_path
+        self.callback_base_url = (callback_base_url if callback_base_url is not None else CALLBACK_BASE_URL).rstrip('/')
+        self.session = session or create_session({
+            'User-Agent': 'Mozilla/5.0 (compatible; EventCalendar/1.0)'
+        })
+        self.init_table()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.callback_base_url)
+
+    def init_table(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        # state: pending (requested, not yet verified), active, denied, unsubscribing, unsubscribed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS websub_subscriptions (
+                feed_id INTEGER PRIMARY KEY,
+                hub_url TEXT NOT NULL,
+                topic_url TEXT NOT NULL,
+                token TEXT NOT NULL UNIQUE,
+                secret TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                lease_seconds INTEGER,
+                expires_at TEXT,
+                requested_at TEXT,
+                verified_at TEXT,
+                last_push_at TEXT,
+                last_polled_at TEXT,
+                push_count INTEGER DEFAULT 0,
+                last_error TEXT
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def callback_url(self, token: str) -> str:
+        return f"{self.callback_base_url}{CALLBACK_PATH}{token}"
+
+    # Subscription lifecycle
+
+    def consider(self, fetched: FeedFetchResult) -> Optional[str]:
+        """After a poll: subscribe if the feed advertises a hub we are not subscribed to.
+
+        Returns the new subscription state, or None if nothing was requested.
+        """
+        if fetched.error or fetched.parsed is None:
+            return None
+
+        feed_id = fetched.feed['id']
+        self.note_polled(feed_id)
+
+        advertised = discover_hub(fetched.parsed, fetched.link_header, fetched.feed.get('url', ''))
+        if not advertised or not self.enabled:
+            return None
+
+        hub, topic = advertised
+        current = self.get_subscription(feed_id)
+        if current and current['hub_url'] == hub and current['topic_url'] == topic:
+            if current['state'] in ('active', 'denied', 'unsubscribing'):
+                return None  # Renewal and denial are handled elsewhere
+            if current['state'] == 'pending' and not self._older_than(current['requested_at'], PENDING_RETRY_AFTER):
+                return None
+
+        return self.subscribe(feed_id, hub, topic)
+
+    def subscribe(self, feed_id: int, hub: str, topic: str) -> str:
+        """Ask the hub for a subscription; the hub confirms it by calling verify()"""
+        current = self.get_subscription(feed_id)
+        # Renewals keep the token and secret, so deliveries signed before the hub re-verifies still land
+        renewing = current and current['hub_url'] == hub and current['topic_url'] == topic
+        token = current['token'] if current else secrets.token_urlsafe(24)
+        secret = current['secret'] if renewing else secrets.token_hex(32)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT INTO websub_subscriptions (feed_id, hub_url, topic_url, token, secret, state, requested_at)
+            VALUES (?, ?, ?, ?, ?, 'pending', ?)
+            ON CONFLICT(feed_id) DO UPDATE SET
+                hub_url = excluded.hub_url, topic_url = excluded.topic_url, secret = excluded.secret,
+                state = CASE WHEN state = 'active' AND hub_url = excluded.hub_url
+                             AND topic_url = excluded.topic_url THEN 'active' ELSE 'pending' END,
+                requested_at = excluded.requested_at, last_error = NULL
+        ''', (feed_id, hub, topic, token, secret, datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+
+        error = self._send_request(hub, {
+            'hub.mode': 'subscribe',
+            'hub.topic': topic,
+            'hub.callback': self.callback_url(token),
+            'hub.secret': secret,
+            'hub.lease_seconds': str(REQUESTED_LEASE_SECONDS)
+        })
+        if error:
+            self._set_error(feed_id, error)
+            logger.warning(f"⚠️ WebSub subscribe to {hub} for feed {feed_id} failed: {error}")
+            return 'error'
+
+        logger.info(f"📡 Requested WebSub subscription for feed {feed_id} via {hub}")
+        return 'pending'
+
+    def unsubscribe(self, feed_id: int) -> bool:
+        """Ask the hub to stop pushing a feed (e.g. when it is deleted or disabled)"""
+        current = self.get_subscription(feed_id)
+        if not current or current['state'] in ('unsubscribing', 'unsubscribed'):
+            return False
+
+        self._set_state(feed_id, 'unsubscribing')
+        error = self._send_request(current['hub_url'], {
+            'hub.mode': 'unsubscribe',
+            'hub.topic': current['topic_url'],
+            'hub.callback': self.callback_url(current['token'])
+        })
+        if error:
+            self._set_error(feed_id, error)
+            return False
+        return True
+
+    def renew_expiring(self) -> int:
+        """Re-subscribe active subscriptions whose lease ends soon; returns how many were renewed"""
+        if not self.enabled:
+            return 0
+
+        cutoff = (datetime.now() + RENEW_BEFORE).isoformat()
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT feed_id, hub_url, topic_url FROM websub_subscriptions
+            WHERE state = 'active' AND expires_at IS NOT NULL AND expires_at <= ?
+        ''', (cutoff,)).fetchall()
+        conn.close()
+
+        for feed_id, hub, topic in rows:
+            self.subscribe(feed_id, hub, topic)
+        return len(rows)
+
+    def verify(self, token: str, params: Dict[str, str]) -> Optional[str]:
+        """Handle the hub's verification GET; returns the challenge to echo, or None to refuse"""
+        current = self._by_token(token)
+        mode = params.get('hub.mode', '')
+        if not current:
+            return None
+
+        if mode == 'denied':
+            self._set_state(current['feed_id'], 'denied', error=params.get('hub.reason') or 'denied by hub')
+            logger.warning(f"⚠️ WebSub hub denied subscription for feed {current['feed_id']}")
+            return None
+
+        if params.get('hub.topic') != current['topic_url'] or not params.get('hub.challenge'):
+            return None
+
+        if mode == 'subscribe' and current['state'] in ('pending', 'active'):
+            try:
+                lease = int(params.get('hub.lease_seconds') or REQUESTED_LEASE_SECONDS)
+            except ValueError:
+                lease = REQUESTED_LEASE_SECONDS
+            now = datetime.now()
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                UPDATE websub_subscriptions
+                SET state = 'active', lease_seconds = ?, expires_at = ?, verified_at = ?, last_error = NULL
+                WHERE feed_id = ?
+            ''', (lease, (now + timedelta(seconds=lease)).isoformat(), now.isoformat(), current['feed_id']))
+            conn.commit()
+            conn.close()
+            logger.info(f"✅ WebSub subscription active for feed {current['feed_id']} ({lease}s lease)")
+            return params['hub.challenge']
+
+        if mode == 'unsubscribe' and current['state'] == 'unsubscribing':
+            self._set_state(current['feed_id'], 'unsubscribed')
+            return params['hub.challenge']
+
+        # A verification we never asked for (or no longer want)
+        return None
+
+    # Content distribution
+
+    def receive(self, token: str, body: bytes, signature: str,
+                ingest: Callable[[FeedFetchResult], Dict]) -> Optional[Dict]:
+        """Handle a pushed payload; returns the ingest results, or None if the push was ignored.
+
+        Hubs expect a 2xx even for payloads we drop, so callers should only
+        answer 404 for unknown tokens (see is_known_token).
+        """
+        current = self._by_token(token)
+        if not current or current['state'] not in ('active', 'unsubscribing'):
+            return None
+
+        if not verify_signature(current['secret'], body, signature):
+            logger.warning(f"⚠️ Dropped WebSub push for feed {current['feed_id']}: bad or missing signature")
+            return None
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT id, name, url FROM rss_feeds WHERE id = ?', (current['feed_id'],)).fetchone()
+        conn.close()
+        if not row:
+            return None
+
+        fetched = FeedFetchResult(feed={'id': row[0], 'name': row[1], 'url': row[2]},
+                                  parsed=feedparser.parse(body))
+        results = ingest(fetched)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            UPDATE websub_subscriptions SET last_push_at = ?, push_count = push_count + 1
+            WHERE feed_id = ?
+        ''', (datetime.now().isoformat(), current['feed_id']))
+        conn.commit()
+        conn.close()
+
+        logger.info(f"📥 WebSub push for feed {current['feed_id']}: {json.dumps(results)}")
+        return results
+
+    def is_known_token(self, token: str) -> bool:
+        return self._by_token(token) is not None
+
+    # Polling fallback
+
+    def note_polled(self, feed_id: int):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE websub_subscriptions SET last_polled_at = ? WHERE feed_id = ?',
+                     (datetime.now().isoformat(), feed_id))
+        conn.commit()
+        conn.close()
+
+    def push_covered(self, feed_ids: Iterable[int]) -> Set[int]:
+        """Feeds with a live subscription that were polled recently enough to skip this round"""
+        now = datetime.now()
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT feed_id, expires_at, last_polled_at, last_push_at FROM websub_subscriptions
+            WHERE state = 'active'
+        ''').fetchall()
+        conn.close()
+
+        wanted = set(feed_ids)
+        covered = set()
+        for feed_id, expires_at, last_polled_at, last_push_at in rows:
+            if feed_id not in wanted or not expires_at or expires_at <= now.isoformat():
+                continue
+            last_seen = max(filter(None, [last_polled_at, last_push_at]), default=None)
+            if last_seen and not self._older_than(last_seen, PUSH_FALLBACK_POLL_INTERVAL):
+                covered.add(feed_id)
+        return covered
+
+    # Lookups
+
+    def get_subscription(self, feed_id: int) -> Optional[Dict]:
+        return self._fetch_one('SELECT * FROM websub_subscriptions WHERE feed_id = ?', (feed_id,))
+
+    def get_subscriptions(self):
+        """All subscriptions, without their secrets"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute('SELECT * FROM websub_subscriptions ORDER BY feed_id')]
+        conn.close()
+        for row in rows:
+            row.pop('secret', None)
+            row.pop('token', None)
+        return rows
+
+    def _by_token(self, token: str) -> Optional[Dict]:
+        return self._fetch_one('SELECT * FROM websub_subscriptions WHERE token = ?', (token,))
+
+    def _fetch_one(self, query: str, params: Tuple) -> Optional[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(query, params).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def _set_state(self, feed_id: int, state: str, error: Optional[str] = None):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE websub_subscriptions SET state = ?, last_error = ? WHERE feed_id = ?',
+                     (state, error, feed_id))
+        conn.commit()
+        conn.close()
+
+    def _set_error(self, feed_id: int, error: str):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE websub_subscriptions SET last_error = ? WHERE feed_id = ?', (error, feed_id))
+        conn.commit()
+        conn.close()
+
+    def _send_request(self, hub: str, form: Dict[str, str]) -> Optional[str]:
+        """POST a (un)subscription request; returns an error message or None when accepted"""
+        try:
+            response = self.session.post(hub, data=form, timeout=30)
+        except Exception as e:
+            return str(e)
+        # 202 Accepted (verified later) or 204 (verified before answering)
+        if response.status_code not in (202, 204):
+            return f"hub answered {response.status_code}: {response.text[:200]}"
+        return None
+
+    @staticmethod
+    def _older_than(timestamp: Optional[str], age: timedelta) -> bool:
+        if not timestamp:
+            return True
+        try:
+            return datetime.fromisoformat(timestamp) < datetime.now() - age
+        except ValueError:
+            return True
+
+_subscriber = None
+_subscriber_lock = threading.Lock()
+
+def get_websub_subscriber(db_path: str = 'calendar.db') -> WebSubSubscriber:
+    """Process-wide subscriber"""
+    global _subscriber
+    with _subscriber_lock:
+        if _subscriber is None:
+            _subscriber = WebSubSubscriber(db_path)
+        return _subscriber
@@ -0,0 +1,209 @@
+"""
+Local WebSub hub stand-in for tests
+Accepts subscribe/unsubscribe requests, verifies intent against the
+subscriber's callback, and distributes published content to verified
+callbacks with an HMAC X-Hub-Signature, like a real hub would. Publishing
+works either from code (LocalHub.publish) or by POSTing hub.mode=publish
+with hub.url, in which case the hub fetches the topic itself.
+
+    python websub_hub.py serve --port 8810
+    curl -d hub.mode=publish -d hub.url=http://127.0.0.1:8000/feed.xml http://127.0.0.1:8810/
+"""
+
+import hmac
+import time
+import hashlib
+import logging
+import argparse
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+from http_client import create_session
+
+logger = logging.getLogger(__name__)
+
+# Lease granted when the subscriber does not ask for one (seconds)
+DEFAULT_LEASE_SECONDS = 24 * 3600
+
+class LocalHub:
+    """Minimal in-memory WebSub hub on a local port"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, lease_seconds: Optional[int] = None,
+                 signature_algorithm: str = 'sha256', verify_synchronously: bool = False):
+        self.lease_seconds = lease_seconds
+        self.signature_algorithm = signature_algorithm
+        self.verify_synchronously = verify_synchronously
+        # (callback, topic) -> {'secret': ..., 'expires_at': ...}
+        self.subscriptions: Dict[tuple, Dict] = {}
+        self.log: List[Dict] = []
+        self.lock = threading.Lock()
+        self.session = create_session()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> 'LocalHub':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def subscribers(self, topic: str) -> List[str]:
+        now = time.time()
+        with self.lock:
+            return [callback for (callback, subscribed_topic), sub in self.subscriptions.items()
+                    if subscribed_topic == topic and sub['expires_at'] > now]
+
+    def publish(self, topic: str, content: bytes, content_type: str = 'application/rss+xml',
+                secret_override: Optional[str] = None) -> List[int]:
+        """Deliver content to every verified subscriber of topic; returns their status codes.
+
+        secret_override signs with a different secret, to test rejection of forged pushes.
+        """
+        statuses = []
+        for callback in self.subscribers(topic):
+            with self.lock:
+                secret = self.subscriptions[(callback, topic)]['secret']
+            headers = {
+                'Content-Type': content_type,
+                'Link': f'<{self.url}>; rel="hub", <{topic}>; rel="self"'
+            }
+            signing_secret = secret_override if secret_override is not None else secret
+            if signing_secret:
+                digest = hmac.new(signing_secret.encode('utf-8'), content,
+                                  getattr(hashlib, self.signature_algorithm)).hexdigest()
+                headers['X-Hub-Signature'] = f"{self.signature_algorithm}={digest}"
+            try:
+                response = self.session.post(callback, data=content, headers=headers, timeout=30)
+                statuses.append(response.status_code)
+            except Exception as e:
+                logger.warning(f"Delivery to {callback} failed: {e}")
+                statuses.append(0)
+            self._record('deliver', callback=callback, topic=topic, status=statuses[-1])
+        return statuses
+
+    def deny(self, callback: str, topic: str, reason: str = 'denied for testing') -> int:
+        """Tell a subscriber its subscription was refused"""
+        response = self.session.get(callback, params={'hub.mode': 'denied', 'hub.topic': topic,
+                                                      'hub.reason': reason}, timeout=30)
+        with self.lock:
+            self.subscriptions.pop((callback, topic), None)
+        return response.status_code
+
+    def _make_handler(self):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                form = {name: values[0] for name, values in
+                        parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+                status, message = hub._handle_request(form)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(message)))
+                self.end_headers()
+                self.wfile.write(message)
+
+            def log_message(self, format, *args):
+                pass  # Tests would drown in access logs
+
+        return Handler
+
+    def _handle_request(self, form: Dict[str, str]):
+        mode = form.get('hub.mode')
+
+        if mode == 'publish':
+            topic = form.get('hub.url') or form.get('hub.topic')
+            if not topic:
+                return 400, b'hub.url is required'
+            threading.Thread(target=self._fetch_and_publish, args=(topic,), daemon=True).start()
+            return 202, b''
+
+        if mode not in ('subscribe', 'unsubscribe'):
+            return 400, b'Unsupported hub.mode'
+        if not form.get('hub.callback') or not form.get('hub.topic'):
+            return 400, b'hub.callback and hub.topic are required'
+
+        self._record(mode, callback=form['hub.callback'], topic=form['hub.topic'])
+        if self.verify_synchronously:
+            verified = self._verify_intent(form)
+            return (204, b'') if verified else (409, b'Subscriber did not confirm')
+
+        threading.Thread(target=self._verify_intent, args=(form,), daemon=True).start()
+        return 202, b''
+
+    def _verify_intent(self, form: Dict[str, str]) -> bool:
+        """Confirm the request with the subscriber's callback, then apply it"""
+        mode, callback, topic = form['hub.mode'], form['hub.callback'], form['hub.topic']
+        challenge = secrets.token_urlsafe(16)
+        params = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': challenge}
+
+        lease = self.lease_seconds or int(form.get('hub.lease_seconds') or DEFAULT_LEASE_SECONDS)
+        if mode == 'subscribe':
+            params['hub.lease_seconds'] = str(lease)
+
+        try:
+            response = self.session.get(callback, params=params, timeout=30)
+            verified = response.status_code // 100 == 2 and response.text == challenge
+        except Exception as e:
+            logger.warning(f"Verification of {callback} failed: {e}")
+            verified = False
+
+        self._record('verify', callback=callback, topic=topic, mode=mode, verified=verified)
+        if not verified:
+            return False
+
+        with self.lock:
+            if mode == 'subscribe':
+                self.subscriptions[(callback, topic)] = {'secret': form.get('hub.secret', ''),
+                                                         'expires_at': time.time() + lease}
+            else:
+                self.subscriptions.pop((callback, topic), None)
+        return True
+
+    def _fetch_and_publish(self, topic: str):
+        try:
+            response = self.session.get(topic, timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Could not fetch published topic {topic}: {e}")
+            return
+        self.publish(topic, response.content, response.headers.get('Content-Type', 'application/rss+xml'))
+
+    def _record(self, action: str, **details):
+        with self.lock:
+            self.log.append(dict(details, action=action, at=time.time()))
+
+def main():
+    parser = argparse.ArgumentParser(description='Local WebSub hub for testing push subscriptions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help='Run the hub until interrupted')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8810)
+    serve.add_argument('--lease', type=int, default=None, help='Lease to grant (seconds)')
+    serve.add_argument('--algorithm', default='sha256', choices=['sha1', 'sha256', 'sha384', 'sha512'])
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    hub = LocalHub(args.host, args.port, lease_seconds=args.lease, signature_algorithm=args.algorithm)
+    print(f"📡 Local WebSub hub on {hub.url}")
+    try:
+        hub.server.serve_forever()
+    except KeyboardInterrupt:
+        hub.stop()
+
+if __name__ == '__main__':
+    main()